@@ -3,39 +3,81 @@ AI Analysis Service for Water Quality Data
 Handles comprehensive analysis including predictions, risk assessment, trends, and recommendations
 """
 
-import json
+import threading
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from prediction_service import PredictionService
 from risk_assessment_service import RiskAssessmentService
 from trend_analysis_service import TrendAnalysisService
+from analysis_cache import AnalysisCache, get_analysis_cache
+from upload_store import UploadStore, get_upload_store
+from report_store import DEFAULT_REPORTS_DIR, ReportStore
 
 class AIAnalysisService:
-    def __init__(self):
-        self.reports_dir = Path("saved_reports")
-        self.reports_dir.mkdir(exist_ok=True)
+    def __init__(self, cache: Optional[AnalysisCache] = None, upload_store: Optional[UploadStore] = None,
+                 report_store: Optional[ReportStore] = None):
+        self.reports_dir = Path(DEFAULT_REPORTS_DIR)
+        # Saved reports: SQLite index + compressed bodies (replaces one JSON file per report),
+        # opened on first use so constructing the service writes nothing
+        self._report_store = report_store
+        self._report_store_lock = threading.Lock()
         self.prediction_service = PredictionService()
         self.risk_service = RiskAssessmentService()
         self.trend_service = TrendAnalysisService()
+        # Parsed datasets and analysis components, keyed by dataset content
+        self.cache = cache if cache is not None else get_analysis_cache()
+        # Uploaded files parsed server-side, referenced by upload id
+        self.upload_store = upload_store if upload_store is not None else get_upload_store()
         
-    def analyze_file(self, file_data: Dict[str, Any], location: Optional[Dict] = None) -> Dict[str, Any]:
-        """Generate comprehensive analysis report"""
+    @property
+    def report_store(self) -> ReportStore:
+        if self._report_store is None:
+            with self._report_store_lock:
+                if self._report_store is None:
+                    store = ReportStore(str(self.reports_dir / "reports.db"))
+                    imported = store.import_legacy(str(self.reports_dir))
+                    if imported:
+                        print(f"📁 Imported {imported} saved reports into the report store")
+                    self._report_store = store
+        return self._report_store
+    
+    def analyze_file(
+        self,
+        file_data: Dict[str, Any],
+        location: Optional[Dict] = None,
+        progress: Optional[Callable[[float, str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate comprehensive analysis report
+        
+        Args:
+            file_data: Uploaded file data ('data' holds columns as lists)
+            location: Optional location metadata
+            progress: Optional callback progress(fraction, stage) run
+                before each analysis step
+        """
+        progress = progress or (lambda fraction, stage: None)
         
         report_id = str(uuid.uuid4())
         timestamp = datetime.now()
         
         # Extract parameters from file data
-        df = self._parse_file_data(file_data)
+        progress(0.0, 'parsing')
+        key, df = self.load_dataset(file_data)
         
-        # Generate analysis components
-        predictions = self._generate_predictions(df)
-        risk_assessment = self._generate_risk_assessment(df)
-        trend_analysis = self._generate_trend_analysis(df)
-        recommendations = self._generate_recommendations(df, risk_assessment)
+        # Generate analysis components (reused when this dataset was seen before)
+        progress(0.1, 'predictions')
+        predictions = self.cached_predictions(key, df)
+        progress(0.4, 'risk_assessment')
+        risk_assessment = self.cached_risk_assessment(key, df)
+        progress(0.6, 'trend_analysis')
+        trend_analysis = self.cached_trend_analysis(key, df)
+        progress(0.85, 'recommendations')
+        recommendations = self.cached_recommendations(key, df)
         
         # Build report
         report = {
@@ -70,6 +112,50 @@ class AIAnalysisService:
                 'Temperature': [25.3, 26.1, 25.8, 25.5, 25.9]
             })
     
+    def load_dataset(self, file_data: Dict[str, Any]) -> Tuple[str, pd.DataFrame]:
+        """
+        Parse file data and register it with the analysis cache
+        
+        file_data is either {'data': {column: values}} or a reference to a
+        stored upload, {'upload_id': ...}, as returned by /api/ai/upload.
+        
+        Returns:
+            (dataset key, DataFrame) - the key addresses every cached
+            component of this dataset
+        
+        Raises:
+            LookupError: If the upload id is unknown
+        """
+        upload_id = file_data.get('upload_id')
+        if upload_id:
+            return self.load_upload(upload_id)
+        return self.cache.dataset(self._parse_file_data(file_data))
+    
+    def load_upload(self, upload_id: str) -> Tuple[str, pd.DataFrame]:
+        """Stored upload as (dataset key, DataFrame), read from disk only on a cache miss"""
+        meta = self.upload_store.metadata(upload_id)
+        if meta is None:
+            raise LookupError(f"Unknown upload id: {upload_id}")
+        df = self.cache.frame(meta['datasetKey'])
+        if df is not None:
+            return meta['datasetKey'], df
+        return self.cache.dataset(self.upload_store.load(upload_id))
+    
+    def cached_predictions(self, key: str, df: pd.DataFrame) -> Dict[str, Any]:
+        return self.cache.get_or_compute(key, 'predictions', lambda: self._generate_predictions(df))
+    
+    def cached_risk_assessment(self, key: str, df: pd.DataFrame) -> Dict[str, Any]:
+        return self.cache.get_or_compute(key, 'risk_assessment', lambda: self._generate_risk_assessment(df))
+    
+    def cached_trend_analysis(self, key: str, df: pd.DataFrame) -> Dict[str, Any]:
+        return self.cache.get_or_compute(key, 'trend_analysis', lambda: self._generate_trend_analysis(df))
+    
+    def cached_recommendations(self, key: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        return self.cache.get_or_compute(
+            key, 'recommendations',
+            lambda: self._generate_recommendations(df, self.cached_risk_assessment(key, df))
+        )
+    
     def _generate_predictions(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Generate 2-month predictions for water quality parameters"""
         return self.prediction_service.generate_predictions(df)
@@ -226,51 +312,38 @@ class AIAnalysisService:
         return recommendations
     
     def save_report(self, report: Dict[str, Any]) -> str:
-        """Save report to file system"""
-        report_id = report['id']
-        file_path = self.reports_dir / f"{report_id}.json"
-        
-        with open(file_path, 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        return report_id
+        """Save report to the report store"""
+        return self.report_store.save(report)
     
-    def get_saved_reports(self) -> List[Dict[str, Any]]:
-        """Retrieve all saved reports"""
-        reports = []
+    def get_saved_reports(
+        self,
+        page: int = 1,
+        per_page: Optional[int] = 50,
+        summary_only: bool = False,
+        include_raw: bool = False,
+        **filters
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Retrieve a page of saved reports, newest first
         
-        for file_path in self.reports_dir.glob("*.json"):
-            try:
-                with open(file_path, 'r') as f:
-                    report = json.load(f)
-                    reports.append(report)
-            except Exception as e:
-                print(f"Error loading report {file_path}: {e}")
-                continue
+        Args:
+            page: 1-based page number
+            per_page: Reports per page (None: all matching reports)
+            summary_only: Index fields only (id, timestamp, file name,
+                location, risk) instead of report bodies
+            include_raw: Include each report's rawData (full bodies only)
+            **filters: risk_level, location, file_name, since, until
         
-        # Sort by timestamp, newest first
-        reports.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return reports
+        Returns:
+            (reports, total matching)
+        """
+        return self.report_store.list(page=page, per_page=per_page, full=not summary_only,
+                                      include_raw=include_raw, **filters)
     
     def get_report_by_id(self, report_id: str) -> Optional[Dict[str, Any]]:
         """Get specific report by ID"""
-        file_path = self.reports_dir / f"{report_id}.json"
-        
-        if not file_path.exists():
-            return None
-        
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading report: {e}")
-            return None
+        return self.report_store.get(report_id)
     
     def delete_report(self, report_id: str) -> bool:
         """Delete a report"""
-        file_path = self.reports_dir / f"{report_id}.json"
-        
-        if file_path.exists():
-            file_path.unlink()
-            return True
-        return False
+        return self.report_store.delete(report_id)
@@ -0,0 +1,557 @@
+"""
+Alert Engine - Phase 5
+Rule-table-driven water quality alerts with hysteresis and indexed lookups
+
+Features:
+- ALERT_RULES: one row per parameter and direction, with escalating
+  severity tiers (warning / high / critical)
+- Typed Alert objects (parameter, value, threshold, severity, first_seen,
+  last_seen) deduplicated per station and rule across ticks
+- Hysteresis: an alert is raised as soon as a tier threshold is crossed,
+  but only lowered or cleared once the value has been back inside the
+  threshold by a dead band for several consecutive ticks, so readings
+  jittering around a limit do not flap
+- All stations evaluated per tick with array operations; only the
+  (station, rule) cells that changed touch the severity, district and
+  parameter indexes
+- Listeners receive AlertEvents (raised, escalated, deescalated, cleared)
+"""
+
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+SEVERITIES = ['warning', 'high', 'critical']
+
+# Snake-case fields used by the Phase 6 real-time feeds -> live reading fields
+FIELD_ALIASES = {
+    'dissolved_oxygen': 'dissolvedOxygen',
+    'fecal_coliform': 'fecalColiform',
+    'total_coliform': 'totalColiform',
+}
+
+# Heavy metals are in µg/L, as generated by EnhancedLiveStationService
+ALERT_RULES = [
+    {'rule': 'ph_low', 'field': 'ph', 'label': 'Low pH', 'unit': '', 'direction': 'below',
+     'tiers': [('warning', 6.5), ('high', 6.0), ('critical', 5.0)]},
+    {'rule': 'ph_high', 'field': 'ph', 'label': 'High pH', 'unit': '', 'direction': 'above',
+     'tiers': [('warning', 8.5), ('high', 9.0), ('critical', 10.0)]},
+    {'rule': 'do_low', 'field': 'dissolvedOxygen', 'label': 'Low Dissolved Oxygen', 'unit': 'mg/L',
+     'direction': 'below', 'tiers': [('warning', 4.0), ('critical', 2.0)]},
+    {'rule': 'turbidity_high', 'field': 'turbidity', 'label': 'High Turbidity', 'unit': 'NTU',
+     'direction': 'above', 'tiers': [('warning', 10), ('critical', 50)]},
+    {'rule': 'tds_high', 'field': 'tds', 'label': 'High TDS', 'unit': 'mg/L', 'direction': 'above',
+     'tiers': [('warning', 500), ('high', 2000)]},
+    {'rule': 'nitrates_high', 'field': 'nitrates', 'label': 'High Nitrates', 'unit': 'mg/L',
+     'direction': 'above', 'tiers': [('high', 45)]},
+    {'rule': 'fluoride_high', 'field': 'fluoride', 'label': 'High Fluoride', 'unit': 'mg/L',
+     'direction': 'above', 'tiers': [('warning', 1.5)]},
+    {'rule': 'fluoride_low', 'field': 'fluoride', 'label': 'Low Fluoride', 'unit': 'mg/L',
+     'direction': 'below', 'tiers': [('warning', 0.6)]},
+    {'rule': 'iron_high', 'field': 'iron', 'label': 'High Iron', 'unit': 'mg/L', 'direction': 'above',
+     'tiers': [('warning', 1.0)]},
+    {'rule': 'arsenic_high', 'field': 'arsenic', 'label': 'Arsenic', 'unit': 'µg/L', 'direction': 'above',
+     'tiers': [('critical', 10)]},
+    {'rule': 'lead_high', 'field': 'lead', 'label': 'Lead', 'unit': 'µg/L', 'direction': 'above',
+     'tiers': [('critical', 10)]},
+    {'rule': 'chromium_high', 'field': 'chromium', 'label': 'High Chromium', 'unit': 'µg/L',
+     'direction': 'above', 'tiers': [('high', 50)]},
+    {'rule': 'cadmium_high', 'field': 'cadmium', 'label': 'Cadmium', 'unit': 'µg/L', 'direction': 'above',
+     'tiers': [('critical', 3)]},
+    {'rule': 'mercury_high', 'field': 'mercury', 'label': 'Mercury', 'unit': 'µg/L', 'direction': 'above',
+     'tiers': [('critical', 1)]},
+    {'rule': 'fecal_coliform_high', 'field': 'fecalColiform', 'label': 'High Fecal Coliform',
+     'unit': 'MPN/100ml', 'direction': 'above', 'tiers': [('warning', 100), ('high', 2500), ('critical', 10000)]},
+    {'rule': 'total_coliform_high', 'field': 'totalColiform', 'label': 'High Total Coliform',
+     'unit': 'MPN/100ml', 'direction': 'above', 'tiers': [('warning', 500)]},
+    {'rule': 'bod_high', 'field': 'bod', 'label': 'High BOD', 'unit': 'mg/L', 'direction': 'above',
+     'tiers': [('warning', 6.0), ('high', 10.0)]},
+    {'rule': 'cod_high', 'field': 'cod', 'label': 'High COD', 'unit': 'mg/L', 'direction': 'above',
+     'tiers': [('warning', 30)]},
+]
+
+DEFAULT_DEAD_BAND = 0.1
+DEFAULT_CLEAR_TICKS = 3
+
+
+@dataclass
+class Alert:
+    """One active (or just cleared) alert of a station"""
+    station_id: Any
+    rule: str
+    parameter: str
+    value: float
+    threshold: float
+    direction: str
+    severity: str
+    unit: str
+    message: str
+    first_seen: str
+    last_seen: str
+    district: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class AlertEvent:
+    """State change of an alert: raised, escalated, deescalated or cleared"""
+    kind: str
+    alert: Alert
+    previous_severity: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'kind': self.kind, 'previousSeverity': self.previous_severity, 'alert': self.alert.to_dict()}
+
+
+def _timestamp(seconds: float) -> Optional[str]:
+    return datetime.fromtimestamp(seconds).isoformat() if seconds else None
+
+
+class AlertEngine:
+    """Stateful, vectorized alert evaluation with incremental indexes"""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, dead_band: float = DEFAULT_DEAD_BAND,
+                 clear_ticks: int = DEFAULT_CLEAR_TICKS):
+        """
+        Args:
+            rules: Rule table (ALERT_RULES layout)
+            dead_band: Fraction of the threshold a value must be back
+                inside before its alert can be lowered or cleared
+            clear_ticks: Consecutive ticks in the dead band required to
+                lower or clear an alert
+        """
+        self.rules = list(rules or ALERT_RULES)
+        self.dead_band = dead_band
+        self.clear_ticks = clear_ticks
+        self._compile_rules()
+
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[List[AlertEvent]], None]] = []
+
+        # Station rows are assigned on first sight
+        self._ids: List[Any] = []
+        self._row: Dict[Any, int] = {}
+        self._station_info: Dict[Any, Dict[str, Any]] = {}
+        self._last_rows: Tuple[List[Any], np.ndarray] = ([], np.zeros(0, dtype=np.intp))
+
+        r = len(self.rules)
+        self._level = np.zeros((0, r), dtype=np.int8)      # 0 = no alert, else tier number
+        self._pending = np.zeros((0, r), dtype=np.int16)   # ticks spent in the release zone
+        self._value = np.full((0, r), np.nan)
+        self._first_seen = np.zeros((0, r))
+        self._last_seen = np.zeros((0, r))
+        self._counts = np.zeros(0, dtype=np.int32)         # active alerts per station
+
+        # Indexes of active (row, rule) cells
+        self._by_severity: Dict[str, Set[Tuple[int, int]]] = {s: set() for s in SEVERITIES}
+        self._by_district: Dict[str, Set[Tuple[int, int]]] = {}
+        self._by_parameter: Dict[str, Set[Tuple[int, int]]] = {}
+
+        self._version = 0
+        self._listing_cache: Dict[Tuple, Tuple[List[Any], int]] = {}
+        self.ticks_processed = 0
+        self.last_tick = None
+
+    def _compile_rules(self):
+        """Rule table as arrays; 'below' rules are negated so every check is '>'"""
+        tiers = max(len(rule['tiers']) for rule in self.rules)
+        self.fields = sorted(set(rule['field'] for rule in self.rules))
+        self.rule_fields = np.array([self.fields.index(rule['field']) for rule in self.rules])
+        self.sign = np.array([-1.0 if rule['direction'] == 'below' else 1.0 for rule in self.rules])
+
+        self.thresholds = np.full((len(self.rules), tiers), np.nan)
+        self.tier_severity = np.zeros((len(self.rules), tiers), dtype=np.int8)
+        for i, rule in enumerate(self.rules):
+            for t, (severity, threshold) in enumerate(rule['tiers']):
+                self.thresholds[i, t] = threshold
+                self.tier_severity[i, t] = SEVERITIES.index(severity)
+        self.signed_thresholds = self.thresholds * self.sign[:, None]
+        self.release_thresholds = self.signed_thresholds - np.abs(self.thresholds) * self.dead_band
+        self.rule_index = {rule['rule']: i for i, rule in enumerate(self.rules)}
+        self._field_getter = itemgetter(*self.fields)
+        self._aliases = {field: [k for k, v in FIELD_ALIASES.items() if v == field] for field in self.fields}
+
+    # ==================== STATIONS ====================
+
+    def register_stations(self, stations: Iterable[Dict[str, Any]], id_key: Callable[[Dict], Any] = None):
+        """
+        Station metadata used for district indexing and alert output
+
+        Args:
+            stations: Station dictionaries (need 'district', optionally 'name')
+            id_key: Station id getter (default: 'station_id', then 'id')
+        """
+        id_key = id_key or (lambda s: s.get('station_id', s.get('id')))
+        with self._lock:
+            for station in stations:
+                self._station_info[id_key(station)] = {
+                    'district': station.get('district') or station.get('location'),
+                    'name': station.get('name'),
+                }
+
+    def _rows(self, station_ids: List[Any]) -> np.ndarray:
+        """State rows of the stations, growing the arrays for new ones"""
+        if station_ids == self._last_rows[0]:
+            return self._last_rows[1]
+        new_ids = [sid for sid in station_ids if sid not in self._row]
+        if new_ids:
+            for sid in new_ids:
+                self._row[sid] = len(self._ids)
+                self._ids.append(sid)
+            grow, r = len(new_ids), len(self.rules)
+            self._level = np.concatenate([self._level, np.zeros((grow, r), dtype=np.int8)])
+            self._pending = np.concatenate([self._pending, np.zeros((grow, r), dtype=np.int16)])
+            self._value = np.concatenate([self._value, np.full((grow, r), np.nan)])
+            self._first_seen = np.concatenate([self._first_seen, np.zeros((grow, r))])
+            self._last_seen = np.concatenate([self._last_seen, np.zeros((grow, r))])
+            self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int32)])
+        rows = np.fromiter((self._row[sid] for sid in station_ids), dtype=np.intp, count=len(station_ids))
+        self._last_rows = (station_ids, rows)
+        return rows
+
+    def _district(self, row: int) -> str:
+        return (self._station_info.get(self._ids[row]) or {}).get('district') or 'Unknown'
+
+    # ==================== EVALUATION ====================
+
+    def _values(self, readings: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """(readings x rules) values, NaN where a field is missing or not numeric"""
+        readings = list(readings)
+        try:
+            # Live readings carry every field (None when not measured)
+            rows = list(map(self._field_getter, readings))
+        except KeyError:
+            rows = [[self._field(reading, field) for field in self.fields] for reading in readings]
+        try:
+            values = np.array(rows, dtype=float)
+        except (TypeError, ValueError):
+            values = np.array([[self._to_float(v) for v in row] for row in rows], dtype=float)
+        values = values.reshape(len(rows), len(self.fields))
+        return values[:, self.rule_fields]
+
+    def _field(self, reading: Dict[str, Any], field: str) -> Any:
+        value = reading.get(field)
+        if value is None:
+            value = next((reading[a] for a in self._aliases[field] if reading.get(a) is not None), None)
+        return value
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    def evaluate(self, reading: Dict[str, Any]) -> List[Alert]:
+        """
+        Stateless check of one reading (no hysteresis, no indexing)
+
+        Returns:
+            Alerts at the highest tier crossed by each rule
+        """
+        values = self._values([reading])[0]
+        signed = values * self.sign
+        with np.errstate(invalid='ignore'):
+            levels = (signed[:, None] > self.signed_thresholds).sum(axis=1)
+        now = datetime.now().isoformat()
+        return [self._make_alert(reading.get('station_id'), r, int(levels[r]), float(values[r]), now, now, None)
+                for r in np.flatnonzero(levels)]
+
+    def ingest(self, readings: Dict[Any, Dict[str, Any]], timestamp: Optional[str] = None) -> List[AlertEvent]:
+        """
+        Apply one tick of readings
+
+        Stations not in `readings` keep their state; so do rules whose field
+        is missing from a reading.
+
+        Args:
+            readings: station_id -> reading dictionary
+            timestamp: Tick time (ISO format)
+
+        Returns:
+            Events for every alert raised, escalated, deescalated or cleared
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        now = datetime.fromisoformat(timestamp).timestamp()
+        station_ids = list(readings)
+        values = self._values(readings.values())
+        signed = values * self.sign
+        valid = ~np.isnan(values)
+
+        with np.errstate(invalid='ignore'):
+            raw = (signed[:, :, None] > self.signed_thresholds).sum(axis=2).astype(np.int8)
+            held = (signed[:, :, None] > self.release_thresholds).sum(axis=2).astype(np.int8)
+
+        with self._lock:
+            rows = self._rows(station_ids)
+            current = self._level[rows]
+            pending = self._pending[rows]
+
+            # Raise or escalate at once; lower only after clear_ticks ticks
+            # below the release threshold of the current tier
+            candidate = np.maximum(raw, np.minimum(current, held))
+            lowering = valid & (candidate < current)
+            pending = np.where(lowering, pending + 1, 0)
+            settled = lowering & (pending >= self.clear_ticks)
+            level = np.where(settled, candidate, np.where(lowering | ~valid, current, candidate))
+            pending = np.where(settled, 0, pending)
+
+            changed = level != current
+            active = level > 0
+            self._level[rows] = level
+            self._pending[rows] = pending
+            self._value[rows] = np.where(valid, values, self._value[rows])
+            self._first_seen[rows] = np.where(active & (current == 0), now, self._first_seen[rows])
+            self._last_seen[rows] = np.where(active & valid, now, self._last_seen[rows])
+            self._counts[rows] = active.sum(axis=1)
+
+            events = []
+            for i, r in zip(*np.nonzero(changed)):
+                events.append(self._apply_change(int(rows[i]), int(r), int(current[i, r]), int(level[i, r])))
+            if events:
+                self._version += 1
+                self._listing_cache.clear()
+            self.ticks_processed += 1
+            self.last_tick = timestamp
+
+        for listener in list(self._listeners):
+            try:
+                listener(events)
+            except Exception as e:
+                print(f"❌ Alert listener error: {str(e)}")
+        return events
+
+    def _apply_change(self, row: int, r: int, before: int, after: int) -> AlertEvent:
+        """Update the indexes for one changed cell and describe the change"""
+        key = (row, r)
+        district = self._district(row)
+        parameter = self.rules[r]['field']
+        if before:
+            self._by_severity[SEVERITIES[self.tier_severity[r, before - 1]]].discard(key)
+        if after:
+            self._by_severity[SEVERITIES[self.tier_severity[r, after - 1]]].add(key)
+            self._by_district.setdefault(district, set()).add(key)
+            self._by_parameter.setdefault(parameter, set()).add(key)
+        else:
+            self._by_district.get(district, set()).discard(key)
+            self._by_parameter.get(parameter, set()).discard(key)
+
+        alert = self._cell_alert(row, r, after or before)
+        previous = SEVERITIES[self.tier_severity[r, before - 1]] if before else None
+        if not before:
+            kind = 'raised'
+        elif not after:
+            kind = 'cleared'
+        else:
+            kind = 'escalated' if after > before else 'deescalated'
+        return AlertEvent(kind, alert, previous)
+
+    # ==================== ALERT OBJECTS ====================
+
+    def _make_alert(self, station_id: Any, r: int, tier: int, value: float, first_seen: Optional[str],
+                    last_seen: Optional[str], district: Optional[str]) -> Alert:
+        rule = self.rules[r]
+        threshold = float(self.thresholds[r, tier - 1])
+        severity = SEVERITIES[self.tier_severity[r, tier - 1]]
+        limit = 'min' if rule['direction'] == 'below' else 'max'
+        unit = f" {rule['unit']}" if rule['unit'] else ''
+        message = f"{rule['label']}: {round(value, 4):g}{unit} ({limit}: {threshold:g})"
+        if severity == 'critical':
+            message = f"⚠️ CRITICAL: {message}"
+        return Alert(
+            station_id=station_id, rule=rule['rule'], parameter=rule['field'], value=round(value, 4),
+            threshold=threshold, direction=rule['direction'], severity=severity, unit=rule['unit'],
+            message=message, first_seen=first_seen, last_seen=last_seen, district=district
+        )
+
+    def _cell_alert(self, row: int, r: int, tier: int) -> Alert:
+        return self._make_alert(self._ids[row], r, tier, float(self._value[row, r]),
+                                _timestamp(self._first_seen[row, r]), _timestamp(self._last_seen[row, r]),
+                                self._district(row))
+
+    # ==================== QUERIES ====================
+
+    def station_alerts(self, station_id: Any) -> List[Alert]:
+        """Active alerts of one station, most severe first"""
+        with self._lock:
+            row = self._row.get(station_id)
+            if row is None or not self._counts[row]:
+                return []
+            alerts = [self._cell_alert(row, int(r), int(self._level[row, r]))
+                      for r in np.flatnonzero(self._level[row])]
+        return sorted(alerts, key=lambda a: SEVERITIES.index(a.severity), reverse=True)
+
+    def messages(self, station_id: Any) -> List[str]:
+        """Active alert messages of one station (the reading 'alerts' field)"""
+        return [alert.message for alert in self.station_alerts(station_id)]
+
+    def alert_count(self, station_id: Any) -> int:
+        row = self._row.get(station_id)
+        return int(self._counts[row]) if row is not None else 0
+
+    def _cells(self, severity: Optional[str], district: Optional[str], parameter: Optional[str]) -> Optional[Set]:
+        """Active cells matching the filters (None = no filter given)"""
+        selected = None
+        for index, key in ((self._by_severity, severity and severity.lower()),
+                           (self._by_district, district),
+                           (self._by_parameter, parameter)):
+            if key is None:
+                continue
+            if index is self._by_district:
+                cells = set().union(*(v for k, v in index.items() if k.lower() == key.lower()))
+            else:
+                cells = index.get(key, set())
+            selected = cells if selected is None else selected & cells
+        return selected
+
+    def stations_with_alerts(self, severity: Optional[str] = None, district: Optional[str] = None,
+                             parameter: Optional[str] = None) -> Tuple[List[Any], int]:
+        """
+        Stations with matching active alerts, most alerts first
+
+        Args:
+            severity: Only stations with an alert of this severity
+            district: Only stations of this district
+            parameter: Only stations with an alert on this parameter
+
+        Returns:
+            (station ids, total active alerts of those stations); cached
+            until the next tick that changes an alert
+        """
+        cache_key = (severity, district, parameter)
+        with self._lock:
+            cached = self._listing_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            cells = self._cells(severity, district, parameter)
+            if cells is None:
+                rows = np.flatnonzero(self._counts > 0)
+            else:
+                rows = np.fromiter(sorted({row for row, _ in cells}), dtype=np.intp)
+            rows = rows[np.lexsort((rows, -self._counts[rows]))]
+            result = ([self._ids[row] for row in rows], int(self._counts[rows].sum()))
+            self._listing_cache[cache_key] = result
+            return result
+
+    def active_alerts(self, severity: Optional[str] = None, district: Optional[str] = None,
+                      parameter: Optional[str] = None, offset: int = 0,
+                      limit: Optional[int] = None) -> Tuple[List[Alert], int]:
+        """
+        Active alerts matching the filters, most severe first
+
+        Returns:
+            (alerts in [offset, offset + limit), total matching); only the
+            returned slice is turned into Alert objects
+        """
+        with self._lock:
+            cells = self._cells(severity, district, parameter)
+            if cells is None:
+                cells = zip(*np.nonzero(self._level))
+            cells = [(int(row), int(r)) for row, r in cells]
+            cells.sort(key=lambda c: (-self.tier_severity[c[1], self._level[c] - 1], str(self._ids[c[0]]), c[1]))
+            end = None if limit is None else offset + limit
+            alerts = [self._cell_alert(row, r, int(self._level[row, r])) for row, r in cells[offset:end]]
+        return alerts, len(cells)
+
+    def summary(self) -> Dict[str, Any]:
+        """Active alert counts by severity, parameter and district"""
+        with self._lock:
+            return {
+                'totalAlerts': int(self._counts.sum()),
+                'stationsWithAlerts': int((self._counts > 0).sum()),
+                'bySeverity': {s: len(cells) for s, cells in self._by_severity.items()},
+                'byParameter': {p: len(cells) for p, cells in sorted(self._by_parameter.items()) if cells},
+                'byDistrict': {d: len(cells) for d, cells in sorted(self._by_district.items()) if cells},
+                'ticksProcessed': self.ticks_processed,
+                'lastTick': self.last_tick,
+                'deadBand': self.dead_band,
+                'clearTicks': self.clear_ticks,
+            }
+
+    # ==================== LISTENERS ====================
+
+    def add_listener(self, listener: Callable[[List[AlertEvent]], None]):
+        """Register a callback run with the events of every ingest"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[AlertEvent]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_engine_instance = None
+
+
+def get_alert_engine() -> AlertEngine:
+    """Get the process-wide alert engine"""
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = AlertEngine()
+    return _engine_instance
+
+
+if __name__ == '__main__':
+    import time
+
+    print("=== Alert Engine - Phase 5 ===\n")
+
+    rng = np.random.default_rng(0)
+    stations = 4495
+    base = {
+        'ph': rng.uniform(6.6, 8.4, stations), 'turbidity': rng.uniform(2, 40, stations),
+        'tds': rng.uniform(200, 800, stations), 'nitrates': rng.uniform(2, 40, stations),
+        'fluoride': rng.uniform(0.3, 1.6, stations), 'iron': rng.uniform(0.05, 1.0, stations),
+        'arsenic': rng.uniform(0, 12, stations), 'lead': rng.uniform(0, 8, stations),
+        'chromium': rng.uniform(0, 25, stations), 'cadmium': rng.uniform(0, 3, stations),
+        'fecalColiform': rng.uniform(10, 800, stations), 'totalColiform': rng.uniform(50, 3000, stations),
+        'dissolvedOxygen': rng.uniform(3.5, 8.5, stations), 'bod': rng.uniform(1, 12, stations),
+        'cod': rng.uniform(8, 60, stations), 'mercury': rng.uniform(0, 1.1, stations),
+    }
+    ids = [f'ST{i:04d}' for i in range(stations)]
+
+    def tick_readings():
+        # Same +-15% jitter as the live simulation
+        return {sid: {f: float(v[i] * rng.uniform(0.85, 1.15)) for f, v in base.items()}
+                for i, sid in enumerate(ids)}
+
+    def run(engine, ticks):
+        times, changes = [], []
+        for n, readings in enumerate(ticks):
+            start = time.perf_counter()
+            events = engine.ingest(readings, datetime(2025, 1, 1, n).isoformat())
+            times.append(time.perf_counter() - start)
+            changes.append(len(events))
+        return times, changes
+
+    ticks = [tick_readings() for _ in range(16)]
+    engine = AlertEngine()
+    engine.register_stations({'id': sid, 'district': f'District {i % 36}'} for i, sid in enumerate(ids))
+    times, changes = run(engine, ticks)
+    # No dead band and no clear delay = re-evaluating every reading each tick
+    _, flapping = run(AlertEngine(dead_band=0, clear_ticks=1), ticks)
+    print(f"Ingest {stations} stations: median {np.median(times) * 1000:.1f} ms per tick")
+    print(f"Alert changes per tick after warm-up: {np.mean(changes[8:]):.0f} with hysteresis vs "
+          f"{np.mean(flapping[8:]):.0f} without ({engine.summary()['totalAlerts']} active)")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        engine.stations_with_alerts(severity='critical', district='District 7')
+    cached = (time.perf_counter() - start) / 100
+    engine._listing_cache.clear()
+    start = time.perf_counter()
+    station_ids, total = engine.stations_with_alerts(severity='critical', district='District 7')
+    print(f"Critical alerts in District 7: {len(station_ids)} stations, {total} alerts | "
+          f"lookup {(time.perf_counter() - start) * 1000:.2f} ms cold, {cached * 1000:.3f} ms cached")
+    print(f"Summary: {engine.summary()['bySeverity']}")
+    print(f"{station_ids[0]}: {engine.messages(station_ids[0])[:3]}")
@@ -0,0 +1,318 @@
+"""
+Analysis Cache - Phase 5
+Content-addressed memoization of parsed datasets and AI analysis components
+
+Features:
+- Datasets are keyed by a SHA-256 of the parsed frame (column names, dtypes
+  and values), so the same data re-posted with a different file name or JSON
+  layout maps to the same key
+- The parsed frame and each component (predictions, risk assessment, trend
+  analysis, recommendations) are cached separately, so /api/ai/analyze and
+  the per-component endpoints share work
+- LRU eviction bounded by entry count and by estimated bytes
+- Optional on-disk persistence (pickle per entry, bounded by total size)
+  that survives restarts and is shared by worker processes
+- Hit/miss counters and compute time saved, per component
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Bump when an analysis service changes its output, so persisted entries
+# from an older version are not served
+CACHE_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024
+
+FRAME = 'frame'
+
+
+def dataset_key(df: pd.DataFrame) -> str:
+    """
+    Canonical content hash of a parsed dataset
+
+    Args:
+        df: Parsed DataFrame
+
+    Returns:
+        Hex SHA-256 over row count, column names, dtypes and values
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}:{len(df)}".encode())
+    for column in df.columns:
+        series = df[column]
+        digest.update(f"|{column}:{series.dtype}|".encode())
+        if series.dtype.kind in 'biufcmM':
+            digest.update(np.ascontiguousarray(series.to_numpy()).tobytes())
+        else:
+            digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a cached value, in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class AnalysisCache:
+    """Thread-safe LRU cache of datasets and analysis components"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 persist_dir: Optional[str] = None, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        """
+        Args:
+            max_entries: Maximum number of in-memory entries
+            max_bytes: Maximum estimated in-memory size
+            persist_dir: Directory for on-disk persistence (None = memory only)
+            max_disk_bytes: Maximum total size of persisted entries
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        # (dataset key, component) -> (value, size, compute seconds)
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[Any, int, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.evictions = 0
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    # ==================== LOOKUP ====================
+
+    def get(self, key: str, component: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached value (memory first, then disk)
+
+        Returns:
+            (found, value)
+        """
+        entry_key = (key, component)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                self._entries.move_to_end(entry_key)
+                self._count(component, 'hits', saved=entry[2])
+                return True, entry[0]
+
+        loaded = self._load(entry_key)
+        if loaded is not None:
+            value, compute_seconds = loaded
+            self._store(entry_key, value, compute_seconds)
+            with self._lock:
+                self._count(component, 'hits', saved=compute_seconds)
+                self._count(component, 'disk_hits')
+            return True, value
+
+        with self._lock:
+            self._count(component, 'misses')
+        return False, None
+
+    def put(self, key: str, component: str, value: Any, compute_seconds: float = 0.0):
+        """Cache a value in memory and, when enabled, on disk"""
+        entry_key = (key, component)
+        self._store(entry_key, value, compute_seconds)
+        self._save(entry_key, value, compute_seconds)
+
+    def get_or_compute(self, key: str, component: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached component for a dataset, computing it on a miss
+
+        Cached values are shared between callers and must be treated as
+        read-only.
+        """
+        found, value = self.get(key, component)
+        if found:
+            return value
+
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._count(component, 'compute_seconds', elapsed)
+        self.put(key, component, value, elapsed)
+        return value
+
+    def dataset(self, df: pd.DataFrame) -> Tuple[str, pd.DataFrame]:
+        """
+        Register a parsed dataset
+
+        Returns:
+            (dataset key, frame) - the frame already cached under that key
+            if there is one, so equal datasets share one instance
+        """
+        key = dataset_key(df)
+        found, cached = self.get(key, FRAME)
+        if found:
+            return key, cached
+        self.put(key, FRAME, df)
+        return key, df
+
+    def frame(self, key: str) -> Optional[pd.DataFrame]:
+        """Parsed dataset for a key returned by dataset(), if still cached"""
+        found, df = self.get(key, FRAME)
+        return df if found else None
+
+    # ==================== MEMORY ====================
+
+    def _store(self, entry_key: Tuple[str, str], value: Any, compute_seconds: float):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(entry_key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[entry_key] = (value, size, compute_seconds)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _count(self, component: str, field: str, amount: float = 1, saved: float = 0.0):
+        stats = self.stats.setdefault(component, {
+            'hits': 0, 'misses': 0, 'disk_hits': 0, 'compute_seconds': 0.0, 'saved_seconds': 0.0
+        })
+        stats[field] += amount
+        stats['saved_seconds'] += saved
+
+    # ==================== DISK ====================
+
+    def _path(self, entry_key: Tuple[str, str]) -> str:
+        key, component = entry_key
+        return os.path.join(self.persist_dir, f"{key}.{component}.pkl")
+
+    def _load(self, entry_key: Tuple[str, str]) -> Optional[Tuple[Any, float]]:
+        if not self.persist_dir:
+            return None
+        path = self._path(entry_key)
+        try:
+            with open(path, 'rb') as f:
+                value, compute_seconds = pickle.load(f)
+            os.utime(path)
+            return value, compute_seconds
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Discarding unreadable cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _save(self, entry_key: Tuple[str, str], value: Any, compute_seconds: float):
+        if not self.persist_dir:
+            return
+        path = self._path(entry_key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((value, compute_seconds), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not persist cache entry {path}: {e}")
+            return
+        self._trim_disk()
+
+    def _disk_files(self):
+        with os.scandir(self.persist_dir) as entries:
+            return [(e.stat().st_mtime, e.stat().st_size, e.path)
+                    for e in entries if e.name.endswith('.pkl')]
+
+    def _trim_disk(self):
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_disk_bytes:
+            return
+        # Least recently used first (reads refresh mtime)
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    # ==================== MANAGEMENT ====================
+
+    def clear(self, disk: bool = False):
+        """Drop all in-memory entries (and persisted ones when disk=True)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.persist_dir:
+            for _, _, path in self._disk_files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit rates and sizes for the API"""
+        with self._lock:
+            components = {}
+            for component, stats in self.stats.items():
+                lookups = stats['hits'] + stats['misses']
+                components[component] = {
+                    'hits': int(stats['hits']),
+                    'misses': int(stats['misses']),
+                    'diskHits': int(stats['disk_hits']),
+                    'hitRate': round(stats['hits'] / lookups, 4) if lookups else None,
+                    'computeSeconds': round(stats['compute_seconds'], 4),
+                    'savedSeconds': round(stats['saved_seconds'], 4),
+                }
+            hits = sum(s['hits'] for s in self.stats.values())
+            lookups = hits + sum(s['misses'] for s in self.stats.values())
+            metrics = {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'evictions': self.evictions,
+                'hitRate': round(hits / lookups, 4) if lookups else None,
+                'components': components,
+                'persistDir': self.persist_dir,
+            }
+        if self.persist_dir:
+            files = self._disk_files()
+            metrics['diskEntries'] = len(files)
+            metrics['diskBytes'] = sum(size for _, size, _ in files)
+        return metrics
+
+
+_cache_instance = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """
+    Get or create the process-wide analysis cache
+
+    Configured by ANALYSIS_CACHE_DIR (enables persistence) and
+    ANALYSIS_CACHE_MB (in-memory bound).
+    """
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = AnalysisCache(
+            max_bytes=int(os.environ.get('ANALYSIS_CACHE_MB', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+            persist_dir=os.environ.get('ANALYSIS_CACHE_DIR') or None
+        )
+    return _cache_instance
@@ -3,13 +3,18 @@ Government API Integration Layer - Phase 6
 Connects to CPCB, MPCB, CWC, and other official data sources
 """
 
+import asyncio
 import requests
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Awaitable, Callable
 import json
 from urllib.parse import urljoin
 
+import aiohttp
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -374,6 +379,486 @@ class GovernmentAPIIntegration:
         return overview
 
 
+# ============================================================================
+# ASYNC CLIENT LAYER
+# Shared pooled session, per-source TTL cache with stale-while-revalidate,
+# per-station fan-out and bulk endpoints for network-wide collection
+# ============================================================================
+
+# Update cadence per source (seconds): entries are fresh for `ttl`, then
+# served stale for up to `stale_ttl` while a background refresh runs
+SOURCE_CADENCE = {
+    'cpcb': {'ttl': 900, 'stale_ttl': 3600},     # NWMP real-time stations: 15 min
+    'mpcb': {'ttl': 3600, 'stale_ttl': 6 * 3600},
+    'cwc': {'ttl': 3600, 'stale_ttl': 3 * 3600},  # River gauge levels: hourly
+    'imd': {'ttl': 3 * 3600, 'stale_ttl': 6 * 3600},  # Synoptic weather: 3-hourly
+}
+
+IMD_GRID_DEG = 0.25  # IMD gridded products use a 0.25° grid
+CACHE_MAX_ENTRIES = 20_000  # Per source: every station plus IMD grid cells, with headroom
+
+
+class TTLCache:
+    """
+    Async TTL cache with stale-while-revalidate
+
+    - fresh entries are returned directly
+    - stale entries are returned immediately and refreshed in the background
+    - concurrent misses for the same key share a single fetch
+    - entries past stale_ttl are evicted on insert, and at most max_entries
+      are kept (oldest fetch first)
+    """
+    
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int = CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # Ordered by fetch time: put() moves a key to the end
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0, 'evictions': 0}
+    
+    def lookup(self, key) -> tuple:
+        """Return (value, state) where state is 'fresh', 'stale' or 'miss'"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, 'miss'
+        
+        value, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        if age <= self.ttl:
+            return value, 'fresh'
+        if age <= self.stale_ttl:
+            return value, 'stale'
+        del self._entries[key]
+        self.stats['evictions'] += 1
+        return None, 'miss'
+    
+    def put(self, key, value):
+        """Store a value (None results are not cached) and evict expired entries"""
+        if value is None:
+            return
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = (value, now)
+        while self._entries:
+            oldest_key, (_, fetched_at) = next(iter(self._entries.items()))
+            if now - fetched_at <= self.stale_ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_key]
+            self.stats['evictions'] += 1
+    
+    def is_refreshing(self, key) -> bool:
+        return key in self._inflight
+    
+    async def get_or_fetch(self, key, fetcher: Callable[[], Awaitable[Any]]):
+        """Get a value, fetching or revalidating it as needed"""
+        value, state = self.lookup(key)
+        
+        if state == 'fresh':
+            self.stats['hits'] += 1
+            return value
+        
+        if state == 'stale':
+            self.stats['stale_hits'] += 1
+            if key not in self._inflight:
+                self.stats['refreshes'] += 1
+                self._start_fetch(key, fetcher)
+            return value
+        
+        self.stats['misses'] += 1
+        future = self._inflight.get(key) or self._start_fetch(key, fetcher)
+        return await asyncio.shield(future)
+    
+    def _start_fetch(self, key, fetcher) -> asyncio.Future:
+        future = asyncio.ensure_future(fetcher())
+        self._inflight[key] = future
+        
+        def _done(f):
+            self._inflight.pop(key, None)
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                self.stats['errors'] += 1
+                logger.error(f"{self.name} cache refresh failed for {key}: {f.exception()}")
+                return
+            self.put(key, f.result())
+        
+        future.add_done_callback(_done)
+        return future
+    
+    def refresh_many(self, keys: List, fetch_chunk: Callable[[List], Awaitable[Dict]]) -> Dict[Any, asyncio.Future]:
+        """
+        Fetch several keys with one bulk call
+
+        Each key gets its own in-flight future (resolving to its value or
+        None), so single-key lookups issued meanwhile share the bulk fetch.
+        """
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        self._inflight.update(futures)
+        task = asyncio.ensure_future(fetch_chunk(list(keys)))
+        
+        def _done(t):
+            results = {}
+            if t.cancelled():
+                pass
+            elif t.exception() is not None:
+                self.stats['errors'] += 1
+                logger.error(f"{self.name} bulk refresh failed for {len(keys)} keys: {t.exception()}")
+            else:
+                results = t.result() or {}
+            for key, future in futures.items():
+                self._inflight.pop(key, None)
+                value = results.get(key)
+                self.put(key, value)
+                if not future.done():
+                    future.set_result(value)
+        
+        task.add_done_callback(_done)
+        return futures
+    
+    def get_stats(self) -> Dict:
+        lookups = self.stats['hits'] + self.stats['stale_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': round((self.stats['hits'] + self.stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        }
+
+
+class AsyncAPIClient:
+    """Base class for async agency clients sharing one pooled session"""
+    
+    SOURCE = ''
+    BASE_URL = ''
+    MOCK_CLIENT = None  # Blocking client whose mock data is reused
+    
+    def __init__(self, session_provider: Callable[[], 'aiohttp.ClientSession'],
+                 base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 mock: bool = False, bulk_size: int = 100):
+        self._session_provider = session_provider
+        self.base_url = (base_url or self.BASE_URL).rstrip('/') + '/'
+        self.api_key = api_key
+        self.mock = mock
+        # Sources without a configured endpoint make no requests
+        self.enabled = mock or bool(base_url)
+        self._mock_client = self.MOCK_CLIENT() if mock else None
+        self.bulk_size = bulk_size
+        cadence = SOURCE_CADENCE[self.SOURCE]
+        self.cache = TTLCache(self.SOURCE.upper(), cadence['ttl'], cadence['stale_ttl'])
+        self.request_count = 0
+    
+    async def _get_json(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Any]:
+        """GET a JSON document; returns None on any transport or HTTP error"""
+        if not self.enabled:
+            return None
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else None
+        self.request_count += 1
+        try:
+            session = self._session_provider()
+            async with session.get(urljoin(self.base_url, endpoint), params=params, headers=headers) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"{self.SOURCE.upper()} request failed ({endpoint}): {e}")
+            return None
+    
+    async def _bulk(self, keys: List[str],
+                    fetch_chunk: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Resolve many keys through the cache
+
+        Fresh and stale entries come from the cache (stale ones are refreshed
+        in background bulk chunks); misses are fetched now in bulk chunks.
+        """
+        results, missing, stale, pending = {}, [], [], {}
+        for key in dict.fromkeys(keys):
+            value, state = self.cache.lookup(key)
+            if state == 'fresh':
+                self.cache.stats['hits'] += 1
+                results[key] = value
+            elif state == 'stale':
+                self.cache.stats['stale_hits'] += 1
+                results[key] = value
+                if not self.cache.is_refreshing(key):
+                    stale.append(key)
+            else:
+                self.cache.stats['misses'] += 1
+                if self.cache.is_refreshing(key):
+                    pending[key] = self.cache._inflight[key]
+                else:
+                    missing.append(key)
+        
+        # Misses are fetched now, stale keys are revalidated in the background
+        for i in range(0, len(missing), self.bulk_size):
+            pending.update(self.cache.refresh_many(missing[i:i + self.bulk_size], fetch_chunk))
+        for i in range(0, len(stale), self.bulk_size):
+            self.cache.stats['refreshes'] += len(stale[i:i + self.bulk_size])
+            self.cache.refresh_many(stale[i:i + self.bulk_size], fetch_chunk)
+        
+        if pending:
+            values = await asyncio.gather(*(asyncio.shield(f) for f in pending.values()))
+            for key, value in zip(pending.keys(), values):
+                if value is not None:
+                    results[key] = value
+        
+        return results
+
+
+class AsyncCPCBClient(AsyncAPIClient):
+    """Async CPCB NWMP client with a bulk latest-readings endpoint"""
+    
+    SOURCE = 'cpcb'
+    BASE_URL = CPCBAPIClient.BASE_URL
+    MOCK_CLIENT = CPCBAPIClient
+    
+    async def _fetch_latest(self, station_id: str) -> Optional[Dict]:
+        if self.mock:
+            return self._mock_client._mock_latest_reading(station_id)
+        return await self._get_json(f"stations/{station_id}/latest")
+    
+    async def _fetch_latest_bulk(self, station_ids: List[str]) -> Dict[str, Dict]:
+        if self.mock:
+            return {sid: self._mock_client._mock_latest_reading(sid) for sid in station_ids}
+        payload = await self._get_json("stations/latest", params={'ids': ','.join(station_ids)})
+        readings = (payload or {}).get('readings', [])
+        return {str(r['station_id']): r for r in readings if 'station_id' in r}
+    
+    async def get_latest_reading(self, station_id: str) -> Optional[Dict]:
+        """Get most recent reading for a station"""
+        return await self.cache.get_or_fetch(station_id, lambda: self._fetch_latest(station_id))
+    
+    async def get_latest_readings(self, station_ids: List[str]) -> Dict[str, Dict]:
+        """Get most recent readings for many stations using bulk requests"""
+        return await self._bulk(station_ids, self._fetch_latest_bulk)
+
+
+class AsyncMPCBClient(AsyncAPIClient):
+    """Async MPCB client (district summaries)"""
+    
+    SOURCE = 'mpcb'
+    BASE_URL = MPCBAPIClient.BASE_URL
+    MOCK_CLIENT = MPCBAPIClient
+    
+    async def _fetch_district_summary(self, district: str) -> Optional[Dict]:
+        if self.mock:
+            return self._mock_client._mock_district_summary(district)
+        return await self._get_json(f"districts/{district}/summary")
+    
+    async def get_district_summary(self, district: str) -> Optional[Dict]:
+        """Get water quality summary for a district"""
+        return await self.cache.get_or_fetch(district, lambda: self._fetch_district_summary(district))
+
+
+class AsyncCWCClient(AsyncAPIClient):
+    """Async CWC client; levels are cached per river gauge"""
+    
+    SOURCE = 'cwc'
+    BASE_URL = CWCAPIClient.BASE_URL
+    MOCK_CLIENT = CWCAPIClient
+    
+    async def _fetch_level(self, gauge_id: str) -> Optional[Dict]:
+        if self.mock:
+            return self._mock_client._mock_water_level(gauge_id)
+        return await self._get_json(f"gauges/{gauge_id}/level")
+    
+    async def _fetch_level_bulk(self, gauge_ids: List[str]) -> Dict[str, Dict]:
+        if self.mock:
+            return {gid: self._mock_client._mock_water_level(gid) for gid in gauge_ids}
+        payload = await self._get_json("gauges/levels", params={'ids': ','.join(gauge_ids)})
+        levels = (payload or {}).get('levels', [])
+        return {str(l['station_id']): l for l in levels if 'station_id' in l}
+    
+    async def get_water_level(self, gauge_id: str) -> Optional[Dict]:
+        """Get real-time water level for a river gauge"""
+        return await self.cache.get_or_fetch(gauge_id, lambda: self._fetch_level(gauge_id))
+    
+    async def get_water_levels(self, gauge_ids: List[str]) -> Dict[str, Dict]:
+        """Get water levels for many gauges using bulk requests"""
+        return await self._bulk(gauge_ids, self._fetch_level_bulk)
+
+
+class AsyncIMDWeatherClient(AsyncAPIClient):
+    """Async IMD client; weather is cached per 0.25° grid cell"""
+    
+    SOURCE = 'imd'
+    BASE_URL = IMDWeatherClient.BASE_URL
+    MOCK_CLIENT = IMDWeatherClient
+    
+    @staticmethod
+    def grid_cell(lat: float, lon: float) -> tuple:
+        """Snap a coordinate to the centre of its IMD grid cell"""
+        def snap(v):
+            return round((int(v // IMD_GRID_DEG) + 0.5) * IMD_GRID_DEG, 3)
+        return snap(lat), snap(lon)
+    
+    async def _fetch_weather(self, cell: tuple) -> Optional[Dict]:
+        lat, lon = cell
+        if self.mock:
+            return self._mock_client._mock_weather_data(lat, lon)
+        return await self._get_json("weather/current", params={'lat': lat, 'lon': lon})
+    
+    async def get_current_weather(self, lat: float, lon: float) -> Optional[Dict]:
+        """Get current weather for the grid cell containing a location"""
+        cell = self.grid_cell(lat, lon)
+        return await self.cache.get_or_fetch(cell, lambda: self._fetch_weather(cell))
+
+
+class AsyncGovernmentAPIIntegration:
+    """
+    Async counterpart of GovernmentAPIIntegration
+
+    All clients share one pooled aiohttp session. Only sources with a
+    configured base URL are queried; the others return no data. mock=True
+    serves the blocking clients' mock data instead (tests and demos only).
+    """
+    
+    def __init__(self, base_urls: Optional[Dict[str, str]] = None,
+                 cpcb_key: Optional[str] = None, mpcb_key: Optional[str] = None,
+                 mock: bool = False, max_connections: int = 100,
+                 max_per_host: int = 20, timeout_seconds: float = 10.0,
+                 imd_concurrency: int = 20):
+        base_urls = base_urls or {}
+        self.mock = mock
+        
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout_seconds = timeout_seconds
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._imd_semaphore = asyncio.Semaphore(imd_concurrency)
+        
+        self.cpcb = AsyncCPCBClient(self._get_session, base_urls.get('cpcb'), cpcb_key, mock)
+        self.mpcb = AsyncMPCBClient(self._get_session, base_urls.get('mpcb'), mpcb_key, mock)
+        self.cwc = AsyncCWCClient(self._get_session, base_urls.get('cwc'), mock=mock)
+        self.imd = AsyncIMDWeatherClient(self._get_session, base_urls.get('imd'), mock=mock)
+        
+        if mock:
+            mode = 'mock'
+        elif self.enabled:
+            mode = 'live: ' + ', '.join(c.SOURCE.upper() for c in (self.cpcb, self.mpcb, self.cwc, self.imd) if c.enabled)
+        else:
+            mode = 'no sources configured'
+        logger.info(f"Async Government API Integration initialized ({mode})")
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether any source returns data"""
+        return any(c.enabled for c in (self.cpcb, self.mpcb, self.cwc, self.imd))
+    
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Shared pooled session (created lazily inside the running loop)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self.session
+    
+    async def start(self):
+        """Open the shared HTTP session"""
+        self._get_session()
+        logger.info("Async API session started")
+    
+    async def stop(self):
+        """Close the shared HTTP session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        logger.info("Async API session stopped")
+    
+    async def _weather(self, lat: float, lon: float) -> Optional[Dict]:
+        async with self._imd_semaphore:
+            return await self.imd.get_current_weather(lat, lon)
+    
+    @staticmethod
+    def _combine(station_id: str, cpcb_data: Optional[Dict], water_level: Optional[Dict],
+                 weather: Optional[Dict]) -> Dict:
+        """Combine source payloads into the GovernmentAPIIntegration format"""
+        data = {
+            'station_id': station_id,
+            'timestamp': datetime.now().isoformat(),
+            'sources': []
+        }
+        if cpcb_data:
+            data.update(cpcb_data)
+            data['station_id'] = station_id
+            data['sources'].append('CPCB')
+        if water_level:
+            data['water_level'] = water_level
+            data['sources'].append('CWC')
+        if weather:
+            data['weather'] = weather
+            data['sources'].append('IMD')
+        return data
+    
+    async def get_comprehensive_station_data(self, station_id: str, lat: float, lon: float,
+                                             gauge_id: Optional[str] = None) -> Dict:
+        """
+        Get comprehensive data from all sources for a station (concurrently)
+        
+        Args:
+            station_id: Station identifier
+            lat: Latitude
+            lon: Longitude
+            gauge_id: CWC river gauge serving the station (defaults to station_id)
+        """
+        cpcb_data, water_level, weather = await asyncio.gather(
+            self.cpcb.get_latest_reading(station_id),
+            self.cwc.get_water_level(gauge_id or station_id),
+            self._weather(lat, lon)
+        )
+        return self._combine(station_id, cpcb_data, water_level, weather)
+    
+    async def get_network_data(self, stations: List[Dict]) -> Dict[str, Dict]:
+        """
+        Get comprehensive data for a whole network
+        
+        Args:
+            stations: Dicts with 'id', 'lat', 'lon' and optional 'gauge_id'
+        
+        Returns:
+            Dictionary mapping station_id to combined data
+        """
+        station_ids = [str(s['id']) for s in stations]
+        gauges = {str(s['id']): str(s.get('gauge_id') or s['id']) for s in stations}
+        cells = {}
+        for s in stations:
+            cells.setdefault(self.imd.grid_cell(s['lat'], s['lon']), (s['lat'], s['lon']))
+        
+        cpcb_task = self.cpcb.get_latest_readings(station_ids)
+        cwc_task = self.cwc.get_water_levels(list(set(gauges.values())))
+        weather_tasks = [self._weather(lat, lon) for lat, lon in cells.values()]
+        
+        readings, levels, *weather = await asyncio.gather(cpcb_task, cwc_task, *weather_tasks)
+        weather_by_cell = dict(zip(cells.keys(), weather))
+        
+        network = {}
+        for s, station_id in zip(stations, station_ids):
+            network[station_id] = self._combine(
+                station_id,
+                readings.get(station_id),
+                levels.get(gauges[station_id]),
+                weather_by_cell.get(self.imd.grid_cell(s['lat'], s['lon']))
+            )
+        
+        logger.info(f"Fetched network data for {len(network)} stations "
+                    f"({len(set(gauges.values()))} gauges, {len(cells)} weather cells)")
+        return network
+    
+    def get_cache_stats(self) -> Dict:
+        """Cache and request statistics per source"""
+        return {
+            client.SOURCE: {**client.cache.get_stats(), 'requests': client.request_count}
+            for client in (self.cpcb, self.mpcb, self.cwc, self.imd)
+        }
+
+
 # Test runner
 if __name__ == '__main__':
     print("=== Government API Integration - Phase 6 ===\n")
@@ -411,3 +896,94 @@ if __name__ == '__main__':
         print(f"   Rainfall: {comp_data['weather']['rainfall_mm']} mm")
     
     print("\n✓ API Integration test complete")
+    
+    # Test async layer against local stand-in agency servers
+    print("\n5. Async Network Fetch (local stand-in servers):")
+    
+    async def test_async_layer(station_count: int = 500):
+        import random
+        from aiohttp import web
+        
+        hits = {'cpcb': 0, 'cwc': 0, 'imd': 0}
+        
+        async def cpcb_bulk(request):
+            hits['cpcb'] += 1
+            ids = request.query['ids'].split(',')
+            return web.json_response({'readings': [
+                {'station_id': sid, 'ph': round(random.uniform(7.0, 8.5), 2),
+                 'dissolved_oxygen': round(random.uniform(5.0, 8.0), 2)} for sid in ids]})
+        
+        async def cpcb_latest(request):
+            hits['cpcb'] += 1
+            return web.json_response({'station_id': request.match_info['sid'], 'ph': 7.4})
+        
+        async def cwc_bulk(request):
+            hits['cwc'] += 1
+            ids = request.query['ids'].split(',')
+            return web.json_response({'levels': [
+                {'station_id': gid, 'water_level_m': round(random.uniform(2.0, 8.0), 2)} for gid in ids]})
+        
+        async def cwc_level(request):
+            hits['cwc'] += 1
+            return web.json_response({'station_id': request.match_info['gid'], 'water_level_m': 4.2})
+        
+        async def imd_weather(request):
+            hits['imd'] += 1
+            await asyncio.sleep(0.01)  # Simulated upstream latency
+            return web.json_response({'temperature_c': 28.5, 'rainfall_mm': 3.2})
+        
+        app = web.Application()
+        app.router.add_get('/cpcb/stations/latest', cpcb_bulk)
+        app.router.add_get('/cpcb/stations/{sid}/latest', cpcb_latest)
+        app.router.add_get('/cwc/gauges/levels', cwc_bulk)
+        app.router.add_get('/cwc/gauges/{gid}/level', cwc_level)
+        app.router.add_get('/imd/weather/current', imd_weather)
+        
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        
+        integration = AsyncGovernmentAPIIntegration(base_urls={
+            'cpcb': f"{base}/cpcb/", 'cwc': f"{base}/cwc/", 'imd': f"{base}/imd/"
+        })
+        
+        # Stations spread over Maharashtra; every 4 stations share a gauge
+        stations = [
+            {'id': f"MH{i:04d}", 'lat': random.uniform(16.0, 21.5), 'lon': random.uniform(73.0, 80.5),
+             'gauge_id': f"G{i // 4:04d}"}
+            for i in range(station_count)
+        ]
+        
+        try:
+            start = time.perf_counter()
+            network = await integration.get_network_data(stations)
+            cold = time.perf_counter() - start
+            print(f"   Cold fetch: {len(network)} stations in {cold:.2f}s, upstream requests {hits}")
+            
+            start = time.perf_counter()
+            await integration.get_network_data(stations)
+            warm = time.perf_counter() - start
+            print(f"   Warm fetch: {len(network)} stations in {warm * 1000:.1f}ms, upstream requests {hits}")
+            
+            # Expire everything into the stale window: served instantly, refreshed in background
+            for client in (integration.cpcb, integration.cwc, integration.imd):
+                client.cache.ttl = 0
+            start = time.perf_counter()
+            await integration.get_network_data(stations)
+            stale = time.perf_counter() - start
+            await asyncio.sleep(0.5)
+            print(f"   Stale fetch: served in {stale * 1000:.1f}ms, background refresh -> {hits}")
+            
+            sample = network[stations[0]['id']]
+            print(f"   Sample {sample['station_id']}: sources {', '.join(sample['sources'])}")
+            print(f"   Cache stats: {integration.get_cache_stats()}")
+        finally:
+            await integration.stop()
+            await runner.cleanup()
+    
+    asyncio.run(test_async_layer())
+    
+    print("\n✓ Async API layer test complete")
@@ -1,14 +1,28 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from ai_analysis_service import AIAnalysisService
-from report_generator import ReportGenerator
+from report_generator import ReportGenerator, build_district_summaries, generate_district_reports
 # Updated import for enhanced station service
 from enhanced_live_station_service import get_station_service
+from enhanced_prediction_service import EnhancedPredictionService
+from model_registry import get_model_registry
+from streaming_trend_engine import get_trend_engine
+from network_risk_engine import get_risk_engine
+from disease_risk_engine import get_disease_risk_engine
+from streaming_anomaly_detector import get_anomaly_detector
+from sse_broker import SSEServer, get_event_broker
+from job_queue import get_job_queue
+from request_coalescer import SingleFlight, CoalesceTimeout
+from response_compression import CompressedBody, compress_response
+from station_query import StationFilter, get_query_engine
+from upload_store import SUPPORTED_EXTENSIONS
+from utils import convert_to_serializable
 import json
 import os
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import hashlib
+import functools
 import pandas as pd
 import numpy as np
 
@@ -20,7 +34,7 @@ CORS(app, resources={
         "origins": "*",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization", "Accept", "If-None-Match"],
-        "expose_headers": ["Content-Type", "ETag", "Cache-Control"],
+        "expose_headers": ["Content-Type", "ETag", "Cache-Control", "X-Dataset-Key"],
         "supports_credentials": False
     }
 })
@@ -34,6 +48,33 @@ ai_analysis = AIAnalysisService()
 report_generator = ReportGenerator()
 # Initialize enhanced station service with full Maharashtra network (PRODUCTION MODE)
 station_service = get_station_service(test_mode=False)
+# Phase 5 models are loaded once per process and shared by all requests
+model_registry = get_model_registry()
+ml_prediction_service = EnhancedPredictionService(model_registry=model_registry)
+# Trend statistics are updated incrementally on every station tick
+trend_engine = get_trend_engine(station_service)
+# Every live station is risk-scored and ranked on each tick
+risk_engine = get_risk_engine(station_service, ai_analysis.risk_service)
+# Disease risks and high-risk-day counters are updated on each tick
+disease_engine = get_disease_risk_engine(station_service)
+# Spikes and level shifts (EWMA / CUSUM) are detected on each tick
+anomaly_detector = get_anomaly_detector(station_service)
+# Tick deltas and alerts are streamed over SSE. Under Flask the stream is a
+# sidecar aiohttp server on SSE_PORT and /api/stream redirects to it;
+# SSE_PUBLIC_URL overrides the redirect target (e.g. the sidecar's path behind
+# a reverse proxy). With API_MODE=async it is served on the main app instead.
+event_broker = get_event_broker(station_service)
+event_stream = SSEServer(event_broker)
+SSE_PORT = int(os.environ.get('SSE_PORT', 8001))
+SSE_PUBLIC_URL = os.environ.get('SSE_PUBLIC_URL')
+# Station listings share one bitset-indexed query engine with cursor pagination
+query_engine = get_query_engine(station_service)
+# Long-running analysis and PDF generation can run as background jobs; the job
+# table and dispatcher start on first submit (or with the server in __main__),
+# so importing this module leaves no files or threads behind
+job_queue = get_job_queue()
+# Identical concurrent station list requests share one computation per tick
+request_coalescer = SingleFlight(version=lambda: station_service.tick_seq, sizeof=lambda r: len(r.body))
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
@@ -65,6 +106,78 @@ def set_cached_response(cache_key, data):
     """Cache response with timestamp"""
     response_cache[cache_key] = (data, datetime.now())
 
+def coalesce_per_tick(view):
+    """
+    Compute a GET view once per normalized request and tick
+    
+    Concurrent identical requests wait for the first one and share its
+    encoded response; successful responses (and their compressed
+    encodings) are reused until the next tick.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        
+        def compute():
+            response = app.make_response(view(*args, **kwargs))
+            return CompressedBody(response.get_data(), response.status_code, response.mimetype)
+        
+        try:
+            cached = request_coalescer.do(key, compute, retain=lambda r: r.status_code == 200)
+        except CoalesceTimeout as e:
+            return jsonify({'error': str(e)}), 504
+        return cached.make_response(app.response_class, request.headers.get('Accept-Encoding'))
+    
+    return wrapper
+
+@app.after_request
+def compress_api_response(response):
+    """Negotiated gzip/br/zstd for responses that were not served pre-compressed"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+def query_station_page(filters, order='catalog', restrict=None, default_per_page=50, max_per_page=200):
+    """
+    One page of a station listing, with the request's pagination arguments
+    
+    page / per_page select an offset page; cursor (the next_cursor of the
+    previous page) continues keyset pagination and takes precedence.
+    
+    Returns:
+        (station ids of the page, pagination block of the response)
+    
+    Raises:
+        ValueError: For an invalid cursor or filter
+    """
+    per_page = max(1, min(request.args.get('per_page', default_per_page, type=int), max_per_page))
+    cursor = request.args.get('cursor')
+    result = query_engine.query(filters, limit=per_page, cursor=cursor,
+                                page=None if cursor else request.args.get('page', 1, type=int),
+                                order=order, restrict=restrict)
+    total_count = result['total']
+    page = result['offset'] // per_page + 1
+    total_pages = (total_count + per_page - 1) // per_page
+    return result['stationIds'], {
+        'page': page,
+        'per_page': per_page,
+        'total_items': total_count,
+        'total_pages': total_pages,
+        'has_next': result['nextCursor'] is not None,
+        'has_prev': result['offset'] > 0,
+        'next_cursor': result['nextCursor'],
+        'seq': station_service.change_cursor(result['seq']),
+        'seq_changed': result['seqChanged']
+    }
+
+def station_with_reading(station_id):
+    """Listing item of a station and its current reading"""
+    return {
+        'station': query_engine.station_record(station_id),
+        'currentReading': station_service.get_station_data(station_id)
+    }
+
 def check_etag_match(data):
     """Check if client has cached version (ETag match)"""
     client_etag = request.headers.get('If-None-Match')
@@ -86,6 +199,8 @@ def status():
         'ai_service': 'active',
         'version': '2.1.0',  # Updated version with caching
         'cache_enabled': True,
+        'analysis_cache_hit_rate': ai_analysis.cache.metrics()['hitRate'],
+        'request_coalescing': request_coalescer.metrics(),
         'total_stations': len(station_service.get_all_stations())
     })
 
@@ -106,22 +221,62 @@ def ai_upload():
             return jsonify({'error': 'No file selected'}), 400
         
         filename = secure_filename(file.filename)
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            return jsonify({'error': f"Unsupported file type (supported: {', '.join(SUPPORTED_EXTENSIONS)})"}), 400
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
         
-        # Parse file data
-        file_data = _parse_uploaded_file(file_path)
-        file_data['file_name'] = filename
+        # Parse once into a typed dataset stored server-side; clients
+        # reference it by upload id instead of re-posting the data
+        upload = ai_analysis.upload_store.ingest(file_path, filename)
         
-        # Get record count
-        record_count = len(file_data.get('data', {}).get(list(file_data.get('data', {}).keys())[0], [])) if file_data.get('data') else 0
+        print(f"📥 Upload {upload['uploadId']}: {upload['rowCount']} rows, "
+              f"{upload['columnCount']} columns ({upload['parseSeconds']}s)")
         
-        return jsonify({
-            'file_data': file_data,
+        response = {
+            'upload_id': upload['uploadId'],
+            'file_data': {'upload_id': upload['uploadId'], 'file_name': filename},
             'file_name': filename,
-            'record_count': record_count,
+            'record_count': upload['rowCount'],
+            'schema': upload['schema'],
+            'summary': upload['summary'],
+            'deduplicated': upload['deduplicated'],
             'message': 'File uploaded successfully'
-        })
+        }
+        
+        # Legacy clients that still need the full column data
+        if request.args.get('include_data', 'false').lower() == 'true':
+            df = ai_analysis.upload_store.load(upload['uploadId'])
+            for column in df.select_dtypes(include='datetime').columns:
+                df[column] = df[column].dt.strftime('%Y-%m-%dT%H:%M:%S')
+            response['file_data']['data'] = convert_to_serializable(
+                {column: df[column].tolist() for column in df.columns}
+            )
+        
+        return jsonify(response)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Upload Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ai/uploads/<upload_id>', methods=['GET', 'DELETE', 'OPTIONS'])
+def ai_upload_detail(upload_id):
+    """Schema and summary of a stored upload, or remove it (DELETE)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        if request.method == 'DELETE':
+            if not ai_analysis.upload_store.delete(upload_id):
+                return jsonify({'error': f'Upload {upload_id} not found'}), 404
+            return jsonify({'success': True, 'upload_id': upload_id})
+        
+        upload = ai_analysis.upload_store.metadata(upload_id)
+        if upload is None:
+            return jsonify({'error': f'Upload {upload_id} not found'}), 404
+        return jsonify(upload)
         
     except Exception as e:
         print(f"❌ Upload Error: {str(e)}")
@@ -134,13 +289,18 @@ def ai_analyze():
         return '', 204
     
     try:
-        data = request.json
-        file_data = data.get('file_data')
+        data = request.get_json(silent=True) or {}
+        file_data = data.get('file_data') or ({'upload_id': data['upload_id']} if data.get('upload_id') else None)
         location = data.get('location')
         
         if not file_data:
             return jsonify({'error': 'No file data provided'}), 400
         
+        if data.get('async'):
+            job = job_queue.submit('ai_analysis', {'file_data': file_data, 'location': location})
+            print(f"📥 Analysis job queued: {job['id']}")
+            return jsonify(job), 202
+        
         print(f"📊 Generating comprehensive analysis...")
         
         # Generate full analysis report
@@ -150,10 +310,42 @@ def ai_analyze():
         
         return jsonify(report)
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"❌ Analysis Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _request_dataset(data):
+    """
+    Resolve the dataset of an AI request
+    
+    Accepts 'file_data', an 'upload_id' from /api/ai/upload, or the
+    'dataset_key' returned in the X-Dataset-Key header of an earlier AI
+    response (no need to re-post the data).
+    
+    Returns:
+        (dataset key, DataFrame), or None when none is usable
+    
+    Raises:
+        LookupError: If the upload id is unknown
+    """
+    dataset_key = data.get('dataset_key')
+    if dataset_key:
+        df = ai_analysis.cache.frame(dataset_key)
+        if df is not None:
+            return dataset_key, df
+    if data.get('upload_id'):
+        return ai_analysis.load_upload(data['upload_id'])
+    file_data = data.get('file_data')
+    if not file_data:
+        return None
+    return ai_analysis.load_dataset(file_data)
+
+def _with_dataset_key(response, dataset_key):
+    response.headers['X-Dataset-Key'] = dataset_key
+    return response
+
 @app.route('/api/ai/predictions', methods=['POST', 'OPTIONS'])
 def ai_predictions():
     """Get predictions for next 2 months"""
@@ -161,17 +353,19 @@ def ai_predictions():
         return '', 204
     
     try:
-        data = request.json
-        file_data = data.get('file_data')
+        data = request.get_json(silent=True) or {}
+        dataset = _request_dataset(data)
         
-        if not file_data:
+        if dataset is None:
             return jsonify({'error': 'No file data provided'}), 400
         
-        df = ai_analysis._parse_file_data(file_data)
-        predictions = ai_analysis._generate_predictions(df)
+        key, df = dataset
+        predictions = ai_analysis.cached_predictions(key, df)
         
-        return jsonify({'predictions': predictions})
+        return _with_dataset_key(jsonify({'predictions': predictions}), key)
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -182,17 +376,19 @@ def ai_risk_assessment():
         return '', 204
     
     try:
-        data = request.json
-        file_data = data.get('file_data')
+        data = request.get_json(silent=True) or {}
+        dataset = _request_dataset(data)
         
-        if not file_data:
+        if dataset is None:
             return jsonify({'error': 'No file data provided'}), 400
         
-        df = ai_analysis._parse_file_data(file_data)
-        risk_assessment = ai_analysis._generate_risk_assessment(df)
+        key, df = dataset
+        risk_assessment = ai_analysis.cached_risk_assessment(key, df)
         
-        return jsonify(risk_assessment)
+        return _with_dataset_key(jsonify(risk_assessment), key)
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -203,17 +399,19 @@ def ai_trend_analysis():
         return '', 204
     
     try:
-        data = request.json
-        file_data = data.get('file_data')
+        data = request.get_json(silent=True) or {}
+        dataset = _request_dataset(data)
         
-        if not file_data:
+        if dataset is None:
             return jsonify({'error': 'No file data provided'}), 400
         
-        df = ai_analysis._parse_file_data(file_data)
-        trend_analysis = ai_analysis._generate_trend_analysis(df)
+        key, df = dataset
+        trend_analysis = ai_analysis.cached_trend_analysis(key, df)
         
-        return jsonify(trend_analysis)
+        return _with_dataset_key(jsonify(trend_analysis), key)
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -224,19 +422,34 @@ def ai_recommendations():
         return '', 204
     
     try:
-        data = request.json
-        file_data = data.get('file_data')
+        data = request.get_json(silent=True) or {}
+        dataset = _request_dataset(data)
         
-        if not file_data:
+        if dataset is None:
             return jsonify({'error': 'No file data provided'}), 400
         
-        df = ai_analysis._parse_file_data(file_data)
-        risk_assessment = ai_analysis._generate_risk_assessment(df)
-        recommendations = ai_analysis._generate_recommendations(df, risk_assessment)
+        key, df = dataset
+        recommendations = ai_analysis.cached_recommendations(key, df)
         
-        return jsonify({'recommendations': recommendations})
+        return _with_dataset_key(jsonify({'recommendations': recommendations}), key)
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ai/cache', methods=['GET', 'DELETE', 'OPTIONS'])
+def ai_cache():
+    """Analysis cache metrics (hit rates per component), or clear it (DELETE)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        if request.method == 'DELETE':
+            ai_analysis.cache.clear(disk=request.args.get('disk', 'false').lower() == 'true')
+        return jsonify(ai_analysis.cache.metrics())
     except Exception as e:
+        print(f"❌ Analysis Cache Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/ai/save-report', methods=['POST', 'OPTIONS'])
@@ -263,13 +476,64 @@ def save_report():
 
 @app.route('/api/ai/reports', methods=['GET', 'OPTIONS'])
 def get_reports():
-    """Get all saved reports"""
+    """
+    Get saved reports, newest first, with pagination and filtering
+    
+    Without page or per_page every matching report is returned in full
+    (including rawData), as before pagination was added; pass either to get
+    pages without rawData and a pagination block.
+    
+    Query Parameters:
+        page (int): Page number (default: 1)
+        per_page (int): Items per page (default: 50, max: 500)
+        risk_level (str): Filter by overall risk level
+        location (str): Filter by location name
+        file_name (str): Search in file names
+        since / until (str): ISO timestamp range
+        fields (str): 'summary' for index fields only (no report bodies)
+    """
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        reports = ai_analysis.get_saved_reports()
-        return jsonify({'reports': reports})
+        filters = {
+            'risk_level': request.args.get('risk_level', None),
+            'location': request.args.get('location', None),
+            'file_name': request.args.get('file_name', None),
+            'since': request.args.get('since', None),
+            'until': request.args.get('until', None)
+        }
+        summary_only = request.args.get('fields') == 'summary'
+        
+        if 'page' not in request.args and 'per_page' not in request.args:
+            reports, _ = ai_analysis.get_saved_reports(
+                per_page=None, summary_only=summary_only, include_raw=True, **filters
+            )
+            return jsonify({'reports': reports, 'filters': filters, 'count': len(reports)})
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        reports, total_count = ai_analysis.get_saved_reports(
+            page=page,
+            per_page=per_page,
+            summary_only=summary_only,
+            **filters
+        )
+        total_pages = (total_count + per_page - 1) // per_page
+        
+        return jsonify({
+            'reports': reports,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total_items': total_count,
+                'total_pages': total_pages,
+                'has_next': page < total_pages,
+                'has_prev': page > 1
+            },
+            'filters': filters,
+            'count': len(reports)
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -296,44 +560,6 @@ def manage_report(report_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def _parse_uploaded_file(file_path):
-    """Parse uploaded file into structured data"""
-    try:
-        import csv
-        
-        data = {}
-        with open(file_path, 'r') as f:
-            # Try CSV first
-            if file_path.endswith('.csv'):
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                
-                if rows:
-                    # Convert to column-based format
-                    for key in rows[0].keys():
-                        data[key] = []
-                    
-                    for row in rows:
-                        for key, value in row.items():
-                            try:
-                                data[key].append(float(value))
-                            except:
-                                data[key].append(value)
-        
-        return {'data': data}
-        
-    except Exception as e:
-        print(f"Error parsing file: {e}")
-        # Return sample data for demo
-        return {
-            'data': {
-                'pH': [7.2, 7.5, 7.1, 7.3, 7.4],
-                'DO': [6.5, 6.8, 6.2, 6.7, 6.6],
-                'BOD': [2.1, 2.3, 2.5, 2.2, 2.4],
-                'Temperature': [25.3, 26.1, 25.8, 25.5, 25.9]
-            }
-        }
-
 @app.route('/api/reports/generate', methods=['POST', 'OPTIONS'])
 def generate_report():
     """Generate comprehensive PDF report"""
@@ -348,6 +574,14 @@ def generate_report():
         if not analysis_data:
             return jsonify({'error': 'No analysis data provided'}), 400
         
+        if data.get('async'):
+            job = job_queue.submit('pdf_report', {
+                'analysis_data': analysis_data,
+                'reports_folder': app.config['REPORTS_FOLDER']
+            })
+            print(f"📥 Report job queued: {job['id']}")
+            return jsonify(job), 202
+        
         print(f"📄 Generating {report_type} report...")
         
         # Generate filename
@@ -376,6 +610,62 @@ def generate_report():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/reports/districts', methods=['POST', 'OPTIONS'])
+def generate_district_report_bundles():
+    """
+    Generate per-district report bundles (PDF + JSON summary, zipped) from live station data
+    
+    Body (optional):
+        districts (list): Only these districts (default: all)
+        async (bool): Run as a background job and return 202
+        workers (int): Render processes for a synchronous batch (1 to CPU count)
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        summaries = build_district_summaries(station_service.get_all_stations(), station_service.current_readings)
+        if data.get('districts'):
+            wanted = {d.lower() for d in data['districts']}
+            summaries = {name: s for name, s in summaries.items() if name.lower() in wanted}
+        if not summaries:
+            return jsonify({'error': 'No matching districts'}), 404
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_dir = os.path.join(app.config['REPORTS_FOLDER'], f"district_reports_{timestamp}")
+        
+        if data.get('async'):
+            job = job_queue.submit('district_reports', {'summaries': summaries, 'output_dir': output_dir})
+            print(f"📥 District reports job queued: {job['id']} ({len(summaries)} districts)")
+            return jsonify(job), 202
+        
+        workers = data.get('workers')
+        if workers is not None:
+            try:
+                workers = int(workers)
+            except (TypeError, ValueError):
+                raise ValueError('workers must be an integer')
+            # One render process per CPU at most
+            workers = max(1, min(workers, os.cpu_count() or 1))
+        
+        print(f"📄 Generating {len(summaries)} district report bundles...")
+        manifest = generate_district_reports(summaries, output_dir, workers=workers)
+        print(f"✅ District reports: {manifest['count']} in {manifest['seconds']}s")
+        
+        return jsonify({
+            'success': True,
+            **manifest,
+            'download_url': f"/api/reports/download/{manifest['bundle']}"
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ District Report Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/reports/download/<filename>', methods=['GET'])
 def download_report(filename):
     """Download generated report"""
@@ -389,18 +679,61 @@ def download_report(filename):
             file_path,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/pdf'
+            mimetype='application/zip' if filename.endswith('.zip') else 'application/pdf'
         )
         
     except Exception as e:
         print(f"❌ Download Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# ============================================
+# BACKGROUND JOB ENDPOINTS
+# ============================================
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE', 'OPTIONS'])
+def job_detail(job_id):
+    """
+    Get status, progress and result of a background job, or cancel it (DELETE)
+    
+    Completion is also pushed to WebSocket clients subscribed with
+    {"type": "subscribe_job", "job_id": ...}.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        if request.method == 'DELETE':
+            if not job_queue.cancel(job_id):
+                return jsonify({'error': f'Job {job_id} not found or already finished'}), 404
+        
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        
+        return jsonify(job)
+        
+    except Exception as e:
+        print(f"❌ Job Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET', 'OPTIONS'])
+def jobs_status():
+    """Get job queue status (workers, queue depth, counts by status)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify(job_queue.status())
+    except Exception as e:
+        print(f"❌ Job Queue Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 # ============================================
 # LIVE WATER STATION MONITORING ENDPOINTS
 # ============================================
 
 @app.route('/api/stations', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_all_stations():
     """
     Get list of all monitoring stations with pagination and filtering
@@ -408,77 +741,40 @@ def get_all_stations():
     Query Parameters:
         page (int): Page number (default: 1)
         per_page (int): Items per page (default: 50, max: 200)
+        cursor (str): next_cursor of the previous page (keyset pagination)
         district (str): Filter by district name
         type (str): Filter by station type (surface_water/groundwater)
         region (str): Filter by region
+        status (str): Filter by current status
+        water_class (str): Filter by current CPCB class (A-E, unfit)
+        has_alerts (bool): Only stations with (or without) active alerts
         search (str): Search in station names
+    
+    Filters combine with AND; comma-separated values of one filter are ORed.
     """
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)  # Max 200 per page
-        
-        # Get filter parameters
-        district_filter = request.args.get('district', None)
-        type_filter = request.args.get('type', None)
-        region_filter = request.args.get('region', None)
-        search_query = request.args.get('search', None)
-        
-        # Get all stations
-        all_stations = station_service.get_all_stations()
-        
-        # Apply filters
-        filtered_stations = all_stations
-        
-        if district_filter:
-            filtered_stations = [s for s in filtered_stations 
-                               if s.get('district', '').lower() == district_filter.lower()]
-        
-        if type_filter:
-            filtered_stations = [s for s in filtered_stations 
-                               if type_filter.lower() in s.get('type', '').lower()]
-        
-        if region_filter:
-            filtered_stations = [s for s in filtered_stations 
-                               if s.get('region', '').lower() == region_filter.lower()]
-        
-        if search_query:
-            search_lower = search_query.lower()
-            filtered_stations = [s for s in filtered_stations 
-                               if search_lower in s.get('name', '').lower() or 
-                                  search_lower in s.get('id', '').lower()]
-        
-        # Calculate pagination
-        total_count = len(filtered_stations)
-        total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated results
-        paginated_stations = filtered_stations[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args))
         
         return jsonify({
             'success': True,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'district': district_filter,
-                'type': type_filter,
-                'region': region_filter,
-                'search': search_query
+                'district': request.args.get('district'),
+                'type': request.args.get('type'),
+                'region': request.args.get('region'),
+                'status': request.args.get('status'),
+                'water_class': request.args.get('water_class'),
+                'has_alerts': request.args.get('has_alerts'),
+                'search': request.args.get('search')
             },
-            'count': len(paginated_stations),
-            'stations': paginated_stations
+            'count': len(station_ids),
+            'stations': [query_engine.station_metadata(sid) for sid in station_ids]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -491,7 +787,7 @@ def get_station_by_id(station_id):
     
     try:
         # Get station info
-        station = next((s for s in station_service.get_all_stations() if s['id'] == station_id), None)
+        station = query_engine.station_metadata(station_id)
         if not station:
             return jsonify({'error': 'Station not found'}), 404
         
@@ -508,6 +804,7 @@ def get_station_by_id(station_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/data/all', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_all_station_data():
     """
     Get current data for all stations with pagination
@@ -515,59 +812,32 @@ def get_all_station_data():
     Query Parameters:
         page (int): Page number (default: 1)
         per_page (int): Items per page (default: 50, max: 200)
+        cursor (str): next_cursor of the previous page (keyset pagination)
         district (str): Filter by district
         type (str): Filter by type
+        (and the other /api/stations filters)
     """
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
-        district_filter = request.args.get('district', None)
-        type_filter = request.args.get('type', None)
-        
-        # Get all data
-        all_data = station_service.get_all_station_data()
-        
-        # Apply filters if needed
-        if district_filter or type_filter:
-            all_stations = station_service.get_all_stations()
-            filtered_data = []
-            for data_item in all_data:
-                station_id = data_item.get('station_id') or data_item.get('stationId')
-                station = next((s for s in all_stations if s.get('id') == station_id), None)
-                if station:
-                    if district_filter and station.get('district', '').lower() != district_filter.lower():
-                        continue
-                    if type_filter and type_filter.lower() not in station.get('type', '').lower():
-                        continue
-                    filtered_data.append(data_item)
-            all_data = filtered_data
+        # Read before the data so a client resuming from it sees no gap
+        seq = station_service.change_cursor()
         
-        # Calculate pagination
-        total_count = len(all_data)
-        total_pages = (total_count + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        paginated_data = all_data[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args))
+        readings = (station_service.get_station_data(sid) for sid in station_ids)
+        paginated_data = [reading for reading in readings if reading is not None]
         
         return jsonify({
             'success': True,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'count': len(paginated_data),
             'data': paginated_data,
+            'seq': seq,
             'timestamp': datetime.now().isoformat()
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -592,118 +862,66 @@ def get_station_data(station_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/district/<district>', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_by_district(district):
-    """Get all stations in a specific district with pagination"""
+    """
+    Get all stations in a specific district with pagination
+    
+    Each item carries the station and its current reading (include_data is
+    accepted for compatibility). Takes the /api/stations filters and cursor.
+    """
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)  # Max 200 items per page
         include_data = request.args.get('include_data', 'false').lower() == 'true'
-        station_type = request.args.get('type', None, type=str)
-        
-        # Get all stations for this district
-        all_stations = station_service.get_stations_by_district(district)
-        
-        # Apply type filter if provided
-        if station_type:
-            all_stations = [s for s in all_stations if s.get('type') == station_type]
-        
-        # Calculate pagination
-        total_count = len(all_stations)
-        total_pages = (total_count + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = all_stations[start_idx:end_idx]
-        
-        # Optionally include current data
-        stations_response = []
-        if include_data:
-            for station in paginated_stations:
-                data = station_service.get_station_data(station.get('station_id') or station.get('id'))
-                stations_response.append({
-                    'station': station,
-                    'current_data': data
-                })
-        else:
-            stations_response = paginated_stations
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args, district=district))
         
         return jsonify({
             'success': True,
             'district': district,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'type': station_type,
+                'type': request.args.get('type'),
                 'include_data': include_data
             },
-            'count': len(stations_response),
-            'stations': stations_response
+            'count': len(station_ids),
+            'stations': [station_with_reading(sid) for sid in station_ids]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/status/<status>', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_by_status(status):
     """Get all stations with a specific water quality status with pagination"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
-        district = request.args.get('district', None, type=str)
-        
-        # Get all stations with this status
-        all_station_data = station_service.get_stations_by_status(status)
-        
-        # Apply district filter
-        if district:
-            all_station_data = [s for s in all_station_data if s.get('district') == district]
-        
-        # Calculate pagination
-        total_count = len(all_station_data)
-        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated data
-        paginated_data = all_station_data[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args, status=status))
         
         return jsonify({
             'success': True,
             'status': status,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'district': district
+                'district': request.args.get('district')
             },
-            'count': len(paginated_data),
-            'stations': paginated_data
+            'count': len(station_ids),
+            'stations': [station_with_reading(sid) for sid in station_ids]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/summary', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_summary_statistics():
     """Get summary statistics across all stations"""
     if request.method == 'OPTIONS':
@@ -780,146 +998,115 @@ def refresh_station_data():
 # ============================================
 
 @app.route('/api/stations/type/<station_type>', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_by_type(station_type):
     """Get stations by type (surface_water or groundwater) with pagination"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
-        district = request.args.get('district', None, type=str)
-        region = request.args.get('region', None, type=str)
-        
-        # Get all stations of this type
-        all_stations = station_service.get_stations_by_type(station_type)
-        
-        # Apply additional filters
-        if district:
-            all_stations = [s for s in all_stations if s.get('district') == district]
-        if region:
-            all_stations = [s for s in all_stations if s.get('region') == region]
-        
-        # Calculate pagination
-        total_count = len(all_stations)
-        total_pages = (total_count + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = all_stations[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args, type=station_type))
         
         return jsonify({
             'success': True,
             'type': station_type,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'district': district,
-                'region': region
+                'district': request.args.get('district'),
+                'region': request.args.get('region')
             },
-            'count': len(paginated_stations),
-            'stations': paginated_stations
+            'count': len(station_ids),
+            'stations': [station_with_reading(sid) for sid in station_ids]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/water-class/<water_class>', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_by_water_class(water_class):
     """Get stations by CPCB water quality class (A, B, C, D, E) with pagination"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
-        district = request.args.get('district', None, type=str)
-        station_type = request.args.get('type', None, type=str)
-        
-        # Get all stations of this water class
-        all_stations = station_service.get_stations_by_water_class(water_class)
-        
-        # Apply additional filters
-        if district:
-            all_stations = [s for s in all_stations if s.get('district') == district]
-        if station_type:
-            all_stations = [s for s in all_stations if s.get('type') == station_type]
-        
-        # Calculate pagination
-        total_count = len(all_stations)
-        total_pages = (total_count + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = all_stations[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args, water_class=water_class))
         
         return jsonify({
             'success': True,
             'waterClass': water_class,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'district': district,
-                'type': station_type
+                'district': request.args.get('district'),
+                'type': request.args.get('type')
             },
-            'count': len(paginated_stations),
-            'stations': paginated_stations
+            'count': len(station_ids),
+            'stations': [station_with_reading(sid) for sid in station_ids]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/alerts', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_with_alerts():
-    """Get all stations with active water quality alerts with pagination"""
+    """Get all stations with active water quality alerts with pagination (most alerts first)"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
         district = request.args.get('district', None, type=str)
-        severity = request.args.get('severity', None, type=str)  # critical, warning
-        
-        # Get all stations with alerts
-        all_stations = station_service.get_stations_with_alerts()
+        severity = request.args.get('severity', None, type=str)  # warning, high, critical
+        parameter = request.args.get('parameter', None, type=str)
+        
+        # Severity / parameter matches come from the alert engine's indexes
+        alert_station_ids, total_alerts = station_service.alert_engine.stations_with_alerts(severity, district, parameter)
+        station_ids, pagination = query_station_page(
+            StationFilter.from_args(request.args, district=None),
+            order='alerts',
+            restrict=(('alerts', severity, district, parameter), lambda: alert_station_ids)
+        )
         
-        # Apply additional filters
-        if district:
-            all_stations = [s for s in all_stations if s.get('district') == district]
-        if severity:
-            all_stations = [s for s in all_stations if any(
-                alert.get('severity') == severity for alert in s.get('alerts', [])
-            )]
+        # Only the page's stations are materialized
+        return jsonify({
+            'success': True,
+            'pagination': pagination,
+            'filters': {
+                'district': district,
+                'severity': severity,
+                'parameter': parameter
+            },
+            'count': len(station_ids),
+            'totalAlerts': total_alerts,
+            'stations': [station_service.get_station_alerts(sid) for sid in station_ids]
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts', methods=['GET', 'OPTIONS'])
+def get_active_alerts():
+    """Active alerts as typed objects, filtered by severity, district and parameter"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        severity = request.args.get('severity', None, type=str)
+        district = request.args.get('district', None, type=str)
+        parameter = request.args.get('parameter', None, type=str)
         
-        # Calculate pagination
-        total_count = len(all_stations)
+        alerts, total_count = station_service.alert_engine.active_alerts(
+            severity, district, parameter, offset=(page - 1) * per_page, limit=per_page
+        )
         total_pages = (total_count + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = all_stations[start_idx:end_idx]
-        
-        # Calculate total alerts
-        total_alerts = sum(s.get('alertCount', len(s.get('alerts', []))) for s in all_stations)
         
         return jsonify({
             'success': True,
@@ -932,15 +1119,29 @@ def get_stations_with_alerts():
                 'has_prev': page > 1
             },
             'filters': {
+                'severity': severity,
                 'district': district,
-                'severity': severity
+                'parameter': parameter
             },
-            'count': len(paginated_stations),
-            'totalAlerts': total_alerts,
-            'stations': paginated_stations
+            'alerts': [alert.to_dict() for alert in alerts]
         })
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
+        print(f"❌ Alerts Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts/summary', methods=['GET', 'OPTIONS'])
+def get_alert_summary():
+    """Active alert counts by severity, parameter and district"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify({
+            'success': True,
+            **station_service.alert_engine.summary()
+        })
+    except Exception as e:
+        print(f"❌ Alert Summary Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/<station_id>/history', methods=['GET', 'OPTIONS'])
@@ -1004,70 +1205,41 @@ def get_parameter_statistics(parameter):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/region/<region>', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_stations_by_region(region):
     """Get all stations in a specific region (Konkan, Pune, Vidarbha, etc.) with pagination"""
     if request.method == 'OPTIONS':
         return '', 204
     
-    try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 50, type=int), 200)
-        station_type = request.args.get('type', None, type=str)
+    try:
         include_data = request.args.get('include_data', 'false').lower() == 'true'
-        
-        # Get all stations in region
-        all_stations = station_service.get_all_stations()
-        matching_stations = [s for s in all_stations if s.get('region', '').lower() == region.lower()]
-        
-        # Apply type filter
-        if station_type:
-            matching_stations = [s for s in matching_stations if s.get('type') == station_type]
-        
-        # Calculate pagination
-        total_count = len(matching_stations)
-        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = matching_stations[start_idx:end_idx]
+        station_ids, pagination = query_station_page(StationFilter.from_args(request.args, region=region))
         
         # Optionally include current data
-        stations_response = []
         if include_data:
-            for station in paginated_stations:
-                station_details = station_service.get_station_by_id(
-                    station.get('station_id') or station.get('id')
-                )
-                if station_details:
-                    stations_response.append(station_details)
+            stations_response = [details for details in map(station_service.get_station_by_id, station_ids) if details]
         else:
-            stations_response = paginated_stations
+            stations_response = [query_engine.station_metadata(sid) for sid in station_ids]
         
         return jsonify({
             'success': True,
             'region': region,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'type': station_type,
+                'type': request.args.get('type'),
                 'include_data': include_data
             },
             'count': len(stations_response),
             'stations': stations_response
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/laboratories', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_laboratory_network():
     """Get list of all laboratories and stations they monitor"""
     if request.method == 'OPTIONS':
@@ -1105,56 +1277,41 @@ def get_laboratory_network():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stations/map-data', methods=['GET', 'OPTIONS'])
+@coalesce_per_tick
 def get_map_data():
     """Get all station locations for map visualization (optimized with pagination)"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 500, type=int), 5000)  # Support all 4,495 stations
-        district = request.args.get('district', None, type=str)
-        station_type = request.args.get('type', None, type=str)
-        minimal = request.args.get('minimal', 'false').lower() == 'true'
-        
-        all_stations = station_service.get_all_stations()
-        
-        # Apply filters
-        if district:
-            all_stations = [s for s in all_stations if s.get('district') == district]
-        if station_type:
-            all_stations = [s for s in all_stations if s.get('type') == station_type]
+        # Read before the data so a client resuming from it sees no gap
+        seq = station_service.change_cursor()
         
-        # Calculate pagination
-        total_count = len(all_stations)
-        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated stations
-        paginated_stations = all_stations[start_idx:end_idx]
+        minimal = request.args.get('minimal', 'false').lower() == 'true'
+        station_ids, pagination = query_station_page(
+            StationFilter.from_args(request.args), default_per_page=500, max_per_page=5000  # Support all 4,495 stations
+        )
         
         map_data = []
         if minimal:
             # Ultra-fast: GPS coordinates only
-            for station in paginated_stations:
+            for station_id in station_ids:
+                station = query_engine.station_metadata(station_id)
                 map_data.append({
-                    'id': station.get('station_id') or station.get('id'),
+                    'id': station_id,
                     'lat': station.get('latitude'),
                     'lon': station.get('longitude'),
                     'type': station.get('type')
                 })
         else:
             # Include basic status info
-            for station in paginated_stations:
-                station_details = station_service.get_station_by_id(
-                    station.get('station_id') or station.get('id')
-                )
-                if station_details and station_details.get('currentReading'):
-                    reading = station_details['currentReading']
+            for station_id in station_ids:
+                reading = station_service.get_station_data(station_id)
+                if reading:
+                    station = query_engine.station_metadata(station_id)
+                    alerts = reading.get('alerts', [])
                     map_data.append({
-                        'id': station.get('station_id') or station.get('id'),
+                        'id': station_id,
                         'name': station.get('name'),
                         'type': station.get('type'),
                         'latitude': station.get('latitude'),
@@ -1162,32 +1319,110 @@ def get_map_data():
                         'wqi': reading.get('wqi'),
                         'status': reading.get('status'),
                         'waterClass': reading.get('waterQualityClass'),
-                        'hasAlerts': len(reading.get('alerts', [])) > 0,
-                        'alertCount': len(reading.get('alerts', []))
+                        'hasAlerts': len(alerts) > 0,
+                        'alertCount': len(alerts)
                     })
         
         return jsonify({
             'success': True,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
+            'pagination': pagination,
             'filters': {
-                'district': district,
-                'type': station_type,
+                'district': request.args.get('district'),
+                'type': request.args.get('type'),
                 'minimal': minimal
             },
             'count': len(map_data),
-            'stations': map_data
+            'stations': map_data,
+            'seq': seq
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stations/changes', methods=['GET', 'OPTIONS'])
+def get_station_changes():
+    """
+    Stations whose status, class, WQI bucket or alerts changed since a tick
+    
+    Query Parameters:
+        since (str): Last seq cursor the client has (from map-data, data/all
+            or a previous changes call); omit to get the current seq
+        full (bool): Include each changed station's complete reading
+    
+    When resync is true the client's seq is older than the change log (or
+    from before a restart) and it should reload map-data / data/all.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        result = station_service.get_changes(
+            request.args.get('since', None),
+            full=request.args.get('full', 'false').lower() == 'true'
+        )
+        
+        return jsonify({
+            'success': True,
+            **result
+        })
+        
+    except Exception as e:
+        print(f"❌ Station Changes Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stream', methods=['GET', 'OPTIONS'])
+def stream_station_events():
+    """
+    Server-Sent Events of tick deltas and alerts
+    
+    Redirects to the event stream sidecar, which holds the connections on
+    one event loop instead of a Flask thread per client. The target is
+    SSE_PUBLIC_URL when set, otherwise this host on SSE_PORT.
+    
+    Query Parameters:
+        district (str): Comma-separated districts
+        type (str): Comma-separated station types
+        bbox (str): min_lon,min_lat,max_lon,max_lat
+        events (str): tick, alert or both (default)
+        last_event_id (int): Resume point when the Last-Event-ID header
+            cannot be set
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    query = request.query_string.decode()
+    if SSE_PUBLIC_URL:
+        location = SSE_PUBLIC_URL
+    elif event_stream.serving:
+        host = request.host.rsplit(':', 1)[0] if not request.host.endswith(']') else request.host
+        location = f"{request.scheme}://{host}:{SSE_PORT}/api/stream"
+    else:
+        return jsonify({'error': 'Event stream sidecar is not running; set SSE_PUBLIC_URL or start it on SSE_PORT'}), 503
+    if query:
+        location += ('&' if '?' in location else '?') + query
+    return '', 307, {'Location': location}
+
+@app.route('/api/stream/status', methods=['GET', 'OPTIONS'])
+def get_stream_status():
+    """Connections, replay buffer and delivery counters of the event stream"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify({
+            'success': True,
+            'serving': event_stream.serving,
+            'port': SSE_PORT,
+            'publicUrl': SSE_PUBLIC_URL,
+            **event_broker.status()
+        })
+        
+    except Exception as e:
+        print(f"❌ Stream Status Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stations/nearby', methods=['GET', 'OPTIONS'])
 def get_nearby_stations():
     """Get stations within a radius of user location (optimized for mobile/performance)"""
@@ -1388,12 +1623,8 @@ def station_prediction(station_id):
         # Convert to DataFrame
         df = pd.DataFrame(historical_data)
         
-        # Generate predictions using prediction service
-        from prediction_service import PredictionService
-        prediction_service = PredictionService()
-        prediction_service.prediction_days = min(prediction_days, 60)
-        
-        predictions = prediction_service.generate_predictions(df)
+        # Generate predictions using the shared prediction service
+        predictions = ai_analysis.prediction_service.generate_predictions(df)
         
         return jsonify({
             'success': True,
@@ -1407,31 +1638,222 @@ def station_prediction(station_id):
         print(f"❌ Prediction Error for {station_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/stations/<station_id>/ai/risk', methods=['POST', 'OPTIONS'])
-def station_risk(station_id):
-    """Get risk assessment for a specific station"""
+@app.route('/api/stations/ai/predictions/batch', methods=['POST', 'OPTIONS'])
+def station_predictions_batch():
+    """Forecast many stations' histories in one batched fit"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        data = request.json
-        historical_data = data.get('historical_data', [])
+        data = request.json or {}
+        stations = data.get('stations', {})
         
-        if not historical_data:
-            return jsonify({'error': 'No historical data provided'}), 400
+        if not stations:
+            return jsonify({'error': 'No station histories provided'}), 400
         
-        # Convert to DataFrame
-        df = pd.DataFrame(historical_data)
+        predictions = ai_analysis.prediction_service.generate_network_predictions(stations)
+        
+        return jsonify({
+            'success': True,
+            'station_count': len(predictions),
+            'predictions': predictions,
+            'analysis_date': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        print(f"❌ Batch Prediction Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stations/risk/top', methods=['GET', 'OPTIONS'])
+def top_risk_stations():
+    """Worst N stations of the latest network risk ranking"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        n = min(request.args.get('n', 10, type=int), 500)
+        level = request.args.get('level')
+        
+        result = risk_engine.top(n, level)
+        
+        return jsonify({
+            'success': True,
+            'count': len(result['stations']),
+            **result
+        })
+        
+    except Exception as e:
+        print(f"❌ Top Risk Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# ==================== DISEASE RISK ENDPOINTS ====================
+
+@app.route('/api/disease-risk/top', methods=['GET', 'OPTIONS'])
+def top_disease_risk_stations():
+    """Stations most at risk of one disease (or of an outbreak) in the latest tick"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        n = min(request.args.get('n', 10, type=int), 500)
+        result = disease_engine.top(request.args.get('disease'), n, request.args.get('district'))
+        
+        return jsonify({
+            'success': True,
+            'count': len(result['stations']),
+            **result
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Disease Risk Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/disease-risk/districts', methods=['GET', 'OPTIONS'])
+def disease_risk_districts():
+    """Districts ranked by high-risk days in the rolling window"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        result = disease_engine.districts(request.args.get('disease'), request.args.get('n', type=int))
+        
+        return jsonify({
+            'success': True,
+            'count': len(result['districts']),
+            **result
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Disease Risk Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/disease-risk/stations/<station_id>', methods=['GET', 'OPTIONS'])
+def station_disease_risk(station_id):
+    """Disease risks, high-risk days and network ranks of one live station"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        result = disease_engine.station(station_id)
+        if result is None:
+            return jsonify({'error': f'Station {station_id} not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'disease_risk': result
+        })
+        
+    except Exception as e:
+        print(f"❌ Disease Risk Error for {station_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/disease-risk/status', methods=['GET', 'OPTIONS'])
+def disease_risk_status():
+    """Disease risk engine counters"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify({
+            'success': True,
+            **disease_engine.status()
+        })
+        
+    except Exception as e:
+        print(f"❌ Disease Risk Status Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/anomalies', methods=['GET', 'OPTIONS'])
+def recent_anomalies():
+    """Most recent spikes and level shifts across the live network"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        events = anomaly_detector.events(
+            station_id=request.args.get('station_id'),
+            parameter=request.args.get('parameter'),
+            kind=request.args.get('kind'),
+            limit=request.args.get('limit', 100, type=int)
+        )
+        
+        return jsonify({
+            'success': True,
+            'count': len(events),
+            'anomalies': events
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Anomaly Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stations/<station_id>/anomalies', methods=['GET', 'OPTIONS'])
+def station_anomalies(station_id):
+    """EWMA baselines, CUSUM state and recent anomalies of one live station"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        result = anomaly_detector.station_state(station_id)
+        if result is None:
+            return jsonify({'error': f'Station {station_id} not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'anomalies': result
+        })
+        
+    except Exception as e:
+        print(f"❌ Anomaly Error for {station_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/anomalies/status', methods=['GET', 'OPTIONS'])
+def anomaly_status():
+    """Streaming anomaly detector counters"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify({
+            'success': True,
+            **anomaly_detector.status()
+        })
         
-        # Generate risk assessment using risk service
-        from risk_assessment_service import RiskAssessmentService
-        risk_service = RiskAssessmentService()
+    except Exception as e:
+        print(f"❌ Anomaly Status Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stations/<station_id>/ai/risk', methods=['GET', 'POST', 'OPTIONS'])
+def station_risk(station_id):
+    """Get risk assessment for a specific station"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        historical_data = data.get('historical_data', [])
         
-        risk_assessment = risk_service.assess_risks(df)
+        if historical_data:
+            # Client-supplied history is assessed as posted
+            risk_assessment = ai_analysis.risk_service.assess_risk(pd.DataFrame(historical_data))
+            source = 'historical_data'
+        else:
+            # Live stations are served from the latest network scoring
+            risk_assessment = risk_engine.station_assessment(station_id)
+            if risk_assessment is None:
+                return jsonify({'error': f'Station {station_id} not found'}), 404
+            source = 'live'
         
         return jsonify({
             'success': True,
             'station_id': station_id,
+            'source': source,
             'risk_assessment': risk_assessment,
             'analysis_date': datetime.now().isoformat()
         })
@@ -1440,31 +1862,31 @@ def station_risk(station_id):
         print(f"❌ Risk Assessment Error for {station_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/stations/<station_id>/ai/trends', methods=['POST', 'OPTIONS'])
+@app.route('/api/stations/<station_id>/ai/trends', methods=['GET', 'POST', 'OPTIONS'])
 def station_trends(station_id):
     """Get trend analysis for a specific station"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        data = request.json
+        data = request.get_json(silent=True) or {}
         historical_data = data.get('historical_data', [])
         
-        if not historical_data:
-            return jsonify({'error': 'No historical data provided'}), 400
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(historical_data)
-        
-        # Generate trend analysis using trend service
-        from trend_analysis_service import TrendAnalysisService
-        trend_service = TrendAnalysisService()
-        
-        trends = trend_service.analyze_trends(df)
+        if historical_data:
+            # Client-supplied history is analyzed as posted
+            trends = ai_analysis.trend_service.analyze_trends(pd.DataFrame(historical_data))
+            source = 'historical_data'
+        else:
+            # Live stations are served from the running trend statistics
+            trends = trend_engine.analyze_station(station_id)
+            if trends is None:
+                return jsonify({'error': f'Station {station_id} not found'}), 404
+            source = 'live'
         
         return jsonify({
             'success': True,
             'station_id': station_id,
+            'source': source,
             'trends': trends,
             'analysis_date': datetime.now().isoformat()
         })
@@ -1473,26 +1895,25 @@ def station_trends(station_id):
         print(f"❌ Trend Analysis Error for {station_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/stations/<station_id>/ai/recommendations', methods=['POST', 'OPTIONS'])
+@app.route('/api/stations/<station_id>/ai/recommendations', methods=['GET', 'POST', 'OPTIONS'])
 def station_recommendations(station_id):
     """Get AI recommendations for a specific station"""
     if request.method == 'OPTIONS':
         return '', 204
     
     try:
-        data = request.json
+        data = request.get_json(silent=True) or {}
         historical_data = data.get('historical_data', [])
         
-        if not historical_data:
-            return jsonify({'error': 'No historical data provided'}), 400
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(historical_data)
-        
         # Generate risk assessment first
-        from risk_assessment_service import RiskAssessmentService
-        risk_service = RiskAssessmentService()
-        risk_assessment = risk_service.assess_risks(df)
+        if historical_data:
+            df = pd.DataFrame(historical_data)
+            risk_assessment = ai_analysis.risk_service.assess_risk(df)
+        else:
+            risk_assessment = risk_engine.station_assessment(station_id)
+            if risk_assessment is None:
+                return jsonify({'error': f'Station {station_id} not found'}), 404
+            df = pd.DataFrame([station_service.current_readings.get(station_id, {})])
         
         # Generate recommendations based on risk assessment
         recommendations = ai_analysis._generate_recommendations(df, risk_assessment)
@@ -1544,10 +1965,7 @@ def ml_system_status():
         return '', 204
     
     try:
-        import os
-        from ml_models import WaterQualityMLModels
-        
-        models_dir = 'models'
+        models_dir = model_registry.model_dir
         status = {
             'models_directory_exists': os.path.exists(models_dir),
             'models_found': [],
@@ -1572,12 +1990,13 @@ def ml_system_status():
             if os.path.exists(data_file):
                 status['training_data_found'].append(data_file)
         
-        # Try to load models
+        # Models come from the shared registry (loaded once, then cached)
         try:
-            ml = WaterQualityMLModels()
-            status['models_loaded'] = ml.load_models()
-        except:
+            model_registry.get_models()
+            status['models_loaded'] = True
+        except Exception:
             status['models_loaded'] = False
+        status['registry'] = model_registry.status()
         
         # Overall status
         if status['models_loaded'] and len(status['models_found']) >= 6:
@@ -1602,6 +2021,41 @@ def ml_system_status():
             'error': str(e)
         }), 500
 
+@app.route('/api/ml/models', methods=['GET', 'OPTIONS'])
+def ml_model_registry_status():
+    """Model registry: versions, load time and memory per model"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        return jsonify({
+            'success': True,
+            'registry': model_registry.status(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ml/models/reload', methods=['POST', 'OPTIONS'])
+def reload_ml_models():
+    """Reload changed model files (force=true re-reads all of them)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        force = request.args.get('force', 'false').lower() == 'true'
+        reloaded = model_registry.reload(force=force)
+        return jsonify({
+            'success': True,
+            'reloaded': reloaded,
+            'model_set_version': model_registry.model_set_version(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/ml/training-data', methods=['GET', 'OPTIONS'])
 def get_training_data_info():
     """Get information about training data used for ML models"""
@@ -1680,8 +2134,6 @@ def test_ml_prediction():
         return '', 204
     
     try:
-        from enhanced_prediction_service import EnhancedPredictionService
-        
         data = request.json or {}
         
         # Use provided data or default test data
@@ -1698,24 +2150,26 @@ def test_ml_prediction():
         season = data.get('season', 'monsoon')
         horizons = data.get('horizons', [7, 30, 90])
         
-        # Generate predictions
-        service = EnhancedPredictionService()
-        forecast = service.generate_multi_parameter_forecast(test_data, season, horizons)
+        # Generate predictions (models come from the shared registry)
+        forecast = ml_prediction_service.generate_multi_parameter_forecast(test_data, season, horizons)
         
-        # Test determinism - run same prediction twice
-        forecast2 = service.generate_multi_parameter_forecast(test_data, season, horizons)
-        
-        # Compare predictions
+        # Test determinism - re-run only the model inference
         determinism_test = {
-            'passed': True,
+            'passed': 'forecasts' in forecast,
             'differences': {}
         }
+        rerun = {}
+        if 'forecasts' in forecast:
+            rerun = ml_prediction_service.ml_models.predict_multi_parameter(
+                test_data, days_ahead=horizons, season=season
+            )
         
+        model_keys = {'pH': 'ph', 'BOD': 'bod', 'DO': 'dissolved_oxygen'}
         for horizon in [str(h) for h in horizons]:
-            if horizon in forecast['forecasts'] and horizon in forecast2['forecasts']:
+            if horizon in forecast.get('forecasts', {}) and f'{horizon}_days' in rerun:
                 for param in ['pH', 'BOD', 'DO']:
                     val1 = forecast['forecasts'][horizon]['parameters'][param]['value']
-                    val2 = forecast2['forecasts'][horizon]['parameters'][param]['value']
+                    val2 = rerun[f'{horizon}_days'][model_keys[param]]['value']
                     diff = abs(val1 - val2)
                     
                     determinism_test['differences'][f'{param}_{horizon}d'] = {
@@ -1736,6 +2190,7 @@ def test_ml_prediction():
             'determinism_test': determinism_test,
             'ml_metadata': {
                 'model_version': 'Phase 5 - Multi-Parameter',
+                'model_set_version': model_registry.model_set_version(),
                 'uses_real_ml': True,
                 'training_samples': 1900
             },
@@ -1758,12 +2213,23 @@ if __name__ == '__main__':
     print("✅ API Running: http://localhost:8000")
     print("✅ Status: http://localhost:8000/api/status")
     print("\n📊 AI Analysis Endpoints:")
+    print("   POST http://localhost:8000/api/ai/upload")
+    print("   GET  http://localhost:8000/api/ai/uploads/<upload_id>")
     print("   POST http://localhost:8000/api/ai/analyze")
+    print("   POST http://localhost:8000/api/ai/predictions | risk-assessment | trend-analysis")
+    print("   GET  http://localhost:8000/api/ai/cache")
     print("   POST http://localhost:8000/api/reports/generate")
+    print("   (send \"async\": true to either to run it as a background job)")
+    print("   POST http://localhost:8000/api/reports/districts")
+    print("   GET  http://localhost:8000/api/jobs")
+    print("   GET  http://localhost:8000/api/jobs/<job_id>")
+    print("   DELETE http://localhost:8000/api/jobs/<job_id>")
     print("\n🔬 ML Verification Endpoints (NEW!):")
     print("   GET  http://localhost:8000/api/ml/status")
     print("   GET  http://localhost:8000/api/ml/verify")
     print("   GET  http://localhost:8000/api/ml/training-data")
+    print("   GET  http://localhost:8000/api/ml/models")
+    print("   POST http://localhost:8000/api/ml/models/reload")
     print("   POST http://localhost:8000/api/ml/test-prediction")
     print("\n🌊 Enhanced Live Station Monitoring Endpoints:")
     print("   GET  http://localhost:8000/api/stations")
@@ -1773,11 +2239,28 @@ if __name__ == '__main__':
     print("   GET  http://localhost:8000/api/stations/type/<type>")
     print("   GET  http://localhost:8000/api/stations/water-class/<class>")
     print("   GET  http://localhost:8000/api/stations/alerts")
+    print("   GET  http://localhost:8000/api/alerts?severity=critical")
+    print("   GET  http://localhost:8000/api/alerts/summary")
     print("   GET  http://localhost:8000/api/stations/region/<region>")
     print("   GET  http://localhost:8000/api/stations/laboratories")
     print("   GET  http://localhost:8000/api/stations/map-data")
+    print("   GET  http://localhost:8000/api/stations/changes?since=<seq>")
+    print("   GET  http://localhost:8000/api/stream?district=Pune&events=tick,alert  (SSE sidecar on SSE_PORT 8001, or SSE_PUBLIC_URL)")
+    print("   GET  http://localhost:8000/api/stream/status")
+    print("   GET  http://localhost:8000/api/async/status  (API_MODE=async)")
     print("   GET  http://localhost:8000/api/stations/summary")
     print("   GET  http://localhost:8000/api/stations/<id>/history")
+    print("   POST http://localhost:8000/api/stations/ai/predictions/batch")
+    print("   GET  http://localhost:8000/api/stations/<id>/ai/trends")
+    print("   GET  http://localhost:8000/api/stations/<id>/ai/risk")
+    print("   GET  http://localhost:8000/api/stations/risk/top?n=10")
+    print("   GET  http://localhost:8000/api/disease-risk/top?disease=cholera&n=10")
+    print("   GET  http://localhost:8000/api/disease-risk/districts")
+    print("   GET  http://localhost:8000/api/disease-risk/stations/<id>")
+    print("   GET  http://localhost:8000/api/disease-risk/status")
+    print("   GET  http://localhost:8000/api/anomalies?parameter=turbidity&kind=level_shift_up")
+    print("   GET  http://localhost:8000/api/stations/<id>/anomalies")
+    print("   GET  http://localhost:8000/api/anomalies/status")
     print("   GET  http://localhost:8000/api/parameters/<param>/statistics")
     print("   POST http://localhost:8000/api/stations/simulation/start")
     print("   POST http://localhost:8000/api/stations/simulation/stop")
@@ -1792,5 +2275,13 @@ if __name__ == '__main__':
     # Start live simulation automatically with 15-minute intervals
     print("🔄 Initializing Maharashtra Water Quality Monitoring Network...")
     station_service.start_simulation(update_interval=900)
+    # Requeue jobs interrupted by the previous run without waiting for a submit
+    job_queue.start()
     
-    app.run(host='0.0.0.0', port=8000, debug=False)
+    if os.environ.get('API_MODE', 'flask') == 'async':
+        # One event loop serves the REST routes and the event stream
+        from async_api import run_async_api
+        run_async_api(app, host='0.0.0.0', port=8000, event_stream=event_stream)
+    else:
+        event_stream.start_in_thread('0.0.0.0', SSE_PORT)
+        app.run(host='0.0.0.0', port=8000, debug=False)
@@ -0,0 +1,375 @@
+"""
+Async Station API - Phase 6
+Serves the Flask REST routes from an aiohttp event loop
+
+Features:
+- /api/stations/* and /api/ai/* on the same event loop as the WebSocket
+  server, orchestrator and event stream (mount on their aiohttp app), or
+  as a standalone async server (API_MODE=async python app.py)
+- Connections are held by the loop: idle keep-alive clients cost no thread
+- Route handlers are the Flask views themselves (one implementation, no
+  duplicated endpoint logic), called through a WSGI bridge:
+    * constant-time in-memory lookups run inline on the loop
+    * station reads run on a station executor
+    * AI analysis, predictions and reports run on a separate, smaller AI
+      executor so a burst of heavy work cannot starve station reads
+- Bounded queues: when an executor's backlog is full the request is
+  answered 503 with Retry-After instead of queueing without limit
+- Any other route of the Flask app is bridged through the station executor,
+  so the async server is a drop-in replacement for the dev server
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from werkzeug.exceptions import HTTPException
+
+
+STATION_WORKERS = int(os.environ.get('ASYNC_STATION_WORKERS', 8))
+AI_WORKERS = int(os.environ.get('ASYNC_AI_WORKERS', 2))
+MAX_PENDING_PER_WORKER = 64
+
+# Flask GET endpoints that run on the loop itself: constant-time lookups only.
+# The loop is shared with the WebSocket server and orchestrator, so anything
+# that scans stations or does NumPy work (risk, anomalies, change deltas)
+# goes to the station executor
+INLINE_ENDPOINTS = {
+    'get_stream_status',
+    'get_station_history',
+}
+
+# Flask endpoints that run models, analysis or report generation
+AI_ENDPOINTS = {
+    'ai_upload',
+    'ai_upload_detail',
+    'ai_analyze',
+    'ai_predictions',
+    'ai_risk_assessment',
+    'ai_trend_analysis',
+    'ai_recommendations',
+    'save_report',
+    'generate_report',
+    'generate_district_report_bundles',
+    'station_prediction',
+    'station_predictions_batch',
+    'station_recommendations',
+}
+
+# Hop-by-hop headers a WSGI app must not set; aiohttp manages them
+_HOP_BY_HOP = {'connection', 'keep-alive', 'transfer-encoding', 'content-length'}
+
+
+class AsyncStationAPI:
+    """Dispatches HTTP requests to a Flask app without a thread per connection"""
+
+    def __init__(self, flask_app, station_workers: int = STATION_WORKERS, ai_workers: int = AI_WORKERS):
+        """
+        Args:
+            flask_app: The Flask application whose views serve the routes
+            station_workers: Threads for station reads
+            ai_workers: Threads for AI analysis and report generation
+        """
+        self.flask_app = flask_app
+        self.max_body = flask_app.config.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024
+        self.url_map = flask_app.url_map
+        self.pools = {
+            'station': ThreadPoolExecutor(max_workers=station_workers, thread_name_prefix='api-station'),
+            'ai': ThreadPoolExecutor(max_workers=ai_workers, thread_name_prefix='api-ai'),
+        }
+        self.max_pending = {
+            'station': station_workers * MAX_PENDING_PER_WORKER,
+            'ai': ai_workers * MAX_PENDING_PER_WORKER,
+        }
+        self.pending = {'station': 0, 'ai': 0}
+        self.stats = {'inline': 0, 'station': 0, 'ai': 0, 'rejected': 0, 'errors': 0}
+        self._lane_cache: Dict[Tuple[str, str], str] = {}
+
+    # ==================== ROUTING ====================
+
+    def setup_routes(self, app: web.Application, catch_all: bool = False):
+        """
+        Add the API routes to an aiohttp application
+
+        Args:
+            app: Application (e.g. RealtimeWebSocketServer.app) whose loop serves the API
+            catch_all: Also bridge every other path to the Flask app (standalone mode)
+        """
+        app.router.add_get('/api/async/status', self.status_handler)
+        for prefix in ('/api/stations', '/api/ai'):
+            app.router.add_route('*', prefix, self.handle)
+            app.router.add_route('*', prefix + '/{tail:.*}', self.handle)
+        if catch_all:
+            app.router.add_route('*', '/{tail:.*}', self.handle)
+        app.on_cleanup.append(self._shutdown)
+
+    def lane(self, path: str, method: str) -> str:
+        """Where a request runs: 'inline', 'station' or 'ai'"""
+        key = (path, method)
+        lane = self._lane_cache.get(key)
+        if lane is None:
+            try:
+                endpoint, _ = self.url_map.bind('localhost').match(path, method)
+            except HTTPException:
+                endpoint = None  # 404/405 are answered by Flask itself
+            if method == 'OPTIONS' or (method == 'GET' and endpoint in INLINE_ENDPOINTS):
+                lane = 'inline'
+            elif endpoint in AI_ENDPOINTS or (method == 'POST' and '/ai/' in path):
+                # POSTed station AI calls analyze client-supplied history
+                lane = 'ai'
+            else:
+                lane = 'station'
+            if len(self._lane_cache) < 10000:
+                self._lane_cache[key] = lane
+        return lane
+
+    # ==================== HANDLERS ====================
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = b''
+        if request.can_read_body:
+            body = await self._read_body(request)
+            if body is None:
+                return web.json_response({'error': 'Request body too large'}, status=413)
+
+        environ = self._environ(request, body)
+        lane = self.lane(request.path, request.method)
+        try:
+            if lane == 'inline':
+                self.stats['inline'] += 1
+                status, headers, payload = self._call_wsgi(environ)
+            else:
+                if self.pending[lane] >= self.max_pending[lane]:
+                    self.stats['rejected'] += 1
+                    return web.json_response({'error': 'Server busy, retry shortly'}, status=503,
+                                             headers={'Retry-After': '1', 'Access-Control-Allow-Origin': '*'})
+                self.stats[lane] += 1
+                self.pending[lane] += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    status, headers, payload = await loop.run_in_executor(self.pools[lane], self._call_wsgi, environ)
+                finally:
+                    self.pending[lane] -= 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"❌ Async API Error: {str(e)}")
+            return web.json_response({'error': str(e)}, status=500)
+
+        response = web.Response(body=payload, status=int(status.split(' ', 1)[0]))
+        for name, value in headers:
+            if name.lower() not in _HOP_BY_HOP:
+                response.headers.add(name, value)
+        return response
+
+    async def _read_body(self, request: web.Request) -> Optional[bytes]:
+        """
+        Whole request body, read until EOF
+
+        Returns:
+            Body bytes, or None when it exceeds max_body
+        """
+        if request.content_length is not None and request.content_length > self.max_body:
+            return None
+        chunks, size = [], 0
+        while True:
+            # read(n) returns only what is buffered, so large uploads need a loop
+            chunk = await request.content.readany()
+            if not chunk:
+                return b''.join(chunks)
+            size += len(chunk)
+            if size > self.max_body:
+                return None
+            chunks.append(chunk)
+
+    async def status_handler(self, request: web.Request) -> web.Response:
+        return web.json_response({'success': True, **self.status()}, headers={'Access-Control-Allow-Origin': '*'})
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'workers': {lane: pool._max_workers for lane, pool in self.pools.items()},
+            'pending': dict(self.pending),
+            'maxPending': dict(self.max_pending),
+            'requests': dict(self.stats),
+        }
+
+    async def _shutdown(self, app):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== WSGI BRIDGE ====================
+
+    def _environ(self, request: web.Request, body: bytes) -> Dict[str, Any]:
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query_string,
+            'SERVER_NAME': request.url.host or 'localhost',
+            'SERVER_PORT': str(request.url.port or 80),
+            'SERVER_PROTOCOL': f'HTTP/{request.version.major}.{request.version.minor}',
+            'REMOTE_ADDR': request.remote or '',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': request.scheme,
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif key != 'CONTENT_LENGTH':
+                key = 'HTTP_' + key
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], bytes]:
+        """Run the Flask app for one request and collect the whole response"""
+        started: List[Any] = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        result = self.flask_app.wsgi_app(environ, start_response)
+        try:
+            payload = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started[0], started[1], payload
+
+
+# ==================== STANDALONE SERVER ====================
+
+def create_async_app(flask_app, event_stream=None, **kwargs) -> Tuple[web.Application, AsyncStationAPI]:
+    """
+    Standalone aiohttp application serving the whole Flask app
+
+    Args:
+        flask_app: Flask application
+        event_stream: Optional SSEServer, served on the same loop at /api/stream
+    """
+    app = web.Application()
+    api = AsyncStationAPI(flask_app, **kwargs)
+    if event_stream is not None:
+        event_stream.setup_routes(app)
+    api.setup_routes(app, catch_all=True)
+    return app, api
+
+
+def run_async_api(flask_app, host: str = '0.0.0.0', port: int = 8000, event_stream=None, **kwargs):
+    """Serve the Flask app from an aiohttp event loop (blocks)"""
+    app, api = create_async_app(flask_app, event_stream, **kwargs)
+    workers = api.status()['workers']
+    print(f"⚡ Async API serving on http://{host}:{port} "
+          f"({workers['station']} station workers, {workers['ai']} AI workers)")
+    web.run_app(app, host=host, port=port, backlog=4096, print=None, access_log=None)
+
+
+if __name__ == '__main__':
+    import argparse
+    import multiprocessing
+    import subprocess
+    import urllib.request
+
+    import aiohttp
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description='Async API vs Flask dev server: RPS and p99 latency')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--serve', choices=['flask', 'async'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        os.environ.setdefault('JOB_DB_PATH', '/tmp/async_api_bench_jobs.db')
+        import app as api_app
+        api_app.job_queue.stop()
+        if args.serve == 'async':
+            run_async_api(api_app.app, '127.0.0.1', args.port)
+        else:
+            from werkzeug.serving import make_server
+            make_server('127.0.0.1', args.port, api_app.app, threaded=True).serve_forever()
+        sys.exit(0)
+
+    def run_load(port, connections, duration, paths, queue):
+        """Client process: each connection sends requests back to back"""
+        async def main():
+            latencies, errors, shed = [], 0, 0
+            deadline = time.perf_counter() + duration
+
+            async def client(i, session):
+                nonlocal errors, shed
+                n = i
+                while time.perf_counter() < deadline:
+                    n += 1
+                    started = time.perf_counter()
+                    try:
+                        async with session.get(f'http://127.0.0.1:{port}{paths[n % len(paths)]}') as response:
+                            await response.read()
+                            if response.status == 503:
+                                shed += 1
+                                continue
+                            if response.status >= 500:
+                                errors += 1
+                                continue
+                        latencies.append(time.perf_counter() - started)
+                    except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                        errors += 1
+                        await asyncio.sleep(0.1)
+
+            connector = aiohttp.TCPConnector(limit=0)
+            timeout = aiohttp.ClientTimeout(total=30)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                await asyncio.gather(*(client(i, session) for i in range(connections)))
+            queue.put((latencies, errors, shed))
+
+        asyncio.run(main())
+
+    def bench(mode):
+        server = subprocess.Popen([sys.executable, __file__, '--serve', mode, '--port', str(args.port)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(600):
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/stations/changes', timeout=1) as r:
+                        feed = __import__('json').load(r)
+                    seq = feed['seq']
+                    if feed['tick'] >= 1:
+                        break
+                except OSError:
+                    pass
+                time.sleep(1)
+            with urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/stations/risk/top?n=50', timeout=10) as r:
+                ids = [s['stationId'] for s in __import__('json').load(r)['stations']]
+            paths = [f'/api/stations/changes?since={seq}', '/api/stations/risk/top?n=10']
+            paths += [f'/api/stations/{sid}/history' for sid in ids[:10]]
+            paths += [f'/api/stations/{sid}/ai/risk' for sid in ids[:10]]
+            paths += ['/api/stations/district/Pune']
+
+            queue = multiprocessing.Queue()
+            load = multiprocessing.Process(target=run_load, args=(args.port, args.connections, args.duration, paths, queue))
+            load.start()
+            latencies, errors, shed = queue.get()
+            load.join()
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = np.array(latencies) * 1000
+        return (len(latencies) / args.duration, np.percentile(latencies, 50), np.percentile(latencies, 99),
+                errors, shed)
+
+    print(f"=== Async Station API - Phase 6: {args.connections:,} concurrent connections, {args.duration:.0f} s ===\n")
+    for mode, label in (('flask', 'Flask dev server (threaded)'), ('async', 'Async API (aiohttp)')):
+        rps, p50, p99, errors, shed = bench(mode)
+        print(f"{label:30s} {rps:6.0f} req/s | p50 {p50:7.1f} ms | p99 {p99:7.1f} ms | "
+              f"{errors:,} errors | {shed:,} shed (503)")
@@ -2,6 +2,11 @@
 Enhanced Water Quality Data Generator with Authentic Maharashtra Ranges
 Based on Maharashtra Water Quality Status Report 2023-24 (MPCB)
 Implements CPCB WQI calculation methodology
+
+Datasets are generated column-wise: every parameter is drawn for all samples
+of a quality bucket at once, and correlations, seasonal patterns, WQI and
+classifications are array operations. stream_dataset() writes datasets
+larger than RAM chunk by chunk to CSV or Parquet.
 """
 
 import pandas as pd
@@ -9,6 +14,19 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import math
+import os
+import sys
+import time
+
+import wqi_kernel
+
+# Parquet output (optional)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 class AuthenticWaterQualityGenerator:
     """
@@ -16,14 +34,14 @@ class AuthenticWaterQualityGenerator:
     Follows CPCB standards and MPCB classifications
     """
     
-    # CPCB Modified Weights for WQI
-    WEIGHT_DO = 0.31
-    WEIGHT_FC = 0.28
-    WEIGHT_PH = 0.22
-    WEIGHT_BOD = 0.19
+    # CPCB Modified Weights for WQI (wqi_kernel computes the index)
+    WEIGHT_DO = wqi_kernel.CPCB_WEIGHTS['dissolved_oxygen']
+    WEIGHT_FC = wqi_kernel.CPCB_WEIGHTS['fecal_coliform']
+    WEIGHT_PH = wqi_kernel.CPCB_WEIGHTS['ph']
+    WEIGHT_BOD = wqi_kernel.CPCB_WEIGHTS['bod']
     
     # DO Saturation Constant
-    DO_SATURATION_CONSTANT = 6.5
+    DO_SATURATION_CONSTANT = wqi_kernel.DO_SATURATION_CONSTANT
     
     # Seasonal patterns from Maharashtra report
     SEASONS = {
@@ -62,10 +80,99 @@ class AuthenticWaterQualityGenerator:
         }
     }
     
+    # Parameter ranges based on Maharashtra WQR 2023-24: (min, max, std)
+    PARAMETER_RANGES = {
+        'ph': {
+            'excellent': (7.0, 8.2, 0.3),  # (min, max, std)
+            'good': (6.8, 8.5, 0.4),
+            'medium': (6.5, 9.0, 0.5),
+            'bad': (6.0, 9.5, 0.6),
+            'very_bad': (5.5, 10.0, 0.8)
+        },
+        'bod': {  # mg/l
+            'excellent': (1.0, 2.5, 0.4),
+            'good': (2.0, 4.0, 0.6),
+            'medium': (3.5, 8.0, 1.2),
+            'bad': (6.0, 20.0, 3.0),
+            'very_bad': (15.0, 38.0, 5.0)
+        },
+        'do': {  # mg/l
+            'excellent': (6.5, 8.5, 0.6),
+            'good': (5.0, 7.5, 0.8),
+            'medium': (4.0, 6.0, 0.7),
+            'bad': (2.5, 4.5, 0.6),
+            'very_bad': (0.5, 3.0, 0.5)
+        },
+        'fc': {  # MPN/100ml - log scale
+            'excellent': (1, 50, 1.5),
+            'good': (10, 500, 2.0),
+            'medium': (100, 5000, 2.5),
+            'bad': (500, 50000, 3.0),
+            'very_bad': (5000, 160000, 3.5)
+        },
+        'tds': {  # mg/l
+            'excellent': (50, 300, 60),
+            'good': (200, 500, 80),
+            'medium': (400, 1000, 150),
+            'bad': (800, 1500, 200),
+            'very_bad': (1200, 2000, 250)
+        },
+        'turbidity': {  # NTU
+            'excellent': (1, 5, 1.0),
+            'good': (3, 10, 2.0),
+            'medium': (8, 25, 4.0),
+            'bad': (20, 50, 8.0),
+            'very_bad': (40, 100, 15.0)
+        },
+        'temperature': {  # °C
+            'excellent': (20, 30, 3.0),
+            'good': (18, 32, 4.0),
+            'medium': (15, 35, 5.0),
+            'bad': (15, 35, 5.0),
+            'very_bad': (15, 35, 5.0)
+        },
+        'total_coliform': {  # MPN/100ml - log scale
+            'excellent': (50, 500, 2.0),
+            'good': (200, 5000, 2.5),
+            'medium': (1000, 50000, 3.0),
+            'bad': (10000, 500000, 3.5),
+            'very_bad': (100000, 1000000, 4.0)
+        }
+    }
+    
+    # Location adjustments
+    LOCATION_FACTORS = {
+        'rural': 1.0,
+        'urban': 1.3,  # More pollution
+        'industrial': 1.6,  # High pollution
+        'coastal': 1.1  # Saline effects
+    }
+    
+    # Parameter draws per sample -> dataset column
+    DATASET_PARAMETERS = {
+        'ph': 'ph',
+        'bod': 'bod',
+        'do': 'dissolved_oxygen',
+        'fc': 'fecal_coliform',
+        'temperature': 'temperature',
+        'tds': 'tds',
+        'turbidity': 'turbidity',
+    }
+    
+    DEFAULT_QUALITY_DISTRIBUTION = {
+        'excellent': 0.25,
+        'good': 0.40,
+        'medium': 0.20,
+        'bad': 0.10,
+        'very_bad': 0.05
+    }
+    
     def __init__(self, seed=42):
         """Initialize generator with random seed for reproducibility"""
         np.random.seed(seed)
         self.seed = seed
+        # Vectorized generation draws from its own generator
+        self.rng = np.random.default_rng(seed)
     
     def calculate_wqi(self, ph, bod, dissolved_oxygen, fecal_coliform, temperature=None):
         """
@@ -82,115 +189,35 @@ class AuthenticWaterQualityGenerator:
         Returns:
             float: WQI value (0-100)
         """
-        # Calculate sub-indices
-        do_sub_index = self._calculate_do_sub_index(dissolved_oxygen, temperature)
-        fc_sub_index = self._calculate_fc_sub_index(fecal_coliform)
-        ph_sub_index = self._calculate_ph_sub_index(ph)
-        bod_sub_index = self._calculate_bod_sub_index(bod)
-        
-        # Apply weights
-        wqi = (
-            (do_sub_index * self.WEIGHT_DO) +
-            (fc_sub_index * self.WEIGHT_FC) +
-            (ph_sub_index * self.WEIGHT_PH) +
-            (bod_sub_index * self.WEIGHT_BOD)
-        )
-        
-        return max(0, min(100, wqi))  # Clamp to 0-100
+        return float(wqi_kernel.cpcb_wqi(ph, bod, dissolved_oxygen, fecal_coliform, temperature))
     
-    def _calculate_do_sub_index(self, do_value, temperature):
-        """Calculate DO sub-index based on % saturation"""
-        # Adjust saturation constant by temperature if provided
-        saturation_constant = self.DO_SATURATION_CONSTANT
-        if temperature is not None:
-            saturation_constant = self.DO_SATURATION_CONSTANT * (1 - ((temperature - 20) * 0.015))
-            saturation_constant = max(4.0, min(9.0, saturation_constant))
-        
-        do_saturation_percent = (do_value / saturation_constant) * 100
-        
-        if 0 <= do_saturation_percent <= 40:
-            sub_index = 0.18 + (0.66 * do_saturation_percent)
-        elif 40 < do_saturation_percent <= 100:
-            sub_index = -13.55 + (1.17 * do_saturation_percent)
-        elif 100 < do_saturation_percent <= 140:
-            sub_index = 163.34 - (0.62 * do_saturation_percent)
-        else:
-            sub_index = 50.0 if do_saturation_percent > 140 else 2.0
-        
-        return max(0, min(100, sub_index))
-    
-    def _calculate_fc_sub_index(self, fc_value):
-        """Calculate Fecal Coliform sub-index"""
-        if fc_value < 1:
-            return 97.0
-        
-        if 1 <= fc_value <= 1000:
-            log_fc = math.log10(fc_value)
-            sub_index = 97.2 - (26.6 * log_fc)
-        elif 1000 < fc_value <= 100000:
-            log_fc = math.log10(fc_value)
-            sub_index = 42.33 - (7.75 * log_fc)
-        else:
-            sub_index = 2.0
-        
-        return max(0, min(100, sub_index))
-    
-    def _calculate_ph_sub_index(self, ph_value):
-        """Calculate pH sub-index"""
-        if 2 <= ph_value < 5:
-            sub_index = 16.1 + (7.35 * ph_value)
-        elif 5 <= ph_value < 7.3:
-            sub_index = -142.67 + (33.5 * ph_value)
-        elif 7.3 <= ph_value <= 10:
-            sub_index = 316.96 - (29.85 * ph_value)
-        elif 10 < ph_value <= 12:
-            sub_index = 96.17 - (8.0 * ph_value)
-        else:
-            sub_index = 0.0
-        
-        return max(0, min(100, sub_index))
-    
-    def _calculate_bod_sub_index(self, bod_value):
-        """Calculate BOD sub-index"""
-        if 0 <= bod_value <= 10:
-            sub_index = 96.67 - (7.0 * bod_value)
-        elif 10 < bod_value <= 30:
-            sub_index = 38.9 - (1.23 * bod_value)
-        else:
-            sub_index = 2.0
+    def calculate_wqi_array(self, ph, bod, dissolved_oxygen, fecal_coliform, temperature=None):
+        """
+        Vectorized calculate_wqi for arrays of samples
         
-        return max(0, min(100, sub_index))
+        Returns:
+            ndarray: WQI values (0-100)
+        """
+        return wqi_kernel.cpcb_wqi(ph, bod, dissolved_oxygen, fecal_coliform, temperature)
     
     def get_classification(self, wqi):
         """Get water quality classification based on WQI"""
-        if wqi >= 63:
-            return {
-                'classification': 'Good to Excellent',
-                'cpcbClass': 'A',
-                'mpcbClass': 'A-I',
-                'status': 'Non Polluted'
-            }
-        elif wqi >= 50:
-            return {
-                'classification': 'Medium to Good',
-                'cpcbClass': 'B',
-                'mpcbClass': 'Not Prescribed',
-                'status': 'Non Polluted'
-            }
-        elif wqi >= 38:
-            return {
-                'classification': 'Bad',
-                'cpcbClass': 'C',
-                'mpcbClass': 'A-II',
-                'status': 'Polluted'
-            }
-        else:
-            return {
-                'classification': 'Bad to Very Bad',
-                'cpcbClass': 'D' if wqi >= 25 else 'E',
-                'mpcbClass': 'A-III' if wqi >= 25 else 'A-IV',
-                'status': 'Heavily Polluted'
-            }
+        classification = self.get_classification_arrays([wqi])
+        return {
+            'classification': classification['classification'][0],
+            'cpcbClass': classification['cpcb_class'][0],
+            'mpcbClass': classification['mpcb_class'][0],
+            'status': classification['status'][0]
+        }
+    
+    def get_classification_arrays(self, wqi):
+        """
+        Vectorized get_classification
+        
+        Returns:
+            Dict of arrays: classification, cpcb_class, mpcb_class, status
+        """
+        return wqi_kernel.cpcb_classification(wqi)
     
     def generate_parameter(self, param_type, quality_target='good', location_type='rural'):
         """
@@ -204,74 +231,7 @@ class AuthenticWaterQualityGenerator:
         Returns:
             float: Generated parameter value
         """
-        # Ranges based on Maharashtra WQR 2023-24
-        ranges = {
-            'ph': {
-                'excellent': (7.0, 8.2, 0.3),  # (min, max, std)
-                'good': (6.8, 8.5, 0.4),
-                'medium': (6.5, 9.0, 0.5),
-                'bad': (6.0, 9.5, 0.6),
-                'very_bad': (5.5, 10.0, 0.8)
-            },
-            'bod': {  # mg/l
-                'excellent': (1.0, 2.5, 0.4),
-                'good': (2.0, 4.0, 0.6),
-                'medium': (3.5, 8.0, 1.2),
-                'bad': (6.0, 20.0, 3.0),
-                'very_bad': (15.0, 38.0, 5.0)
-            },
-            'do': {  # mg/l
-                'excellent': (6.5, 8.5, 0.6),
-                'good': (5.0, 7.5, 0.8),
-                'medium': (4.0, 6.0, 0.7),
-                'bad': (2.5, 4.5, 0.6),
-                'very_bad': (0.5, 3.0, 0.5)
-            },
-            'fc': {  # MPN/100ml - log scale
-                'excellent': (1, 50, 1.5),
-                'good': (10, 500, 2.0),
-                'medium': (100, 5000, 2.5),
-                'bad': (500, 50000, 3.0),
-                'very_bad': (5000, 160000, 3.5)
-            },
-            'tds': {  # mg/l
-                'excellent': (50, 300, 60),
-                'good': (200, 500, 80),
-                'medium': (400, 1000, 150),
-                'bad': (800, 1500, 200),
-                'very_bad': (1200, 2000, 250)
-            },
-            'turbidity': {  # NTU
-                'excellent': (1, 5, 1.0),
-                'good': (3, 10, 2.0),
-                'medium': (8, 25, 4.0),
-                'bad': (20, 50, 8.0),
-                'very_bad': (40, 100, 15.0)
-            },
-            'temperature': {  # °C
-                'excellent': (20, 30, 3.0),
-                'good': (18, 32, 4.0),
-                'medium': (15, 35, 5.0),
-                'bad': (15, 35, 5.0),
-                'very_bad': (15, 35, 5.0)
-            },
-            'total_coliform': {  # MPN/100ml - log scale
-                'excellent': (50, 500, 2.0),
-                'good': (200, 5000, 2.5),
-                'medium': (1000, 50000, 3.0),
-                'bad': (10000, 500000, 3.5),
-                'very_bad': (100000, 1000000, 4.0)
-            }
-        }
-        
-        # Location adjustments
-        location_factors = {
-            'rural': 1.0,
-            'urban': 1.3,  # More pollution
-            'industrial': 1.6,  # High pollution
-            'coastal': 1.1  # Saline effects
-        }
-        
+        ranges = self.PARAMETER_RANGES
         if param_type not in ranges:
             raise ValueError(f"Unknown parameter type: {param_type}")
         
@@ -279,7 +239,7 @@ class AuthenticWaterQualityGenerator:
         min_val, max_val, std = param_range
         
         # Adjust for location
-        location_factor = location_factors.get(location_type, 1.0)
+        location_factor = self.LOCATION_FACTORS.get(location_type, 1.0)
         
         if param_type in ['fc', 'total_coliform']:
             # Log-normal distribution for coliform
@@ -299,6 +259,52 @@ class AuthenticWaterQualityGenerator:
         
         return value
     
+    def generate_parameter_array(self, param_type, quality_target, size, location_type='rural', rng=None):
+        """
+        Draw one parameter for many samples of the same quality bucket
+        
+        Same distributions and bounds as generate_parameter.
+        """
+        ranges = self.PARAMETER_RANGES
+        if param_type not in ranges:
+            raise ValueError(f"Unknown parameter type: {param_type}")
+        rng = rng if rng is not None else self.rng
+        
+        min_val, max_val, std = ranges[param_type].get(quality_target, ranges[param_type]['good'])
+        location_factor = self.LOCATION_FACTORS.get(location_type, 1.0)
+        
+        if param_type in ['fc', 'total_coliform']:
+            mean_log = (math.log(min_val) + math.log(max_val)) / 2
+            values = rng.lognormal(mean_log, std / 2, size) * location_factor
+            return np.clip(values, min_val, max_val * 2)
+        
+        values = rng.normal((min_val + max_val) / 2, std, size) * location_factor
+        if param_type in ['ph', 'temperature']:
+            return np.clip(values, min_val, max_val)
+        return np.maximum(values, min_val * 0.5)  # Allow some variation below min
+    
+    def _correlate_columns(self, columns, rng):
+        """apply_parameter_correlations on a dict of arrays (modified in place)"""
+        n = len(columns['bod'])
+        bod = columns['bod']
+        temperature = columns['temperature']
+        
+        # BOD and DO inverse relationship
+        columns['dissolved_oxygen'] = columns['dissolved_oxygen'] * np.where(
+            bod > 8, 0.7, np.where(bod > 5, 0.85, 1.0))
+        # Temperature and DO inverse relationship
+        columns['dissolved_oxygen'] *= np.where(
+            temperature > 30, 0.85, np.where(temperature < 20, 1.15, 1.0))
+        # Total coliform is typically 3-10x fecal coliform
+        columns['total_coliform'] = columns['fecal_coliform'] * rng.uniform(3, 10, n)
+        # High turbidity correlates with coliform
+        turbid = columns['turbidity'] > 20
+        k = int(turbid.sum())
+        columns['fecal_coliform'] = columns['fecal_coliform'].copy()
+        columns['fecal_coliform'][turbid] *= rng.uniform(1.5, 3.0, k)
+        columns['total_coliform'][turbid] *= rng.uniform(1.5, 3.0, k)
+        return columns
+    
     def apply_parameter_correlations(self, data):
         """
         Apply realistic parameter correlations
@@ -308,34 +314,11 @@ class AuthenticWaterQualityGenerator:
         High Turbidity → Often high coliform
         """
         df = pd.DataFrame(data)
-        
-        # BOD and DO inverse relationship
-        for i in range(len(df)):
-            if df.loc[i, 'bod'] > 8:
-                # High BOD reduces DO
-                df.loc[i, 'dissolved_oxygen'] *= 0.7
-            elif df.loc[i, 'bod'] > 5:
-                df.loc[i, 'dissolved_oxygen'] *= 0.85
-        
-        # Temperature and DO inverse relationship
-        for i in range(len(df)):
-            if df.loc[i, 'temperature'] > 30:
-                df.loc[i, 'dissolved_oxygen'] *= 0.85
-            elif df.loc[i, 'temperature'] < 20:
-                df.loc[i, 'dissolved_oxygen'] *= 1.15
-        
-        # Fecal Coliform and Total Coliform relationship
-        for i in range(len(df)):
-            fc = df.loc[i, 'fecal_coliform']
-            # Total coliform is typically 3-10x fecal coliform
-            df.loc[i, 'total_coliform'] = fc * np.random.uniform(3, 10)
-        
-        # High turbidity correlates with coliform
-        for i in range(len(df)):
-            if df.loc[i, 'turbidity'] > 20:
-                df.loc[i, 'fecal_coliform'] *= np.random.uniform(1.5, 3.0)
-                df.loc[i, 'total_coliform'] *= np.random.uniform(1.5, 3.0)
-        
+        columns = {name: df[name].to_numpy(dtype=float, copy=True)
+                   for name in ['bod', 'temperature', 'dissolved_oxygen', 'fecal_coliform', 'turbidity']}
+        self._correlate_columns(columns, self.rng)
+        for name, values in columns.items():
+            df[name] = values
         return df
     
     def get_season_from_month(self, month):
@@ -345,6 +328,51 @@ class AuthenticWaterQualityGenerator:
                 return season_name
         return 'post_monsoon'  # Default
     
+    def _season_columns(self, columns, season, rng):
+        """apply_seasonal_patterns on a dict of arrays (modified in place)"""
+        params = self.SEASONS[season]
+        n = len(columns['ph'])
+        
+        def draw(key):
+            return rng.uniform(*params[key], n)
+        
+        if season == 'monsoon':
+            columns['turbidity'] = columns['turbidity'] * draw('turbidity_multiplier')
+            fc_mult = draw('fc_multiplier')
+            columns['fecal_coliform'] = columns['fecal_coliform'] * fc_mult
+            columns['total_coliform'] = columns['total_coliform'] * fc_mult
+            columns['dissolved_oxygen'] = columns['dissolved_oxygen'] * draw('do_multiplier')
+            columns['bod'] = columns['bod'] * draw('bod_multiplier')
+            columns['tds'] = columns['tds'] * draw('tds_multiplier')
+        elif season == 'summer':
+            columns['temperature'] = columns['temperature'] + draw('temperature_increase')
+            columns['dissolved_oxygen'] = columns['dissolved_oxygen'] * draw('do_multiplier')
+            columns['tds'] = columns['tds'] * draw('tds_multiplier')
+            fc_mult = draw('fc_multiplier')
+            columns['fecal_coliform'] = columns['fecal_coliform'] * fc_mult
+            columns['total_coliform'] = columns['total_coliform'] * fc_mult
+        elif season == 'winter':
+            columns['temperature'] = columns['temperature'] - draw('temperature_decrease')
+            columns['dissolved_oxygen'] = columns['dissolved_oxygen'] * draw('do_multiplier')
+            columns['bod'] = columns['bod'] * draw('bod_multiplier')
+            fc_mult = draw('fc_multiplier')
+            columns['fecal_coliform'] = columns['fecal_coliform'] * fc_mult
+            columns['total_coliform'] = columns['total_coliform'] * fc_mult
+        elif season == 'post_monsoon':
+            columns['turbidity'] = columns['turbidity'] * draw('turbidity_multiplier')
+            fc_mult = draw('fc_multiplier')
+            columns['fecal_coliform'] = columns['fecal_coliform'] * fc_mult
+            columns['total_coliform'] = columns['total_coliform'] * fc_mult
+            columns['dissolved_oxygen'] = columns['dissolved_oxygen'] * draw('do_multiplier')
+        
+        # Ensure parameters stay within realistic bounds
+        columns['ph'] = np.clip(columns['ph'], 5.5, 9.5)
+        columns['dissolved_oxygen'] = np.clip(columns['dissolved_oxygen'], 0.28, 9.75)
+        columns['bod'] = np.clip(columns['bod'], 0.5, 40.0)
+        columns['turbidity'] = np.clip(columns['turbidity'], 0.5, 150.0)
+        columns['temperature'] = np.clip(columns['temperature'], 10.0, 40.0)
+        return columns
+    
     def apply_seasonal_patterns(self, data, season=None, month=None):
         """
         Apply realistic seasonal variations to water quality data
@@ -375,74 +403,79 @@ class AuthenticWaterQualityGenerator:
         if season not in self.SEASONS:
             return data  # No changes if invalid season
         
-        season_params = self.SEASONS[season]
-        
-        # Apply seasonal multipliers
-        for i in range(len(df)):
-            # Monsoon effects
-            if season == 'monsoon':
-                turb_mult = np.random.uniform(*season_params['turbidity_multiplier'])
-                fc_mult = np.random.uniform(*season_params['fc_multiplier'])
-                do_mult = np.random.uniform(*season_params['do_multiplier'])
-                bod_mult = np.random.uniform(*season_params['bod_multiplier'])
-                tds_mult = np.random.uniform(*season_params['tds_multiplier'])
-                
-                df.loc[i, 'turbidity'] *= turb_mult
-                df.loc[i, 'fecal_coliform'] *= fc_mult
-                df.loc[i, 'total_coliform'] *= fc_mult
-                df.loc[i, 'dissolved_oxygen'] *= do_mult
-                df.loc[i, 'bod'] *= bod_mult
-                df.loc[i, 'tds'] *= tds_mult
-            
-            # Summer effects
-            elif season == 'summer':
-                temp_increase = np.random.uniform(*season_params['temperature_increase'])
-                do_mult = np.random.uniform(*season_params['do_multiplier'])
-                tds_mult = np.random.uniform(*season_params['tds_multiplier'])
-                fc_mult = np.random.uniform(*season_params['fc_multiplier'])
-                
-                df.loc[i, 'temperature'] += temp_increase
-                df.loc[i, 'dissolved_oxygen'] *= do_mult
-                df.loc[i, 'tds'] *= tds_mult
-                df.loc[i, 'fecal_coliform'] *= fc_mult
-                df.loc[i, 'total_coliform'] *= fc_mult
-            
-            # Winter effects
-            elif season == 'winter':
-                temp_decrease = np.random.uniform(*season_params['temperature_decrease'])
-                do_mult = np.random.uniform(*season_params['do_multiplier'])
-                bod_mult = np.random.uniform(*season_params['bod_multiplier'])
-                fc_mult = np.random.uniform(*season_params['fc_multiplier'])
-                
-                df.loc[i, 'temperature'] -= temp_decrease
-                df.loc[i, 'dissolved_oxygen'] *= do_mult
-                df.loc[i, 'bod'] *= bod_mult
-                df.loc[i, 'fecal_coliform'] *= fc_mult
-                df.loc[i, 'total_coliform'] *= fc_mult
-            
-            # Post-monsoon effects
-            elif season == 'post_monsoon':
-                turb_mult = np.random.uniform(*season_params['turbidity_multiplier'])
-                fc_mult = np.random.uniform(*season_params['fc_multiplier'])
-                do_mult = np.random.uniform(*season_params['do_multiplier'])
-                
-                df.loc[i, 'turbidity'] *= turb_mult
-                df.loc[i, 'fecal_coliform'] *= fc_mult
-                df.loc[i, 'total_coliform'] *= fc_mult
-                df.loc[i, 'dissolved_oxygen'] *= do_mult
-            
-            # Ensure parameters stay within realistic bounds
-            df.loc[i, 'ph'] = max(5.5, min(9.5, df.loc[i, 'ph']))
-            df.loc[i, 'dissolved_oxygen'] = max(0.28, min(9.75, df.loc[i, 'dissolved_oxygen']))
-            df.loc[i, 'bod'] = max(0.5, min(40.0, df.loc[i, 'bod']))
-            df.loc[i, 'turbidity'] = max(0.5, min(150.0, df.loc[i, 'turbidity']))
-            df.loc[i, 'temperature'] = max(10.0, min(40.0, df.loc[i, 'temperature']))
+        names = ['ph', 'bod', 'dissolved_oxygen', 'fecal_coliform', 'total_coliform',
+                 'temperature', 'tds', 'turbidity']
+        columns = {name: df[name].to_numpy(dtype=float, copy=True) for name in names}
+        self._season_columns(columns, season, self.rng)
+        for name, values in columns.items():
+            df[name] = values
         
         if is_dataframe:
             return df
         else:
             return df.iloc[0].to_dict()
     
+    def _generate_columns(self, n_samples, quality_distribution, location_type, season,
+                          rng, timestamps):
+        """Generate one block of samples as a dict of column arrays"""
+        buckets = list(quality_distribution.keys())
+        quality_targets = rng.choice(len(buckets), size=n_samples,
+                                     p=list(quality_distribution.values()))
+        
+        columns = {'timestamp': timestamps}
+        for column in self.DATASET_PARAMETERS.values():
+            columns[column] = np.empty(n_samples)
+        
+        # One draw per parameter and quality bucket
+        for bucket_index, quality_target in enumerate(buckets):
+            rows = np.flatnonzero(quality_targets == bucket_index)
+            if len(rows) == 0:
+                continue
+            for param_type, column in self.DATASET_PARAMETERS.items():
+                columns[column][rows] = self.generate_parameter_array(
+                    param_type, quality_target, len(rows), location_type, rng)
+        
+        # total_coliform is derived from fecal coliform by the correlations,
+        # so the independent draw of the scalar path is not needed here
+        self._correlate_columns(columns, rng)
+        
+        if season is not None and season in self.SEASONS:
+            self._season_columns(columns, season, rng)
+        
+        columns['wqi'] = self.calculate_wqi_array(
+            columns['ph'], columns['bod'], columns['dissolved_oxygen'],
+            columns['fecal_coliform'], columns['temperature']
+        )
+        columns.update(self.get_classification_arrays(columns['wqi']))
+        return columns
+    
+    def _timestamps(self, start, stop, n_samples, end_date):
+        """Timestamps of samples start..stop, evenly spread over the last year"""
+        start_date = end_date - timedelta(days=365)
+        hours = np.arange(start, stop) * (365 * 24 / n_samples)
+        return pd.Timestamp(start_date) + pd.to_timedelta(hours, unit='h')
+    
+    def iter_dataset_chunks(self, n_samples=1000, chunk_size=250_000, quality_distribution=None,
+                            location_type='rural', season=None):
+        """
+        Generate a dataset as a sequence of DataFrames of at most chunk_size rows
+        
+        The chunks together form one dataset: timestamps span the whole year
+        and the random stream continues from chunk to chunk.
+        """
+        quality_distribution = quality_distribution or self.DEFAULT_QUALITY_DISTRIBUTION
+        end_date = datetime.now()
+        
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            columns = self._generate_columns(
+                stop - start, quality_distribution, location_type, season, self.rng,
+                self._timestamps(start, stop, n_samples, end_date)
+            )
+            chunk = pd.DataFrame(columns)
+            chunk.index = pd.RangeIndex(start, stop)
+            yield chunk
+    
     def generate_dataset(self, n_samples=1000, quality_distribution=None, location_type='rural', season=None):
         """
         Generate complete dataset with authentic parameter ranges
@@ -452,82 +485,63 @@ class AuthenticWaterQualityGenerator:
             quality_distribution: Dict with quality targets and their proportions
                                  e.g., {'excellent': 0.3, 'good': 0.4, 'medium': 0.2, 'bad': 0.1}
             location_type: Type of location
+            season: Optional season whose patterns are applied to every sample
         
         Returns:
             pandas.DataFrame: Generated dataset
         """
-        if quality_distribution is None:
-            quality_distribution = {
-                'excellent': 0.25,
-                'good': 0.40,
-                'medium': 0.20,
-                'bad': 0.10,
-                'very_bad': 0.05
-            }
-        
-        # Generate quality targets for each sample
-        quality_targets = np.random.choice(
-            list(quality_distribution.keys()),
-            size=n_samples,
-            p=list(quality_distribution.values())
-        )
-        
-        # Generate timestamps (last year of data)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        timestamps = [start_date + timedelta(hours=i * (365 * 24 / n_samples)) for i in range(n_samples)]
-        
-        # Initialize data dict
-        data = {
-            'timestamp': timestamps,
-            'ph': [],
-            'bod': [],
-            'dissolved_oxygen': [],
-            'fecal_coliform': [],
-            'temperature': [],
-            'tds': [],
-            'turbidity': [],
-            'total_coliform': []
-        }
-        
-        # Generate parameters for each sample
-        for quality_target in quality_targets:
-            data['ph'].append(self.generate_parameter('ph', quality_target, location_type))
-            data['bod'].append(self.generate_parameter('bod', quality_target, location_type))
-            data['dissolved_oxygen'].append(self.generate_parameter('do', quality_target, location_type))
-            data['fecal_coliform'].append(self.generate_parameter('fc', quality_target, location_type))
-            data['temperature'].append(self.generate_parameter('temperature', quality_target, location_type))
-            data['tds'].append(self.generate_parameter('tds', quality_target, location_type))
-            data['turbidity'].append(self.generate_parameter('turbidity', quality_target, location_type))
-            data['total_coliform'].append(self.generate_parameter('total_coliform', quality_target, location_type))
-        
-        # Apply correlations
-        df = self.apply_parameter_correlations(data)
-        
-        # Apply seasonal patterns if specified
-        if season is not None:
-            df = self.apply_seasonal_patterns(df, season=season)
-        
-        # Calculate WQI for each sample
-        df['wqi'] = df.apply(
-            lambda row: self.calculate_wqi(
-                row['ph'],
-                row['bod'],
-                row['dissolved_oxygen'],
-                row['fecal_coliform'],
-                row['temperature']
-            ),
-            axis=1
-        )
+        return next(self.iter_dataset_chunks(
+            n_samples, chunk_size=max(n_samples, 1), quality_distribution=quality_distribution,
+            location_type=location_type, season=season
+        ), pd.DataFrame())
+    
+    def stream_dataset(self, path, n_samples, chunk_size=250_000, quality_distribution=None,
+                       location_type='rural', season=None, file_format=None):
+        """
+        Write a dataset larger than RAM to CSV or Parquet, one chunk at a time
         
-        # Add classifications
-        classifications = df['wqi'].apply(self.get_classification)
-        df['classification'] = [c['classification'] for c in classifications]
-        df['cpcb_class'] = [c['cpcbClass'] for c in classifications]
-        df['mpcb_class'] = [c['mpcbClass'] for c in classifications]
-        df['status'] = [c['status'] for c in classifications]
+        Args:
+            path: Output file (.csv or .parquet)
+            n_samples: Total number of samples
+            chunk_size: Samples generated and written per chunk
+            file_format: 'csv' or 'parquet' (default: from the file extension)
         
-        return df
+        Returns:
+            Dict with rows, chunks, bytes written and elapsed seconds
+        """
+        file_format = file_format or ('parquet' if path.endswith('.parquet') else 'csv')
+        if file_format == 'parquet' and not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Parquet output")
+        
+        start_time = time.perf_counter()
+        rows = chunks = 0
+        writer = None
+        try:
+            for chunk in self.iter_dataset_chunks(n_samples, chunk_size, quality_distribution,
+                                                  location_type, season):
+                if season is not None:
+                    chunk['season'] = season
+                if file_format == 'parquet':
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema, compression='snappy')
+                    writer.write_table(table)
+                else:
+                    chunk.to_csv(path, mode='w' if chunks == 0 else 'a', header=chunks == 0, index=False)
+                rows += len(chunk)
+                chunks += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        return {
+            'path': path,
+            'format': file_format,
+            'rows': rows,
+            'chunks': chunks,
+            'bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+            'seconds': round(time.perf_counter() - start_time, 2),
+        }
 
 
 def main():
@@ -674,4 +688,10 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) == 4 and sys.argv[1] == '--stream':
+        # e.g. python authentic_data_generator.py --stream 5000000 water_quality_5m.parquet
+        summary = AuthenticWaterQualityGenerator(seed=42).stream_dataset(sys.argv[3], int(sys.argv[2]))
+        print(f"✅ Wrote {summary['rows']:,} samples in {summary['chunks']} chunks to {summary['path']} "
+              f"({summary['bytes'] / 1e6:.1f} MB, {summary['seconds']:.1f}s)")
+    else:
+        main()
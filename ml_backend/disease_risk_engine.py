@@ -0,0 +1,608 @@
+"""
+Disease Risk Engine - Phase 5
+Scores waterborne and vector-borne disease risk for every live station on each tick
+
+HistoricalDataGenerator._calculate_disease_risks() scores one reading with
+if-chains. This engine applies the same rules to the whole network at once:
+- DISEASE_RISK_THRESHOLDS are compiled once into factor arrays (field,
+  threshold, scaling) and a factor -> disease matrix
+- Each tick, the (stations x fields) matrix of current readings is scored
+  for all diseases with array operations, plus the outbreak probability
+- Rolling high-risk-day counters per station and per district, kept in a
+  ring of daily flags so a tick only touches today's slot
+- Per-disease, outbreak and district rankings are computed once per tick;
+  /api/disease-risk/* serves slices of them
+"""
+
+import threading
+import time
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from generate_historical_disease_data import DISEASE_RISK_THRESHOLDS
+
+
+DISEASES = ['cholera', 'typhoid', 'dysentery', 'hepatitis_a', 'malaria', 'dengue', 'skin_infections']
+
+# Score at or above which a disease counts as high risk (as in
+# HistoricalDataGenerator._calculate_outbreak_probability)
+HIGH_RISK_THRESHOLD = 60
+
+# Number of high-risk diseases -> outbreak probability
+OUTBREAK_LEVELS = np.array(['very_low', 'low', 'medium', 'high'])
+OUTBREAK_SCORES = np.array([10, 35, 60, 85])
+
+DEFAULT_WINDOW_DAYS = 30
+
+# Raw reading fields, then the derived indices appended by _derived_fields()
+FIELDS = ['ph', 'turbidity', 'temperature', 'fecalColiform', 'totalColiform', 'nitrates', 'dissolvedOxygen']
+DERIVED_FIELDS = ['stagnationIndex', 'rainfallIndex']
+_reading_fields = itemgetter(*FIELDS, 'season')
+
+
+def _factor(disease: str, field: str, above: float = np.inf, below: float = -np.inf,
+            divisor: float = 1.0, shift: float = 0.0, constant: float = np.nan) -> Tuple:
+    """
+    One risk factor: contributes min((value - shift) / divisor, 1), or a
+    constant, when the field is above `above` or below `below`
+    """
+    return disease, field, above, below, divisor, shift, constant
+
+
+def build_factors(thresholds: Dict[str, Dict[str, float]] = DISEASE_RISK_THRESHOLDS) -> List[Tuple]:
+    """Factor table equivalent to HistoricalDataGenerator._calculate_disease_risks"""
+    t = thresholds
+    return [
+        _factor('cholera', 'fecalColiform', t['cholera']['fecalColiform'], divisor=500),
+        _factor('cholera', 'turbidity', t['cholera']['turbidity'], divisor=20),
+        _factor('cholera', 'ph', t['cholera']['ph_max'], t['cholera']['ph_min'], constant=0.5),
+        _factor('typhoid', 'fecalColiform', t['typhoid']['fecalColiform'], divisor=300),
+        _factor('typhoid', 'nitrates', t['typhoid']['nitrates'], divisor=50),
+        _factor('typhoid', 'totalColiform', t['typhoid']['totalColiform'], divisor=2000),
+        _factor('dysentery', 'fecalColiform', t['dysentery']['fecalColiform'], divisor=1000),
+        _factor('dysentery', 'turbidity', t['dysentery']['turbidity'], divisor=30),
+        _factor('hepatitis_a', 'fecalColiform', t['hepatitis_a']['fecalColiform'], divisor=100),
+        _factor('hepatitis_a', 'totalColiform', t['hepatitis_a']['totalColiform'], divisor=500),
+        _factor('malaria', 'stagnationIndex', t['malaria']['stagnation_index']),
+        _factor('malaria', 'temperature', t['malaria']['temperature'], divisor=15, shift=20),
+        _factor('dengue', 'stagnationIndex', t['dengue']['stagnation_index']),
+        _factor('dengue', 'temperature', t['dengue']['temperature'], divisor=15, shift=20),
+        _factor('dengue', 'rainfallIndex', t['dengue']['rainfall_index']),
+        _factor('skin_infections', 'turbidity', t['skin_infections']['turbidity'], divisor=50),
+        _factor('skin_infections', 'fecalColiform', t['skin_infections']['fecalColiform'], divisor=2000),
+    ]
+
+
+class DiseaseRiskEngine:
+    """Vectorized disease risk scoring, high-risk-day counters and rankings"""
+
+    def __init__(self, window_days: int = DEFAULT_WINDOW_DAYS,
+                 thresholds: Dict[str, Dict[str, float]] = DISEASE_RISK_THRESHOLDS):
+        """
+        Args:
+            window_days: Length of the rolling high-risk-day window
+            thresholds: Disease thresholds (DISEASE_RISK_THRESHOLDS layout)
+        """
+        self.window_days = window_days
+        self.diseases = list(DISEASES)
+        self.fields = FIELDS + DERIVED_FIELDS
+        self._compile_factors(build_factors(thresholds))
+
+        self._lock = threading.RLock()
+        self._stations: Dict[str, dict] = {}
+        self._table: Optional[Dict[str, Any]] = None
+
+        # Rows are assigned to stations (and districts) on first sight and kept
+        self._row: Dict[str, int] = {}
+        self._row_district = np.zeros(0, dtype=np.intp)
+        self._districts: List[str] = []
+        self._district_index: Dict[str, int] = {}
+        self._last_rows: Tuple[List[str], np.ndarray] = ([], np.zeros(0, dtype=np.intp))
+
+        # Ring of daily high-risk flags (slot = day ordinal % window) and
+        # the running sums over the ring
+        k = len(self.diseases)
+        self._station_flags = np.zeros((window_days, 0, k), dtype=bool)
+        self._station_days = np.zeros((0, k), dtype=np.int32)
+        self._district_flags = np.zeros((window_days, 0, k), dtype=bool)
+        self._district_days = np.zeros((0, k), dtype=np.int32)
+        self._day: Optional[int] = None
+
+        self.ticks_processed = 0
+        self.last_tick = None
+        self.last_tick_seconds = 0.0
+
+    def _compile_factors(self, factors: List[Tuple]):
+        """Factor table as arrays aligned with self.fields and self.diseases"""
+        self.factor_fields = np.array([self.fields.index(f[1]) for f in factors])
+        self.factor_above = np.array([f[2] for f in factors], dtype=float)
+        self.factor_below = np.array([f[3] for f in factors], dtype=float)
+        self.factor_divisor = np.array([f[4] for f in factors], dtype=float)
+        self.factor_shift = np.array([f[5] for f in factors], dtype=float)
+        self.factor_constant = np.array([f[6] for f in factors], dtype=float)
+        self.factor_matrix = np.zeros((len(factors), len(self.diseases)))
+        for i, factor in enumerate(factors):
+            self.factor_matrix[i, self.diseases.index(factor[0])] = 1.0
+
+    # ==================== SCORING ====================
+
+    @staticmethod
+    def _derived_fields(values: np.ndarray, seasons: np.ndarray, day_of_month: int) -> np.ndarray:
+        """
+        Stagnation and rainfall indices, which live readings do not carry
+
+        Same formulas as HistoricalDataGenerator, from the live turbidity and
+        dissolved oxygen. Stations without DO (groundwater) get no stagnation
+        index. The generator draws the non-monsoon rainfall index at random;
+        the midpoint of its range is used here.
+        """
+        turbidity, do = values[:, FIELDS.index('turbidity')], values[:, FIELDS.index('dissolvedOxygen')]
+        monsoon = seasons == 'Monsoon'
+        stagnation = (np.minimum(turbidity / 50.0, 1.0) + np.maximum(0.0, (8 - do) / 8.0)) / 2
+        stagnation = np.clip(np.where(monsoon, stagnation * 0.5, stagnation), 0, 1)
+
+        monsoon_rain = min(max(0.7 + np.sin(day_of_month * np.pi / 30) * 0.3, 0), 1)
+        rainfall = np.select([monsoon, seasons == 'Post-Monsoon'], [monsoon_rain, 0.3], 0.05)
+        return np.column_stack([stagnation, rainfall])
+
+    def score(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Disease scores and outbreak probability of every row
+
+        Args:
+            values: (stations x self.fields) values, NaN where missing
+
+        Returns:
+            Dict of arrays: scores (stations x diseases, 0-100), high-risk
+            mask, high-risk disease count, outbreak level index and score
+        """
+        X = values[:, self.factor_fields]
+        with np.errstate(invalid='ignore'):
+            active = (X > self.factor_above) | (X < self.factor_below)
+            contribution = np.where(np.isnan(self.factor_constant),
+                                    np.minimum((X - self.factor_shift) / self.factor_divisor, 1.0),
+                                    self.factor_constant)
+            contribution = np.where(active, contribution, 0.0)
+        # Mean of the active factors of each disease (0 when none is active)
+        totals = contribution @ self.factor_matrix
+        counts = active.astype(float) @ self.factor_matrix
+        scores = np.floor(totals / np.maximum(counts, 1) * 100).astype(np.int16)
+
+        high = scores >= HIGH_RISK_THRESHOLD
+        disease_count = high.sum(axis=1)
+        outbreak = np.minimum(disease_count, 3)
+        return {
+            'scores': scores,
+            'high': high,
+            'diseaseCount': disease_count,
+            'outbreakLevel': outbreak,
+            'outbreakScore': OUTBREAK_SCORES[outbreak],
+        }
+
+    # ==================== INGESTION ====================
+
+    def attach(self, station_service) -> 'DiseaseRiskEngine':
+        """
+        Score the service's current readings, then rescore on every tick
+
+        Args:
+            station_service: EnhancedLiveStationService instance
+        """
+        self._stations = {station_service._get_station_id(s): s for s in station_service.stations}
+        if station_service.current_readings:
+            self.ingest(station_service.current_readings, station_service.last_update)
+        station_service.add_tick_listener(self.on_tick)
+        print(f"🦠 Disease risk engine attached: {len(self._stations)} stations")
+        return self
+
+    def on_tick(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """Tick listener for EnhancedLiveStationService"""
+        self.ingest(readings, timestamp)
+
+    def _rows(self, station_ids: List[str]) -> np.ndarray:
+        """Counter rows of the stations, growing the arrays for new ones"""
+        if station_ids == self._last_rows[0]:
+            return self._last_rows[1]
+        new_ids = [sid for sid in station_ids if sid not in self._row]
+        if new_ids:
+            start = len(self._row)
+            districts = []
+            for offset, sid in enumerate(new_ids):
+                self._row[sid] = start + offset
+                district = self._stations.get(sid, {}).get('district') or 'Unknown'
+                if district not in self._district_index:
+                    self._district_index[district] = len(self._districts)
+                    self._districts.append(district)
+                districts.append(self._district_index[district])
+            self._row_district = np.concatenate([self._row_district, np.array(districts, dtype=np.intp)])
+
+            k = len(self.diseases)
+            grow = len(new_ids)
+            self._station_flags = np.concatenate(
+                [self._station_flags, np.zeros((self.window_days, grow, k), dtype=bool)], axis=1)
+            self._station_days = np.concatenate([self._station_days, np.zeros((grow, k), dtype=np.int32)])
+            grow = len(self._districts) - self._district_days.shape[0]
+            if grow:
+                self._district_flags = np.concatenate(
+                    [self._district_flags, np.zeros((self.window_days, grow, k), dtype=bool)], axis=1)
+                self._district_days = np.concatenate([self._district_days, np.zeros((grow, k), dtype=np.int32)])
+        rows = np.fromiter((self._row[sid] for sid in station_ids), dtype=np.intp, count=len(station_ids))
+        self._last_rows = (station_ids, rows)
+        return rows
+
+    def _advance_to(self, day: int):
+        """Drop the days that left the window before counting `day`"""
+        if self._day is None or day <= self._day:
+            # First tick, same day, or a clock step back (counted as the current day)
+            self._day = day if self._day is None else self._day
+            return
+        if day - self._day >= self.window_days:
+            self._station_flags[:] = False
+            self._station_days[:] = 0
+            self._district_flags[:] = False
+            self._district_days[:] = 0
+        else:
+            for d in range(self._day + 1, day + 1):
+                slot = d % self.window_days
+                self._station_days -= self._station_flags[slot]
+                self._station_flags[slot] = False
+                self._district_days -= self._district_flags[slot]
+                self._district_flags[slot] = False
+        self._day = day
+
+    @staticmethod
+    def _count_today(flags: np.ndarray, days: np.ndarray, rows, high: np.ndarray):
+        """Set today's flags and count each (row, disease) once per day"""
+        newly_high = high & ~flags[rows]
+        days[rows] += newly_high
+        flags[rows] |= high
+
+    def ingest(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """
+        Score every station, update the high-risk-day counters and rank
+
+        Args:
+            readings: station_id -> reading dictionary
+            timestamp: Tick time (its date is the counting day)
+        """
+        start = time.perf_counter()
+        timestamp = timestamp or datetime.now().isoformat()
+        tick_time = datetime.fromisoformat(timestamp)
+
+        station_ids = list(readings)
+        try:
+            raw = list(map(_reading_fields, readings.values()))
+        except KeyError:
+            raw = [tuple(r.get(f) for f in FIELDS + ['season']) for r in readings.values()]
+        seasons = np.array([row[-1] or '' for row in raw])
+        try:
+            values = np.array([row[:-1] for row in raw], dtype=float).reshape(len(raw), len(FIELDS))
+        except (TypeError, ValueError):
+            values = np.array([[self._to_float(v) for v in row[:-1]] for row in raw],
+                              dtype=float).reshape(len(raw), len(FIELDS))
+        values = np.hstack([values, self._derived_fields(values, seasons, tick_time.day)])
+
+        result = self.score(values)
+        high = result['high']
+
+        with self._lock:
+            rows = self._rows(station_ids)
+            self._advance_to(tick_time.date().toordinal())
+            slot = self._day % self.window_days
+
+            self._count_today(self._station_flags[slot], self._station_days, rows, high)
+
+            # District: high-risk day when any of its stations is at high risk
+            district_codes = self._row_district[rows]
+            n_districts = len(self._districts)
+            high_stations = np.column_stack([
+                np.bincount(district_codes, weights=high[:, k], minlength=n_districts)
+                for k in range(len(self.diseases))
+            ]).astype(np.int32)
+            self._count_today(self._district_flags[slot], self._district_days,
+                              slice(None), high_stations > 0)
+
+            station_days = self._station_days[rows].copy()
+            district_days = self._district_days.copy()
+
+        scores = result['scores']
+        max_score = scores.max(axis=1, initial=0)
+        # Worst first: score, then high-risk days in the window
+        disease_order = np.stack([np.lexsort((-station_days[:, k], -scores[:, k]))
+                                  for k in range(len(self.diseases))])
+        outbreak_order = np.lexsort((-station_days.sum(axis=1), -max_score, -result['diseaseCount']))
+
+        district_sizes = np.bincount(district_codes, minlength=n_districts)
+        district_scores = np.column_stack([
+            np.bincount(district_codes, weights=scores[:, k], minlength=n_districts)
+            for k in range(len(self.diseases))
+        ]) / np.maximum(district_sizes, 1)[:, None]
+        district_order = np.stack([np.lexsort((-district_scores[:, k], -high_stations[:, k], -district_days[:, k]))
+                                   for k in range(len(self.diseases))])
+        overall_order = np.lexsort((-high_stations.sum(axis=1), -district_days.sum(axis=1)))
+
+        previous = self._table
+        if previous is not None and previous['stationIds'] == station_ids:
+            index = previous['index']
+        else:
+            index = {sid: i for i, sid in enumerate(station_ids)}
+
+        table = {
+            'stationIds': station_ids,
+            'index': index,
+            'values': values,
+            'stationDays': station_days,
+            'diseaseOrder': disease_order,
+            'outbreakOrder': outbreak_order,
+            'maxScore': max_score,
+            'districtCodes': district_codes,
+            'districts': list(self._districts),
+            'districtSizes': district_sizes,
+            'districtScores': district_scores,
+            'districtHighStations': high_stations,
+            'districtDays': district_days,
+            'districtOrder': district_order,
+            'districtOverallOrder': overall_order,
+            'highRiskStations': dict(zip(self.diseases, high.sum(axis=0).tolist())),
+            'outbreakCounts': dict(zip(
+                OUTBREAK_LEVELS.tolist(),
+                np.bincount(result['outbreakLevel'], minlength=len(OUTBREAK_LEVELS)).tolist())),
+            'timestamp': timestamp,
+            **result
+        }
+
+        with self._lock:
+            self._table = table
+            self.ticks_processed += 1
+            self.last_tick = timestamp
+            self.last_tick_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    # ==================== QUERIES ====================
+
+    def _disease_index(self, disease: Optional[str]) -> Optional[int]:
+        if disease is None:
+            return None
+        name = disease.lower().replace('-', '_')
+        if name not in self.diseases:
+            raise ValueError(f"Unknown disease '{disease}'. Expected one of: {', '.join(self.diseases)}")
+        return self.diseases.index(name)
+
+    def _outbreak(self, table: Dict[str, Any], i: int) -> Dict[str, Any]:
+        """Outbreak probability in the HistoricalDataGenerator format"""
+        return {
+            'level': str(OUTBREAK_LEVELS[table['outbreakLevel'][i]]),
+            'score': int(table['outbreakScore'][i]),
+            'high_risk_diseases': [d for d, h in zip(self.diseases, table['high'][i]) if h],
+            'disease_count': int(table['diseaseCount'][i]),
+        }
+
+    def _station_row(self, table: Dict[str, Any], i: int, rank: int) -> Dict[str, Any]:
+        station_id = table['stationIds'][i]
+        station = self._stations.get(station_id, {})
+        return {
+            'rank': rank,
+            'stationId': station_id,
+            'name': station.get('name'),
+            'district': station.get('district'),
+            'type': station.get('type'),
+            'diseaseRisks': dict(zip(self.diseases, table['scores'][i].tolist())),
+            'highRiskDays': dict(zip(self.diseases, table['stationDays'][i].tolist())),
+            'outbreakProbability': self._outbreak(table, i),
+        }
+
+    def _district_row(self, table: Dict[str, Any], d: int, rank: int) -> Dict[str, Any]:
+        return {
+            'rank': rank,
+            'district': table['districts'][d],
+            'stations': int(table['districtSizes'][d]),
+            'averageRisks': dict(zip(self.diseases, np.round(table['districtScores'][d], 1).tolist())),
+            'highRiskStations': dict(zip(self.diseases, table['districtHighStations'][d].tolist())),
+            'highRiskDays': dict(zip(self.diseases, table['districtDays'][d].tolist())),
+        }
+
+    def _empty(self, key: str) -> Dict[str, Any]:
+        return {key: [], 'timestamp': None, 'windowDays': self.window_days}
+
+    def top(self, disease: Optional[str] = None, n: int = 10, district: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stations most at risk in the latest tick
+
+        Args:
+            disease: Rank by this disease's score (None = outbreak probability)
+            n: Number of stations
+            district: Only stations of this district
+
+        Raises:
+            ValueError: Unknown disease
+        """
+        k = self._disease_index(disease)
+        with self._lock:
+            table = self._table
+        if table is None:
+            return self._empty('stations')
+
+        order = table['outbreakOrder'] if k is None else table['diseaseOrder'][k]
+        if district:
+            names = np.array([name.lower() for name in table['districts']])
+            order = order[names[table['districtCodes'][order]] == district.lower()]
+        return {
+            'disease': None if k is None else self.diseases[k],
+            'stations': [self._station_row(table, i, rank) for rank, i in enumerate(order[:max(n, 0)], 1)],
+            'timestamp': table['timestamp'],
+            'windowDays': self.window_days,
+            'totalStations': len(order),
+            'highRiskStations': table['highRiskStations'],
+            'outbreakCounts': table['outbreakCounts'],
+        }
+
+    def districts(self, disease: Optional[str] = None, n: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Districts ranked by high-risk days, then stations at high risk now
+
+        Args:
+            disease: Rank by this disease (None = all diseases combined)
+            n: Number of districts (None = all)
+
+        Raises:
+            ValueError: Unknown disease
+        """
+        k = self._disease_index(disease)
+        with self._lock:
+            table = self._table
+        if table is None:
+            return self._empty('districts')
+
+        order = table['districtOverallOrder'] if k is None else table['districtOrder'][k]
+        order = order[table['districtSizes'][order] > 0]
+        if n is not None:
+            order = order[:max(n, 0)]
+        return {
+            'disease': None if k is None else self.diseases[k],
+            'districts': [self._district_row(table, d, rank) for rank, d in enumerate(order, 1)],
+            'timestamp': table['timestamp'],
+            'windowDays': self.window_days,
+        }
+
+    def station(self, station_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Disease risks of one live station
+
+        Returns:
+            Risk dictionary with per-disease network ranks, or None for an
+            unknown station
+        """
+        with self._lock:
+            table = self._table
+        if table is None or station_id not in table['index']:
+            return None
+
+        i = table['index'][station_id]
+        ranks = {
+            disease: int(np.flatnonzero(table['diseaseOrder'][k] == i)[0]) + 1
+            for k, disease in enumerate(self.diseases)
+        }
+        row = self._station_row(table, i, int(np.flatnonzero(table['outbreakOrder'] == i)[0]) + 1)
+        row.update({
+            'networkRanks': ranks,
+            'networkSize': len(table['stationIds']),
+            'stagnationIndex': self._round(table['values'][i, self.fields.index('stagnationIndex')]),
+            'rainfallIndex': self._round(table['values'][i, self.fields.index('rainfallIndex')]),
+            'timestamp': table['timestamp'],
+            'windowDays': self.window_days,
+        })
+        return row
+
+    @staticmethod
+    def _round(value: float) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 3)
+
+    def status(self) -> Dict[str, Any]:
+        """Engine counters for the API"""
+        with self._lock:
+            table = self._table
+            return {
+                'stations': len(table['stationIds']) if table else 0,
+                'districts': len(self._districts),
+                'diseases': self.diseases,
+                'highRiskThreshold': HIGH_RISK_THRESHOLD,
+                'windowDays': self.window_days,
+                'ticksProcessed': self.ticks_processed,
+                'lastTick': self.last_tick,
+                'lastTickSeconds': round(self.last_tick_seconds, 4),
+                'highRiskStations': table['highRiskStations'] if table else {},
+                'outbreakCounts': table['outbreakCounts'] if table else {},
+            }
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_engine_instance = None
+
+
+def get_disease_risk_engine(station_service=None, window_days: int = DEFAULT_WINDOW_DAYS) -> DiseaseRiskEngine:
+    """
+    Get the process-wide disease risk engine
+
+    Args:
+        station_service: Attached on first call so the engine follows its ticks
+        window_days: Rolling high-risk-day window
+    """
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = DiseaseRiskEngine(window_days)
+        if station_service is not None:
+            _engine_instance.attach(station_service)
+    return _engine_instance
+
+
+if __name__ == '__main__':
+    print("=== Disease Risk Engine - Phase 5 ===\n")
+
+    from datetime import timedelta
+    from generate_historical_disease_data import HistoricalDataGenerator
+
+    rng = np.random.default_rng(0)
+    stations = 4495
+    seasons = ['Pre-Monsoon', 'Monsoon', 'Post-Monsoon', 'Winter']
+
+    def make_readings():
+        return {
+            f'ST{i:04d}': {
+                'ph': float(rng.normal(7.4, 0.7)), 'turbidity': float(rng.gamma(2, 8)),
+                'temperature': float(rng.normal(27, 3)), 'fecalColiform': int(rng.gamma(1.2, 250)),
+                'totalColiform': int(rng.gamma(1.5, 800)), 'nitrates': float(rng.gamma(3, 8)),
+                'dissolvedOxygen': float(rng.normal(5.5, 1.5)) if i % 3 else None,
+                'season': seasons[i % 4],
+            }
+            for i in range(stations)
+        }
+
+    engine = DiseaseRiskEngine()
+    engine._stations = {f'ST{i:04d}': {'district': f'District {i % 36}'} for i in range(stations)}
+    day = datetime(2025, 7, 1, 6, 0)
+    readings = make_readings()
+    engine.ingest(readings, day.isoformat())
+
+    runs = []
+    for tick in range(1, 97 * 3):
+        readings = make_readings()
+        start = time.perf_counter()
+        engine.ingest(readings, (day + timedelta(minutes=15 * tick)).isoformat())
+        runs.append(time.perf_counter() - start)
+    print(f"Tick for {stations} stations: median {np.median(runs) * 1000:.1f} ms, "
+          f"max {max(runs) * 1000:.1f} ms over {len(runs)} ticks (3 days)")
+
+    start = time.perf_counter()
+    top = engine.top('cholera', 10)
+    districts = engine.districts(n=5)
+    print(f"Top 10 cholera + top 5 districts served in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Same readings through the generator's per-reading if-chains
+    generator = HistoricalDataGenerator()
+    table = engine._table
+    start = time.perf_counter()
+    mismatches = 0
+    for i, (station_id, reading) in enumerate(readings.items()):
+        reading = dict(reading, stagnationIndex=table['values'][i, -2], rainfallIndex=table['values'][i, -1])
+        reading['dissolvedOxygen'] = reading['dissolvedOxygen'] or np.nan
+        reference = generator._calculate_disease_risks(reading)
+        mismatches += any(reference[d] != table['scores'][i, k] for k, d in enumerate(engine.diseases))
+    print(f"Per-reading generator loop: {(time.perf_counter() - start) * 1000:.1f} ms | "
+          f"stations with any score mismatch: {mismatches}")
+
+    print(f"High-risk stations now: {engine.status()['highRiskStations']}")
+    for row in top['stations'][:3]:
+        print(f"  #{row['rank']} {row['stationId']} {row['district']} cholera={row['diseaseRisks']['cholera']} "
+              f"days={row['highRiskDays']['cholera']} outbreak={row['outbreakProbability']['level']}")
+    for row in districts['districts'][:3]:
+        print(f"  #{row['rank']} {row['district']} days={row['highRiskDays']}")
@@ -10,17 +10,20 @@ Implements realistic water quality monitoring with:
 - Time-based Fluctuations
 - Pollution Events
 - Complete Parameter Suite (20+ parameters)
+- Threshold Alerts with Hysteresis (alert_engine.py)
 - Laboratory Network
 - Water Quality Classification
 """
 
 import threading
 import time
+import uuid
 import datetime
 import random
 import json
 import math
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
 
@@ -31,6 +34,8 @@ from enum import Enum
 
 # NEW: Using complete Maharashtra network from station_loader
 from station_loader import get_stations_by_district, ALL_STATIONS
+from alert_engine import get_alert_engine
+import wqi_kernel
 
 
 class Season(Enum):
@@ -51,6 +56,16 @@ class WaterQualityClass(Enum):
     UNFIT = "Unfit for any use"
 
 
+# Change feed: ticks kept in the change log (one day of 15-minute ticks),
+# width of the WQI buckets a change is reported for, and the tracked fields
+CHANGE_LOG_TICKS = 96
+WQI_BUCKET_SIZE = 5
+CHANGE_FIELDS = ('status', 'waterQualityClass', 'wqiBucket', 'alerts')
+
+# Labels of wqi_kernel.USE_CLASS_BANDS (A..E, Unfit)
+WATER_QUALITY_CLASSES = [water_class.value for water_class in WaterQualityClass]
+
+
 @dataclass
 class WaterQualityReading:
     """Complete water quality reading with all parameters"""
@@ -126,13 +141,29 @@ class EnhancedLiveStationService:
         self.historical_data = {}
         self.is_running = False
         self.update_thread = None
+        self._start_lock = threading.Lock()
         self.update_interval = 900  # 15 minutes
         self.last_update = None
         self.test_mode = test_mode
         self.test_district = test_district
+        self.tick_listeners = []  # Called with the readings of every update
+        self.alert_engine = get_alert_engine()
+        
+        # Change feed: tick_seq increases by one per update of all stations;
+        # change_log holds (seq, timestamp, {station_id: changed fields}).
+        # Clients get '<epoch>:<seq>' cursors: tick_seq restarts at 0 with the
+        # process, the epoch tells a pre-restart cursor apart
+        self.epoch = uuid.uuid4().hex[:8]
+        self.tick_seq = 0
+        self.change_log = deque(maxlen=CHANGE_LOG_TICKS)
+        self._change_keys = {}
+        self._alert_signatures = {}
+        self._change_lock = threading.Lock()
         
         # Initialize complete station network
         self._initialize_comprehensive_stations()
+        self.station_index = {self._get_station_id(s): s for s in self.stations}
+        self.alert_engine.register_stations(self.stations, self._get_station_id)
         
         # Start automatic updates
         self.start_simulation()
@@ -610,213 +641,22 @@ class EnhancedLiveStationService:
             alerts=[]
         )
         
-        # Calculate WQI and status
-        reading.wqi = self._calculate_comprehensive_wqi(reading)
-        reading.waterQualityClass = self._determine_water_class(reading, station).value
-        reading.status = self._determine_status(reading.wqi)
-        reading.alerts = self._check_comprehensive_alerts(reading, station)
+        # WQI, class and status are scored a batch at a time (_score_readings);
+        # reading.alerts is filled in by the alert engine once the whole tick is in
         
         return reading
     
-    def _calculate_comprehensive_wqi(self, reading: WaterQualityReading) -> float:
-        """
-        Calculate Water Quality Index using CPCB methodology
-        Weighted average of key parameters
-        """
-        weights = {
-            'ph': 0.10,
-            'dissolvedOxygen': 0.15,
-            'bod': 0.12,
-            'turbidity': 0.10,
-            'tds': 0.10,
-            'nitrates': 0.08,
-            'fecalColiform': 0.15,
-            'totalColiform': 0.10,
-            'fluoride': 0.05,
-            'iron': 0.05,
-        }
-        
-        # Calculate sub-indices (0-100 scale)
-        sub_indices = {}
-        
-        # pH (optimal: 7.0-8.5)
-        if 6.5 <= reading.ph <= 8.5:
-            sub_indices['ph'] = 100
-        elif 6.0 <= reading.ph <= 9.0:
-            sub_indices['ph'] = 80
-        else:
-            sub_indices['ph'] = 50
-        
-        # Dissolved Oxygen (higher is better)
-        if reading.dissolvedOxygen:
-            if reading.dissolvedOxygen >= 6.0:
-                sub_indices['dissolvedOxygen'] = 100
-            elif reading.dissolvedOxygen >= 4.0:
-                sub_indices['dissolvedOxygen'] = 70
-            else:
-                sub_indices['dissolvedOxygen'] = 40
-        else:
-            sub_indices['dissolvedOxygen'] = 80  # Default for groundwater
-        
-        # BOD (lower is better)
-        if reading.bod:
-            if reading.bod <= 3.0:
-                sub_indices['bod'] = 100
-            elif reading.bod <= 6.0:
-                sub_indices['bod'] = 70
-            else:
-                sub_indices['bod'] = 40
-        else:
-            sub_indices['bod'] = 80
-        
-        # Turbidity (lower is better)
-        if reading.turbidity <= 5:
-            sub_indices['turbidity'] = 100
-        elif reading.turbidity <= 10:
-            sub_indices['turbidity'] = 80
-        else:
-            sub_indices['turbidity'] = 50
-        
-        # TDS (lower is better)
-        if reading.tds <= 500:
-            sub_indices['tds'] = 100
-        elif reading.tds <= 1000:
-            sub_indices['tds'] = 75
-        else:
-            sub_indices['tds'] = 50
-        
-        # Nitrates (lower is better)
-        if reading.nitrates <= 10:
-            sub_indices['nitrates'] = 100
-        elif reading.nitrates <= 45:
-            sub_indices['nitrates'] = 70
-        else:
-            sub_indices['nitrates'] = 40
-        
-        # Fecal Coliform (lower is better)
-        if reading.fecalColiform <= 10:
-            sub_indices['fecalColiform'] = 100
-        elif reading.fecalColiform <= 100:
-            sub_indices['fecalColiform'] = 70
-        else:
-            sub_indices['fecalColiform'] = 30
-        
-        # Total Coliform
-        if reading.totalColiform <= 50:
-            sub_indices['totalColiform'] = 100
-        elif reading.totalColiform <= 500:
-            sub_indices['totalColiform'] = 70
-        else:
-            sub_indices['totalColiform'] = 40
-        
-        # Fluoride (1.0-1.5 optimal)
-        if 0.6 <= reading.fluoride <= 1.5:
-            sub_indices['fluoride'] = 100
-        elif reading.fluoride <= 2.0:
-            sub_indices['fluoride'] = 70
-        else:
-            sub_indices['fluoride'] = 40
-        
-        # Iron (lower is better)
-        if reading.iron <= 0.3:
-            sub_indices['iron'] = 100
-        elif reading.iron <= 1.0:
-            sub_indices['iron'] = 75
-        else:
-            sub_indices['iron'] = 50
-        
-        # Calculate weighted WQI
-        wqi = sum(sub_indices[param] * weights[param] for param in weights.keys())
-        
-        return round(wqi, 2)
-    
-    def _determine_water_class(self, reading: WaterQualityReading, station: dict) -> WaterQualityClass:
-        """Determine CPCB water quality class"""
-        wqi = reading.wqi
-        
-        if wqi >= 90:
-            return WaterQualityClass.CLASS_A
-        elif wqi >= 75:
-            return WaterQualityClass.CLASS_B
-        elif wqi >= 60:
-            return WaterQualityClass.CLASS_C
-        elif wqi >= 45:
-            return WaterQualityClass.CLASS_D
-        elif wqi >= 30:
-            return WaterQualityClass.CLASS_E
-        else:
-            return WaterQualityClass.UNFIT
-    
-    def _determine_status(self, wqi: float) -> str:
-        """Determine water quality status"""
-        if wqi >= 80:
-            return "Excellent"
-        elif wqi >= 65:
-            return "Good"
-        elif wqi >= 50:
-            return "Moderate"
-        elif wqi >= 35:
-            return "Poor"
-        else:
-            return "Very Poor"
-    
-    def _check_comprehensive_alerts(self, reading: WaterQualityReading, station: dict) -> List[str]:
-        """Check for parameter threshold violations"""
-        alerts = []
-        
-        # pH
-        if reading.ph < 6.5 or reading.ph > 8.5:
-            alerts.append(f"pH out of range: {reading.ph} (safe: 6.5-8.5)")
-        
-        # Dissolved Oxygen
-        if reading.dissolvedOxygen and reading.dissolvedOxygen < 4.0:
-            alerts.append(f"Low Dissolved Oxygen: {reading.dissolvedOxygen} mg/L (min: 4.0)")
-        
-        # Turbidity
-        if reading.turbidity > 10:
-            alerts.append(f"High Turbidity: {reading.turbidity} NTU (max: 10)")
-        
-        # TDS
-        if reading.tds > 500:
-            alerts.append(f"High TDS: {reading.tds} mg/L (max: 500)")
-        
-        # Nitrates
-        if reading.nitrates > 45:
-            alerts.append(f"High Nitrates: {reading.nitrates} mg/L (max: 45)")
-        
-        # Fluoride
-        if reading.fluoride > 1.5:
-            alerts.append(f"High Fluoride: {reading.fluoride} mg/L (max: 1.5)")
-        elif reading.fluoride < 0.6:
-            alerts.append(f"Low Fluoride: {reading.fluoride} mg/L (min: 0.6)")
-        
-        # Iron
-        if reading.iron > 1.0:
-            alerts.append(f"High Iron: {reading.iron} mg/L (max: 1.0)")
-        
-        # Heavy Metals
-        if reading.arsenic > 0.01:
-            alerts.append(f"⚠️ CRITICAL: Arsenic: {reading.arsenic} mg/L (max: 0.01)")
-        if reading.lead > 0.01:
-            alerts.append(f"⚠️ CRITICAL: Lead: {reading.lead} mg/L (max: 0.01)")
-        if reading.chromium > 0.05:
-            alerts.append(f"High Chromium: {reading.chromium} mg/L (max: 0.05)")
-        if reading.cadmium > 0.003:
-            alerts.append(f"⚠️ CRITICAL: Cadmium: {reading.cadmium} mg/L (max: 0.003)")
-        
-        # Microbiological
-        if reading.fecalColiform > 100:
-            alerts.append(f"⚠️ High Fecal Coliform: {reading.fecalColiform} MPN/100ml (max: 100)")
-        if reading.totalColiform > 500:
-            alerts.append(f"High Total Coliform: {reading.totalColiform} MPN/100ml (max: 500)")
-        
-        # BOD/COD
-        if reading.bod and reading.bod > 6.0:
-            alerts.append(f"High BOD: {reading.bod} mg/L (max: 6.0)")
-        if reading.cod and reading.cod > 30:
-            alerts.append(f"High COD: {reading.cod} mg/L (max: 30)")
-        
-        return alerts
+    def _score_readings(self, readings: List[dict]):
+        """Fill in WQI, CPCB class and status of a batch of readings with one vectorized call"""
+        if not readings:
+            return
+        wqi = wqi_kernel.score_records(readings, 'banded')
+        classes = wqi_kernel.classify(wqi, (wqi_kernel.USE_CLASS_BANDS[0], WATER_QUALITY_CLASSES))
+        statuses = wqi_kernel.classify(wqi, wqi_kernel.BANDED_STATUS_BANDS)
+        for reading, value, water_class, status in zip(readings, wqi.tolist(), classes, statuses):
+            reading['wqi'] = value
+            reading['waterQualityClass'] = water_class
+            reading['status'] = status
     
     def _get_station_id(self, station: dict) -> str:
         """Get station ID supporting both old ('id') and new ('station_id') format"""
@@ -829,31 +669,113 @@ class EnhancedLiveStationService:
         
         print(f"🔄 Updating {total} stations in batches of {batch_size}...")
         
+        # The tick is built aside and published once its alerts are in, so
+        # readers never see a reading without its alerts
+        tick_readings = {}
         for i in range(0, total, batch_size):
             batch = self.stations[i:i + batch_size]
+            readings = [asdict(self._generate_realistic_reading(station)) for station in batch]
+            self._score_readings(readings)
             
-            for station in batch:
-                reading = self._generate_realistic_reading(station)
-                station_id = self._get_station_id(station)
-                self.current_readings[station_id] = asdict(reading)
-                
-                # Store historical data
-                if station_id not in self.historical_data:
-                    self.historical_data[station_id] = []
-                
-                self.historical_data[station_id].append(asdict(reading))
-                
-                # Keep last 100 readings
-                if len(self.historical_data[station_id]) > 100:
-                    self.historical_data[station_id] = self.historical_data[station_id][-100:]
+            for station, reading in zip(batch, readings):
+                tick_readings[self._get_station_id(station)] = reading
             
             # Log progress for large batches
             if total > 1000:
                 progress = min(i + batch_size, total)
                 print(f"   Progress: {progress}/{total} ({progress*100//total}%)")
         
-        self.last_update = datetime.datetime.now().isoformat()
+        timestamp = datetime.datetime.now().isoformat()
+        self._update_alerts(tick_readings, timestamp)
+        
+        self.current_readings.update(tick_readings)
+        for station_id, reading in tick_readings.items():
+            # Store historical data
+            if station_id not in self.historical_data:
+                self.historical_data[station_id] = []
+            
+            self.historical_data[station_id].append(reading)
+            
+            # Keep last 100 readings
+            if len(self.historical_data[station_id]) > 100:
+                self.historical_data[station_id] = self.historical_data[station_id][-100:]
+        
+        self.last_update = timestamp
+        self._record_changes()
         print(f"✅ Batch update complete at {self.last_update}")
+        
+        self._notify_tick_listeners()
+    
+    def _update_alerts(self, readings: Dict[str, dict], timestamp: str):
+        """Run a tick through the alert engine and store each station's active alerts in its reading"""
+        events = self.alert_engine.ingest(readings, timestamp)
+        station_ids, _ = self.alert_engine.stations_with_alerts()
+        signatures = {}
+        for station_id in station_ids:
+            alerts = self.alert_engine.station_alerts(station_id)
+            signatures[station_id] = tuple(sorted((alert.rule, alert.severity) for alert in alerts))
+            reading = readings.get(station_id)
+            if reading is not None:
+                reading['alerts'] = [alert.message for alert in alerts]
+        self._alert_signatures = signatures
+        if events:
+            raised = sum(1 for e in events if e.kind == 'raised')
+            cleared = sum(1 for e in events if e.kind == 'cleared')
+            print(f"🚨 Alerts: {raised} raised, {cleared} cleared, {len(events) - raised - cleared} changed severity")
+    
+    def _change_key(self, station_id: str, reading: dict) -> tuple:
+        """Values a change is reported for, in CHANGE_FIELDS order"""
+        wqi = reading.get('wqi')
+        return (
+            reading.get('status'),
+            reading.get('waterQualityClass'),
+            None if wqi is None else int(wqi // WQI_BUCKET_SIZE),
+            self._alert_signatures.get(station_id, ()),
+        )
+    
+    def _record_changes(self):
+        """Advance tick_seq and log the stations whose status, class, WQI bucket or alerts changed"""
+        previous = self._change_keys
+        keys = {}
+        changes = {}
+        for station_id, reading in self.current_readings.items():
+            key = self._change_key(station_id, reading)
+            keys[station_id] = key
+            old = previous.get(station_id)
+            if old != key:
+                changes[station_id] = CHANGE_FIELDS if old is None else tuple(
+                    field for field, before, after in zip(CHANGE_FIELDS, old, key) if before != after
+                )
+        
+        with self._change_lock:
+            self.tick_seq += 1
+            self.change_log.append((self.tick_seq, self.last_update, changes))
+            self._change_keys = keys
+        print(f"🔁 Tick {self.tick_seq}: {len(changes)} of {len(keys)} stations changed")
+    
+    def add_tick_listener(self, listener: Callable[[Dict[str, dict], str], None]):
+        """
+        Register a callback run after every update of all stations
+        
+        Args:
+            listener: Called as listener(readings, timestamp) with the
+                station_id -> reading dictionary of the update
+        """
+        if listener not in self.tick_listeners:
+            self.tick_listeners.append(listener)
+    
+    def remove_tick_listener(self, listener: Callable[[Dict[str, dict], str], None]):
+        """Unregister a tick callback"""
+        if listener in self.tick_listeners:
+            self.tick_listeners.remove(listener)
+    
+    def _notify_tick_listeners(self):
+        """Hand the latest readings to every tick listener"""
+        for listener in list(self.tick_listeners):
+            try:
+                listener(self.current_readings, self.last_update)
+            except Exception as e:
+                print(f"❌ Tick listener error: {str(e)}")
     
     def _background_update_loop(self):
         """Background thread for automatic updates with smart timing"""
@@ -887,9 +809,16 @@ class EnhancedLiveStationService:
             # Sleep until next update
             time.sleep(self.update_interval)
     
-    def start_simulation(self, update_interval: int = 900):
-        """Start the monitoring simulation"""
-        if not self.is_running:
+    def start_simulation(self, update_interval: int = 900) -> bool:
+        """
+        Start the monitoring simulation
+        
+        Returns:
+            False when it was already running (the call is a no-op)
+        """
+        with self._start_lock:
+            if self.is_running:
+                return False
             self.update_interval = update_interval
             self.is_running = True
             
@@ -906,6 +835,7 @@ class EnhancedLiveStationService:
             surface_count = len([s for s in self.stations if s['type'] == 'surface_water'])
             groundwater_count = len(self.stations) - surface_count
             print(f"   Monitoring: {surface_count} Surface Water + {groundwater_count} Groundwater Stations")
+            return True
     
     def stop_simulation(self):
         """Stop the monitoring simulation"""
@@ -949,7 +879,7 @@ class EnhancedLiveStationService:
     
     def get_station_by_id(self, station_id: str) -> Optional[dict]:
         """Get complete station details"""
-        station = next((s for s in self.stations if self._get_station_id(s) == station_id), None)
+        station = self.station_index.get(station_id)
         if station:
             current_reading = self.current_readings.get(station_id)
             return {
@@ -959,6 +889,15 @@ class EnhancedLiveStationService:
             }
         return None
     
+    def get_station_data(self, station_id: str) -> Optional[dict]:
+        """Current reading of one station"""
+        return self.current_readings.get(station_id)
+    
+    def get_all_station_data(self) -> List[dict]:
+        """Current readings of all stations, in station list order"""
+        readings = (self.current_readings.get(self._get_station_id(s)) for s in self.stations)
+        return [reading for reading in readings if reading is not None]
+    
     def get_all_current_data(self) -> dict:
         """Get current readings for all stations"""
         return {
@@ -967,6 +906,79 @@ class EnhancedLiveStationService:
             'readings': self.current_readings
         }
     
+    def change_cursor(self, seq: Optional[int] = None) -> str:
+        """Client-facing change feed position of a tick: '<epoch>:<seq>'"""
+        return f"{self.epoch}:{self.tick_seq if seq is None else seq}"
+    
+    def _cursor_seq(self, cursor: Optional[str]) -> Optional[int]:
+        """tick_seq of a cursor issued by this process, else None"""
+        epoch, separator, seq = str(cursor or '').partition(':')
+        if separator and epoch == self.epoch and seq.isdigit():
+            return int(seq)
+        return None
+    
+    def get_changes(self, since: Optional[str], full: bool = False) -> Dict[str, Any]:
+        """
+        Stations that changed after the tick of cursor `since`
+        
+        Changes of several ticks are merged; every station is reported once
+        with its current values and the union of its changed fields.
+        
+        Args:
+            since: Last seq cursor ('<epoch>:<seq>') the client has seen
+            full: Include each changed station's complete current reading
+        
+        Returns:
+            Dict with seq (cursor of the current tick), tick (its number),
+            minSince (oldest cursor still served), resync (True when `since`
+            is older than the change log, from another process or unknown -
+            fetch everything again) and the changed stations
+        """
+        since_seq = self._cursor_seq(since)
+        with self._change_lock:
+            seq = self.tick_seq
+            oldest = self.change_log[0][0] if self.change_log else seq + 1
+            min_since = oldest - 1 if self.change_log else seq
+            resync = since_seq is None or since_seq > seq or since_seq < min_since
+            changed = {}
+            if not resync:
+                for entry_seq, _, changes in reversed(self.change_log):
+                    if entry_seq <= since_seq:
+                        break
+                    for station_id, fields in changes.items():
+                        changed.setdefault(station_id, set()).update(fields)
+        
+        items = []
+        for station_id in sorted(changed):
+            reading = self.current_readings.get(station_id)
+            if reading is None:
+                continue
+            alerts = reading.get('alerts') or []
+            item = {
+                'id': station_id,
+                'wqi': reading.get('wqi'),
+                'status': reading.get('status'),
+                'waterClass': reading.get('waterQualityClass'),
+                'hasAlerts': len(alerts) > 0,
+                'alertCount': len(alerts),
+                'changed': [field for field in CHANGE_FIELDS if field in changed[station_id]],
+                'timestamp': reading.get('timestamp'),
+            }
+            if full:
+                item['reading'] = reading
+            items.append(item)
+        
+        return {
+            'seq': self.change_cursor(seq),
+            'tick': seq,
+            'since': since,
+            'resync': resync,
+            'minSince': self.change_cursor(min_since),
+            'count': len(items),
+            'changes': items,
+            'lastUpdate': self.last_update,
+        }
+    
     def get_stations_by_district(self, district: str) -> List[dict]:
         """Get all stations in a district"""
         matching_stations = [s for s in self.stations if s['district'].lower() == district.lower()]
@@ -996,19 +1008,34 @@ class EnhancedLiveStationService:
                 })
         return result
     
-    def get_stations_with_alerts(self) -> List[dict]:
-        """Get all stations with active alerts"""
+    def get_stations_by_status(self, status: str) -> List[dict]:
+        """Get stations by current status (Excellent / Good / Moderate / Poor / Very Poor)"""
+        wanted = status.lower().replace('_', ' ')
         result = []
         for station in self.stations:
-            station_id = self._get_station_id(station)
-            reading = self.current_readings.get(station_id)
-            if reading and reading.get('alerts'):
+            reading = self.current_readings.get(self._get_station_id(station))
+            if reading and reading['status'].lower() == wanted:
                 result.append({
                     'station': station,
-                    'currentReading': reading,
-                    'alertCount': len(reading['alerts'])
+                    'currentReading': reading
                 })
-        return sorted(result, key=lambda x: x['alertCount'], reverse=True)
+        return result
+    
+    def get_stations_with_alerts(self, severity: Optional[str] = None, district: Optional[str] = None,
+                                 parameter: Optional[str] = None) -> List[dict]:
+        """Get all stations with active alerts, most alerts first"""
+        station_ids, _ = self.alert_engine.stations_with_alerts(severity, district, parameter)
+        return [self.get_station_alerts(station_id) for station_id in station_ids]
+    
+    def get_station_alerts(self, station_id: str) -> dict:
+        """Station, current reading and typed active alerts of one station"""
+        alerts = self.alert_engine.station_alerts(station_id)
+        return {
+            'station': self.station_index.get(station_id),
+            'currentReading': self.current_readings.get(station_id),
+            'alertCount': len(alerts),
+            'alerts': [alert.to_dict() for alert in alerts]
+        }
     
     def get_summary_statistics(self) -> dict:
         """Get comprehensive summary statistics"""
@@ -1030,8 +1057,9 @@ class EnhancedLiveStationService:
             class_counts[wclass] = class_counts.get(wclass, 0) + 1
         
         # Count alerts
-        total_alerts = sum(len(r.get('alerts', [])) for r in readings)
-        stations_with_alerts = len([r for r in readings if r.get('alerts')])
+        alert_summary = self.alert_engine.summary()
+        total_alerts = alert_summary['totalAlerts']
+        stations_with_alerts = alert_summary['stationsWithAlerts']
         
         # Average WQI
         wqi_values = [r['wqi'] for r in readings]
@@ -1065,6 +1093,7 @@ class EnhancedLiveStationService:
             'waterClassDistribution': class_counts,
             'totalAlerts': total_alerts,
             'stationsWithAlerts': stations_with_alerts,
+            'alertsBySeverity': alert_summary['bySeverity'],
             'regionStatistics': region_stats,
             'currentSeason': self._get_current_season().value
         }
@@ -18,9 +18,14 @@ class EnhancedPredictionService:
     Provides 7/30/90-day forecasts with confidence intervals and anomaly detection
     """
     
-    def __init__(self):
-        self.ml_models = WaterQualityMLModels()
-        self._load_models()
+    def __init__(self, model_registry=None):
+        # With a registry, models are shared process-wide and hot-reloaded;
+        # without one, this instance loads its own copy from disk
+        self.model_registry = model_registry
+        self._ml_models = None
+        if model_registry is None:
+            self._ml_models = WaterQualityMLModels()
+            self._load_models()
         
         # CPCB thresholds for water quality
         self.thresholds = {
@@ -33,12 +38,19 @@ class EnhancedPredictionService:
             'temperature': {'min': 20, 'max': 30, 'optimal': 25, 'unit': '°C'}
         }
     
+    @property
+    def ml_models(self) -> WaterQualityMLModels:
+        """Current model set (re-resolved from the registry on every use)"""
+        if self.model_registry is not None:
+            return self.model_registry.get_models()
+        return self._ml_models
+    
     def _load_models(self):
         """Load trained ML models"""
         try:
             models_dir = os.path.join(os.path.dirname(__file__), 'models')
             if os.path.exists(os.path.join(models_dir, 'wqi_model.pkl')):
-                self.ml_models.load_models()
+                self._ml_models.load_models()
                 print("✓ ML models loaded successfully")
             else:
                 print("⚠️ ML models not found. Please train models first.")
@@ -69,30 +81,76 @@ class EnhancedPredictionService:
                 days_ahead=horizons,
                 season=season
             )
-            
-            # Enrich predictions with additional analysis
-            enhanced_forecast = {
-                'timestamp': datetime.now().isoformat(),
-                'season': season,
-                'current_conditions': self._analyze_current_conditions(current_data),
-                'forecasts': self._format_forecasts(predictions, horizons),
-                'trends': predictions.get('trends', {}),
-                'anomalies': predictions.get('anomalies', []),
-                'recommendations': self._generate_recommendations(predictions),
-                'risk_assessment': self._assess_risk(predictions),
-                'metadata': {
-                    'model_version': 'Phase 5 - Multi-Parameter',
-                    'training_samples': 1900,
-                    'forecast_horizons': horizons
-                }
-            }
-            
-            return convert_to_serializable(enhanced_forecast)
+            return self._enhance_forecast(current_data, predictions, season, horizons)
             
         except Exception as e:
             print(f"Error generating forecast: {e}")
             return self._fallback_prediction(current_data, horizons)
     
+    def generate_network_forecast(
+        self,
+        stations_data: Dict[Any, Dict[str, float]],
+        season: str = 'monsoon',
+        horizons: List[int] = [7, 30, 90]
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        Generate forecasts for many stations with one batched model pass
+        
+        Args:
+            stations_data: Mapping of station_id to current parameters
+            season: Current season (monsoon, summer, winter, post_monsoon)
+            horizons: Forecast horizons in days (default: 7, 30, 90)
+        
+        Returns:
+            Mapping of station_id to the same forecast format as
+            generate_multi_parameter_forecast
+        """
+        station_ids = list(stations_data.keys())
+        if not station_ids:
+            return {}
+        
+        try:
+            # Resolve the model set once: the registry lookup (and its change check)
+            # is not repeated per station, and the whole batch uses one model version
+            models = self.ml_models
+            network = models.predict_network(
+                pd.DataFrame([stations_data[sid] for sid in station_ids]),
+                days_ahead=horizons,
+                season=season
+            )
+        except Exception as e:
+            print(f"Error generating network forecast: {e}")
+            return {sid: self._fallback_prediction(stations_data[sid], horizons) for sid in station_ids}
+        
+        forecasts = {}
+        for index, station_id in enumerate(station_ids):
+            current_data = stations_data[station_id]
+            predictions = models.station_predictions(network, index, current_data)
+            forecasts[station_id] = self._enhance_forecast(current_data, predictions, season, horizons)
+        
+        return forecasts
+    
+    def _enhance_forecast(self, current_data: Dict[str, float], predictions: Dict,
+                          season: str, horizons: List[int]) -> Dict[str, Any]:
+        """Enrich raw model predictions with analysis and recommendations"""
+        enhanced_forecast = {
+            'timestamp': datetime.now().isoformat(),
+            'season': season,
+            'current_conditions': self._analyze_current_conditions(current_data),
+            'forecasts': self._format_forecasts(predictions, horizons),
+            'trends': predictions.get('trends', {}),
+            'anomalies': predictions.get('anomalies', []),
+            'recommendations': self._generate_recommendations(predictions),
+            'risk_assessment': self._assess_risk(predictions),
+            'metadata': {
+                'model_version': 'Phase 5 - Multi-Parameter',
+                'training_samples': 1900,
+                'forecast_horizons': horizons
+            }
+        }
+        
+        return convert_to_serializable(enhanced_forecast)
+    
     def _format_forecasts(self, predictions: Dict, horizons: List[int]) -> Dict[str, Any]:
         """Format ML predictions into structured forecast"""
         forecasts = {}
@@ -2,7 +2,12 @@ import pandas as pd
 import csv
 import json
 from io import StringIO, BytesIO
-import PyPDF2
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
 
 class FileParser:
     """Parse CSV, Excel, PDF files for water quality data"""
@@ -28,6 +33,8 @@ class FileParser:
     @staticmethod
     def parse_pdf(file_bytes):
         """Extract tables from PDF"""
+        if not PYPDF2_AVAILABLE:
+            raise Exception("PDF parsing requires PyPDF2 (pip install PyPDF2)")
         try:
             tables = []
             pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
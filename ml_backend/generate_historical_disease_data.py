@@ -16,6 +16,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List
 import os
 
+import wqi_kernel
+
+# wqi_kernel.USE_CLASS_BANDS with this generator's labels
+WATER_CLASS_BANDS = (
+    wqi_kernel.USE_CLASS_BANDS[0],
+    [f'Class {c}' if c != 'Unfit' else c for c in wqi_kernel.USE_CLASS_BANDS[1]]
+)
+
 # Disease risk thresholds based on water quality parameters
 DISEASE_RISK_THRESHOLDS = {
     'cholera': {
@@ -94,6 +102,15 @@ class HistoricalDataGenerator:
             
             readings.append(reading)
         
+        # WQI, status and class of the whole year in one vectorized pass
+        wqi = wqi_kernel.score_records(readings, 'ratio')
+        statuses = wqi_kernel.classify(wqi, wqi_kernel.RATIO_STATUS_BANDS)
+        classes = wqi_kernel.classify(wqi, WATER_CLASS_BANDS)
+        for reading, value, status, water_class in zip(readings, wqi.tolist(), statuses, classes):
+            reading['wqi'] = value
+            reading['status'] = status
+            reading['waterQualityClass'] = water_class
+        
         return readings
     
     def _get_baseline_params(self, station_type: str, district: str) -> Dict:
@@ -250,11 +267,7 @@ class HistoricalDataGenerator:
             'rainfallIndex': self._get_rainfall_index(season, date),
         }
         
-        # Calculate WQI
-        reading['wqi'] = self._calculate_wqi(reading)
-        reading['status'] = self._get_status(reading['wqi'])
-        reading['waterQualityClass'] = self._get_water_class(reading['wqi'])
-        
+        # WQI, status and class are scored per station history (wqi_kernel)
         return reading
     
     def _calculate_stagnation_index(self, turbidity: float, do: float, season: str) -> float:
@@ -377,45 +390,6 @@ class HistoricalDataGenerator:
             'high_risk_diseases': high_risk_diseases,
             'disease_count': len(high_risk_diseases)
         }
-    
-    def _calculate_wqi(self, reading: Dict) -> float:
-        """Calculate Water Quality Index"""
-        # Simplified WQI calculation
-        do_score = min(reading['dissolvedOxygen'] / 8.0, 1.0) * 100
-        ph_score = (1 - abs(reading['ph'] - 7.0) / 7.0) * 100
-        turb_score = max(0, (1 - reading['turbidity'] / 50.0)) * 100
-        coliform_score = max(0, (1 - reading['fecalColiform'] / 1000.0)) * 100
-        
-        wqi = (do_score + ph_score + turb_score + coliform_score) / 4
-        return round(wqi, 1)
-    
-    def _get_status(self, wqi: float) -> str:
-        """Get water quality status from WQI"""
-        if wqi >= 80:
-            return 'good'
-        elif wqi >= 60:
-            return 'moderate'
-        elif wqi >= 40:
-            return 'poor'
-        elif wqi >= 20:
-            return 'very_poor'
-        else:
-            return 'critical'
-    
-    def _get_water_class(self, wqi: float) -> str:
-        """Get water quality class"""
-        if wqi >= 90:
-            return 'Class A'
-        elif wqi >= 75:
-            return 'Class B'
-        elif wqi >= 60:
-            return 'Class C'
-        elif wqi >= 45:
-            return 'Class D'
-        elif wqi >= 30:
-            return 'Class E'
-        else:
-            return 'Unfit'
 
 
 def generate_all_stations_historical_data():
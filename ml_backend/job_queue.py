@@ -0,0 +1,637 @@
+"""
+Job Queue - Phase 5
+Runs AI analysis and PDF report generation outside the request thread
+
+Features:
+- Persistent SQLite job table (WAL mode): queued jobs survive a restart and
+  other processes (the WebSocket server) can follow job progress
+- Bounded pool of persistent worker processes; a worker whose job exceeds
+  its timeout, or is cancelled, is killed outright and replaced
+- Only the dispatcher thread writes the job table; workers report progress
+  and results over a pipe
+- Identical inputs are deduplicated by a content hash of (kind, payload):
+  queued/running jobs are shared, completed analyses are reused for a few
+  minutes, and jobs that produce files are never reused once finished
+- Finished jobs are purged from the table by the dispatcher after a day
+- Progress is written by the worker itself (fraction + stage)
+- Completion is pushed to WebSocket clients by websocket_server.py, which
+  polls the same job table
+"""
+
+import hashlib
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from utils import convert_to_serializable
+
+
+# Anchored to this directory so the API and the WebSocket server share one table
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'jobs.db')
+DEFAULT_TIMEOUT = 300  # seconds
+FINAL_STATUSES = ('completed', 'failed', 'cancelled', 'timeout')
+# A completed job is reused for identical input only this long (models are hot-reloaded)
+COMPLETED_REUSE_SECONDS = 600
+# Kinds whose result is a file in the reports folder, which may be deleted later;
+# only their queued/running jobs are shared
+FILE_JOB_KINDS = ('pdf_report', 'district_reports')
+# Final jobs are deleted from the table after this long, checked every PURGE_INTERVAL
+JOB_RETENTION_SECONDS = 24 * 3600
+PURGE_INTERVAL = 3600
+
+
+def canonical_payload(payload: Dict[str, Any]) -> str:
+    """Key-order independent JSON of a job input"""
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def payload_hash(kind: str, canonical: str) -> str:
+    """Content hash of a job input"""
+    return hashlib.sha256(f"{kind}\n{canonical}".encode('utf-8')).hexdigest()
+
+
+class JobStore:
+    """SQLite job table shared by the API process, workers and the WebSocket server"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0,
+            stage TEXT,
+            payload TEXT,
+            result TEXT,
+            error TEXT,
+            timeout REAL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_input ON jobs (kind, input_hash);
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated_at);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def create(self, kind: str, payload: Dict[str, Any], timeout: float,
+               reuse_completed: float = COMPLETED_REUSE_SECONDS) -> Dict[str, Any]:
+        """
+        Insert a queued job, or return the active job with the same input
+
+        Args:
+            reuse_completed: Also return a job with the same input that completed
+                within this many seconds (0: only queued/running jobs)
+
+        Returns:
+            Job dictionary with 'deduplicated' set when an existing job is reused
+        """
+        canonical = canonical_payload(payload)
+        digest = payload_hash(kind, canonical)
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND input_hash = ? AND (status IN ('queued', 'running') "
+                "OR (status = 'completed' AND finished_at >= ?)) ORDER BY created_at DESC LIMIT 1",
+                (kind, digest, now - reuse_completed if reuse_completed > 0 else float('inf'))
+            ).fetchone()
+            if existing:
+                conn.execute('COMMIT')
+                return {**self._to_dict(existing), 'deduplicated': True}
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, input_hash, status, payload, timeout, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, digest, canonical, timeout, now, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return {**self.get(job_id), 'deduplicated': False}
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row, include_result) if row else None
+
+    def payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute('SELECT payload FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row['payload']) if row and row['payload'] else None
+
+    def claim_queued(self, limit: int) -> List[Dict[str, Any]]:
+        """Mark up to limit queued jobs as running, oldest first"""
+        if limit <= 0:
+            return []
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT ?", (limit,)
+            ).fetchall()
+            now = time.time()
+            conn.executemany(
+                "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? WHERE id = ?",
+                [(now, now, row['id']) for row in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [{**self._to_dict(row, include_result=False), 'status': 'running', 'started_at': now}
+                for row in rows]
+
+    def progress(self, job_id: str, fraction: float, stage: str):
+        self._connect().execute(
+            "UPDATE jobs SET progress = ?, stage = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+            (round(float(fraction), 3), stage, time.time(), job_id)
+        )
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> bool:
+        """
+        Move a job to a final status; False if it was already final
+
+        result must already be JSON-serializable (workers convert it)
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, progress = CASE WHEN ? = 'completed' THEN 1 ELSE progress END, "
+            "finished_at = ?, updated_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (status, None if result is None else json.dumps(result, default=str),
+             error, status, now, now, job_id)
+        )
+        return cursor.rowcount > 0
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left 'running' by a previous process go back to the queue"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'queued', progress = 0, stage = 'requeued', updated_at = ? WHERE status = 'running'",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+    def updates_since(self, since: float, limit: int = 500) -> List[Dict[str, Any]]:
+        """Jobs changed after a timestamp, without results (for push notifications)"""
+        rows = self._connect().execute(
+            'SELECT * FROM jobs WHERE updated_at > ? ORDER BY updated_at LIMIT ?', (since, limit)
+        ).fetchall()
+        return [self._to_dict(row, include_result=False) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connect().execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def purge(self, older_than: float) -> int:
+        """Delete final jobs that finished more than older_than seconds ago"""
+        cursor = self._connect().execute(
+            f"DELETE FROM jobs WHERE status IN {FINAL_STATUSES} AND finished_at < ?",
+            (time.time() - older_than,)
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool = True) -> Dict[str, Any]:
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'progress': row['progress'],
+            'stage': row['stage'],
+            'error': row['error'],
+            'timeout': row['timeout'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'updated_at': row['updated_at'],
+        }
+        if include_result and row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        return job
+
+
+# ==================== JOB HANDLERS ====================
+# Run inside the worker process; module level so every start method can import them
+
+_worker_services: Dict[str, Any] = {}
+
+
+def _worker_service(name: str, factory: Callable[[], Any]) -> Any:
+    if name not in _worker_services:
+        _worker_services[name] = factory()
+    return _worker_services[name]
+
+
+def run_ai_analysis(payload: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, Any]:
+    """Full AIAnalysisService report of the posted file data"""
+    from ai_analysis_service import AIAnalysisService
+    service = _worker_service('ai_analysis', AIAnalysisService)
+    return service.analyze_file(payload['file_data'], payload.get('location'), progress=progress)
+
+
+def run_pdf_report(payload: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, Any]:
+    """ReportLab PDF of an analysis into the reports folder"""
+    from report_generator import ReportGenerator
+    generator = _worker_service('report_generator', ReportGenerator)
+
+    progress(0.05, 'rendering')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"water_quality_report_{timestamp}_{uuid.uuid4().hex[:6]}.pdf"
+    output_path = os.path.join(payload.get('reports_folder', 'reports'), filename)
+    generator.generate_comprehensive_report(payload['analysis_data'], output_path)
+
+    return {
+        'success': True,
+        'filename': filename,
+        'download_url': f'/api/reports/download/{filename}',
+        'file_size': os.path.getsize(output_path),
+        'generated_at': datetime.now().isoformat()
+    }
+
+
+def run_district_reports(payload: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, Any]:
+    """Per-district report bundles from district summaries built by the API process"""
+    from report_generator import generate_district_reports
+
+    # Job workers are daemonic and cannot start a process pool of their own
+    manifest = generate_district_reports(payload['summaries'], payload['output_dir'], workers=1,
+                                         progress=progress)
+    return {**manifest, 'download_url': f"/api/reports/download/{manifest['bundle']}"}
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Callable[[float, str], None]], Any]] = {
+    'ai_analysis': run_ai_analysis,
+    'pdf_report': run_pdf_report,
+    'district_reports': run_district_reports,
+}
+
+
+def _worker_main(conn):
+    """
+    Worker process loop
+
+    Workers never touch SQLite (connections must not be shared across a
+    fork); progress and outcomes go back to the dispatcher over the pipe.
+    """
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        job_id, kind, payload = message
+        try:
+            result = JOB_HANDLERS[kind](
+                payload, lambda fraction, stage: conn.send(('progress', job_id, fraction, stage))
+            )
+            conn.send(('completed', job_id, convert_to_serializable(result)))
+        except Exception as e:
+            conn.send(('failed', job_id, f"{type(e).__name__}: {e}"))
+
+
+# ==================== QUEUE ====================
+
+class JobQueue:
+    """Dispatches queued jobs to a bounded pool of worker processes"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_workers: Optional[int] = None,
+                 default_timeout: float = DEFAULT_TIMEOUT, poll_interval: float = 0.05):
+        self.db_path = db_path
+        self._store: Optional[JobStore] = None
+        self.max_workers = max_workers or max(2, min(4, os.cpu_count() or 1))
+        self.default_timeout = default_timeout
+        self.poll_interval = poll_interval
+        # fork reuses the already imported services; spawn works everywhere
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(method)
+
+        self._workers: List[Dict[str, Any]] = []
+        self._cancel_requests = set()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        # Submissions wake the dispatcher through a pipe it waits on with the workers
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0,
+                      'timeouts': 0, 'cancelled': 0, 'workers_replaced': 0}
+
+    @property
+    def store(self) -> JobStore:
+        """Job table, opened (and created) on first use rather than at import"""
+        if self._store is None:
+            with self._start_lock:
+                if self._store is None:
+                    self._store = JobStore(self.db_path)
+        return self._store
+
+    def start(self) -> 'JobQueue':
+        """Requeue interrupted jobs and start the dispatcher (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        store = self.store
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            requeued = store.requeue_interrupted()
+            if requeued:
+                print(f"♻️ Requeued {requeued} interrupted jobs")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+            self._thread.start()
+            print(f"⚙️ Job queue started: {self.max_workers} workers, db {store.db_path}")
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout)
+        for worker in self._workers:
+            if worker['job_id']:
+                self.store.finish(worker['job_id'], 'cancelled', error='Job queue stopped')
+            self._terminate(worker)
+        self._workers = []
+
+    def submit(self, kind: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Queue a job and return immediately
+
+        Args:
+            kind: Key of JOB_HANDLERS
+            payload: JSON-serializable job input
+            timeout: Seconds of run time before the worker is killed
+
+        Returns:
+            Job dictionary (the existing job when deduplicated)
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        reuse = 0 if kind in FILE_JOB_KINDS else COMPLETED_REUSE_SECONDS
+        job = self.store.create(kind, payload, timeout or self.default_timeout, reuse_completed=reuse)
+        with self._lock:
+            self.stats['submitted'] += 1
+            if job['deduplicated']:
+                self.stats['deduplicated'] += 1
+        if not job['deduplicated']:
+            self._wake()
+        return job
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id, include_result)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; a running worker is killed"""
+        cancelled = self.store.finish(job_id, 'cancelled', error='Cancelled by user')
+        if cancelled:
+            with self._lock:
+                self.stats['cancelled'] += 1
+                self._cancel_requests.add(job_id)
+            self._wake()
+        return cancelled
+
+    def wait(self, job_id: str, timeout: float = 60, interval: float = 0.05) -> Optional[Dict[str, Any]]:
+        """Block until a job is final (for scripts and tests)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.store.get(job_id)
+            if job and job['status'] in FINAL_STATUSES:
+                return job
+            time.sleep(interval)
+        return self.store.get(job_id)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            'workers': self.max_workers,
+            'busy': sum(1 for w in self._workers if w['job_id']),
+            'jobs': self.store.counts(),
+            'stats': stats,
+        }
+
+    # ==================== DISPATCHER ====================
+
+    def _dispatch_loop(self):
+        next_purge = time.time()
+        while not self._stop.is_set():
+            try:
+                self._collect()
+                self._enforce_deadlines()
+                self._assign()
+                if time.time() >= next_purge:
+                    next_purge = time.time() + PURGE_INTERVAL
+                    purged = self.store.purge(JOB_RETENTION_SECONDS)
+                    if purged:
+                        print(f"🧹 Purged {purged} finished jobs")
+            except Exception as e:
+                print(f"❌ Job dispatcher error: {str(e)}")
+            # Sleep until a worker reports, a job is submitted or the poll interval passes
+            ready = multiprocessing.connection.wait(
+                [self._wake_reader] + [w['conn'] for w in self._workers], self.poll_interval
+            )
+            while self._wake_reader in ready and self._wake_reader.poll():
+                self._wake_reader.recv_bytes()
+
+    def _wake(self):
+        try:
+            self._wake_writer.send_bytes(b'')
+        except OSError:
+            pass
+
+    def _spawn_worker(self) -> Dict[str, Any]:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), name='job-worker', daemon=True)
+        process.start()
+        child_conn.close()
+        return {'process': process, 'conn': parent_conn, 'job_id': None, 'deadline': None}
+
+    def _terminate(self, worker: Dict[str, Any]):
+        process = worker['process']
+        process.terminate()
+        process.join(2)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        worker['conn'].close()
+
+    def _replace(self, worker: Dict[str, Any]):
+        self._terminate(worker)
+        self._workers.remove(worker)
+        with self._lock:
+            self.stats['workers_replaced'] += 1
+
+    def _collect(self):
+        """Record progress and outcomes reported by the workers"""
+        for worker in list(self._workers):
+            try:
+                while worker['conn'].poll():
+                    message = worker['conn'].recv()
+                    if message[0] == 'progress':
+                        _, job_id, fraction, stage = message
+                        self.store.progress(job_id, fraction, stage)
+                        continue
+                    status, job_id, outcome = message
+                    if status == 'completed':
+                        recorded = self.store.finish(job_id, 'completed', result=outcome)
+                    else:
+                        recorded = self.store.finish(job_id, 'failed', error=outcome)
+                    if recorded:
+                        with self._lock:
+                            self.stats[status] += 1
+                    worker['job_id'] = worker['deadline'] = None
+            except (EOFError, OSError):
+                pass
+            if not worker['process'].is_alive():
+                # The worker died without reporting an outcome
+                if worker['job_id']:
+                    if self.store.finish(worker['job_id'], 'failed',
+                                         error=f"Worker exited with code {worker['process'].exitcode}"):
+                        with self._lock:
+                            self.stats['failed'] += 1
+                self._replace(worker)
+
+    def _enforce_deadlines(self):
+        """Kill workers running a cancelled job or one past its timeout"""
+        with self._lock:
+            cancelled, self._cancel_requests = self._cancel_requests, set()
+        now = time.time()
+        for worker in list(self._workers):
+            job_id = worker['job_id']
+            if not job_id:
+                continue
+            if job_id in cancelled:
+                self._replace(worker)
+            elif now > worker['deadline']:
+                if self.store.finish(job_id, 'timeout', error='Job exceeded its timeout'):
+                    with self._lock:
+                        self.stats['timeouts'] += 1
+                self._replace(worker)
+
+    def _assign(self):
+        """Hand queued jobs to idle workers, starting workers as needed"""
+        idle = [w for w in self._workers if not w['job_id']]
+        missing = self.max_workers - len(self._workers)
+        jobs = self.store.claim_queued(len(idle) + missing)
+        for job in jobs:
+            if idle:
+                worker = idle.pop()
+            else:
+                worker = self._spawn_worker()
+                self._workers.append(worker)
+            payload = self.store.payload(job['id'])
+            timeout = job.get('timeout') or self.default_timeout
+            worker['job_id'], worker['deadline'] = job['id'], time.time() + timeout
+            worker['conn'].send((job['id'], job['kind'], payload))
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_queue_instance = None
+
+
+def get_job_queue(db_path: Optional[str] = None, max_workers: Optional[int] = None) -> JobQueue:
+    """Get or create the process-wide job queue (its table and dispatcher start on first submit)"""
+    global _queue_instance
+    if _queue_instance is None:
+        _queue_instance = JobQueue(db_path or os.environ.get('JOB_DB_PATH', DEFAULT_DB_PATH),
+                                   max_workers=max_workers)
+    return _queue_instance
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description='Job queue throughput benchmark')
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--unique', type=int, default=40, help='Distinct inputs among the jobs')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("=== Job Queue - Phase 5 ===\n")
+    rng = np.random.default_rng(0)
+
+    def file_data(seed: int) -> Dict[str, Any]:
+        r = np.random.default_rng(seed)
+        return {'file_name': f'upload_{seed}.csv', 'data': {
+            'pH': np.round(r.normal(7.2, 0.4, args.rows), 2).tolist(),
+            'DO': np.round(r.normal(6.0, 1.0, args.rows), 2).tolist(),
+            'BOD': np.round(r.gamma(2, 1.5, args.rows), 2).tolist(),
+            'turbidity': np.round(r.gamma(2, 2, args.rows), 2).tolist(),
+            'temperature': np.round(r.normal(26, 2, args.rows), 2).tolist(),
+        }}
+
+    payloads = [{'file_data': file_data(i % args.unique), 'location': None} for i in range(args.jobs)]
+
+    # Synchronous baseline: what /api/ai/analyze does inside the request
+    from ai_analysis_service import AIAnalysisService
+    service = AIAnalysisService()
+    start = time.perf_counter()
+    for payload in payloads[:5]:
+        service.analyze_file(payload['file_data'])
+    per_request = (time.perf_counter() - start) / 5
+    print(f"Inline analysis: {per_request * 1000:.0f} ms per request "
+          f"-> {per_request * args.jobs:.1f}s for {args.jobs} requests on one worker thread")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, 'jobs.db'), max_workers=args.workers).start()
+
+        def submit(payload):
+            t = time.perf_counter()
+            job = queue.submit('ai_analysis', payload)
+            return job, time.perf_counter() - t
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            submitted = list(pool.map(submit, payloads))
+        submit_wall = time.perf_counter() - start
+        latencies = sorted(latency for _, latency in submitted)
+        unique_ids = {job['id'] for job, _ in submitted}
+
+        for job_id in unique_ids:
+            queue.wait(job_id, timeout=600)
+        total = time.perf_counter() - start
+
+        print(f"\n{args.jobs} concurrent submissions ({len(unique_ids)} distinct after dedupe, "
+              f"{queue.max_workers} workers, {os.cpu_count()} CPUs)")
+        print(f"   Submit latency: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms (all accepted in {submit_wall:.2f}s)")
+        print(f"   All jobs finished in {total:.1f}s -> {args.jobs / total:.1f} requests/s")
+        print(f"   {queue.status()}")
+
+        # Timeout handling
+        queue.default_timeout = 0.01
+        slow = queue.submit('ai_analysis', {'file_data': file_data(10_000), 'location': None})
+        print(f"   Timed-out job: {queue.wait(slow['id'])['status']}")
+        queue.stop()
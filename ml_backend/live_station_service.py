@@ -11,6 +11,8 @@ from typing import Dict, List, Optional
 import threading
 import json
 
+import wqi_kernel
+
 
 class LiveStationService:
     """
@@ -529,52 +531,6 @@ class LiveStationService:
         """Generate random variation within range"""
         return (random.random() - 0.5) * 2 * range_val
     
-    def _calculate_wqi(self, params: Dict) -> float:
-        """Calculate Water Quality Index based on parameters"""
-        ph = params['pH']
-        turbidity = params['turbidity']
-        do_ = params['dissolvedOxygen']
-        tds = params['tds']
-        bod = params['bod']
-        chlorides = params['chlorides']
-        nitrates = params['nitrates']
-        
-        # Ideal pH is 7.0
-        ph_index = 100 - (abs(ph - 7.0) / 1.5 * 100)
-        ph_index = max(0, min(100, ph_index))
-        
-        # Calculate sub-indices
-        turbidity_index = max(0, 100 - (turbidity / 50.0 * 100))
-        do_index = min(100, (do_ / 12.0) * 100)
-        tds_index = max(0, 100 - (tds / 1500.0 * 100))
-        bod_index = max(0, 100 - (bod / 20.0 * 100))
-        chlorides_index = max(0, 100 - (chlorides / 600.0 * 100))
-        nitrates_index = max(0, 100 - (nitrates / 50.0 * 100))
-        
-        # Weighted average
-        wqi = (ph_index * 0.20 + 
-               turbidity_index * 0.15 + 
-               do_index * 0.20 + 
-               tds_index * 0.15 + 
-               bod_index * 0.10 + 
-               chlorides_index * 0.10 + 
-               nitrates_index * 0.10)
-        
-        return max(0, min(100, wqi))
-    
-    def _get_water_quality_status(self, wqi: float) -> str:
-        """Get water quality status based on WQI"""
-        if wqi >= 90:
-            return 'Excellent'
-        elif wqi >= 70:
-            return 'Good'
-        elif wqi >= 50:
-            return 'Fair'
-        elif wqi >= 25:
-            return 'Poor'
-        else:
-            return 'Very Poor'
-    
     def _check_alerts(self, params: Dict) -> List[str]:
         """Check for parameter alerts"""
         alerts = []
@@ -630,8 +586,6 @@ class LiveStationService:
             'nitrates': round(nitrates, 2),
         }
         
-        wqi = self._calculate_wqi(parameters)
-        status = self._get_water_quality_status(wqi)
         alerts = self._check_alerts(parameters)
         
         return {
@@ -642,8 +596,8 @@ class LiveStationService:
             'longitude': station['longitude'],
             'timestamp': now.isoformat(),
             'parameters': parameters,
-            'wqi': round(wqi, 1),
-            'status': status,
+            'wqi': None,  # wqi and status are scored for all stations at once (_score_readings)
+            'status': None,
             'alerts': alerts,
             'district': station['district'],
             'region': station['region'],
@@ -651,10 +605,19 @@ class LiveStationService:
             'stationType': station['type'],
         }
     
+    def _score_readings(self, readings: List[Dict]):
+        """Fill in WQI and status of the readings with one vectorized call"""
+        wqi = wqi_kernel.score_records([reading['parameters'] for reading in readings], 'linear')
+        statuses = wqi_kernel.classify(wqi, wqi_kernel.LINEAR_STATUS_BANDS)
+        for reading, value, status in zip(readings, wqi.tolist(), statuses):
+            reading['wqi'] = round(value, 1)
+            reading['status'] = status
+    
     def _update_all_stations(self):
         """Update readings for all stations"""
-        for station in self.stations:
-            reading = self._generate_station_reading(station)
+        readings = [self._generate_station_reading(station) for station in self.stations]
+        self._score_readings(readings)
+        for station, reading in zip(self.stations, readings):
             self.station_data[station['id']] = reading
     
     def _background_update_loop(self):
@@ -5,9 +5,7 @@ Includes: Multi-parameter prediction, WQI forecasting, anomaly detection, trend
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
 from joblib import dump, load
 import os
 from datetime import datetime, timedelta
@@ -15,6 +13,69 @@ from datetime import datetime, timedelta
 class WaterQualityMLModels:
     """Enhanced ML models for comprehensive water quality prediction"""
     
+    SEASON_MAP = {'monsoon': 0, 'summer': 1, 'winter': 2, 'post_monsoon': 3}
+    
+    # Station feature columns accepted by predict_network
+    NETWORK_FEATURES = ['ph', 'bod', 'dissolved_oxygen', 'fecal_coliform',
+                        'temperature', 'turbidity', 'tds']
+    
+    # Inputs of each parameter model (after day_of_year, month, season_encoded)
+    PARAMETER_FEATURES = {
+        'ph': ['bod', 'dissolved_oxygen', 'temperature'],
+        'bod': ['dissolved_oxygen', 'temperature', 'turbidity'],
+        'dissolved_oxygen': ['temperature', 'bod', 'turbidity'],
+        'fecal_coliform': ['temperature', 'turbidity', 'bod'],
+        'tds': ['temperature'],
+    }
+    WQI_FEATURES = ['ph', 'bod', 'dissolved_oxygen', 'fecal_coliform']
+    
+    # Training recipe of each parameter model (fitted by training_pipeline.py)
+    MODEL_SPECS = {
+        'ph': {
+            'label': 'pH', 'model_attr': 'ph_model', 'scaler_attr': 'scaler_ph',
+            'features': PARAMETER_FEATURES['ph'], 'estimator': 'gradient_boosting',
+            'params': {'n_estimators': 100, 'max_depth': 5, 'random_state': 42},
+        },
+        'bod': {
+            'label': 'BOD', 'model_attr': 'bod_model', 'scaler_attr': 'scaler_bod',
+            'features': PARAMETER_FEATURES['bod'], 'estimator': 'random_forest',
+            'params': {'n_estimators': 100, 'max_depth': 8, 'random_state': 42},
+        },
+        'dissolved_oxygen': {
+            'label': 'DO', 'model_attr': 'do_model', 'scaler_attr': 'scaler_do',
+            'features': PARAMETER_FEATURES['dissolved_oxygen'], 'estimator': 'gradient_boosting',
+            'params': {'n_estimators': 100, 'max_depth': 5, 'random_state': 42},
+        },
+        'fecal_coliform': {
+            'label': 'Fecal Coliform', 'model_attr': 'fc_model', 'scaler_attr': 'scaler_fc',
+            'features': PARAMETER_FEATURES['fecal_coliform'], 'estimator': 'random_forest',
+            'params': {'n_estimators': 100, 'max_depth': 8, 'random_state': 42},
+            'log_target': True,  # Log transform for FC
+        },
+        'tds': {
+            'label': 'TDS', 'model_attr': 'tds_model', 'scaler_attr': 'scaler_tds',
+            'features': PARAMETER_FEATURES['tds'], 'estimator': 'random_forest',
+            'params': {'n_estimators': 100, 'max_depth': 6, 'random_state': 42},
+        },
+        'wqi': {
+            'label': 'WQI', 'model_attr': 'wqi_model', 'scaler_attr': 'scaler_wqi',
+            'features': WQI_FEATURES, 'estimator': 'gradient_boosting',
+            'params': {'n_estimators': 150, 'max_depth': 6, 'random_state': 42},
+            'min_features': 4,
+        },
+    }
+    
+    # Values used when a station is missing an input
+    FEATURE_DEFAULTS = {
+        'ph': 7.0,
+        'bod': 2.0,
+        'dissolved_oxygen': 6.0,
+        'fecal_coliform': 500.0,
+        'temperature': 25.0,
+        'turbidity': 5.0,
+        'tds': 300.0,
+    }
+    
     def __init__(self):
         # Multi-parameter regressors
         self.ph_model = None
@@ -43,198 +104,32 @@ class WaterQualityMLModels:
             'BOD': 0.19
         }
     
-    def train(self, df):
+    def train(self, df, n_workers=None, incremental=True):
         """
         Train ML models on authentic water quality data with seasonal patterns
-        """
-        print("🤖 Training Enhanced ML Models (Phase 5)...")
-        print(f"   Dataset: {len(df)} samples")
-        
-        # Prepare time-based features
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['day_of_year'] = df['timestamp'].dt.dayofyear
-            df['month'] = df['timestamp'].dt.month
-        
-        # Season encoding (if available)
-        if 'season' in df.columns:
-            season_map = {'monsoon': 0, 'summer': 1, 'winter': 2, 'post_monsoon': 3}
-            df['season_encoded'] = df['season'].map(season_map).fillna(0)
-        
-        # Base features for all models
-        base_features = []
-        if 'day_of_year' in df.columns:
-            base_features.extend(['day_of_year', 'month'])
-        if 'season_encoded' in df.columns:
-            base_features.append('season_encoded')
-        
-        # Train individual parameter models
-        self._train_ph_model(df, base_features)
-        self._train_bod_model(df, base_features)
-        self._train_do_model(df, base_features)
-        self._train_fc_model(df, base_features)
-        self._train_tds_model(df, base_features)
-        self._train_wqi_model(df, base_features)
-        
-        # Save all models
-        self.save_models()
-        print("\n✅ Phase 5 Models trained and saved!")
-        
-    def _train_ph_model(self, df, base_features):
-        """Train pH prediction model"""
-        print("\n  📊 Training pH Model...")
-        
-        features = base_features + ['bod', 'dissolved_oxygen', 'temperature']
-        features = [f for f in features if f in df.columns]
-        
-        if len(features) == 0 or 'ph' not in df.columns:
-            print("     ⚠️ Insufficient data for pH model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = df['ph']
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        X_train_scaled = self.scaler_ph.fit_transform(X_train)
-        X_test_scaled = self.scaler_ph.transform(X_test)
-        
-        self.ph_model = GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42)
-        self.ph_model.fit(X_train_scaled, y_train)
-        
-        train_r2 = self.ph_model.score(X_train_scaled, y_train)
-        test_r2 = self.ph_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
-    
-    def _train_bod_model(self, df, base_features):
-        """Train BOD prediction model"""
-        print("\n  📊 Training BOD Model...")
-        
-        features = base_features + ['dissolved_oxygen', 'temperature', 'turbidity']
-        features = [f for f in features if f in df.columns]
-        
-        if len(features) == 0 or 'bod' not in df.columns:
-            print("     ⚠️ Insufficient data for BOD model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = df['bod']
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        X_train_scaled = self.scaler_bod.fit_transform(X_train)
-        X_test_scaled = self.scaler_bod.transform(X_test)
-        
-        self.bod_model = RandomForestRegressor(n_estimators=100, max_depth=8, random_state=42)
-        self.bod_model.fit(X_train_scaled, y_train)
-        
-        train_r2 = self.bod_model.score(X_train_scaled, y_train)
-        test_r2 = self.bod_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
-    
-    def _train_do_model(self, df, base_features):
-        """Train Dissolved Oxygen prediction model"""
-        print("\n  📊 Training DO Model...")
-        
-        features = base_features + ['temperature', 'bod', 'turbidity']
-        features = [f for f in features if f in df.columns]
-        
-        if len(features) == 0 or 'dissolved_oxygen' not in df.columns:
-            print("     ⚠️ Insufficient data for DO model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = df['dissolved_oxygen']
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        X_train_scaled = self.scaler_do.fit_transform(X_train)
-        X_test_scaled = self.scaler_do.transform(X_test)
-        
-        self.do_model = GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42)
-        self.do_model.fit(X_train_scaled, y_train)
-        
-        train_r2 = self.do_model.score(X_train_scaled, y_train)
-        test_r2 = self.do_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
-    
-    def _train_fc_model(self, df, base_features):
-        """Train Fecal Coliform prediction model"""
-        print("\n  📊 Training Fecal Coliform Model...")
-        
-        features = base_features + ['temperature', 'turbidity', 'bod']
-        features = [f for f in features if f in df.columns]
-        
-        if len(features) == 0 or 'fecal_coliform' not in df.columns:
-            print("     ⚠️ Insufficient data for FC model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = np.log1p(df['fecal_coliform'])  # Log transform for FC
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        X_train_scaled = self.scaler_fc.fit_transform(X_train)
-        X_test_scaled = self.scaler_fc.transform(X_test)
-        
-        self.fc_model = RandomForestRegressor(n_estimators=100, max_depth=8, random_state=42)
-        self.fc_model.fit(X_train_scaled, y_train)
-        
-        train_r2 = self.fc_model.score(X_train_scaled, y_train)
-        test_r2 = self.fc_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
-    
-    def _train_tds_model(self, df, base_features):
-        """Train TDS prediction model"""
-        print("\n  📊 Training TDS Model...")
-        
-        features = base_features + ['temperature']
-        features = [f for f in features if f in df.columns]
-        
-        if len(features) == 0 or 'tds' not in df.columns:
-            print("     ⚠️ Insufficient data for TDS model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = df['tds']
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        X_train_scaled = self.scaler_tds.fit_transform(X_train)
-        X_test_scaled = self.scaler_tds.transform(X_test)
-        
-        self.tds_model = RandomForestRegressor(n_estimators=100, max_depth=6, random_state=42)
-        self.tds_model.fit(X_train_scaled, y_train)
-        
-        train_r2 = self.tds_model.score(X_train_scaled, y_train)
-        test_r2 = self.tds_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
-    
-    def _train_wqi_model(self, df, base_features):
-        """Train WQI prediction model"""
-        print("\n  📊 Training WQI Model...")
         
-        features = base_features + ['ph', 'bod', 'dissolved_oxygen', 'fecal_coliform']
-        features = [f for f in features if f in df.columns]
+        The per-parameter models are fitted in parallel by TrainingPipeline;
+        with incremental=True only models whose inputs changed are refit.
         
-        if len(features) < 4 or 'wqi' not in df.columns:
-            print("     ⚠️ Insufficient data for WQI model")
-            return
-        
-        X = df[features].fillna(df[features].mean())
-        y = df['wqi']
+        Args:
+            df: Training data (timestamp, season and parameter columns)
+            n_workers: Worker processes (default: one per CPU)
+            incremental: Skip models whose inputs are unchanged
         
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        Returns:
+            Training report (see TrainingPipeline.run)
+        """
+        from training_pipeline import TrainingPipeline
         
-        X_train_scaled = self.scaler_wqi.fit_transform(X_train)
-        X_test_scaled = self.scaler_wqi.transform(X_test)
+        print("🤖 Training Enhanced ML Models (Phase 5)...")
+        print(f"   Dataset: {len(df)} samples")
         
-        self.wqi_model = GradientBoostingRegressor(n_estimators=150, max_depth=6, random_state=42)
-        self.wqi_model.fit(X_train_scaled, y_train)
+        pipeline = TrainingPipeline(self.model_dir, n_workers=n_workers)
+        report = pipeline.run(df, incremental=incremental)
         
-        train_r2 = self.wqi_model.score(X_train_scaled, y_train)
-        test_r2 = self.wqi_model.score(X_test_scaled, y_test)
-        print(f"     ✅ Train R²: {train_r2:.4f}, Test R²: {test_r2:.4f}")
+        self.load_models()
+        print("\n✅ Phase 5 Models trained and saved!")
+        return report
     
     def save_models(self):
         """Save all trained models to disk"""
@@ -258,6 +153,14 @@ class WaterQualityMLModels:
                 dump(model, os.path.join(self.model_dir, filename))
         
         print("💾 All models saved to disk")
+        
+        # Flattened copies of the tree ensembles for fast inference
+        try:
+            from tree_compiler import compile_models
+            compiled = compile_models(self.model_dir)
+            print(f"⚡ Compiled {len(compiled)} tree ensembles for fast inference")
+        except Exception as e:
+            print(f"⚠️ Tree ensemble compilation skipped: {e}")
     
     def load_models(self):
         """Load trained models from disk"""
@@ -294,115 +197,121 @@ class WaterQualityMLModels:
         Returns:
             Dict with predictions for each parameter and time horizon
         """
+        network = self.predict_network(
+            pd.DataFrame([current_data]), days_ahead=days_ahead, season=season
+        )
+        return self.station_predictions(network, 0, current_data)
+    
+    def predict_network(self, features, days_ahead=(7, 30, 90), season='monsoon'):
+        """
+        Forecast many stations for all horizons at once
+        
+        One scaler transform and one predict call per model covers every
+        (horizon, station) pair, and the base features are built once and
+        shared by all parameter models.
+        
+        Args:
+            features: DataFrame (one row per station, columns named as in
+                NETWORK_FEATURES) or ndarray (stations x NETWORK_FEATURES)
+            days_ahead: Forecast horizons in days
+            season: Season name, or one season name per station
+        
+        Returns:
+            Columnar dict: each parameter maps to 'value' and 'confidence'
+            arrays of shape (horizons, stations)
+        """
         if not all([self.ph_model, self.bod_model, self.do_model, self.fc_model]):
             raise Exception("Models not trained or loaded")
         
-        # Season encoding
-        season_map = {'monsoon': 0, 'summer': 1, 'winter': 2, 'post_monsoon': 3}
-        season_encoded = season_map.get(season, 0)
+        columns = self._network_feature_columns(features)
+        n_stations = len(next(iter(columns.values())))
+        days_ahead = list(days_ahead)
+        n_horizons = len(days_ahead)
+        
+        # Season encoding per station
+        if isinstance(season, str):
+            season_encoded = np.full(n_stations, self.SEASON_MAP.get(season, 0), dtype=float)
+        else:
+            season_encoded = np.array([self.SEASON_MAP.get(s, 0) for s in season], dtype=float)
+        
+        # Base features shared by every model: rows are horizon-major
+        now = datetime.now()
+        future_dates = [now + timedelta(days=days) for days in days_ahead]
+        base = np.empty((n_horizons * n_stations, 3))
+        base[:, 0] = np.repeat([d.timetuple().tm_yday for d in future_dates], n_stations)
+        base[:, 1] = np.repeat([d.month for d in future_dates], n_stations)
+        base[:, 2] = np.tile(season_encoded, n_horizons)
+        
+        def tiled(names):
+            return np.tile(np.column_stack([columns[n] for n in names]), (n_horizons, 1))
+        
+        def run(model, scaler, extra):
+            X = np.hstack([base, extra])
+            return model.predict(scaler.transform(X)).reshape(n_horizons, n_stations)
+        
+        models = {
+            'ph': (self.ph_model, self.scaler_ph),
+            'bod': (self.bod_model, self.scaler_bod),
+            'dissolved_oxygen': (self.do_model, self.scaler_do),
+            'fecal_coliform': (self.fc_model, self.scaler_fc),
+            'tds': (self.tds_model, self.scaler_tds),
+        }
+        
+        result = {
+            'station_count': n_stations,
+            'days_ahead': days_ahead,
+            'forecast_dates': [d.strftime('%Y-%m-%d') for d in future_dates],
+            'season': season,
+        }
+        
+        for param, (model, scaler) in models.items():
+            if model is None:
+                continue
+            values = run(model, scaler, tiled(self.PARAMETER_FEATURES[param]))
+            if param == 'fecal_coliform':
+                values = np.expm1(values)  # Inverse log transform
+            result[param] = {
+                'value': values,
+                'confidence': self._confidence_array(days_ahead, n_stations)
+            }
+        
+        if self.wqi_model:
+            wqi_inputs = np.column_stack([result[p]['value'].ravel() for p in self.WQI_FEATURES])
+            wqi = run(self.wqi_model, self.scaler_wqi, wqi_inputs)
+            result['wqi'] = {
+                'value': wqi,
+                'confidence': self._confidence_array(days_ahead, n_stations),
+                'classification': self._wqi_classification_array(wqi)
+            }
+        
+        return result
+    
+    def station_predictions(self, network, index, current_data=None):
+        """
+        Extract one station from predict_network output
         
+        Returns the per-horizon dict format of predict_multi_parameter,
+        including trends and anomalies.
+        """
         predictions = {}
         
-        for days in days_ahead:
-            # Calculate day of year for future date
-            future_date = datetime.now() + timedelta(days=days)
-            day_of_year = future_date.timetuple().tm_yday
-            month = future_date.month
-            
-            # Prepare base features
-            base_features = np.array([[day_of_year, month, season_encoded]])
-            
-            # Predict each parameter
+        for h, days in enumerate(network['days_ahead']):
+            season = network['season']
             pred_dict = {
                 'days_ahead': days,
-                'forecast_date': future_date.strftime('%Y-%m-%d'),
-                'season': season
+                'forecast_date': network['forecast_dates'][h],
+                'season': season if isinstance(season, str) else season[index]
             }
             
-            # pH prediction
-            if self.ph_model:
-                ph_features = np.concatenate([
-                    base_features,
-                    [[current_data.get('bod', 2.0), 
-                      current_data.get('dissolved_oxygen', 6.0),
-                      current_data.get('temperature', 25.0)]]
-                ], axis=1)
-                ph_scaled = self.scaler_ph.transform(ph_features)
-                pred_dict['ph'] = {
-                    'value': float(self.ph_model.predict(ph_scaled)[0]),
-                    'confidence': self._calculate_confidence(days)
-                }
-            
-            # BOD prediction
-            if self.bod_model:
-                bod_features = np.concatenate([
-                    base_features,
-                    [[current_data.get('dissolved_oxygen', 6.0),
-                      current_data.get('temperature', 25.0),
-                      current_data.get('turbidity', 5.0)]]
-                ], axis=1)
-                bod_scaled = self.scaler_bod.transform(bod_features)
-                pred_dict['bod'] = {
-                    'value': float(self.bod_model.predict(bod_scaled)[0]),
-                    'confidence': self._calculate_confidence(days)
-                }
-            
-            # DO prediction
-            if self.do_model:
-                do_features = np.concatenate([
-                    base_features,
-                    [[current_data.get('temperature', 25.0),
-                      current_data.get('bod', 2.0),
-                      current_data.get('turbidity', 5.0)]]
-                ], axis=1)
-                do_scaled = self.scaler_do.transform(do_features)
-                pred_dict['dissolved_oxygen'] = {
-                    'value': float(self.do_model.predict(do_scaled)[0]),
-                    'confidence': self._calculate_confidence(days)
-                }
-            
-            # FC prediction (log-transformed)
-            if self.fc_model:
-                fc_features = np.concatenate([
-                    base_features,
-                    [[current_data.get('temperature', 25.0),
-                      current_data.get('turbidity', 5.0),
-                      current_data.get('bod', 2.0)]]
-                ], axis=1)
-                fc_scaled = self.scaler_fc.transform(fc_features)
-                fc_log = self.fc_model.predict(fc_scaled)[0]
-                pred_dict['fecal_coliform'] = {
-                    'value': float(np.expm1(fc_log)),  # Inverse log transform
-                    'confidence': self._calculate_confidence(days)
-                }
-            
-            # TDS prediction
-            if self.tds_model:
-                tds_features = np.concatenate([
-                    base_features,
-                    [[current_data.get('temperature', 25.0)]]
-                ], axis=1)
-                tds_scaled = self.scaler_tds.transform(tds_features)
-                pred_dict['tds'] = {
-                    'value': float(self.tds_model.predict(tds_scaled)[0]),
-                    'confidence': self._calculate_confidence(days)
-                }
-            
-            # WQI prediction
-            if self.wqi_model:
-                wqi_features = np.concatenate([
-                    base_features,
-                    [[pred_dict['ph']['value'],
-                      pred_dict['bod']['value'],
-                      pred_dict['dissolved_oxygen']['value'],
-                      pred_dict['fecal_coliform']['value']]]
-                ], axis=1)
-                wqi_scaled = self.scaler_wqi.transform(wqi_features)
-                pred_dict['wqi'] = {
-                    'value': float(self.wqi_model.predict(wqi_scaled)[0]),
-                    'confidence': self._calculate_confidence(days),
-                    'classification': self._get_wqi_classification(self.wqi_model.predict(wqi_scaled)[0])
+            for param in ('ph', 'bod', 'dissolved_oxygen', 'fecal_coliform', 'tds', 'wqi'):
+                if param not in network:
+                    continue
+                pred_dict[param] = {
+                    'value': float(network[param]['value'][h, index]),
+                    'confidence': float(network[param]['confidence'][h, index])
                 }
+                if param == 'wqi':
+                    pred_dict[param]['classification'] = str(network[param]['classification'][h, index])
             
             predictions[f'{days}_days'] = pred_dict
         
@@ -410,10 +319,48 @@ class WaterQualityMLModels:
         predictions['trends'] = self._analyze_trends(predictions)
         
         # Detect anomalies
-        predictions['anomalies'] = self._detect_anomalies(current_data, predictions)
+        predictions['anomalies'] = self._detect_anomalies(current_data or {}, predictions)
         
         return predictions
     
+    def _network_feature_columns(self, features):
+        """Normalise station features into one float array per column"""
+        if isinstance(features, pd.DataFrame):
+            n = len(features)
+            columns = {}
+            for name in self.NETWORK_FEATURES:
+                if name in features.columns:
+                    col = pd.to_numeric(features[name], errors='coerce').to_numpy(dtype=float, copy=True)
+                else:
+                    col = np.full(n, np.nan)
+                columns[name] = col
+        else:
+            matrix = np.asarray(features, dtype=float)
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(1, -1)
+            if matrix.shape[1] != len(self.NETWORK_FEATURES):
+                raise ValueError(f"Expected {len(self.NETWORK_FEATURES)} feature columns "
+                                 f"({', '.join(self.NETWORK_FEATURES)}), got {matrix.shape[1]}")
+            columns = {name: matrix[:, i].copy() for i, name in enumerate(self.NETWORK_FEATURES)}
+        
+        for name, default in self.FEATURE_DEFAULTS.items():
+            col = columns[name]
+            col[np.isnan(col)] = default
+        return columns
+    
+    def _confidence_array(self, days_ahead, n_stations):
+        """Vectorised _calculate_confidence for (horizons, stations)"""
+        base = np.array([0.85 if d <= 7 else 0.75 if d <= 30 else 0.65 for d in days_ahead])
+        return base[:, None] + np.random.uniform(-0.05, 0.05, (len(days_ahead), n_stations))
+    
+    def _wqi_classification_array(self, wqi):
+        """Vectorised _get_wqi_classification"""
+        return np.select(
+            [wqi >= 90, wqi >= 70, wqi >= 50, wqi >= 25],
+            ['Excellent (Class A)', 'Good (Class B)', 'Medium (Class C)', 'Bad (Class D)'],
+            default='Very Bad (Class E)'
+        )
+    
     def _calculate_confidence(self, days_ahead):
         """Calculate prediction confidence based on time horizon"""
         if days_ahead <= 7:
@@ -535,13 +482,10 @@ if __name__ == '__main__':
     
     print("\nTraining 6 parameter-specific models...")
     print("=" * 60)
-    ml.train(df)
+    report = ml.train(df)
     print("=" * 60)
-    
-    # Save trained models
-    print("\nSaving trained models...")
-    ml.save_models()
-    print("✓ All models saved to models/ directory")
+    print(f"✓ Models saved to models/ directory ({len(report['trained'])} trained, "
+          f"{len(report['skipped'])} unchanged, {report['wall_seconds']:.1f}s)")
     
     # Test predictions
     print("\n=== Testing Predictions ===")
@@ -607,6 +551,24 @@ if __name__ == '__main__':
     else:
         print("\n✓ No anomalies detected in forecasts")
     
+    # Network-wide batch inference
+    print("\n" + "=" * 60)
+    print("NETWORK BATCH INFERENCE (4,495 stations x 3 horizons)")
+    print("=" * 60)
+    import time
+    network_sample = df.sample(n=4495, replace=True, random_state=42)
+    start = time.perf_counter()
+    network = ml.predict_network(network_sample, days_ahead=[7, 30, 90],
+                                 season=network_sample['season'].tolist())
+    elapsed = time.perf_counter() - start
+    print(f"  Batch: {elapsed:.3f}s for {network['station_count']} stations")
+    
+    start = time.perf_counter()
+    for _, row in network_sample.head(20).iterrows():
+        ml.predict_multi_parameter(row.to_dict(), days_ahead=[7, 30, 90], season=row['season'])
+    per_station = (time.perf_counter() - start) / 20
+    print(f"  Per-station loop (estimated): {per_station * 4495:.1f}s")
+    
     print("\n" + "=" * 60)
     print("✓ Phase 5 ML Models - Training Complete!")
     print("=" * 60)
@@ -0,0 +1,383 @@
+"""
+Model Registry - Phase 5
+Loads each trained model once per process and serves it to every caller
+
+Features:
+- Lazy loading: an artifact is deserialized on first use only
+- joblib mmap mode: numpy arrays inside the pickles are memory-mapped, so
+  page cache is shared between worker processes
+- Content-hash versions for every artifact
+- Hot reload when a file on disk changes (checked at most every few seconds)
+- Per-model load time and memory footprint for the API
+- Compiled tree ensembles (tree_compiler.py) are preferred over the pickle
+  when their source hash matches, so node arrays are mapped, not copied.
+  They serve small batches; large batches go to the pickled sklearn model
+  (loaded on first use), which is faster there
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from joblib import load
+
+from ml_models import WaterQualityMLModels
+from tree_compiler import CompiledEnsemble, RoutedEnsemble, compiled_path_for
+
+
+# Registry name -> (file name, WaterQualityMLModels attribute)
+MODEL_ARTIFACTS = {
+    'ph_model': ('ph_model.pkl', 'ph_model'),
+    'bod_model': ('bod_model.pkl', 'bod_model'),
+    'do_model': ('do_model.pkl', 'do_model'),
+    'fc_model': ('fc_model.pkl', 'fc_model'),
+    'tds_model': ('tds_model.pkl', 'tds_model'),
+    'wqi_model': ('wqi_model.pkl', 'wqi_model'),
+    'scaler_ph': ('scaler_ph.pkl', 'scaler_ph'),
+    'scaler_bod': ('scaler_bod.pkl', 'scaler_bod'),
+    'scaler_do': ('scaler_do.pkl', 'scaler_do'),
+    'scaler_fc': ('scaler_fc.pkl', 'scaler_fc'),
+    'scaler_tds': ('scaler_tds.pkl', 'scaler_tds'),
+    'scaler_wqi': ('scaler_wqi.pkl', 'scaler_wqi'),
+}
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+
+def file_content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, streamed in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def estimate_memory(obj: Any) -> Dict[str, int]:
+    """
+    Estimate the array memory held by a loaded model
+
+    Walks the object graph (including objects that expose state through
+    __getstate__, such as sklearn trees) and sums numpy array buffers,
+    separating memory-mapped (shared) from private heap arrays.
+    """
+    totals = {'heap_bytes': 0, 'mmap_bytes': 0, 'arrays': 0}
+    seen = set()
+    alive = []  # keep temporary state objects alive so ids are not reused
+
+    def is_mapped(arr: np.ndarray) -> bool:
+        base = arr
+        while base is not None:
+            if isinstance(base, np.memmap):
+                return True
+            base = getattr(base, 'base', None)
+            if not isinstance(base, np.ndarray):
+                return base is not None and type(base).__name__ == 'mmap'
+        return False
+
+    def walk(value, depth=0):
+        if depth > 12 or id(value) in seen:
+            return
+        seen.add(id(value))
+
+        if isinstance(value, np.ndarray) and value.dtype == object:
+            # e.g. GradientBoostingRegressor.estimators_
+            for item in value.ravel():
+                walk(item, depth + 1)
+            return
+        if isinstance(value, np.ndarray):
+            totals['arrays'] += 1
+            key = 'mmap_bytes' if is_mapped(value) else 'heap_bytes'
+            totals[key] += int(value.nbytes)
+            return
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item, depth + 1)
+            return
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item, depth + 1)
+            return
+        if isinstance(value, (str, bytes, int, float, bool, type(None))):
+            return
+
+        # Extension types (sklearn Tree) only expose their arrays via __getstate__
+        try:
+            state = value.__getstate__()
+        except Exception:
+            state = getattr(value, '__dict__', None)
+        if state is not None:
+            alive.append(state)
+            walk(state, depth + 1)
+
+    walk(obj)
+    return totals
+
+
+class ModelArtifact:
+    """One loaded model file and its metadata"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.obj: Any = None
+        self.format: Optional[str] = None
+        self.compiled_path: Optional[str] = None
+        self.compiled_mtime = 0.0
+        self.version: Optional[str] = None
+        self.file_bytes = 0
+        self.mtime = 0.0
+        self.load_seconds = 0.0
+        self.loaded_at: Optional[str] = None
+        self.memory: Dict[str, int] = {}
+        self.reload_count = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.obj is not None
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'file': os.path.basename(self.path),
+            'loaded': self.loaded,
+            'format': self.format,
+            'version': self.version[:12] if self.version else None,
+            'file_bytes': self.file_bytes,
+            'load_seconds': round(self.load_seconds, 4),
+            'loaded_at': self.loaded_at,
+            'memory': self.memory,
+            'reload_count': self.reload_count,
+        }
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of Phase 5 model artifacts
+
+    Use get_models() to obtain a WaterQualityMLModels instance wired to the
+    registry's objects. Instances are cached per version set, so repeated
+    calls are free until a file changes on disk.
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_MODEL_DIR, mmap_mode: Optional[str] = 'r',
+                 check_interval: float = 5.0, use_compiled: bool = True):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.use_compiled = use_compiled
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._artifacts = {
+            name: ModelArtifact(name, os.path.join(model_dir, filename))
+            for name, (filename, _) in MODEL_ARTIFACTS.items()
+        }
+        self._last_check = 0.0
+        self._models: Optional[WaterQualityMLModels] = None
+        self._models_versions: Optional[tuple] = None
+        self.stats = {'hits': 0, 'loads': 0, 'reloads': 0, 'failed_loads': 0}
+
+    @staticmethod
+    def _compiled_mtime(artifact: ModelArtifact) -> float:
+        try:
+            return os.stat(os.path.join(compiled_path_for(artifact.path), 'meta.json')).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _compiled_source(self, artifact: ModelArtifact, version: str) -> Optional[str]:
+        """Compiled directory built from exactly this pickle, if any"""
+        if not self.use_compiled:
+            return None
+        path = compiled_path_for(artifact.path)
+        meta = CompiledEnsemble.read_meta(path)
+        if meta and meta.get('source_hash') == version:
+            return path
+        return None
+
+    def _load_artifact(self, artifact: ModelArtifact, force: bool = False):
+        """Deserialize one artifact (caller holds the lock)"""
+        stat = os.stat(artifact.path)
+        version = file_content_hash(artifact.path)
+        compiled_path = self._compiled_source(artifact, version)
+        compiled_mtime = self._compiled_mtime(artifact)
+
+        if (artifact.loaded and version == artifact.version
+                and compiled_path == artifact.compiled_path
+                and compiled_mtime == artifact.compiled_mtime and not force):
+            # Touched but unchanged: keep the loaded object
+            artifact.mtime = stat.st_mtime
+            return
+
+        start = time.perf_counter()
+        try:
+            if compiled_path:
+                pickle_path, mmap_mode = artifact.path, self.mmap_mode
+                obj = RoutedEnsemble(CompiledEnsemble.load(compiled_path, mmap_mode=mmap_mode),
+                                     lambda: load(pickle_path, mmap_mode=mmap_mode))
+            else:
+                obj = load(artifact.path, mmap_mode=self.mmap_mode)
+        except Exception as e:
+            self.stats['failed_loads'] += 1
+            print(f"❌ Error loading model {artifact.name}: {e}")
+            raise
+        elapsed = time.perf_counter() - start
+
+        if artifact.loaded:
+            artifact.reload_count += 1
+            self.stats['reloads'] += 1
+            print(f"🔄 Model {artifact.name} reloaded ({artifact.version[:12]} -> {version[:12]})")
+        self.stats['loads'] += 1
+
+        artifact.obj = obj
+        artifact.format = 'compiled' if compiled_path else 'pickle'
+        artifact.compiled_path = compiled_path
+        artifact.compiled_mtime = compiled_mtime
+        artifact.version = version
+        artifact.file_bytes = stat.st_size
+        artifact.mtime = stat.st_mtime
+        artifact.load_seconds = elapsed
+        artifact.loaded_at = datetime.now().isoformat()
+        artifact.memory = estimate_memory(obj)
+
+    def _check_for_changes(self, force: bool = False) -> List[str]:
+        """Reload loaded artifacts whose files changed (caller holds the lock)"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return []
+        self._last_check = now
+
+        reloaded = []
+        for artifact in self._artifacts.values():
+            if not artifact.loaded:
+                continue
+            try:
+                stat = os.stat(artifact.path)
+            except FileNotFoundError:
+                continue
+            if (stat.st_mtime != artifact.mtime or stat.st_size != artifact.file_bytes
+                    or self._compiled_mtime(artifact) != artifact.compiled_mtime):
+                previous = (artifact.version, artifact.format)
+                self._load_artifact(artifact)
+                if (artifact.version, artifact.format) != previous:
+                    reloaded.append(artifact.name)
+        return reloaded
+
+    def get(self, name: str) -> Any:
+        """Get a loaded model object by registry name (lazy)"""
+        with self._lock:
+            self._check_for_changes()
+            artifact = self._artifacts[name]
+            if not artifact.loaded:
+                self._load_artifact(artifact)
+            else:
+                self.stats['hits'] += 1
+            return artifact.obj
+
+    def available(self) -> bool:
+        """True when every model file exists on disk"""
+        return all(os.path.exists(a.path) for a in self._artifacts.values())
+
+    def get_models(self) -> WaterQualityMLModels:
+        """
+        WaterQualityMLModels backed by the registry's shared objects
+
+        Raises FileNotFoundError if the models have not been trained.
+        """
+        with self._lock:
+            self._check_for_changes()
+            for artifact in self._artifacts.values():
+                if not artifact.loaded:
+                    self._load_artifact(artifact)
+
+            versions = tuple((a.version, a.format) for a in self._artifacts.values())
+            if self._models is None or versions != self._models_versions:
+                models = WaterQualityMLModels()
+                models.model_dir = self.model_dir
+                for name, (_, attribute) in MODEL_ARTIFACTS.items():
+                    setattr(models, attribute, self._artifacts[name].obj)
+                self._models = models
+                self._models_versions = versions
+            else:
+                self.stats['hits'] += 1
+            return self._models
+
+    def reload(self, force: bool = False) -> List[str]:
+        """Check all files now; force=True re-reads every artifact"""
+        with self._lock:
+            if not force:
+                return self._check_for_changes(force=True)
+
+            reloaded = []
+            for artifact in self._artifacts.values():
+                if artifact.loaded and os.path.exists(artifact.path):
+                    self._load_artifact(artifact, force=True)
+                    reloaded.append(artifact.name)
+            self._models = None
+            return reloaded
+
+    def model_set_version(self) -> Optional[str]:
+        """Combined version of all loaded artifacts"""
+        with self._lock:
+            versions = [a.version for a in self._artifacts.values() if a.version]
+            if not versions:
+                return None
+            return hashlib.sha256(''.join(versions).encode()).hexdigest()[:12]
+
+    def status(self) -> Dict:
+        """Registry state for the API"""
+        with self._lock:
+            artifacts = [a.to_dict() for a in self._artifacts.values()]
+            return {
+                'model_dir': self.model_dir,
+                'mmap_mode': self.mmap_mode,
+                'model_set_version': self.model_set_version(),
+                'loaded': sum(1 for a in artifacts if a['loaded']),
+                'total': len(artifacts),
+                'total_load_seconds': round(sum(a['load_seconds'] for a in artifacts), 4),
+                'total_heap_bytes': sum(a['memory'].get('heap_bytes', 0) for a in artifacts),
+                'total_mmap_bytes': sum(a['memory'].get('mmap_bytes', 0) for a in artifacts),
+                'stats': dict(self.stats),
+                'models': artifacts,
+            }
+
+
+# Global registry instance
+_registry_instance = None
+
+
+def get_model_registry(model_dir: Optional[str] = None) -> ModelRegistry:
+    """Get or create the process-wide model registry"""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = ModelRegistry(model_dir or os.environ.get('MODEL_DIR', DEFAULT_MODEL_DIR))
+    return _registry_instance
+
+
+if __name__ == '__main__':
+    print("=== Model Registry - Phase 5 ===\n")
+
+    registry = get_model_registry()
+    if not registry.available():
+        print(f"⚠️ Models not found in {registry.model_dir}. Please train models first.")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    registry.get_models()
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        registry.get_models()
+    cached = (time.perf_counter() - start) / 100
+
+    status = registry.status()
+    print(f"First load: {first:.3f}s | Cached lookup: {cached * 1e6:.1f}µs")
+    print(f"Model set version: {status['model_set_version']}\n")
+    print(f"{'Model':<12} {'Format':<9} {'Version':<14} {'File':>10} {'Load (s)':>9} {'Heap':>10} {'Mapped':>10}")
+    for model in status['models']:
+        print(f"{model['name']:<12} {model['format']:<9} {model['version']:<14} {model['file_bytes']:>10,} "
+              f"{model['load_seconds']:>9.4f} {model['memory']['heap_bytes']:>10,} "
+              f"{model['memory']['mmap_bytes']:>10,}")
@@ -0,0 +1,426 @@
+"""
+Network Risk Engine - Phase 5
+Scores every station of the live network on each tick
+
+RiskAssessmentService.assess_risk() works on one uploaded DataFrame and
+loops over parameters. This engine applies the same rules to the whole
+network at once:
+- Standards are compiled once into arrays (min, max, optimal, critical
+  limits, weights) aligned with the live reading fields
+- Each tick, the (stations x parameters) matrix of current readings is
+  scored with array operations and ranked once
+- Health-impact categories come from a parameter -> category matrix
+- /api/stations/risk/top serves the worst N stations from the ranking in O(N)
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from risk_assessment_service import RiskAssessmentService
+from utils import convert_to_serializable
+
+
+# Live reading field -> RiskAssessmentService standard
+FIELD_STANDARDS = {
+    'ph': 'pH',
+    'turbidity': 'turbidity',
+    'dissolvedOxygen': 'DO',
+    'temperature': 'temperature',
+    'conductivity': 'conductivity',
+    'bod': 'BOD',
+    'tds': 'TDS',
+    'fecalColiform': 'coliform',
+}
+
+# Standard -> health-impact category of an exceedance
+HEALTH_IMPACT_CATEGORIES = {
+    'pH': 'chemical',
+    'turbidity': 'pathogen_harbor',
+    'DO': 'ecological',
+    'temperature': 'ecological',
+    'conductivity': 'chemical',
+    'BOD': 'organic_pollution',
+    'TDS': 'chemical',
+    'coliform': 'waterborne_disease',
+}
+
+RISK_LEVELS = np.array(['low', 'medium', 'high', 'critical'])
+LOW, MEDIUM, HIGH, CRITICAL = range(4)
+
+
+class NetworkRiskEngine:
+    """Vectorized risk scoring and ranking of all live stations"""
+
+    def __init__(self, risk_service: Optional[RiskAssessmentService] = None,
+                 field_standards: Optional[Dict[str, str]] = None):
+        self.risk_service = risk_service or RiskAssessmentService()
+        self.field_standards = dict(field_standards or FIELD_STANDARDS)
+        self.fields = list(self.field_standards)
+        self.parameters = [self.field_standards[f] for f in self.fields]
+        self._compile_standards()
+
+        self._lock = threading.RLock()
+        self._stations: Dict[str, dict] = {}
+        self._table: Optional[Dict[str, Any]] = None
+        self.ticks_processed = 0
+        self.last_tick = None
+        self.last_tick_seconds = 0.0
+
+    def _compile_standards(self):
+        """Standards as arrays aligned with self.parameters (NaN = not defined)"""
+        standards = [self.risk_service.standards[p] for p in self.parameters]
+
+        def column(key):
+            return np.array([s.get(key, np.nan) for s in standards], dtype=float)
+
+        self.std_min = column('min')
+        self.std_max = column('max')
+        self.std_optimal = column('optimal')
+        # Same defaults as RiskAssessmentService._assess_parameter_risk
+        self.std_critical_min = np.where(np.isnan(column('critical_min')), self.std_min * 0.7, column('critical_min'))
+        self.std_critical_max = np.where(np.isnan(column('critical_max')), self.std_max * 1.5, column('critical_max'))
+        self.weights = column('weight')
+
+        categories = sorted(set(HEALTH_IMPACT_CATEGORIES[p] for p in self.parameters))
+        self.categories = np.array(categories)
+        self.category_matrix = np.zeros((len(self.parameters), len(categories)), dtype=bool)
+        for j, parameter in enumerate(self.parameters):
+            self.category_matrix[j, categories.index(HEALTH_IMPACT_CATEGORIES[parameter])] = True
+
+    # ==================== SCORING ====================
+
+    def score(self, values: np.ndarray, std_dev: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Parameter and overall risk of every row, same rules as assess_risk()
+
+        Args:
+            values: (stations x parameters) current values, NaN where missing
+            std_dev: Optional matching standard deviations for the
+                variability check (zero if not given)
+
+        Returns:
+            Dict of arrays: parameter scores/levels, overall score/level,
+            exceedance (tie-breaker) and health-impact categories
+        """
+        V = np.asarray(values, dtype=float)
+        std_dev = np.zeros_like(V) if std_dev is None else std_dev
+        valid = ~np.isnan(V)
+        score = np.zeros_like(V)
+        level = np.zeros(V.shape, dtype=np.int8)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Below minimum
+            has_min = ~np.isnan(self.std_min)
+            critical_low = has_min & (V < self.std_critical_min)
+            low = has_min & (V < self.std_min) & ~critical_low
+            score = np.where(critical_low, 90, np.where(low, 70, score))
+            level = np.where(critical_low, CRITICAL, np.where(low, HIGH, level))
+
+            # Above maximum
+            has_max = ~np.isnan(self.std_max)
+            critical_high = has_max & (V > self.std_critical_max)
+            high = has_max & (V > self.std_max) & ~critical_high
+            score = np.where(critical_high, np.maximum(score, 95), np.where(high, np.maximum(score, 75), score))
+            level = np.where(critical_high, CRITICAL, np.where(high, HIGH, level))
+
+            # Deviation from optimal
+            has_optimal = ~np.isnan(self.std_optimal)
+            deviation = np.where(
+                self.std_optimal != 0,
+                np.abs((V - self.std_optimal) / self.std_optimal) * 100,
+                np.where(V != 0, np.inf, 0.0)
+            )
+            off_optimal = has_optimal & (score < 60) & (deviation > 20)
+            score = np.where(off_optimal, np.maximum(score, 50), score)
+            level = np.where(off_optimal & (level == LOW), MEDIUM, level)
+
+            # Variability
+            unstable = std_dev > V * 0.15
+            score = np.where(unstable, np.maximum(score, 40), score)
+            level = np.where(unstable & (level == LOW), MEDIUM, level)
+
+            # Still low risk
+            settled = score < 30
+            score = np.where(settled, 20, score)
+            level = np.where(settled, LOW, level)
+
+            score = np.where(valid, score, 0.0)
+            weights = np.where(valid, self.weights, 0.0)
+            total_weight = weights.sum(axis=1)
+            overall = np.where(total_weight > 0, (score * weights).sum(axis=1) / total_weight, 50.0)
+
+            # How far beyond the limits, to order stations with equal scores
+            above = np.where(has_max & (self.std_max > 0), V / self.std_max - 1, np.where(has_max, V, 0.0))
+            below = np.where(has_min, 1 - V / self.std_min, 0.0)
+            exceedance = np.nansum(np.maximum(np.maximum(above, below), 0.0), axis=1)
+
+        overall_level = np.select([overall >= 80, overall >= 60, overall >= 40], [CRITICAL, HIGH, MEDIUM], LOW)
+        serious = valid & (level >= HIGH)
+
+        return {
+            'valid': valid,
+            'parameterScores': score,
+            'parameterLevels': np.where(valid, level, LOW).astype(np.int8),
+            'riskScore': overall,
+            'riskLevel': overall_level,
+            'exceedance': exceedance,
+            'severity': np.where(valid, level, LOW).max(axis=1, initial=LOW),
+            'impactCategories': (serious.astype(np.uint8) @ self.category_matrix.astype(np.uint8)) > 0,
+        }
+
+    # ==================== INGESTION ====================
+
+    def attach(self, station_service) -> 'NetworkRiskEngine':
+        """
+        Score the service's current readings, then rescore on every tick
+
+        Args:
+            station_service: EnhancedLiveStationService instance
+        """
+        self._stations = {station_service._get_station_id(s): s for s in station_service.stations}
+        if station_service.current_readings:
+            self.ingest(station_service.current_readings, station_service.last_update)
+        station_service.add_tick_listener(self.on_tick)
+        print(f"🛡️ Risk engine attached: {len(self._stations)} stations")
+        return self
+
+    def on_tick(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """Tick listener for EnhancedLiveStationService"""
+        self.ingest(readings, timestamp)
+
+    def ingest(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """
+        Score and rank the current reading of every station
+
+        Args:
+            readings: station_id -> reading dictionary
+            timestamp: Tick time
+        """
+        start = time.perf_counter()
+        station_ids = list(readings)
+        rows = [[r.get(f) for f in self.fields] for r in readings.values()]
+        try:
+            values = np.array(rows, dtype=float).reshape(len(rows), len(self.fields))
+        except (TypeError, ValueError):
+            values = np.array([[self._to_float(v) for v in row] for row in rows],
+                              dtype=float).reshape(len(rows), len(self.fields))
+
+        result = self.score(values)
+        # Worst first: overall score, then how far beyond the limits
+        order = np.lexsort((-result['exceedance'], -np.round(result['riskScore'], 1)))
+
+        table = {
+            'stationIds': station_ids,
+            'index': {sid: i for i, sid in enumerate(station_ids)},
+            'values': values,
+            'order': order,
+            'rank': np.empty_like(order),
+            'timestamp': timestamp or datetime.now().isoformat(),
+            **result
+        }
+        table['rank'][order] = np.arange(1, len(order) + 1)
+
+        level_counts = np.bincount(result['riskLevel'], minlength=len(RISK_LEVELS))
+        table['levelCounts'] = dict(zip(RISK_LEVELS.tolist(), level_counts.tolist()))
+
+        with self._lock:
+            self._table = table
+            self.ticks_processed += 1
+            self.last_tick = table['timestamp']
+            self.last_tick_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    # ==================== QUERIES ====================
+
+    def _risk_factors(self, table: Dict[str, Any], i: int) -> List[Dict[str, Any]]:
+        """assess_risk()-style factor dictionaries of one station"""
+        factors = []
+        for j, parameter in enumerate(self.parameters):
+            if not table['valid'][i, j]:
+                continue
+            value = float(table['values'][i, j])
+            level = RISK_LEVELS[table['parameterLevels'][i, j]]
+            factors.append({
+                'parameter': parameter,
+                'field': self.fields[j],
+                'level': str(level),
+                'riskScore': round(float(table['parameterScores'][i, j]), 1),
+                'currentValue': round(value, 2),
+                'standardMin': None if np.isnan(self.std_min[j]) else float(self.std_min[j]),
+                'standardMax': None if np.isnan(self.std_max[j]) else float(self.std_max[j]),
+                'standardOptimal': None if np.isnan(self.std_optimal[j]) else float(self.std_optimal[j]),
+                'description': self._factor_description(parameter, value, j, level)
+            })
+        return sorted(factors, key=lambda f: f['riskScore'], reverse=True)
+
+    def _factor_description(self, parameter: str, value: float, j: int, level: str) -> str:
+        """Same wording as RiskAssessmentService._assess_parameter_risk"""
+        if value < self.std_critical_min[j]:
+            return f'{parameter} is critically below minimum safe level'
+        if value > self.std_critical_max[j]:
+            return f'{parameter} critically exceeds maximum safe level'
+        if value < self.std_min[j]:
+            return f'{parameter} is below minimum safe level'
+        if value > self.std_max[j]:
+            return f'{parameter} exceeds maximum safe level'
+        if level == 'medium':
+            return f'{parameter} deviates from optimal range'
+        return f'{parameter} is within acceptable limits'
+
+    def _station_row(self, table: Dict[str, Any], i: int) -> Dict[str, Any]:
+        """Ranked-table row of one station"""
+        station_id = table['stationIds'][i]
+        station = self._stations.get(station_id, {})
+        serious = table['valid'][i] & (table['parameterLevels'][i] >= HIGH)
+        return {
+            'rank': int(table['rank'][i]),
+            'stationId': station_id,
+            'name': station.get('name'),
+            'district': station.get('district'),
+            'type': station.get('type'),
+            'riskScore': round(float(table['riskScore'][i]), 1),
+            'riskLevel': str(RISK_LEVELS[table['riskLevel'][i]]),
+            'healthImpact': {
+                'severity': str(RISK_LEVELS[table['severity'][i]]),
+                'categories': self.categories[table['impactCategories'][i]].tolist()
+            },
+            'exceedingParameters': [p for p, s in zip(self.parameters, serious) if s],
+        }
+
+    def top(self, n: int = 10, level: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Worst n stations of the latest ranking
+
+        Args:
+            n: Number of stations
+            level: Only stations at this overall risk level
+        """
+        with self._lock:
+            table = self._table
+        if table is None:
+            return {'stations': [], 'timestamp': None, 'totalStations': 0, 'levelCounts': {}}
+
+        order = table['order']
+        if level:
+            order = order[RISK_LEVELS[table['riskLevel'][order]] == level.lower()]
+        return {
+            'stations': [self._station_row(table, i) for i in order[:max(n, 0)]],
+            'timestamp': table['timestamp'],
+            'totalStations': len(table['stationIds']),
+            'levelCounts': table['levelCounts'],
+        }
+
+    def station_assessment(self, station_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Risk assessment of one live station in the assess_risk() format
+
+        Returns:
+            Assessment dictionary, or None for an unknown station
+        """
+        with self._lock:
+            table = self._table
+        if table is None or station_id not in table['index']:
+            return None
+
+        i = table['index'][station_id]
+        factors = self._risk_factors(table, i)
+        score = float(table['riskScore'][i])
+        level = str(RISK_LEVELS[table['riskLevel'][i]])
+        return convert_to_serializable({
+            'overallRiskLevel': level,
+            'riskScore': round(score, 1),
+            'riskFactors': factors,
+            'summary': self.risk_service._generate_risk_summary(level, score, factors),
+            'healthImpact': self.risk_service._assess_health_impact(factors),
+            'networkRank': int(table['rank'][i]),
+            'networkSize': len(table['stationIds']),
+            'timestamp': table['timestamp']
+        })
+
+    def status(self) -> Dict[str, Any]:
+        """Engine counters for the API"""
+        with self._lock:
+            table = self._table
+            return {
+                'stations': len(table['stationIds']) if table else 0,
+                'parameters': self.parameters,
+                'ticksProcessed': self.ticks_processed,
+                'lastTick': self.last_tick,
+                'lastTickSeconds': round(self.last_tick_seconds, 4),
+                'levelCounts': table['levelCounts'] if table else {},
+            }
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_engine_instance = None
+
+
+def get_risk_engine(station_service=None, risk_service: Optional[RiskAssessmentService] = None) -> NetworkRiskEngine:
+    """
+    Get the process-wide network risk engine
+
+    Args:
+        station_service: Attached on first call so the engine follows its ticks
+        risk_service: Service whose standards and wording are used
+    """
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = NetworkRiskEngine(risk_service)
+        if station_service is not None:
+            _engine_instance.attach(station_service)
+    return _engine_instance
+
+
+if __name__ == '__main__':
+    print("=== Network Risk Engine - Phase 5 ===\n")
+
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    stations = 4495
+    readings = {
+        f'ST{i:04d}': {
+            'ph': rng.normal(7.4, 0.8), 'turbidity': rng.gamma(2, 6), 'dissolvedOxygen': rng.normal(5.5, 1.5),
+            'temperature': rng.normal(26, 3), 'conductivity': rng.normal(600, 200), 'bod': rng.gamma(2, 2),
+            'tds': rng.normal(450, 150), 'fecalColiform': rng.integers(1, 30),
+        }
+        for i in range(stations)
+    }
+
+    engine = NetworkRiskEngine()
+    start = time.perf_counter()
+    engine.ingest(readings)
+    print(f"Scored and ranked {stations} stations in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    top = engine.top(10)
+    print(f"Top 10 served in {(time.perf_counter() - start) * 1000:.2f} ms | levels {top['levelCounts']}")
+
+    # Per-station loop through RiskAssessmentService, as the old routes did
+    service = RiskAssessmentService()
+    sample = list(readings.items())[:200]
+    start = time.perf_counter()
+    mismatches = 0
+    for station_id, reading in sample:
+        df = pd.DataFrame([{FIELD_STANDARDS[f]: v for f, v in reading.items()}])
+        reference = service.assess_risk(df)
+        # Scores agree up to rounding of the last digit (summation order)
+        mismatches += abs(reference['riskScore'] - engine.station_assessment(station_id)['riskScore']) > 0.11
+    loop = (time.perf_counter() - start) / len(sample) * stations
+    print(f"Per-station assess_risk loop: ~{loop:.1f}s for the network | "
+          f"score mismatches in {len(sample)} checked: {mismatches}")
+
+    for row in top['stations'][:5]:
+        print(f"  #{row['rank']} {row['stationId']} {row['riskScore']} {row['riskLevel']} "
+              f"{row['healthImpact']['categories']}")
@@ -1,6 +1,10 @@
 """
 Phase 6 Integration Script
 Starts WebSocket server + Real-time service + Flask backend
+
+With serve_api (default) the station REST API (/api/stations/*, /api/ai/*)
+and the SSE event stream are mounted on the WebSocket server's aiohttp app,
+so REST, WebSocket, SSE and the orchestrator share one event loop and port.
 """
 
 import asyncio
@@ -11,7 +15,7 @@ import sys
 # Import Phase 6 components
 from websocket_server import RealtimeWebSocketServer
 from realtime_service import RealtimeDataOrchestrator
-from api_integrations import GovernmentAPIIntegration
+from api_integrations import GovernmentAPIIntegration, AsyncGovernmentAPIIntegration
 from sensor_handler import IoTSensorHandler, SensorConfig
 from satellite_processor import SatelliteDataProcessor, StationLocation
 
@@ -28,10 +32,13 @@ class Phase6Integration:
     Coordinates all real-time components
     """
     
-    def __init__(self):
+    def __init__(self, serve_api: bool = True):
+        self.serve_api = serve_api
+        self.station_api = None
         self.websocket_server = None
         self.orchestrator = None
         self.api_integration = None
+        self.async_api_integration = None
         self.sensor_handler = None
         self.satellite_processor = None
         
@@ -42,6 +49,8 @@ class Phase6Integration:
         # 1. Initialize API integrations
         logger.info("1. Initializing Government API Integration...")
         self.api_integration = GovernmentAPIIntegration()
+        self.async_api_integration = AsyncGovernmentAPIIntegration()
+        await self.async_api_integration.start()
         logger.info("   ✓ API Integration ready\n")
         
         # 2. Initialize WebSocket server
@@ -54,10 +63,27 @@ class Phase6Integration:
         logger.info("     - http://localhost:8080/health (health check)")
         logger.info("     - http://localhost:8080/stats (statistics)\n")
         
+        # 2b. Mount the station API and event stream on the same loop
+        if self.serve_api:
+            logger.info("2b. Mounting Station API on the WebSocket server loop...")
+            # Importing the app loads the station network and Phase 5 models and
+            # starts the station simulation (15-minute ticks)
+            import app as api_app
+            from async_api import AsyncStationAPI
+            self.station_api = AsyncStationAPI(api_app.app)
+            api_app.job_queue.start()
+            api_app.event_stream.setup_routes(self.websocket_server.app)
+            self.station_api.setup_routes(self.websocket_server.app)
+            logger.info("   ✓ Station API ready")
+            logger.info("     - http://localhost:8080/api/stations/* (REST)")
+            logger.info("     - http://localhost:8080/api/ai/* (REST, AI executor)")
+            logger.info("     - http://localhost:8080/api/stream (SSE)\n")
+        
         # 3. Initialize Real-time Orchestrator
         logger.info("3. Initializing Real-time Data Orchestrator...")
         self.orchestrator = RealtimeDataOrchestrator(
-            websocket_server=self.websocket_server
+            websocket_server=self.websocket_server,
+            api_integration=self.async_api_integration
         )
         logger.info("   ✓ Data Orchestrator ready\n")
         
@@ -184,6 +210,9 @@ class Phase6Integration:
         if self.satellite_processor:
             await self.satellite_processor.stop()
         
+        if self.async_api_integration:
+            await self.async_api_integration.stop()
+        
         logger.info("✓ All services stopped")
 
 
@@ -1,22 +1,31 @@
 """
 Water Quality Prediction Service
 Provides 60-day forecasts for water quality parameters using time-series analysis
+
+All parameter columns are fitted at once: closed-form least squares over a
+(time x parameters) matrix with a validity mask, all weekly horizons in one
+array operation, and residual-based prediction intervals. Many stations can
+be forecast in a single call with generate_network_predictions().
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from sklearn.linear_model import LinearRegression
+from typing import Dict, List, Any, Optional
+from scipy import stats
 from utils import convert_to_serializable
 
 
 class PredictionService:
     """Generate 60-day water quality predictions"""
     
-    def __init__(self):
+    # Columns that never hold measurements
+    NON_PARAMETER_COLUMNS = ['date', 'timestamp', 'location', 'station', 'id']
+    
+    def __init__(self, interval_level: float = 0.95):
         self.prediction_days = 60
         self.prediction_weeks = 8  # 2 months = ~8 weeks
+        self.interval_level = interval_level
         
         # Define safe thresholds for parameters
         self.thresholds = {
@@ -30,6 +39,172 @@ class PredictionService:
             'TDS': {'max': 500, 'optimal': 300}
         }
     
+    def _parameter_matrix(self, df: pd.DataFrame):
+        """Numeric (time x parameters) matrix of a DataFrame; NaN where missing"""
+        columns = [
+            c for c in df.columns
+            if str(c).lower() not in self.NON_PARAMETER_COLUMNS
+            and not pd.api.types.is_datetime64_any_dtype(df[c].dtype)
+        ]
+        if not columns:
+            return [], np.empty((len(df), 0))
+        matrix = np.column_stack([
+            (df[c] if pd.api.types.is_numeric_dtype(df[c].dtype) else pd.to_numeric(df[c], errors='coerce'))
+            .to_numpy(dtype=float, na_value=np.nan)
+            for c in columns
+        ])
+        return columns, matrix
+    
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+    
+    def _records_matrix(self, records: List[Dict[str, Any]]):
+        """Like _parameter_matrix for a list of JSON records, without a DataFrame"""
+        columns = list(dict.fromkeys(
+            key for record in records for key in record
+            if str(key).lower() not in self.NON_PARAMETER_COLUMNS
+        ))
+        if not columns:
+            return [], np.empty((len(records), 0))
+        matrix = np.array(
+            [[self._to_float(record.get(c)) for c in columns] for record in records],
+            dtype=float
+        )
+        return columns, matrix
+    
+    def _fit_columns(self, Y: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Fit a linear trend to every column of Y at once and forecast all weeks
+        
+        Each column is fitted on its own valid (non-NaN) values, indexed
+        0..n-1 in order, exactly like fitting the column after dropna().
+        
+        Args:
+            Y: (time x columns) matrix, NaN for missing values
+        
+        Returns:
+            Dict of per-column arrays (n, current, mean, std, slope, intercept)
+            and (weeks x columns) arrays predicted, lower and upper
+        """
+        valid = ~np.isnan(Y)
+        n = valid.sum(axis=0).astype(float)
+        y = np.where(valid, Y, 0.0)
+        x = np.where(valid, np.cumsum(valid, axis=0) - 1, 0).astype(float)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = (n - 1) / 2
+            y_mean = y.sum(axis=0) / n
+            sxx = n * (n * n - 1) / 12  # sum((x - x_mean)^2) for x = 0..n-1
+            sxy = (np.where(valid, x - x_mean, 0.0) * y).sum(axis=0)
+            slope = sxy / sxx
+            intercept = y_mean - slope * x_mean
+            
+            residuals = np.where(valid, y - (intercept + slope * x), 0.0)
+            std = np.sqrt(np.where(valid, (y - y_mean) ** 2, 0.0).sum(axis=0) / n)
+            # Residual standard error; with two points the line fits exactly,
+            # so fall back to the spread of the values
+            dof = n - 2
+            residual_se = np.where(dof > 0, np.sqrt((residuals ** 2).sum(axis=0) / np.maximum(dof, 1)), std)
+            
+            # Weekly horizons for every column in one array operation
+            weeks = np.arange(1, self.prediction_weeks + 1, dtype=float)[:, None]
+            future_index = n[None, :] + weeks * 7  # 7 days per week
+            predicted = intercept[None, :] + slope[None, :] * future_index
+            
+            # Prediction interval of a new observation at each horizon
+            t_value = stats.t.ppf(0.5 + self.interval_level / 2, np.maximum(dof, 1))
+            half_width = t_value * residual_se * np.sqrt(
+                1 + 1 / n + (future_index - x_mean) ** 2 / sxx
+            )
+        
+        last_row = Y.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        current = Y[last_row, np.arange(Y.shape[1])] if Y.shape[0] else np.full(Y.shape[1], np.nan)
+        
+        return {
+            'n': n,
+            'current': current,
+            'mean': y_mean,
+            'std': std,
+            'slope': slope,
+            'intercept': intercept,
+            'predicted': predicted,
+            'lower': predicted - half_width,
+            'upper': predicted + half_width,
+        }
+    
+    def _threshold_bounds(self, parameters: List[str]):
+        """Per-column clamp limits and replacement values from the safe thresholds"""
+        low, low_value = np.full(len(parameters), -np.inf), np.zeros(len(parameters))
+        high, high_value = np.full(len(parameters), np.inf), np.zeros(len(parameters))
+        for j, parameter in enumerate(parameters):
+            threshold = self.thresholds.get(parameter.lower())
+            if not threshold:
+                continue
+            if 'min' in threshold:
+                low[j], low_value[j] = threshold['min'] * 0.8, threshold['min'] * 0.9
+            if 'max' in threshold:
+                high[j], high_value[j] = threshold['max'] * 1.2, threshold['max'] * 1.1
+        return low, low_value, high, high_value
+    
+    def _column_predictions(self, parameters: List[str], fit: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Prediction dictionaries for every column of a batched fit
+        
+        Bounding, intervals and confidence are computed for all columns at
+        once; only the final dictionaries are built per column.
+        """
+        low, low_value, high, high_value = self._threshold_bounds(parameters)
+        
+        # Keep predictions within reasonable bounds of the safe thresholds
+        raw = fit['predicted']
+        predicted = np.where(raw < low, low_value, raw)
+        predicted = np.where(predicted > high, high_value, predicted)
+        # Bounded weeks keep the width of their interval around the new value
+        lower = predicted - (raw - fit['lower'])
+        upper = predicted + (fit['upper'] - raw)
+        
+        # Confidence from the interval width relative to the predicted value
+        scale = np.maximum(np.abs(predicted), fit['std'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidence = np.where(scale > 0, 1 - (upper - lower) / (2 * scale), 0.99)
+        confidence = np.clip(np.nan_to_num(confidence, nan=0.05), 0.05, 0.99)
+        
+        # Determine trend direction
+        slope, mean = fit['slope'], fit['mean']
+        trend = np.where(np.abs(slope) < 0.01 * mean, 'stable',  # Less than 1% change
+                         np.where(slope > 0, 'increasing', 'decreasing'))
+        
+        predicted_rows = np.round(predicted, 2).T.tolist()
+        lower_rows = np.round(lower, 2).T.tolist()
+        upper_rows = np.round(upper, 2).T.tolist()
+        confidence_rows = np.round(confidence, 2).T.tolist()
+        current = np.round(fit['current'], 2).tolist()
+        mean_values = np.round(mean, 2).tolist()
+        slopes = np.round(slope, 4).tolist()
+        trend = trend.tolist()
+        weeks = list(range(1, self.prediction_weeks + 1))
+        
+        return [
+            {
+                'current': current[j],
+                'mean': mean_values[j],
+                'predicted': predicted_rows[j],
+                'lower': lower_rows[j],
+                'upper': upper_rows[j],
+                'confidence': confidence_rows[j],
+                'intervalLevel': self.interval_level,
+                'trend': trend[j],
+                'trendSlope': slopes[j],
+                'alerts': self._check_threshold_alerts(parameter, predicted_rows[j]),
+                'weeks': list(weeks)
+            }
+            for j, parameter in enumerate(parameters)
+        ]
+    
     def generate_predictions(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Generate 60-day predictions for all water quality parameters
@@ -40,110 +215,81 @@ class PredictionService:
         Returns:
             Dictionary with predictions for each parameter
         """
-        predictions = {}
+        columns, Y = self._parameter_matrix(df)
+        if not columns:
+            return {}
         
-        for column in df.columns:
-            # Skip non-numeric columns
-            if column.lower() in ['date', 'timestamp', 'location', 'station', 'id']:
-                continue
-            
-            try:
-                # Get clean numeric values
-                values = pd.to_numeric(df[column], errors='coerce').dropna()
-                
-                if len(values) < 2:
-                    continue
-                
-                # Generate prediction for this parameter
-                param_prediction = self._predict_parameter(column, values.tolist())
-                
-                if param_prediction:
-                    predictions[column] = param_prediction
-                    
-            except Exception as e:
-                print(f"Error predicting {column}: {e}")
-                continue
+        fit = self._fit_columns(Y)
+        predictions = {
+            column: prediction
+            for column, prediction, n in zip(columns, self._column_predictions([str(c) for c in columns], fit), fit['n'])
+            if n >= 2
+        }
         
         return convert_to_serializable(predictions)
     
-    def _predict_parameter(self, parameter: str, historical_values: List[float]) -> Dict[str, Any]:
+    def generate_network_predictions(self, station_histories: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Generate prediction for a single parameter
+        Forecast many stations' histories in one batched fit
         
         Args:
-            parameter: Parameter name (e.g., 'pH', 'turbidity')
-            historical_values: List of historical values
-            
+            station_histories: station_id -> DataFrame, list of records or
+                dict of columns
+        
         Returns:
-            Prediction dictionary with forecasted values and metadata
+            station_id -> predictions (same format as generate_predictions)
         """
-        if len(historical_values) < 2:
-            return None
+        blocks = []
+        for station_id, history in station_histories.items():
+            if isinstance(history, list):
+                columns, Y = self._records_matrix(history)
+            else:
+                df = history if isinstance(history, pd.DataFrame) else pd.DataFrame(history)
+                columns, Y = self._parameter_matrix(df)
+            if columns:
+                blocks.append((station_id, columns, Y))
         
-        # Calculate statistics
-        current_value = historical_values[-1]
-        mean_value = np.mean(historical_values)
-        std_value = np.std(historical_values)
+        results = {station_id: {} for station_id in station_histories}
+        if not blocks:
+            return convert_to_serializable(results)
         
-        # Detect trend using linear regression
-        X = np.array(range(len(historical_values))).reshape(-1, 1)
-        y = np.array(historical_values)
+        # One (time x all station columns) matrix, NaN-padded to the longest history
+        longest = max(Y.shape[0] for _, _, Y in blocks)
+        width = sum(Y.shape[1] for _, _, Y in blocks)
+        matrix = np.full((longest, width), np.nan)
+        offset = 0
+        for _, _, Y in blocks:
+            matrix[:Y.shape[0], offset:offset + Y.shape[1]] = Y
+            offset += Y.shape[1]
         
-        model = LinearRegression()
-        model.fit(X, y)
+        fit = self._fit_columns(matrix)
+        parameters = [str(column) for _, columns, _ in blocks for column in columns]
+        column_predictions = iter(zip(self._column_predictions(parameters, fit), fit['n']))
         
-        trend_slope = model.coef_[0]
-        
-        # Determine trend direction
-        if abs(trend_slope) < 0.01 * mean_value:  # Less than 1% change
-            trend_direction = 'stable'
-        elif trend_slope > 0:
-            trend_direction = 'increasing'
-        else:
-            trend_direction = 'decreasing'
+        for station_id, columns, _ in blocks:
+            for column in columns:
+                prediction, n = next(column_predictions)
+                if n >= 2:
+                    results[station_id][column] = prediction
         
-        # Generate weekly predictions (8 weeks = 2 months)
-        predicted_values = []
-        confidence_values = []
+        # Everything above is built from native Python values already
+        return results
+    
+    def _predict_parameter(self, parameter: str, historical_values: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Generate prediction for a single parameter
         
-        for week in range(1, self.prediction_weeks + 1):
-            # Future time step
-            future_index = len(historical_values) + (week * 7)  # 7 days per week
-            
-            # Linear trend prediction
-            base_prediction = model.predict([[future_index]])[0]
-            
-            # Add slight random variation based on historical std
-            variation = np.random.normal(0, std_value * 0.1)
-            predicted_value = base_prediction + variation
-            
-            # Ensure prediction stays within reasonable bounds
-            if parameter.lower() in self.thresholds:
-                threshold = self.thresholds[parameter.lower()]
-                if 'min' in threshold and predicted_value < threshold['min'] * 0.8:
-                    predicted_value = threshold['min'] * 0.9
-                if 'max' in threshold and predicted_value > threshold['max'] * 1.2:
-                    predicted_value = threshold['max'] * 1.1
-            
-            predicted_values.append(round(predicted_value, 2))
+        Args:
+            parameter: Parameter name (e.g., 'pH', 'turbidity')
+            historical_values: List of historical values
             
-            # Confidence decreases with time (from 0.95 to 0.70)
-            confidence = 0.95 - (week - 1) * 0.03
-            confidence_values.append(round(confidence, 2))
-        
-        # Determine if parameter will exceed thresholds
-        alerts = self._check_threshold_alerts(parameter, predicted_values)
-        
-        return {
-            'current': round(current_value, 2),
-            'mean': round(mean_value, 2),
-            'predicted': predicted_values,
-            'confidence': confidence_values,
-            'trend': trend_direction,
-            'trendSlope': round(trend_slope, 4),
-            'alerts': alerts,
-            'weeks': list(range(1, self.prediction_weeks + 1))
-        }
+        Returns:
+            Prediction dictionary with forecasted values and metadata
+        """
+        if len(historical_values) < 2:
+            return None
+        fit = self._fit_columns(np.asarray(historical_values, dtype=float).reshape(-1, 1))
+        return self._column_predictions([parameter], fit)[0]
     
     def _check_threshold_alerts(self, parameter: str, predicted_values: List[float]) -> List[Dict[str, Any]]:
         """Check if predicted values will exceed safe thresholds"""
@@ -9,6 +9,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import pandas as pd
 from enhanced_prediction_service import EnhancedPredictionService
+from model_registry import get_model_registry
+from alert_engine import AlertEngine
+from streaming_anomaly_detector import StreamingAnomalyDetector
+import wqi_kernel
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,9 +24,19 @@ class RealtimeDataOrchestrator:
     Integrates Phase 5 ML models with live data streams
     """
     
-    def __init__(self, websocket_server=None):
+    def __init__(self, websocket_server=None, api_integration=None, alert_engine: Optional[AlertEngine] = None,
+                 anomaly_detector: Optional[StreamingAnomalyDetector] = None):
         self.websocket_server = websocket_server
-        self.prediction_service = EnhancedPredictionService()
+        self.api_integration = api_integration  # AsyncGovernmentAPIIntegration
+        self.prediction_service = EnhancedPredictionService(model_registry=get_model_registry())
+        # Threshold alerts (with hysteresis). The orchestrator's stations get their
+        # own engine so they never show up in the live station service's listings
+        self.alert_engine = alert_engine or AlertEngine()
+        if self.websocket_server:
+            self.websocket_server.watch_alerts(self.alert_engine)
+        # EWMA / CUSUM change points against each station's own baseline
+        self.anomaly_detector = anomaly_detector or StreamingAnomalyDetector()
+        self._anomaly_checked: Dict[int, Any] = {}
         self.active_stations: Dict[int, Dict] = {}
         self.last_update: Dict[int, datetime] = {}
         self.update_interval = 300  # 5 minutes in seconds
@@ -56,7 +70,14 @@ class RealtimeDataOrchestrator:
         
         while True:
             try:
-                for station_id in self.active_stations.keys():
+                # Warm the API caches for the whole network with bulk requests,
+                # so the per-station collection below is served from cache
+                if self.api_integration and self.api_integration.enabled:
+                    api_stations = self._api_station_list()
+                    if api_stations:
+                        await self.api_integration.get_network_data(api_stations)
+                
+                for station_id in list(self.active_stations.keys()):
                     await self.collect_station_data(station_id)
                     await asyncio.sleep(1)  # Small delay between stations
                 
@@ -73,9 +94,7 @@ class RealtimeDataOrchestrator:
         
         while True:
             try:
-                for station_id, station_data in self.active_stations.items():
-                    if 'current_data' in station_data:
-                        await self.update_predictions(station_id, station_data['current_data'])
+                await self.update_network_predictions()
                 
                 # Update predictions every 15 minutes
                 await asyncio.sleep(900)
@@ -90,9 +109,18 @@ class RealtimeDataOrchestrator:
         
         while True:
             try:
-                for station_id, station_data in self.active_stations.items():
-                    if 'current_data' in station_data:
-                        await self.detect_anomalies(station_id, station_data['current_data'])
+                # Only readings collected since the last pass; feeding a stale
+                # reading twice would shrink the detector's variance estimates
+                fresh = {}
+                for station_id, station_data in list(self.active_stations.items()):
+                    data = station_data.get('current_data')
+                    if data and self._anomaly_checked.get(station_id) != data.get('timestamp'):
+                        self._anomaly_checked[station_id] = data.get('timestamp')
+                        fresh[station_id] = data
+                
+                for station_id, data in fresh.items():
+                    await self.detect_anomalies(station_id, data)
+                await self.detect_change_points(fresh)
                 
                 # Check every 5 minutes
                 await asyncio.sleep(300)
@@ -167,11 +195,46 @@ class RealtimeDataOrchestrator:
         # For now, return None to simulate no sensor data
         return None, None
     
+    def _api_station_list(self) -> List[Dict]:
+        """Stations with coordinates, in the format used by the API layer"""
+        stations = []
+        for station_id, station in self.active_stations.items():
+            info = station.get('info', {})
+            if 'lat' in info and 'lon' in info:
+                stations.append({
+                    'id': str(station_id),
+                    'lat': info['lat'],
+                    'lon': info['lon'],
+                    'gauge_id': info.get('gauge_id')
+                })
+        return stations
+    
     async def fetch_api_data(self, station_id: int) -> tuple:
-        """Fetch data from government APIs"""
-        # TODO: Implement CPCB/MPCB API integration
-        # For now, return simulated data
-        return None, None
+        """Fetch data from government APIs (CPCB water quality + CWC + IMD)"""
+        # No CPCB endpoint configured: fall back to the other sources / ML
+        if not self.api_integration or not self.api_integration.cpcb.enabled:
+            return None, None
+        
+        info = self.active_stations.get(station_id, {}).get('info', {})
+        if 'lat' not in info or 'lon' not in info:
+            return None, None
+        
+        combined = await self.api_integration.get_comprehensive_station_data(
+            str(station_id), info['lat'], info['lon'], gauge_id=info.get('gauge_id')
+        )
+        if 'CPCB' not in combined['sources']:
+            return None, None
+        
+        data = {
+            key: combined[key]
+            for key in ('ph', 'bod', 'dissolved_oxygen', 'fecal_coliform', 'temperature', 'turbidity', 'tds')
+            if key in combined
+        }
+        if 'water_level' in combined:
+            data['water_level_m'] = combined['water_level'].get('water_level_m')
+        if 'weather' in combined:
+            data['rainfall_mm'] = combined['weather'].get('rainfall_mm')
+        return data, 'api'
     
     async def fetch_satellite_data(self, station_id: int) -> tuple:
         """Fetch data from satellite sources"""
@@ -263,40 +326,62 @@ class RealtimeDataOrchestrator:
         return validation
     
     def calculate_wqi_quick(self, data: Dict) -> float:
-        """Quick WQI calculation using CPCB weights"""
-        # Simplified WQI - use Phase 1 calculator for full accuracy
+        """Quick WQI screen using CPCB weights (wqi_kernel screening index)"""
+        # Simplified WQI - wqi_kernel.cpcb_wqi gives the full CPCB index
         try:
-            ph = data.get('ph', 7.0)
-            bod = data.get('bod', 2.0)
-            do_val = data.get('dissolved_oxygen', 6.0)
-            fc = data.get('fecal_coliform', 500)
-            
-            # Rough sub-indices
-            ph_sub = 90 if 7.0 <= ph <= 8.5 else 70
-            bod_sub = 90 if bod <= 3 else 70
-            do_sub = 90 if do_val >= 6 else 70
-            fc_sub = 90 if fc <= 500 else 70
-            
-            wqi = (0.22 * ph_sub + 0.19 * bod_sub + 0.31 * do_sub + 0.28 * fc_sub)
-            return max(0, min(100, wqi))
+            return wqi_kernel.score_reading(data, 'screening')
             
         except Exception as e:
             logger.error(f"Error calculating WQI: {e}")
             return 50.0
     
+    def _current_season(self) -> str:
+        """Season name used by the Phase 5 models"""
+        month = datetime.now().month
+        if month in [6, 7, 8, 9]:
+            return 'monsoon'
+        elif month in [3, 4, 5]:
+            return 'summer'
+        elif month in [11, 12, 1, 2]:
+            return 'winter'
+        return 'post_monsoon'
+    
+    async def update_network_predictions(self):
+        """Update ML predictions for all stations with one batched forecast"""
+        try:
+            stations_data = {
+                station_id: station_data['current_data']
+                for station_id, station_data in self.active_stations.items()
+                if 'current_data' in station_data
+            }
+            if not stations_data:
+                return
+            
+            # Model inference is CPU-bound: keep it off the event loop
+            loop = asyncio.get_running_loop()
+            forecasts = await loop.run_in_executor(
+                None,
+                lambda: self.prediction_service.generate_network_forecast(
+                    stations_data, season=self._current_season(), horizons=[7, 30, 90]
+                )
+            )
+            
+            for station_id, predictions in forecasts.items():
+                if station_id not in self.active_stations:
+                    continue
+                self.active_stations[station_id]['predictions'] = predictions
+                if self.websocket_server:
+                    await self.websocket_server.broadcast_prediction(station_id, predictions)
+            
+            logger.info(f"Updated predictions for {len(forecasts)} stations")
+            
+        except Exception as e:
+            logger.error(f"Error updating network predictions: {e}")
+    
     async def update_predictions(self, station_id: int, current_data: Dict):
         """Update ML predictions for a station"""
         try:
-            # Determine season
-            month = datetime.now().month
-            if month in [6, 7, 8, 9]:
-                season = 'monsoon'
-            elif month in [3, 4, 5]:
-                season = 'summer'
-            elif month in [11, 12, 1, 2]:
-                season = 'winter'
-            else:
-                season = 'post_monsoon'
+            season = self._current_season()
             
             # Generate predictions using Phase 5 models
             predictions = self.prediction_service.generate_multi_parameter_forecast(
@@ -318,46 +403,50 @@ class RealtimeDataOrchestrator:
             logger.error(f"Error updating predictions: {e}")
     
     async def detect_anomalies(self, station_id: int, data: Dict):
-        """Detect anomalies and send alerts"""
+        """
+        Run the station's latest data through the alert engine
+        
+        New and escalated alerts reach WebSocket clients through the
+        engine listener registered by the WebSocket server.
+        """
         try:
-            alerts = []
+            events = self.alert_engine.ingest({station_id: data}, data.get('timestamp'))
             
-            # Check for critical values
-            if data.get('dissolved_oxygen', 10) < 4.0:
-                alerts.append({
-                    'severity': 'critical',
-                    'parameter': 'Dissolved Oxygen',
-                    'value': data['dissolved_oxygen'],
-                    'threshold': 4.0,
-                    'message': 'Critical DO levels detected - aquatic life at risk'
-                })
+            for event in events:
+                if event.kind in ('raised', 'escalated'):
+                    logger.warning(f"Alert for station {station_id}: {event.alert.message}")
+                elif event.kind == 'cleared':
+                    logger.info(f"Alert cleared for station {station_id}: {event.alert.rule}")
             
-            if data.get('fecal_coliform', 0) > 2500:
-                alerts.append({
-                    'severity': 'high',
-                    'parameter': 'Fecal Coliform',
-                    'value': data['fecal_coliform'],
-                    'threshold': 2500,
-                    'message': 'High bacterial contamination detected'
-                })
+            return events
             
-            if data.get('ph', 7) < 6.0 or data.get('ph', 7) > 9.0:
-                alerts.append({
-                    'severity': 'high',
-                    'parameter': 'pH',
-                    'value': data['ph'],
-                    'threshold': '6.0-9.0',
-                    'message': 'pH outside safe range'
-                })
+        except Exception as e:
+            logger.error(f"Error detecting anomalies: {e}")
+            return []
+    
+    async def detect_change_points(self, readings: Dict[int, Dict]):
+        """
+        Run a batch of station readings through the streaming anomaly detector
+        
+        All stations are updated in one vectorized step; spikes and level
+        shifts are sent to WebSocket subscribers of the station.
+        """
+        if not readings:
+            return []
+        try:
+            events = self.anomaly_detector.ingest(readings, datetime.now().isoformat())
             
-            # Send alerts if any found
-            for alert in alerts:
+            for event in events:
+                logger.warning(f"Anomaly at station {event['stationId']}: {event['kind']} in "
+                               f"{event['parameter']} (value {event['value']}, expected {event['expected']})")
                 if self.websocket_server:
-                    await self.websocket_server.broadcast_alert(station_id, alert)
-                logger.warning(f"Alert for station {station_id}: {alert['message']}")
+                    await self.websocket_server.broadcast_alert(event['stationId'], event, event=event['kind'])
+            
+            return events
             
         except Exception as e:
-            logger.error(f"Error detecting anomalies: {e}")
+            logger.error(f"Error detecting change points: {e}")
+            return []
     
     def register_station(self, station_id: int, station_info: Dict):
         """Register a station for real-time monitoring"""
@@ -365,6 +454,7 @@ class RealtimeDataOrchestrator:
             'info': station_info,
             'registered_at': datetime.now()
         }
+        self.alert_engine.register_stations([station_info], lambda s: station_id)
         logger.info(f"Registered station {station_id} for real-time monitoring")
     
     def unregister_station(self, station_id: int):
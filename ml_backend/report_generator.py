@@ -1,6 +1,16 @@
 """
 Report Generator Service
 Generates PDF and Excel reports for water quality analysis
+
+Features:
+- Paragraph and table styles are compiled once per process and shared by
+  every report
+- Chart images are rendered with the object-oriented matplotlib API (thread
+  safe, no pyplot state) and cached as PNG bytes by a hash of their data
+- Independent report sections are built in parallel on a thread pool and
+  assembled in order
+- Batch mode: per-district report bundles (PDF + JSON summary, zipped) for
+  every district, from live station data, rendered on a process pool
 """
 
 from reportlab.lib.pagesizes import A4, letter
@@ -9,54 +19,274 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import multiprocessing
 import os
 import io
+import re
+import threading
+import time
+import zipfile
 import matplotlib
 matplotlib.use('Agg')  # Use non-GUI backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 
-class ReportGenerator:
-    """Generate professional PDF and Excel reports"""
-    
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-        
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.title_style = ParagraphStyle(
+# Table styles are immutable once built; one instance serves every report
+INFO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+RISK_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f9ff')]),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+])
+
+PREDICTION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecfdf5')]),
+])
+
+PREDICTIONS_INTRO = """
+        AI-powered predictions for the next 60 days (8 weeks) show trends for all monitored parameters.
+        Predictions are based on historical data patterns and statistical modeling.
+        """
+
+FOOTER_DISCLAIMER = "<i>This report is computer-generated and does not require a signature.</i>"
+
+# Live reading field -> (label, unit) summarized in district reports
+DISTRICT_PARAMETERS = OrderedDict([
+    ('ph', ('pH', '')),
+    ('dissolvedOxygen', ('Dissolved Oxygen', 'mg/L')),
+    ('bod', ('BOD', 'mg/L')),
+    ('tds', ('TDS', 'mg/L')),
+    ('turbidity', ('Turbidity', 'NTU')),
+    ('nitrates', ('Nitrates', 'mg/L')),
+    ('fluoride', ('Fluoride', 'mg/L')),
+    ('fecalColiform', ('Fecal Coliform', 'MPN/100ml')),
+])
+
+STATUS_ORDER = ['Excellent', 'Good', 'Fair', 'Poor', 'Very Poor']
+STATUS_COLORS = ['#10b981', '#84cc16', '#f59e0b', '#f97316', '#dc2626']
+
+
+@lru_cache(maxsize=None)
+def _shared_styles() -> Dict[str, ParagraphStyle]:
+    """Sample stylesheet plus the report's custom styles, built once per process"""
+    base = getSampleStyleSheet()
+    return {
+        'Normal': base['Normal'],
+        'BodyText': base['BodyText'],
+        'title': ParagraphStyle(
             'CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=base['Heading1'],
             fontSize=24,
             textColor=colors.HexColor('#1e3a8a'),
             spaceAfter=30,
             alignment=TA_CENTER,
             fontName='Helvetica-Bold'
-        )
-        
-        self.heading_style = ParagraphStyle(
+        ),
+        'heading': ParagraphStyle(
             'CustomHeading',
-            parent=self.styles['Heading2'],
+            parent=base['Heading2'],
             fontSize=16,
             textColor=colors.HexColor('#1e3a8a'),
             spaceAfter=12,
             spaceBefore=12,
             fontName='Helvetica-Bold'
-        )
-        
-        self.subheading_style = ParagraphStyle(
+        ),
+        'subheading': ParagraphStyle(
             'CustomSubheading',
-            parent=self.styles['Heading3'],
+            parent=base['Heading3'],
             fontSize=12,
             textColor=colors.HexColor('#374151'),
             spaceAfter=8,
             fontName='Helvetica-Bold'
-        )
+        ),
+        'subtitle': ParagraphStyle(
+            'Subtitle',
+            parent=base['Normal'],
+            fontSize=14,
+            textColor=colors.HexColor('#6b7280'),
+            alignment=TA_CENTER
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=base['Normal'],
+            fontSize=9,
+            textColor=colors.HexColor('#6b7280'),
+            alignment=TA_CENTER
+        ),
+    }
+
+
+class ChartCache:
+    """LRU cache of rendered chart PNGs keyed by a hash of the chart's data"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._images: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(kind: str, data: Any) -> str:
+        payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(f"{kind}\n{payload}".encode('utf-8')).hexdigest()
+    
+    def get_or_render(self, kind: str, data: Any, render: Callable[[Any], bytes]) -> bytes:
+        key = self.key(kind, data)
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+        png = render(data)
+        with self._lock:
+            self._images[key] = png
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        return png
+    
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._images),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def _figure_png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.savefig(buffer, format='png', dpi=110)
+    return buffer.getvalue()
+
+
+def _render_prediction_chart(series: List[Dict[str, Any]]) -> bytes:
+    """Small multiples of predicted values with their interval band"""
+    cols = min(3, len(series))
+    rows = (len(series) + cols - 1) // cols
+    fig = Figure(figsize=(2.3 * cols, 1.7 * rows))
+    for i, item in enumerate(series):
+        ax = fig.add_subplot(rows, cols, i + 1)
+        weeks = item['weeks']
+        ax.fill_between(weeks, item['lower'], item['upper'], color='#a7f3d0', alpha=0.6, linewidth=0)
+        ax.plot(weeks, item['predicted'], color='#059669', linewidth=1.5)
+        ax.axhline(item['current'], color='#6b7280', linestyle='--', linewidth=0.8)
+        ax.set_title(item['parameter'], fontsize=8)
+        ax.tick_params(labelsize=6)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+def _render_status_chart(counts: List[int]) -> bytes:
+    """Bar chart of stations per water quality status"""
+    fig = Figure(figsize=(5.5, 2.2))
+    ax = fig.add_subplot(1, 1, 1)
+    ax.bar(STATUS_ORDER, counts, color=STATUS_COLORS)
+    for x, count in enumerate(counts):
+        ax.text(x, count, str(count), ha='center', va='bottom', fontsize=7)
+    ax.set_ylabel('Stations', fontsize=8)
+    ax.tick_params(labelsize=7)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+def _render_wqi_histogram(histogram: Dict[str, List[float]]) -> bytes:
+    """Distribution of station WQI values"""
+    fig = Figure(figsize=(5.5, 2.2))
+    ax = fig.add_subplot(1, 1, 1)
+    edges = histogram['edges']
+    ax.bar(edges[:-1], histogram['counts'], width=np.diff(edges), align='edge',
+           color='#3b82f6', edgecolor='white')
+    ax.set_xlabel('WQI', fontsize=8)
+    ax.set_ylabel('Stations', fontsize=8)
+    ax.tick_params(labelsize=7)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+
+_chart_cache = ChartCache()
+
+
+class ReportGenerator:
+    """Generate professional PDF and Excel reports"""
+    
+    def __init__(self, chart_cache: Optional[ChartCache] = None, section_workers: int = 4):
+        """
+        Args:
+            chart_cache: Chart image cache (default: shared per process)
+            section_workers: Threads used to build report sections
+        """
+        self.chart_cache = chart_cache if chart_cache is not None else _chart_cache
+        self.section_workers = section_workers
+        self._setup_custom_styles()
+        
+    def _setup_custom_styles(self):
+        """Setup custom paragraph styles (compiled once per process)"""
+        shared = _shared_styles()
+        self.styles = shared
+        self.title_style = shared['title']
+        self.heading_style = shared['heading']
+        self.subheading_style = shared['subheading']
+        self.subtitle_style = shared['subtitle']
+        self.footer_style = shared['footer']
+    
+    def _chart(self, kind: str, data: Any, render: Callable[[Any], bytes], width: float) -> Image:
+        """Cached chart as a flowable scaled to width"""
+        png = self.chart_cache.get_or_render(kind, data, render)
+        image = Image(io.BytesIO(png))
+        image.drawHeight = width * image.imageHeight / image.imageWidth
+        image.drawWidth = width
+        return image
+    
+    def _build_sections(self, builders: List[Tuple[Callable, tuple]]) -> List:
+        """Run independent section builders concurrently; story keeps their order"""
+        if self.section_workers <= 1 or len(builders) <= 1:
+            parts = [builder(*args) for builder, args in builders]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.section_workers, len(builders))) as pool:
+                parts = list(pool.map(lambda item: item[0](*item[1]), builders))
+        story = []
+        for part in parts:
+            story.extend(part)
+        return story
     
     def generate_comprehensive_report(
         self,
@@ -68,41 +298,37 @@ class ReportGenerator:
         doc = SimpleDocTemplate(output_path, pagesize=A4,
                                 rightMargin=72, leftMargin=72,
                                 topMargin=72, bottomMargin=18)
-        story = []
-        
-        # Cover Page
-        story.extend(self._generate_cover_page(analysis_data))
-        story.append(PageBreak())
-        
-        # Executive Summary
-        story.extend(self._generate_executive_summary(analysis_data))
-        story.append(Spacer(1, 0.3*inch))
+        spacer = lambda: [Spacer(1, 0.3*inch)]
+        
+        # Sections are independent of each other; built concurrently, kept in order
+        builders = [
+            (self._generate_cover_page, (analysis_data,)),
+            (lambda: [PageBreak()], ()),
+            (self._generate_executive_summary, (analysis_data,)),
+            (spacer, ()),
+        ]
         
         # Risk Assessment Section
         if 'riskAssessment' in analysis_data:
-            story.extend(self._generate_risk_section(analysis_data['riskAssessment']))
-            story.append(Spacer(1, 0.3*inch))
+            builders += [(self._generate_risk_section, (analysis_data['riskAssessment'],)), (spacer, ())]
         
         # Predictions Section
         if 'predictions' in analysis_data:
-            story.extend(self._generate_predictions_section(analysis_data['predictions']))
-            story.append(Spacer(1, 0.3*inch))
+            builders += [(self._generate_predictions_section, (analysis_data['predictions'],)), (spacer, ())]
         
         # Trend Analysis Section
         if 'trendAnalysis' in analysis_data:
-            story.extend(self._generate_trends_section(analysis_data['trendAnalysis']))
-            story.append(Spacer(1, 0.3*inch))
+            builders += [(self._generate_trends_section, (analysis_data['trendAnalysis'],)), (spacer, ())]
         
         # Recommendations Section
         if 'recommendations' in analysis_data:
-            story.extend(self._generate_recommendations_section(analysis_data['recommendations']))
+            builders.append((self._generate_recommendations_section, (analysis_data['recommendations'],)))
         
         # Footer
-        story.append(Spacer(1, 0.5*inch))
-        story.extend(self._generate_footer())
+        builders += [(lambda: [Spacer(1, 0.5*inch)], ()), (self._generate_footer, ())]
         
         # Build PDF
-        doc.build(story)
+        doc.build(self._build_sections(builders))
         return output_path
     
     def _generate_cover_page(self, data: Dict[str, Any]) -> List:
@@ -118,16 +344,9 @@ class ReportGenerator:
         elements.append(Spacer(1, 0.5*inch))
         
         # Subtitle
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#6b7280'),
-            alignment=TA_CENTER
-        )
         elements.append(Paragraph(
             "Maharashtra Water Quality Monitoring System",
-            subtitle_style
+            self.subtitle_style
         ))
         elements.append(Spacer(1, 1*inch))
         
@@ -135,17 +354,12 @@ class ReportGenerator:
         info_data = [
             ['Report ID:', data.get('id', 'N/A')[:20]],
             ['Generated:', datetime.now().strftime('%B %d, %Y at %I:%M %p')],
-            ['Location:', data.get('location', {}).get('name', 'Multiple Stations')],
+            ['Location:', (data.get('location') or {}).get('name', 'Multiple Stations')],
             ['File Analyzed:', data.get('fileName', 'N/A')],
         ]
         
         info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        info_table.setStyle(INFO_TABLE_STYLE)
         elements.append(info_table)
         
         return elements
@@ -205,17 +419,7 @@ class ReportGenerator:
                 ])
             
             table = Table(table_data, colWidths=[1.2*inch, 0.8*inch, 0.6*inch, 0.9*inch, 2.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f9ff')]),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ]))
+            table.setStyle(RISK_TABLE_STYLE)
             elements.append(table)
         
         return elements
@@ -227,11 +431,7 @@ class ReportGenerator:
         elements.append(Paragraph("60-Day Predictions", self.heading_style))
         
         # Predictions summary
-        summary_text = f"""
-        AI-powered predictions for the next 60 days (8 weeks) show trends for all monitored parameters.
-        Predictions are based on historical data patterns and statistical modeling.
-        """
-        elements.append(Paragraph(summary_text, self.styles['BodyText']))
+        elements.append(Paragraph(PREDICTIONS_INTRO, self.styles['BodyText']))
         elements.append(Spacer(1, 0.2*inch))
         
         # Predictions table
@@ -253,17 +453,25 @@ class ReportGenerator:
                 ])
             
             table = Table(table_data, colWidths=[1.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1*inch, 0.8*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecfdf5')]),
-            ]))
+            table.setStyle(PREDICTION_TABLE_STYLE)
             elements.append(table)
+            
+            # Forecast chart (cached by the plotted values)
+            series = [
+                {
+                    'parameter': param,
+                    'current': pred['current'],
+                    'weeks': pred.get('weeks') or list(range(1, len(pred['predicted']) + 1)),
+                    'predicted': pred['predicted'],
+                    'lower': pred.get('lower') or pred['predicted'],
+                    'upper': pred.get('upper') or pred['predicted'],
+                }
+                for param, pred in list(predictions.items())[:6]
+                if pred.get('predicted')
+            ]
+            if series:
+                elements.append(Spacer(1, 0.2*inch))
+                elements.append(self._chart('predictions', series, _render_prediction_chart, 6*inch))
         
         return elements
     
@@ -332,19 +540,338 @@ class ReportGenerator:
         """Generate report footer"""
         elements = []
         
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#6b7280'),
-            alignment=TA_CENTER
-        )
-        
         footer_text = f"""
         Generated by PureHealth AI System | Maharashtra Water Quality Monitoring<br/>
         {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
-        <i>This report is computer-generated and does not require a signature.</i>
+        {FOOTER_DISCLAIMER}
+        """
+        elements.append(Paragraph(footer_text, self.footer_style))
+        
+        return elements
+    
+    # ==================== DISTRICT REPORTS ====================
+    
+    def generate_district_report(self, summary: Dict[str, Any], output_path: str) -> str:
         """
-        elements.append(Paragraph(footer_text, footer_style))
+        Generate a district PDF report from a summary built by build_district_summaries
         
+        Args:
+            summary: District summary (stations, WQI, status mix, parameters)
+            output_path: Where to write the PDF
+        """
+        doc = SimpleDocTemplate(output_path, pagesize=A4,
+                                rightMargin=54, leftMargin=54,
+                                topMargin=54, bottomMargin=18)
+        builders = [
+            (self._generate_district_overview, (summary,)),
+            (self._generate_district_charts, (summary,)),
+            (self._generate_district_parameters, (summary,)),
+            (self._generate_district_stations, (summary,)),
+            (lambda: [Spacer(1, 0.4*inch)], ()),
+            (self._generate_footer, ()),
+        ]
+        doc.build(self._build_sections(builders))
+        return output_path
+    
+    def _generate_district_overview(self, summary: Dict[str, Any]) -> List:
+        elements = [
+            Paragraph(f"{summary['district']} District Water Quality Report", self.title_style),
+            Paragraph("Maharashtra Water Quality Monitoring System", self.subtitle_style),
+            Spacer(1, 0.3*inch),
+        ]
+        wqi = summary['wqi']
+        info_data = [
+            ['Generated:', datetime.now().strftime('%B %d, %Y at %I:%M %p')],
+            ['Data as of:', summary.get('dataTimestamp') or 'N/A'],
+            ['Stations:', f"{summary['stationCount']} ({summary['surfaceWater']} surface water, "
+                          f"{summary['groundwater']} groundwater)"],
+            ['Reporting:', str(summary['reportingStations'])],
+            ['Average WQI:', f"{wqi['mean']:.1f} (min {wqi['min']:.1f}, max {wqi['max']:.1f})"
+                             if wqi['mean'] is not None else 'N/A'],
+            ['Active Alerts:', f"{summary['alertCount']} ({summary['criticalAlertCount']} critical)"],
+        ]
+        info_table = Table(info_data, colWidths=[1.6*inch, 4.6*inch])
+        info_table.setStyle(INFO_TABLE_STYLE)
+        elements.append(info_table)
         return elements
+    
+    def _generate_district_charts(self, summary: Dict[str, Any]) -> List:
+        counts = [summary['statusCounts'].get(status, 0) for status in STATUS_ORDER]
+        return [
+            Paragraph("Water Quality Status", self.heading_style),
+            self._chart('status', counts, _render_status_chart, 5.5*inch),
+            Paragraph("WQI Distribution", self.subheading_style),
+            self._chart('wqi_histogram', summary['wqiHistogram'], _render_wqi_histogram, 5.5*inch),
+        ]
+    
+    def _generate_district_parameters(self, summary: Dict[str, Any]) -> List:
+        elements = [Paragraph("Key Parameters", self.heading_style)]
+        table_data = [['Parameter', 'Unit', 'Mean', 'Min', 'Max']]
+        for stats in summary['parameters'].values():
+            if stats['mean'] is None:
+                continue
+            table_data.append([stats['label'], stats['unit'], f"{stats['mean']:.2f}",
+                               f"{stats['min']:.2f}", f"{stats['max']:.2f}"])
+        table = Table(table_data, colWidths=[1.8*inch, 1.1*inch, 1*inch, 1*inch, 1*inch])
+        table.setStyle(PREDICTION_TABLE_STYLE)
+        elements.append(table)
+        return elements
+    
+    def _generate_district_stations(self, summary: Dict[str, Any]) -> List:
+        elements = [Paragraph("Stations Needing Attention", self.heading_style)]
+        stations = summary['worstStations']
+        if not stations:
+            elements.append(Paragraph("No station readings available.", self.styles['BodyText']))
+            return elements
+        table_data = [['Station', 'Type', 'WQI', 'Status', 'Alerts']]
+        for station in stations:
+            name = station['name'] or station['id']
+            table_data.append([
+                name[:34] + '...' if len(name) > 34 else name,
+                (station['type'] or '').replace('_', ' ').title(),
+                f"{station['wqi']:.1f}" if station['wqi'] is not None else 'N/A',
+                station['status'] or 'N/A',
+                str(station['alerts']),
+            ])
+        table = Table(table_data, colWidths=[2.6*inch, 1.2*inch, 0.7*inch, 1*inch, 0.7*inch])
+        table.setStyle(RISK_TABLE_STYLE)
+        elements.append(table)
+        return elements
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_') or 'unknown'
+
+
+def build_district_summaries(
+    stations: List[Dict[str, Any]],
+    readings: Dict[str, Dict[str, Any]],
+    worst_count: int = 10
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summarize live station data per district (input for district reports)
+    
+    Args:
+        stations: Station metadata (get_all_stations())
+        readings: Current reading per station id
+        worst_count: Lowest-WQI stations listed per district
+    
+    Returns:
+        District name -> JSON-ready summary
+    """
+    fields = list(DISTRICT_PARAMETERS)
+    meta = pd.DataFrame(stations, columns=['id', 'name', 'type', 'district'])
+    meta = meta.drop_duplicates('id')
+    meta['district'] = meta['district'].fillna('Unknown')
+    
+    rows = []
+    for station_id, reading in readings.items():
+        row = {field: reading.get(field) for field in fields}
+        row.update({
+            'id': station_id,
+            'wqi': reading.get('wqi'),
+            'status': reading.get('status'),
+            'alerts': len(reading.get('alerts') or []),
+            'critical': sum(1 for a in (reading.get('alerts') or []) if 'CRITICAL' in str(a)),
+            'timestamp': reading.get('timestamp'),
+        })
+        rows.append(row)
+    live = pd.DataFrame(rows, columns=fields + ['id', 'wqi', 'status', 'alerts', 'critical', 'timestamp'])
+    for column in fields + ['wqi']:
+        live[column] = pd.to_numeric(live[column], errors='coerce')
+    frame = meta.merge(live, on='id', how='left')
+    
+    edges = np.linspace(0, 100, 11)
+    summaries = {}
+    for district, group in frame.groupby('district', sort=True):
+        wqi = group['wqi'].dropna()
+        reporting = group[group['timestamp'].notna()]
+        counts, _ = np.histogram(wqi.clip(0, 100), bins=edges)
+        worst = reporting.sort_values('wqi', na_position='last').head(worst_count)
+        summaries[district] = {
+            'district': district,
+            'slug': _slug(district),
+            'dataTimestamp': reporting['timestamp'].max() if len(reporting) else None,
+            'stationCount': int(len(group)),
+            'reportingStations': int(len(reporting)),
+            'surfaceWater': int((group['type'] == 'surface_water').sum()),
+            'groundwater': int((group['type'] == 'groundwater').sum()),
+            'wqi': {
+                'mean': round(float(wqi.mean()), 2) if len(wqi) else None,
+                'min': round(float(wqi.min()), 2) if len(wqi) else None,
+                'max': round(float(wqi.max()), 2) if len(wqi) else None,
+            },
+            'wqiHistogram': {'edges': edges.tolist(), 'counts': counts.tolist()},
+            'statusCounts': {str(k): int(v) for k, v in reporting['status'].value_counts().items()},
+            'alertCount': int(reporting['alerts'].sum()),
+            'criticalAlertCount': int(reporting['critical'].sum()),
+            'parameters': {
+                field: {
+                    'label': label,
+                    'unit': unit,
+                    'mean': round(float(group[field].mean()), 3) if group[field].notna().any() else None,
+                    'min': round(float(group[field].min()), 3) if group[field].notna().any() else None,
+                    'max': round(float(group[field].max()), 3) if group[field].notna().any() else None,
+                }
+                for field, (label, unit) in DISTRICT_PARAMETERS.items()
+            },
+            'worstStations': [
+                {
+                    'id': row.id,
+                    'name': row.name if isinstance(row.name, str) else None,
+                    'type': row.type if isinstance(row.type, str) else None,
+                    'wqi': None if pd.isna(row.wqi) else round(float(row.wqi), 1),
+                    'status': row.status if isinstance(row.status, str) else None,
+                    'alerts': int(row.alerts),
+                }
+                for row in worst.itertuples(index=False)
+            ],
+        }
+    return summaries
+
+
+_district_generator = None
+
+
+def _render_district_bundle(task: Tuple[Dict[str, Any], str]) -> Dict[str, Any]:
+    """Write one district's PDF and JSON summary (runs in a pool process)"""
+    global _district_generator
+    if _district_generator is None:
+        # Pool processes render one district at a time; sections stay sequential
+        _district_generator = ReportGenerator(section_workers=1)
+    summary, output_dir = task
+    start = time.perf_counter()
+    pdf_path = os.path.join(output_dir, f"{summary['slug']}.pdf")
+    json_path = os.path.join(output_dir, f"{summary['slug']}.json")
+    _district_generator.generate_district_report(summary, pdf_path)
+    with open(json_path, 'w') as f:
+        json.dump(summary, f)
+    return {
+        'district': summary['district'],
+        'pdf': os.path.basename(pdf_path),
+        'summary': os.path.basename(json_path),
+        'file_size': os.path.getsize(pdf_path),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def generate_district_reports(
+    summaries: Dict[str, Dict[str, Any]],
+    output_dir: str,
+    workers: Optional[int] = None,
+    bundle: bool = True,
+    progress: Optional[Callable[[float, str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Render a report bundle (PDF + JSON summary) for every district
+    
+    Args:
+        summaries: Output of build_district_summaries
+        output_dir: Directory receiving <district>.pdf / <district>.json
+        workers: Render processes, at most one per CPU (default: up to 4)
+        bundle: Also write <output_dir>.zip with every file
+        progress: Optional callback progress(fraction, district) after each district
+    
+    Returns:
+        Manifest with per-district files, the zip name and throughput
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, os.cpu_count() or 1)) if workers else max(1, min(4, os.cpu_count() or 1))
+    tasks = [(summaries[name], output_dir) for name in sorted(summaries)]
+    
+    start = time.perf_counter()
+    results = []
+    if workers > 1 and len(tasks) > 1:
+        # fork reuses the already imported modules; spawn works everywhere
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            for result in pool.map(_render_district_bundle, tasks):
+                results.append(result)
+                if progress:
+                    progress(len(results) / len(tasks), result['district'])
+    else:
+        for task in tasks:
+            results.append(_render_district_bundle(task))
+            if progress:
+                progress(len(results) / len(tasks), results[-1]['district'])
+    
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'districts': results,
+        'count': len(results),
+        'workers': workers,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    if bundle:
+        zip_path = f"{output_dir.rstrip(os.sep)}.zip"
+        # PDFs are already compressed; store them as-is
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for name in sorted(os.listdir(output_dir)):
+                archive.write(os.path.join(output_dir, name), arcname=os.path.join(os.path.basename(output_dir), name))
+        manifest['bundle'] = os.path.basename(zip_path)
+        manifest['bundle_size'] = os.path.getsize(zip_path)
+    
+    manifest['seconds'] = round(time.perf_counter() - start, 3)
+    manifest['reports_per_second'] = round(len(results) / manifest['seconds'], 2) if manifest['seconds'] else None
+    return manifest
+
+
+if __name__ == '__main__':
+    import argparse
+    import shutil
+    import tempfile
+    
+    parser = argparse.ArgumentParser(description='Benchmark report rendering')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    from ai_analysis_service import AIAnalysisService
+    from enhanced_live_station_service import get_station_service
+    
+    rng = np.random.default_rng(0)
+    file_data = {'data': {
+        name: rng.uniform(low, high, 200).round(2).tolist()
+        for name, low, high in [('pH', 6.0, 9.0), ('DO', 3.0, 9.0), ('BOD', 1.0, 6.0),
+                                ('TDS', 100.0, 900.0), ('Temperature', 20.0, 30.0), ('Turbidity', 1.0, 20.0)]
+    }}
+    report = AIAnalysisService().analyze_file(file_data)
+    tmp = tempfile.mkdtemp()
+    out = os.path.join(tmp, 'report.pdf')
+    
+    def latency(generator, label):
+        runs = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            generator.generate_comprehensive_report(report, out)
+            runs.append(time.perf_counter() - t)
+        print(f"{label:<44} p50 {sorted(runs)[len(runs) // 2] * 1000:6.1f} ms  "
+              f"first {runs[0] * 1000:6.1f} ms")
+    
+    latency(ReportGenerator(chart_cache=ChartCache(max_entries=0), section_workers=1),
+            'Single report, no chart cache, sequential')
+    latency(ReportGenerator(chart_cache=ChartCache(), section_workers=1),
+            'Single report, chart cache, sequential')
+    latency(ReportGenerator(chart_cache=ChartCache(), section_workers=4),
+            'Single report, chart cache, parallel sections')
+    
+    service = get_station_service(test_mode=False)
+    service.stop_simulation()
+    summaries = build_district_summaries(service.get_all_stations(), service.current_readings)
+    print(f"\n🗺️  {len(summaries)} districts, {sum(s['stationCount'] for s in summaries.values())} stations")
+    for workers in sorted({1, args.workers or max(1, min(4, os.cpu_count() or 1))}):
+        # Cold charts for every run (forked workers would inherit a warm cache)
+        _chart_cache.clear()
+        _district_generator = None
+        manifest = generate_district_reports(summaries, os.path.join(tmp, f"districts_{workers}"), workers=workers)
+        print(f"Batch with {workers} worker(s): {manifest['count']} district bundles in {manifest['seconds']:.2f}s "
+              f"-> {manifest['reports_per_second']} reports/s (zip {manifest['bundle_size'] / 1e6:.1f} MB)")
+        if workers == 1:
+            manifest = generate_district_reports(summaries, os.path.join(tmp, 'districts_warm'), workers=1)
+            print(f"Batch again, unchanged data (chart cache warm): {manifest['seconds']:.2f}s "
+                  f"-> {manifest['reports_per_second']} reports/s")
+    print(f"CPUs: {os.cpu_count()}")
+    shutil.rmtree(tmp)
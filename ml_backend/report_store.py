@@ -0,0 +1,319 @@
+"""
+Report Store - Phase 5
+Indexed storage for saved AI analysis reports
+
+Features:
+- SQLite (WAL) metadata index: id, timestamp, file name, location, risk
+  level and score, so listing is an index query instead of loading every
+  report file
+- Paginated listing filtered by risk level, location, file name and time range
+- Report bodies stored zlib-compressed and decompressed only when a report
+  is opened
+- rawData (the uploaded columns) kept in its own table and loaded only
+  when asked for
+- One-time import of legacy saved_reports/*.json files
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'saved_reports')
+DEFAULT_DB_PATH = os.path.join(DEFAULT_REPORTS_DIR, 'reports.db')
+COMPRESSION_LEVEL = 6
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(',', ':'), default=str).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class ReportStore:
+    """Saved reports: small index rows, compressed bodies, separate raw data"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            id TEXT PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            file_name TEXT,
+            location_name TEXT,
+            location TEXT,
+            risk_level TEXT,
+            risk_score REAL,
+            body_bytes INTEGER NOT NULL,
+            raw_bytes INTEGER NOT NULL,
+            saved_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS report_bodies (
+            id TEXT PRIMARY KEY,
+            body BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS report_raw_data (
+            id TEXT PRIMARY KEY,
+            raw_data BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_reports_risk ON reports (risk_level, timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_reports_location ON reports (location_name COLLATE NOCASE, timestamp, id);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # ==================== WRITE ====================
+
+    @staticmethod
+    def _index_row(report: Dict[str, Any]) -> Tuple:
+        location = report.get('location') if isinstance(report.get('location'), dict) else None
+        risk = report.get('riskAssessment') or {}
+        return (
+            report['id'],
+            report.get('timestamp') or '',
+            report.get('fileName'),
+            location.get('name') if location else None,
+            json.dumps(location) if location else None,
+            risk.get('overallRiskLevel'),
+            risk.get('riskScore'),
+        )
+
+    def save(self, report: Dict[str, Any]) -> str:
+        """
+        Save (or replace) a report
+
+        Returns:
+            Report id (generated when the report has none)
+        """
+        report = dict(report)
+        report.setdefault('id', str(uuid.uuid4()))
+        raw_data = report.pop('rawData', None)
+        body = _pack(report)
+        raw = _pack(raw_data)
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO reports (id, timestamp, file_name, location_name, location, risk_level, '
+                'risk_score, body_bytes, raw_bytes, saved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                self._index_row(report) + (len(body), len(raw), time.time())
+            )
+            conn.execute('INSERT OR REPLACE INTO report_bodies (id, body) VALUES (?, ?)', (report['id'], body))
+            conn.execute('INSERT OR REPLACE INTO report_raw_data (id, raw_data) VALUES (?, ?)', (report['id'], raw))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return report['id']
+
+    def delete(self, report_id: str) -> bool:
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = conn.execute('DELETE FROM reports WHERE id = ?', (report_id,)).rowcount
+            conn.execute('DELETE FROM report_bodies WHERE id = ?', (report_id,))
+            conn.execute('DELETE FROM report_raw_data WHERE id = ?', (report_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return deleted > 0
+
+    def import_legacy(self, reports_dir: str) -> int:
+        """
+        Import saved_reports/*.json written by older versions
+
+        Imported files are renamed to *.json.imported so startup does not
+        read them again.
+
+        Returns:
+            Number of reports imported
+        """
+        imported = 0
+        if not os.path.isdir(reports_dir):
+            return imported
+        for name in sorted(os.listdir(reports_dir)):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(reports_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    report = json.load(f)
+                report.setdefault('id', name[:-len('.json')])
+                self.save(report)
+                os.replace(path, f"{path}.imported")
+                imported += 1
+            except Exception as e:
+                print(f"Error importing report {path}: {e}")
+        return imported
+
+    # ==================== READ ====================
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        """Index row in the report's own field names (no body needed)"""
+        return {
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'fileName': row['file_name'],
+            'location': json.loads(row['location']) if row['location'] else None,
+            'riskAssessment': {
+                'overallRiskLevel': row['risk_level'],
+                'riskScore': row['risk_score'],
+            },
+            'sizeBytes': row['body_bytes'] + row['raw_bytes'],
+        }
+
+    def list(self, page: int = 1, per_page: Optional[int] = 50, risk_level: Optional[str] = None,
+             location: Optional[str] = None, file_name: Optional[str] = None,
+             since: Optional[str] = None, until: Optional[str] = None,
+             full: bool = False, include_raw: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Newest-first page of reports
+
+        Args:
+            page: 1-based page number
+            per_page: Reports per page (None: every matching report)
+            risk_level: Exact overall risk level
+            location: Location name (case-insensitive)
+            file_name: Substring of the file name
+            since / until: ISO timestamp bounds (inclusive)
+            full: Return full report bodies instead of summaries
+            include_raw: With full, also read each report's rawData
+
+        Returns:
+            (reports, total matching)
+        """
+        clauses, params = [], []
+        if risk_level:
+            clauses.append('risk_level = ?')
+            params.append(risk_level.lower())
+        if location:
+            clauses.append('location_name = ? COLLATE NOCASE')
+            params.append(location)
+        if file_name:
+            clauses.append("file_name LIKE ? ESCAPE '\\'")
+            params.append('%' + file_name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM reports {where}', params).fetchone()[0]
+        # Skip the offset on the (covering) index, then read only the page's rows
+        rows = conn.execute(
+            f'SELECT reports.* FROM (SELECT rowid FROM reports {where} '
+            f'ORDER BY timestamp DESC, id LIMIT ? OFFSET ?) AS page '
+            f'JOIN reports ON reports.rowid = page.rowid ORDER BY timestamp DESC, id',
+            params + ([-1, 0] if per_page is None else [per_page, (max(page, 1) - 1) * per_page])
+        ).fetchall()
+
+        if not full:
+            return [self._summary(row) for row in rows], total
+        return [self.get(row['id'], include_raw=include_raw) or self._summary(row) for row in rows], total
+
+    def get(self, report_id: str, include_raw: bool = True) -> Optional[Dict[str, Any]]:
+        """Full report, decompressed; rawData only read when include_raw"""
+        conn = self._connect()
+        row = conn.execute('SELECT body FROM report_bodies WHERE id = ?', (report_id,)).fetchone()
+        if row is None:
+            return None
+        report = _unpack(row['body'])
+        if include_raw:
+            report['rawData'] = self.raw_data(report_id)
+        return report
+
+    def raw_data(self, report_id: str) -> Any:
+        row = self._connect().execute('SELECT raw_data FROM report_raw_data WHERE id = ?', (report_id,)).fetchone()
+        return _unpack(row['raw_data']) if row else None
+
+    def count(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    import tempfile
+    from datetime import datetime, timedelta
+
+    parser = argparse.ArgumentParser(description='Benchmark report listing')
+    parser.add_argument('--reports', type=int, default=100_000)
+    args = parser.parse_args()
+
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    rng = random.Random(0)
+    levels = ['low', 'medium', 'high', 'critical']
+    start_time = datetime(2024, 1, 1)
+    raw = {'data': {'pH': [round(rng.uniform(6, 9), 2) for _ in range(500)],
+                    'DO': [round(rng.uniform(3, 9), 2) for _ in range(500)]}}
+
+    start = time.perf_counter()
+    conn = store._connect()
+    conn.execute('BEGIN')
+    raw_blob = _pack(raw)
+    for i in range(args.reports):
+        level = rng.choice(levels)
+        report = {
+            'id': uuid.uuid4().hex,
+            'timestamp': (start_time + timedelta(minutes=i)).isoformat(),
+            'fileName': f"samples_{i % 500}.csv",
+            'location': {'name': f"Station {i % 300}", 'type': 'river'},
+            'riskAssessment': {'overallRiskLevel': level, 'riskScore': rng.uniform(0, 100), 'riskFactors': []},
+            'predictions': {'pH': {'predicted': [7.1] * 60}},
+        }
+        body = _pack(report)
+        conn.execute('INSERT INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     store._index_row(report) + (len(body), len(raw_blob), time.time()))
+        conn.execute('INSERT INTO report_bodies VALUES (?, ?)', (report['id'], body))
+        conn.execute('INSERT INTO report_raw_data VALUES (?, ?)', (report['id'], raw_blob))
+    conn.execute('COMMIT')
+    print(f"📝 Inserted {args.reports:,} reports in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(store.db_path) / 1e6:.0f} MB)")
+
+    def timed(label, **kwargs):
+        runs = []
+        for _ in range(20):
+            t = time.perf_counter()
+            items, total = store.list(**kwargs)
+            runs.append(time.perf_counter() - t)
+        print(f"{label:<38} {sorted(runs)[10] * 1000:6.2f} ms  ({len(items)} of {total:,})")
+
+    timed('List page 1 (50 newest)')
+    timed('List page 1000', page=1000)
+    timed('Filter risk_level=critical', risk_level='critical')
+    timed('Filter location + since', location='station 42', since='2024-02-01')
+    timed('Filter file name substring', file_name='samples_42')
+    timed('Page 1 with full bodies', full=True)
+
+    some_id = store.list(per_page=1)[0][0]['id']
+    t = time.perf_counter()
+    store.get(some_id)
+    print(f"{'Open one report (with rawData)':<38} {(time.perf_counter() - t) * 1000:6.2f} ms")
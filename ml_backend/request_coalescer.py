@@ -0,0 +1,228 @@
+"""
+Request Coalescer - Phase 5
+Single-flight execution of identical concurrent requests
+
+Features:
+- The first caller of a key computes; concurrent callers of the same key
+  wait for it and share its result instead of recomputing in parallel
+- Keys are combined with a data version (the station service tick_seq), so
+  a result is also reused by later callers for the rest of the tick and
+  dropped as soon as the next tick lands
+- Errors raised by the computation are re-raised in every waiting caller
+  and are never retained
+- Waiters give up after a timeout (CoalesceTimeout); the computation itself
+  keeps running and still serves the callers that arrive after it
+- Retained results are bounded by entry count and bytes (LRU)
+- Metrics: computations, coalesced waits, tick hits, computations saved
+  and compute time saved
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CoalesceTimeout(TimeoutError):
+    """A waiter gave up before the shared computation finished"""
+
+
+class _Flight:
+    """One in-progress computation and the callers waiting for it"""
+
+    __slots__ = ('done', 'value', 'error', 'waiters', 'started')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.started = time.perf_counter()
+
+
+class SingleFlight:
+    """Thread-safe single-flight group with per-version result retention"""
+
+    def __init__(self, version: Optional[Callable[[], Hashable]] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 sizeof: Callable[[Any], int] = lambda value: 0):
+        """
+        Args:
+            version: Returns the current data version (e.g. tick_seq); results
+                are retained until it changes. None = coalesce in-flight only
+            timeout: Default seconds a waiter waits for the computation
+            max_entries: Maximum retained results
+            max_bytes: Maximum total sizeof() of retained results
+            sizeof: Size of a result in bytes, for the max_bytes bound
+        """
+        self.version = version
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._results: OrderedDict = OrderedDict()  # key -> (value, size, compute_seconds)
+        self._bytes = 0
+        self._version = None
+        self._metrics = {
+            'calls': 0,
+            'computations': 0,
+            'coalesced': 0,
+            'tickHits': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'computeSeconds': 0.0,
+            'savedSeconds': 0.0,
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None,
+           retain: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Result of fn() for key, computed once for all concurrent callers
+
+        Args:
+            key: Normalized request (the data version is added here)
+            fn: Computation, run by the first caller only
+            timeout: Seconds to wait for another caller's computation
+            retain: Whether a result may be reused for the rest of the version
+                (e.g. only successful responses)
+
+        Raises:
+            CoalesceTimeout: The shared computation did not finish in time
+            Exception: Whatever fn() raised, in every caller that waited on it
+        """
+        version = self.version() if self.version else None
+        key = (version, key)
+
+        with self._lock:
+            self._metrics['calls'] += 1
+            if version != self._version:
+                self._results.clear()
+                self._bytes = 0
+                self._version = version
+            retained = self._results.get(key)
+            if retained is not None:
+                self._results.move_to_end(key)
+                self._metrics['tickHits'] += 1
+                self._metrics['savedSeconds'] += retained[2]
+                return retained[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self._metrics['coalesced'] += 1
+
+        if not leader:
+            if not flight.done.wait(self.timeout if timeout is None else timeout):
+                with self._lock:
+                    self._metrics['timeouts'] += 1
+                raise CoalesceTimeout(f'Shared computation still running after '
+                                      f'{self.timeout if timeout is None else timeout:.0f} s')
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - flight.started
+            with self._lock:
+                self._flights.pop(key, None)
+                self._metrics['computations'] += 1
+                self._metrics['computeSeconds'] += elapsed
+                if flight.error is not None:
+                    self._metrics['errors'] += 1
+                else:
+                    self._metrics['savedSeconds'] += elapsed * flight.waiters
+                    if key[0] == self._version and retain(flight.value):
+                        self._retain(key, flight.value, elapsed)
+            flight.done.set()
+        return flight.value
+
+    def _retain(self, key, value, elapsed: float):
+        """Keep a result for the rest of the version (caller holds the lock)"""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._results[key] = (value, size, elapsed)
+        self._bytes += size
+        while len(self._results) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._results.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def clear(self):
+        """Drop retained results (in-flight computations are unaffected)"""
+        with self._lock:
+            self._results.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            m = dict(self._metrics)
+            m['inFlight'] = len(self._flights)
+            m['retained'] = len(self._results)
+            m['retainedBytes'] = self._bytes
+            m['version'] = self._version
+        saved = m['coalesced'] + m['tickHits']
+        m['computationsSaved'] = saved
+        m['savedRate'] = round(saved / m['calls'], 4) if m['calls'] else 0.0
+        m['computeSeconds'] = round(m['computeSeconds'], 3)
+        m['savedSeconds'] = round(m['savedSeconds'], 3)
+        return m
+
+
+if __name__ == '__main__':
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("=== Request Coalescer - Phase 5: burst test ===\n")
+
+    tick = {'seq': 1}
+    group = SingleFlight(version=lambda: tick['seq'], timeout=2.0, sizeof=len)
+    keys = ['summary', 'map-data?per_page=5000', 'district/Pune', 'district/Thane', 'district/Nagpur']
+
+    def expensive(key):
+        time.sleep(0.15)  # stands in for a 150 ms scan of every station
+        return f'{key}@{tick["seq"]}'.encode() * 1000
+
+    def client(i):
+        key = random.choice(keys)
+        return group.do(key, lambda: expensive(key))
+
+    clients = 500
+    with ThreadPoolExecutor(max_workers=200) as pool:
+        started = time.perf_counter()
+        list(pool.map(client, range(clients)))
+        burst = time.perf_counter() - started
+        tick['seq'] = 2
+        list(pool.map(client, range(clients)))
+
+    m = group.metrics()
+    print(f"{2 * clients} requests for {len(keys)} URLs over 2 ticks (first burst {burst:.2f} s):")
+    print(f"  computed {m['computations']} | coalesced {m['coalesced']} | tick hits {m['tickHits']} | "
+          f"saved {m['computationsSaved']} ({m['savedRate']:.1%}), {m['savedSeconds']:.1f} s of compute")
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError('district not loaded')
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        futures = [pool.submit(group.do, 'broken', failing) for _ in range(10)]
+    errors = sum(isinstance(f.exception(), ValueError) for f in futures)
+    print(f"Error propagation: {errors}/10 callers got the ValueError, {group.metrics()['errors']} computation")
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(group.do, 'slow', lambda: time.sleep(0.5) or b'ok', 0.1) for _ in range(5)]
+    timeouts = sum(isinstance(f.exception(), CoalesceTimeout) for f in futures)
+    print(f"Timeouts: {timeouts}/5 waiters timed out after 0.1 s, the leader finished")
@@ -0,0 +1,292 @@
+"""
+Response Compression - Phase 5
+Negotiated gzip / brotli / zstd for API responses
+
+Features:
+- Accept-Encoding negotiation with q-values; on ties the server prefers
+  zstd, then br, then gzip (brotli and zstandard are optional packages,
+  gzip is always available)
+- Tick-cached responses (coalesce_per_tick) keep their compressed bodies
+  next to the plain body: each encoding is built once per tick at a high
+  level and then served as stored bytes
+- Other JSON/text responses are compressed on the fly at a fast level
+  (Flask after_request hook); small bodies are left as they are
+- Streamed responses are compressed incrementally, flushing per chunk
+- SSE frames are compressed as self-contained segments (gzip, zstd) that
+  can be concatenated into one stream, so a frame is compressed once and
+  shared by every connection, and connections hold no compressor state
+"""
+
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Server preference order
+AVAILABLE_ENCODINGS: Tuple[str, ...] = tuple(
+    encoding for encoding, available in (('zstd', ZSTD_AVAILABLE), ('br', BROTLI_AVAILABLE), ('gzip', True))
+    if available
+)
+# Encodings whose independently compressed segments concatenate into a valid stream
+SEGMENT_ENCODINGS: Tuple[str, ...] = tuple(e for e in AVAILABLE_ENCODINGS if e in ('zstd', 'gzip'))
+
+MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+    'text/plain', 'text/html', 'text/csv', 'text/css', 'text/xml', 'text/event-stream',
+}
+
+# Levels for bodies compressed once and cached, and for per-request compression
+CACHED_LEVELS = {'gzip': 9, 'br': 9, 'zstd': 12}
+FAST_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+
+# Gzip member header (no name, no mtime, unknown OS) that starts a segment stream
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+
+# ==================== NEGOTIATION ====================
+
+def negotiate(accept_encoding: Optional[str], available: Tuple[str, ...] = AVAILABLE_ENCODINGS) -> Optional[str]:
+    """
+    Pick the response encoding
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+        available: Candidate encodings in server preference order
+
+    Returns:
+        Encoding name, or None for identity
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+# ==================== CODECS ====================
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression of a whole body"""
+    level = FAST_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Incremental compressor; every chunk is flushed so the client can decode it immediately"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        level = FAST_LEVELS[encoding] if level is None else level
+        if encoding == 'gzip':
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == 'br':
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == 'gzip':
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+    def iterate(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Compress a response iterable chunk by chunk"""
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield self.compress(chunk)
+        yield self.finish()
+
+
+def segment_preamble(encoding: str) -> bytes:
+    """Bytes that start a stream of compress_segment() outputs"""
+    return _GZIP_HEADER if encoding == 'gzip' else b''
+
+
+def compress_segment(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress data without reference to anything sent before it
+
+    Segments of one encoding can be sent in any order after
+    segment_preamble(): gzip segments are sync-flushed raw deflate blocks of
+    one gzip member, zstd segments are complete zstd frames.
+    """
+    level = FAST_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"{encoding} segments cannot be concatenated; use one of {', '.join(SEGMENT_ENCODINGS)}")
+
+
+# ==================== CACHED BODIES ====================
+
+class CompressedBody:
+    """A cacheable response body and its compressed encodings, each built once"""
+
+    def __init__(self, body: bytes, status_code: int, mimetype: Optional[str]):
+        self.body = body
+        self.status_code = status_code
+        self.mimetype = mimetype
+        self.compressible = is_compressible(mimetype) and len(body) >= MIN_SIZE
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Body in the given encoding (None = identity)"""
+        if encoding is None or not self.compressible:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = self._encoded[encoding] = compress(self.body, encoding, CACHED_LEVELS[encoding])
+        return data
+
+    def make_response(self, response_class, accept_encoding: Optional[str]):
+        """Response for one request, using the negotiated stored encoding"""
+        encoding = negotiate(accept_encoding) if self.compressible else None
+        response = response_class(self.encoded(encoding), status=self.status_code, mimetype=self.mimetype)
+        if is_compressible(self.mimetype):
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+# ==================== FLASK HOOK ====================
+
+def compress_response(response, accept_encoding: Optional[str]):
+    """
+    Compress a Flask response for the client (after_request hook)
+
+    Responses that are already encoded, file passthroughs, non-text types,
+    bodies under MIN_SIZE and statuses without a body are left as they are.
+    """
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers or response.direct_passthrough
+            or not is_compressible(response.mimetype)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = StreamCompressor(encoding).iterate(response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_SIZE:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    os.environ.setdefault('JOB_DB_PATH', '/tmp/response_compression_bench.db')
+    import app as api_app
+    api_app.job_queue.stop()
+    client = api_app.app.test_client()
+
+    sid = next(iter(api_app.station_service.station_index))
+    endpoints = [
+        '/api/stations/map-data?per_page=5000',
+        '/api/stations/map-data',
+        '/api/stations/laboratories',
+        '/api/stations?page=1&per_page=200',
+        '/api/stations/district/Pune?per_page=200',
+        '/api/stations/alerts',
+        '/api/stations/risk/top?n=200',
+        '/api/stations/summary',
+        f'/api/stations/{sid}/history',
+        f'/api/stations/{sid}/ai/trends',
+    ]
+
+    # Let the startup ticks land so the tick caches stay valid while measuring
+    seq = None
+    while seq != api_app.station_service.tick_seq:
+        seq = api_app.station_service.tick_seq
+        time.sleep(5)
+
+    def cpu_ms(url, headers, repeat):
+        started = time.process_time()
+        for _ in range(repeat):
+            response = client.get(url, headers=headers)
+        return len(response.data), (time.process_time() - started) / repeat * 1000
+
+    coalesce = api_app.request_coalescer.do
+    print(f"=== Response Compression - Phase 5 (encodings: {', '.join(AVAILABLE_ENCODINGS)}) ===\n")
+    print("before: uncompressed, computed per request | after: negotiated encoding; "
+          "cold = first request of a tick, warm = later requests\n")
+    print(f"{'endpoint':42s} {'before':>18s}   " + '   '.join(f"{'after ' + e + ' (cold/warm)':>34s}" for e in AVAILABLE_ENCODINGS))
+    for url in endpoints:
+        api_app.request_coalescer.do = lambda key, fn, **kwargs: fn()
+        client.get(url)
+        plain_bytes, plain_cpu = cpu_ms(url, {}, 5)
+        api_app.request_coalescer.do = coalesce
+        row = f"{url[:42]:42s} {plain_bytes / 1024:7.1f} KB {plain_cpu:6.1f} ms"
+        for encoding in AVAILABLE_ENCODINGS:
+            headers = {'Accept-Encoding': encoding}
+            api_app.request_coalescer.clear()
+            _, cold_cpu = cpu_ms(url, headers, 1)
+            size, warm_cpu = cpu_ms(url, headers, 20)
+            row += f"   {size / 1024:6.1f} KB ({plain_bytes / max(size, 1):4.1f}x) {cold_cpu:6.1f}/{warm_cpu:4.1f} ms"
+        print(row)
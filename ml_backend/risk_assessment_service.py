@@ -75,6 +75,8 @@ class RiskAssessmentService:
                 'weight': 0.30
             }
         }
+        # Callers pass lower-cased column names ('ph', 'bod', 'tds')
+        self._standards_by_lower_name = {name.lower(): standard for name, standard in self.standards.items()}
     
     def assess_risk(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -151,6 +153,9 @@ class RiskAssessmentService:
         # Normalize parameter name
         if param_name in self.standards:
             return self.standards[param_name]
+        standard = self._standards_by_lower_name.get(param_name.lower())
+        if standard:
+            return standard
         
         # Check variations
         if 'do' in param_name or 'oxygen' in param_name:
@@ -26,6 +26,11 @@ from pathlib import Path
 # Geospatial libraries (optional - install as needed)
 try:
     import numpy as np
+    from satellite_raster_engine import (
+        RasterBandMathEngine, RasterScene, StationPixel,
+        turbidity_ratio, ndci, brightness_temperature,
+        turbidity_from_ratio, chlorophyll_from_ndci
+    )
     NUMPY_AVAILABLE = True
 except ImportError:
     NUMPY_AVAILABLE = False
@@ -190,12 +195,10 @@ class Sentinel2Processor:
             return 0.0
         
         # Calculate ratio
-        ratio = red_band[water_mask] / blue_band[water_mask]
+        ratio = turbidity_ratio(red_band[water_mask], blue_band[water_mask])
         
         # Convert to NTU (empirical relationship)
-        turbidity_ntu = np.median(ratio) * 10.0
-        
-        return float(turbidity_ntu)
+        return turbidity_from_ratio(np.median(ratio))
     
     def calculate_chlorophyll_a(self, red_edge: np.ndarray, red_band: np.ndarray) -> float:
         """
@@ -205,14 +208,9 @@ class Sentinel2Processor:
         if not NUMPY_AVAILABLE:
             return 0.0
         
-        # Calculate NDCI
-        ndci = (red_edge - red_band) / (red_edge + red_band + 1e-10)
-        
         # Convert NDCI to Chlorophyll-a (μg/L) using empirical relationship
         # Chl-a = 14.039 + 86.115 * NDCI + 194.325 * NDCI^2
-        chlorophyll_a = 14.039 + 86.115 * np.median(ndci) + 194.325 * (np.median(ndci) ** 2)
-        
-        return max(0.0, float(chlorophyll_a))
+        return chlorophyll_from_ndci(np.median(ndci(red_edge, red_band)))
 
 
 class Landsat8Processor:
@@ -311,16 +309,9 @@ class Landsat8Processor:
         if not NUMPY_AVAILABLE:
             return 0.0
         
-        # Convert DN to radiance (simplified)
+        # Convert to brightness temperature (simplified calibration)
         # Real implementation needs metadata for calibration
-        K1 = 774.89  # Calibration constant
-        K2 = 1321.08  # Calibration constant
-        
-        # Convert to brightness temperature (Kelvin)
-        temp_kelvin = K2 / (np.log(K1 / thermal_band + 1))
-        
-        # Convert to Celsius
-        temp_celsius = temp_kelvin - 273.15
+        temp_celsius = brightness_temperature(thermal_band)
         
         # Mask water pixels and return median
         water_temp = np.median(temp_celsius[temp_celsius > 0])
@@ -344,6 +335,7 @@ class SatelliteDataProcessor:
         self.stations: Dict[str, StationLocation] = {}
         self.cache_dir = Path("satellite_cache")
         self.cache_dir.mkdir(exist_ok=True)
+        self.raster_engine = RasterBandMathEngine(self.cache_dir / "rasters") if NUMPY_AVAILABLE else None
         
         logger.info("Satellite Data Processor initialized")
     
@@ -483,6 +475,66 @@ class SatelliteDataProcessor:
         logger.info(f"Processed satellite data for {station_id}: {result}")
         return result
     
+    def process_scene(self, scene: 'RasterScene',
+                      station_pixels: Optional[Dict[str, Tuple[int, int]]] = None,
+                      half_window: int = 5) -> Dict[str, List[SatelliteReading]]:
+        """
+        Process a local scene once for all registered stations
+        
+        Args:
+            scene: Scene with memory-mapped bands
+            station_pixels: Optional station_id -> (row, col); stations without
+                an entry are located through the scene geotransform and CRS
+            half_window: Window half-size in pixels around each station
+            
+        Returns:
+            Dictionary mapping station_id to list of readings
+            
+        Raises:
+            ValueError: Stations must be located in a non-WGS84 scene without pyproj
+        """
+        if not NUMPY_AVAILABLE:
+            return {}
+        
+        station_pixels = station_pixels or {}
+        pixels = []
+        for station_id, location in self.stations.items():
+            if station_id in station_pixels:
+                row, col = station_pixels[station_id]
+            elif scene.geotransform is not None:
+                row, col = scene.pixel_for_lonlat(location.longitude, location.latitude)
+            else:
+                continue
+            pixels.append(StationPixel(station_id, row, col, half_window))
+        
+        rasters = self.raster_engine.process_scene(scene)
+        values = self.raster_engine.extract_station_windows(rasters, pixels)
+        
+        units = {'turbidity': 'NTU', 'chlorophyll_a': 'μg/L', 'temperature': '°C'}
+        timestamp = scene.timestamp or datetime.now().isoformat()
+        all_readings = {}
+        
+        for station_id, params in values.items():
+            location = self.stations[station_id]
+            all_readings[station_id] = [
+                SatelliteReading(
+                    station_id=station_id,
+                    latitude=location.latitude,
+                    longitude=location.longitude,
+                    parameter=param,
+                    value=params[param],
+                    unit=unit,
+                    timestamp=timestamp,
+                    satellite=scene.satellite,
+                    cloud_cover=scene.cloud_cover,
+                    quality="good" if params['water_fraction'] >= 0.5 else "suspect"
+                )
+                for param, unit in units.items() if param in params
+            ]
+        
+        logger.info(f"Extracted scene {scene.scene_id} values for {len(all_readings)} stations")
+        return all_readings
+    
     def save_cache(self, station_id: str, readings: List[SatelliteReading]):
         """Save readings to cache"""
         cache_file = self.cache_dir / f"{station_id}_satellite.json"
@@ -0,0 +1,582 @@
+"""
+Satellite Raster Band-Math Engine for Pure Health
+Scene-level processing of Sentinel-2 / Landsat bands:
+- Bands are memory-mapped from local NumPy (.npy) or GeoTIFF files
+- Water mask, turbidity ratio, NDCI and surface temperature are computed
+  in a single chunked pass over the scene
+- Index rasters are written to memory-mapped .npy files
+- Per-station values are extracted from small pixel windows
+
+Memory use is bounded by the strip size (``block_pixels``), not the tile
+size: every strip is released from the page tables once it has been
+processed, so a 10980x10980 tile runs in the same footprint as a small one.
+"""
+
+import functools
+import logging
+import mmap
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+# GeoTIFF support (optional - only uncompressed, contiguous tiles can be mapped)
+try:
+    import tifffile
+    TIFFFILE_AVAILABLE = True
+except ImportError:
+    TIFFFILE_AVAILABLE = False
+
+# CRS reprojection of station coordinates (optional - needed for UTM scenes)
+try:
+    from pyproj import Transformer
+    PYPROJ_AVAILABLE = True
+except ImportError:
+    PYPROJ_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Empirical relationships shared with Sentinel2Processor / Landsat8Processor
+TURBIDITY_RATIO_SCALE = 10.0          # NTU = median(Red/Blue) * 10
+CHLOROPHYLL_NDCI_COEFFS = (14.039, 86.115, 194.325)  # Chl-a = a + b*NDCI + c*NDCI^2
+LANDSAT_K1 = 774.89                   # Thermal calibration constant
+LANDSAT_K2 = 1321.08                  # Thermal calibration constant
+KELVIN_OFFSET = 273.15
+
+WGS84_CRS = 'EPSG:4326'
+
+# Default strip size: ~1M pixels keeps every temporary around 4 MB
+DEFAULT_BLOCK_PIXELS = 1 << 20
+
+ArrayLike = Union[np.ndarray, np.memmap]
+
+
+# ============================================================================
+# ELEMENT-WISE KERNELS
+# ============================================================================
+
+def water_mask(red: ArrayLike, blue: ArrayLike,
+               green: Optional[ArrayLike] = None,
+               nir: Optional[ArrayLike] = None) -> np.ndarray:
+    """
+    Water pixel mask
+
+    Valid reflectance in Red and Blue is required. When Green and NIR are
+    available, pixels must also have a positive NDWI (McFeeters).
+    """
+    mask = (red > 0) & (blue > 0)
+    if green is not None and nir is not None:
+        green = np.asarray(green, dtype=np.float32)
+        nir = np.asarray(nir, dtype=np.float32)
+        mask &= (green - nir) > 0
+    return mask
+
+
+def turbidity_ratio(red: ArrayLike, blue: ArrayLike) -> np.ndarray:
+    """Red/Blue reflectance ratio (turbidity proxy)"""
+    red = np.asarray(red, dtype=np.float32)
+    blue = np.asarray(blue, dtype=np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return red / blue
+
+
+def ndci(red_edge: ArrayLike, red: ArrayLike) -> np.ndarray:
+    """Normalized Difference Chlorophyll Index: (RE - Red) / (RE + Red)"""
+    red_edge = np.asarray(red_edge, dtype=np.float32)
+    red = np.asarray(red, dtype=np.float32)
+    return (red_edge - red) / (red_edge + red + 1e-10)
+
+
+def brightness_temperature(thermal: ArrayLike) -> np.ndarray:
+    """Landsat thermal band to brightness temperature in Celsius"""
+    thermal = np.asarray(thermal, dtype=np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        temp_kelvin = LANDSAT_K2 / np.log(LANDSAT_K1 / thermal + 1)
+    return temp_kelvin - KELVIN_OFFSET
+
+
+def turbidity_from_ratio(median_ratio: float) -> float:
+    """Convert the median Red/Blue ratio to NTU"""
+    return float(median_ratio * TURBIDITY_RATIO_SCALE)
+
+
+def chlorophyll_from_ndci(median_ndci: float) -> float:
+    """Convert the median NDCI to Chlorophyll-a (μg/L)"""
+    a, b, c = CHLOROPHYLL_NDCI_COEFFS
+    return max(0.0, float(a + b * median_ndci + c * median_ndci ** 2))
+
+
+# ============================================================================
+# BAND I/O
+# ============================================================================
+
+def open_band(source: Union[str, Path, np.ndarray]) -> np.ndarray:
+    """
+    Open a band as a read-only memory map
+
+    Args:
+        source: Path to a .npy / .tif / .tiff file, or an in-memory array
+
+    Returns:
+        2-D array backed by the file (no data is read until accessed)
+    """
+    if isinstance(source, np.ndarray):
+        return source
+
+    path = Path(source)
+    suffix = path.suffix.lower()
+
+    if suffix == '.npy':
+        band = np.load(path, mmap_mode='r')
+    elif suffix in ('.tif', '.tiff'):
+        if not TIFFFILE_AVAILABLE:
+            raise ImportError("tifffile is required to memory-map GeoTIFF bands")
+        # Raises ValueError for compressed / tiled files that cannot be mapped
+        band = tifffile.memmap(str(path), mode='r')
+    else:
+        raise ValueError(f"Unsupported band format: {path.suffix}")
+
+    if band.ndim != 2:
+        raise ValueError(f"Band {path.name} must be 2-D, got shape {band.shape}")
+    return band
+
+
+@functools.lru_cache(maxsize=8)
+def _wgs84_transformer(crs: str) -> 'Transformer':
+    """WGS84 -> scene CRS transformer (x = longitude, y = latitude)"""
+    return Transformer.from_crs(WGS84_CRS, crs, always_xy=True)
+
+
+def _release_rows(band: np.ndarray, row_start: int, row_end: int):
+    """
+    Drop the pages backing rows [row_start, row_end) of a memory-mapped band
+
+    Dirty pages are flushed first, so this is safe for output rasters too.
+    Plain in-memory arrays are left untouched.
+    """
+    mm = getattr(band, '_mmap', None)
+    if mm is None or not isinstance(band, np.memmap) or not hasattr(mm, 'madvise'):
+        return
+
+    row_bytes = band.strides[0]
+    # np.memmap maps from the allocation-granularity boundary below `offset`
+    base = band.offset % mmap.ALLOCATIONGRANULARITY
+    start = base + row_start * row_bytes
+    end = base + row_end * row_bytes
+
+    start = (start // mmap.PAGESIZE) * mmap.PAGESIZE
+    length = min(end, len(mm)) - start
+    if length <= 0:
+        return
+
+    try:
+        if band.flags.writeable:
+            mm.flush(start, length)
+        mm.madvise(mmap.MADV_DONTNEED, start, length)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+
+# ============================================================================
+# SCENE PROCESSING
+# ============================================================================
+
+@dataclass
+class RasterScene:
+    """A satellite scene whose bands share one pixel grid"""
+    scene_id: str
+    bands: Dict[str, np.ndarray]
+    satellite: str = "sentinel2"
+    timestamp: str = ""
+    cloud_cover: float = 0.0
+    # Affine geotransform (origin_x, pixel_width, 0, origin_y, 0, pixel_height)
+    geotransform: Optional[Tuple[float, float, float, float, float, float]] = None
+    # CRS of the geotransform (Sentinel-2 / Landsat tiles are in UTM, e.g. EPSG:32643)
+    crs: str = WGS84_CRS
+
+    @classmethod
+    def from_files(cls, scene_id: str, band_paths: Dict[str, Union[str, Path]],
+                   **kwargs) -> 'RasterScene':
+        """Memory-map every band file of a scene"""
+        bands = {name: open_band(path) for name, path in band_paths.items()}
+        return cls(scene_id=scene_id, bands=bands, **kwargs)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        shapes = {band.shape for band in self.bands.values()}
+        if len(shapes) != 1:
+            raise ValueError(f"Scene {self.scene_id} bands are not co-registered: {shapes}")
+        return shapes.pop()
+
+    def pixel_for(self, x: float, y: float) -> Tuple[int, int]:
+        """Map scene coordinates (in the scene CRS) to (row, col)"""
+        if self.geotransform is None:
+            raise ValueError(f"Scene {self.scene_id} has no geotransform")
+        origin_x, pixel_w, _, origin_y, _, pixel_h = self.geotransform
+        col = int((x - origin_x) / pixel_w)
+        row = int((y - origin_y) / pixel_h)
+        return row, col
+
+    def pixel_for_lonlat(self, longitude: float, latitude: float) -> Tuple[int, int]:
+        """
+        Map WGS84 longitude/latitude to (row, col)
+
+        Raises:
+            ValueError: The scene is not in WGS84 and pyproj is not installed
+        """
+        if self.crs.upper() == WGS84_CRS:
+            return self.pixel_for(longitude, latitude)
+        if not PYPROJ_AVAILABLE:
+            raise ValueError(f"Scene {self.scene_id} is in {self.crs}; pyproj is required "
+                             f"to locate stations given in {WGS84_CRS}")
+        x, y = _wgs84_transformer(self.crs).transform(longitude, latitude)
+        return self.pixel_for(x, y)
+
+
+@dataclass
+class SceneIndexRasters:
+    """Memory-mapped index rasters produced for one scene"""
+    scene_id: str
+    shape: Tuple[int, int]
+    water_mask: np.ndarray                     # uint8, 1 = water
+    turbidity_ratio: Optional[np.ndarray]      # float32, NaN outside water
+    ndci: Optional[np.ndarray]                 # float32, NaN outside water
+    temperature: Optional[np.ndarray]          # float32 °C, NaN where invalid
+    paths: Dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    @classmethod
+    def open(cls, scene_id: str, output_dir: Union[str, Path]) -> 'SceneIndexRasters':
+        """Re-open index rasters written by a previous run"""
+        output_dir = Path(output_dir)
+        rasters = {}
+        paths = {}
+        for name in ('water_mask', 'turbidity_ratio', 'ndci', 'temperature'):
+            path = output_dir / f"{scene_id}_{name}.npy"
+            rasters[name] = np.load(path, mmap_mode='r') if path.exists() else None
+            if rasters[name] is not None:
+                paths[name] = str(path)
+        if rasters['water_mask'] is None:
+            raise FileNotFoundError(f"No index rasters for scene {scene_id} in {output_dir}")
+        return cls(scene_id=scene_id, shape=rasters['water_mask'].shape, paths=paths, **rasters)
+
+
+@dataclass
+class StationPixel:
+    """Station position on a scene grid"""
+    station_id: str
+    row: int
+    col: int
+    half_window: int = 5  # 11x11 pixels (~110 m at 10 m resolution)
+
+
+class RasterBandMathEngine:
+    """
+    Chunked band-math over whole scenes
+
+    Band roles (Sentinel-2 names, thermal from a co-registered Landsat band):
+        B2 blue, B3 green, B4 red, B5 red edge, B8 NIR, B10 thermal
+    """
+
+    BAND_ROLES = {
+        'blue': 'B2',
+        'green': 'B3',
+        'red': 'B4',
+        'red_edge': 'B5',
+        'nir': 'B8',
+        'thermal': 'B10',
+    }
+
+    def __init__(self, output_dir: Union[str, Path] = "satellite_cache/rasters",
+                 block_pixels: int = DEFAULT_BLOCK_PIXELS,
+                 band_roles: Optional[Dict[str, str]] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.block_pixels = max(1, int(block_pixels))
+        self.band_roles = dict(self.BAND_ROLES, **(band_roles or {}))
+        logger.info(f"Raster band-math engine initialized (block: {self.block_pixels:,} px)")
+
+    def _band(self, scene: RasterScene, role: str) -> Optional[np.ndarray]:
+        return scene.bands.get(self.band_roles[role])
+
+    def _create_output(self, scene_id: str, name: str, shape: Tuple[int, int],
+                       dtype) -> Tuple[np.ndarray, str]:
+        path = self.output_dir / f"{scene_id}_{name}.npy"
+        raster = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        return raster, str(path)
+
+    def process_scene(self, scene: RasterScene) -> SceneIndexRasters:
+        """
+        Compute the water mask and all available indices in one pass
+
+        Every input band is read exactly once, strip by strip. Indices whose
+        bands are missing from the scene are skipped.
+        """
+        start = time.perf_counter()
+        rows, cols = scene.shape
+
+        blue = self._band(scene, 'blue')
+        red = self._band(scene, 'red')
+        if blue is None or red is None:
+            raise ValueError(f"Scene {scene.scene_id} needs at least the blue and red bands")
+        green = self._band(scene, 'green')
+        nir = self._band(scene, 'nir')
+        red_edge = self._band(scene, 'red_edge')
+        thermal = self._band(scene, 'thermal')
+
+        outputs: Dict[str, Optional[np.ndarray]] = {}
+        paths: Dict[str, str] = {}
+        outputs['water_mask'], paths['water_mask'] = self._create_output(
+            scene.scene_id, 'water_mask', (rows, cols), np.uint8)
+        outputs['turbidity_ratio'], paths['turbidity_ratio'] = self._create_output(
+            scene.scene_id, 'turbidity_ratio', (rows, cols), np.float32)
+        outputs['ndci'] = outputs['temperature'] = None
+        if red_edge is not None:
+            outputs['ndci'], paths['ndci'] = self._create_output(
+                scene.scene_id, 'ndci', (rows, cols), np.float32)
+        if thermal is not None:
+            outputs['temperature'], paths['temperature'] = self._create_output(
+                scene.scene_id, 'temperature', (rows, cols), np.float32)
+
+        inputs = [b for b in (blue, red, green, nir, red_edge, thermal) if b is not None]
+        strip_rows = max(1, self.block_pixels // cols)
+
+        for r0 in range(0, rows, strip_rows):
+            r1 = min(rows, r0 + strip_rows)
+
+            red_s = np.asarray(red[r0:r1], dtype=np.float32)
+            blue_s = np.asarray(blue[r0:r1], dtype=np.float32)
+            mask = water_mask(
+                red_s, blue_s,
+                green[r0:r1] if green is not None else None,
+                nir[r0:r1] if nir is not None else None,
+            )
+            outputs['water_mask'][r0:r1] = mask
+
+            ratio = turbidity_ratio(red_s, blue_s)
+            ratio[~mask] = np.nan
+            outputs['turbidity_ratio'][r0:r1] = ratio
+
+            if red_edge is not None:
+                index = ndci(red_edge[r0:r1], red_s)
+                index[~mask] = np.nan
+                outputs['ndci'][r0:r1] = index
+
+            if thermal is not None:
+                temp = brightness_temperature(thermal[r0:r1])
+                temp[~(temp > 0)] = np.nan
+                outputs['temperature'][r0:r1] = temp
+
+            for band in inputs:
+                _release_rows(band, r0, r1)
+            for raster in outputs.values():
+                if raster is not None:
+                    _release_rows(raster, r0, r1)
+
+        for raster in outputs.values():
+            if raster is not None:
+                raster.flush()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Processed scene {scene.scene_id} ({rows}x{cols}) in {elapsed:.2f}s")
+
+        return SceneIndexRasters(
+            scene_id=scene.scene_id,
+            shape=(rows, cols),
+            paths=paths,
+            elapsed_seconds=elapsed,
+            **outputs,
+        )
+
+    def extract_station_windows(self, rasters: SceneIndexRasters,
+                                stations: List[StationPixel]) -> Dict[str, Dict[str, float]]:
+        """
+        Extract per-station parameters from pixel windows
+
+        Only the window around each station is read from the index rasters,
+        so memory stays proportional to the window size.
+
+        Returns:
+            Dictionary mapping station_id to parameter values
+        """
+        rows, cols = rasters.shape
+        results = {}
+
+        # Visit stations in row order so neighbouring windows share pages
+        for station in sorted(stations, key=lambda s: (s.row, s.col)):
+            h = station.half_window
+            r0, r1 = max(0, station.row - h), min(rows, station.row + h + 1)
+            c0, c1 = max(0, station.col - h), min(cols, station.col + h + 1)
+            if r0 >= r1 or c0 >= c1:
+                logger.warning(f"Station {station.station_id} is outside scene {rasters.scene_id}")
+                continue
+
+            water = np.asarray(rasters.water_mask[r0:r1, c0:c1], dtype=bool)
+            values = {
+                'water_pixels': int(water.sum()),
+                'water_fraction': round(float(water.mean()), 3),
+            }
+
+            if water.any():
+                ratio = np.asarray(rasters.turbidity_ratio[r0:r1, c0:c1])
+                values['turbidity'] = round(turbidity_from_ratio(np.nanmedian(ratio[water])), 2)
+                if rasters.ndci is not None:
+                    index = np.asarray(rasters.ndci[r0:r1, c0:c1])
+                    values['chlorophyll_a'] = round(chlorophyll_from_ndci(np.nanmedian(index[water])), 2)
+
+            if rasters.temperature is not None:
+                temp = np.asarray(rasters.temperature[r0:r1, c0:c1])
+                valid = temp[~np.isnan(temp)]
+                if valid.size:
+                    values['temperature'] = round(float(np.median(valid)), 2)
+
+            results[station.station_id] = values
+
+            for raster in (rasters.water_mask, rasters.turbidity_ratio,
+                           rasters.ndci, rasters.temperature):
+                if raster is not None:
+                    _release_rows(raster, r0, r1)
+
+        return results
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def write_synthetic_tile(output_dir: Union[str, Path], size: int,
+                         block_pixels: int = DEFAULT_BLOCK_PIXELS,
+                         seed: int = 42) -> Dict[str, str]:
+    """
+    Write a synthetic Sentinel-2 style tile (uint16 reflectance, float32 thermal)
+
+    The tile is written strip by strip so generation is memory-bounded too.
+    A river band runs diagonally across the tile; everything else is land.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    bands = {}
+    paths = {}
+    for name in ('B2', 'B3', 'B4', 'B5', 'B8'):
+        path = output_dir / f"synthetic_{size}_{name}.npy"
+        bands[name] = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint16, shape=(size, size))
+        paths[name] = str(path)
+    path = output_dir / f"synthetic_{size}_B10.npy"
+    bands['B10'] = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(size, size))
+    paths['B10'] = str(path)
+
+    strip_rows = max(1, block_pixels // size)
+    cols = np.arange(size)
+    river_width = max(4, size // 20)
+
+    for r0 in range(0, size, strip_rows):
+        r1 = min(size, r0 + strip_rows)
+        shape = (r1 - r0, size)
+        rows = np.arange(r0, r1)[:, None]
+        is_water = np.abs(cols[None, :] - rows) < river_width
+
+        blue = rng.integers(600, 1400, shape)
+        red = rng.integers(400, 1800, shape)
+        green = np.where(is_water, rng.integers(900, 1500, shape), rng.integers(500, 900, shape))
+        nir = np.where(is_water, rng.integers(100, 500, shape), rng.integers(1500, 3000, shape))
+        red_edge = red + rng.integers(-200, 400, shape)
+
+        bands['B2'][r0:r1] = blue
+        bands['B3'][r0:r1] = green
+        bands['B4'][r0:r1] = red
+        bands['B5'][r0:r1] = np.clip(red_edge, 1, None)
+        bands['B8'][r0:r1] = nir
+        bands['B10'][r0:r1] = rng.uniform(8.5, 10.5, shape).astype(np.float32)
+
+        for band in bands.values():
+            _release_rows(band, r0, r1)
+
+    for band in bands.values():
+        band.flush()
+    del bands
+    return paths
+
+
+def _benchmark_worker(size: int, work_dir: str, block_pixels: int, stations: int):
+    """Generate and process one synthetic tile, then print a result line"""
+    tile_dir = Path(work_dir) / f"tile_{size}"
+    paths = write_synthetic_tile(tile_dir, size, block_pixels)
+
+    engine = RasterBandMathEngine(output_dir=tile_dir / "indices", block_pixels=block_pixels)
+    scene = RasterScene.from_files(f"synthetic_{size}", paths)
+    rasters = engine.process_scene(scene)
+
+    # Stations spread along the river
+    step = max(1, size // max(stations, 1))
+    pixels = [StationPixel(str(i), min(size - 1, i * step), min(size - 1, i * step))
+              for i in range(stations)]
+    start = time.perf_counter()
+    engine.extract_station_windows(rasters, pixels)
+    extract_seconds = time.perf_counter() - start
+
+    print(f"RESULT {size} {rasters.elapsed_seconds:.3f} {extract_seconds:.3f} {_peak_rss_mb():.1f}")
+
+
+def run_benchmark(sizes: Tuple[int, ...] = (2048, 5490, 10980),
+                  block_pixels: int = DEFAULT_BLOCK_PIXELS,
+                  stations: int = 500,
+                  work_dir: Optional[str] = None):
+    """
+    Benchmark scene processing across tile sizes
+
+    Each size runs in a fresh interpreter so peak RSS is measured per tile.
+    A full 10980x10980 run needs ~2.7 GB of free disk for bands and indices.
+    """
+    import shutil
+    import subprocess
+    import tempfile
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="raster_bench_")
+
+    print("\n" + "=" * 70)
+    print("SATELLITE RASTER ENGINE BENCHMARK")
+    print("=" * 70)
+    print(f"Block: {block_pixels:,} px | Stations: {stations} | Work dir: {work_dir}\n")
+    print(f"{'Tile':>12} {'Pixels':>14} {'Scene (s)':>10} {'Mpx/s':>8} {'Windows (s)':>12} {'Peak RSS':>10}")
+
+    try:
+        for size in sizes:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker',
+                 str(size), work_dir, str(block_pixels), str(stations)],
+                capture_output=True, text=True, check=True,
+            )
+            line = next(l for l in proc.stdout.splitlines() if l.startswith('RESULT'))
+            _, _, scene_s, extract_s, rss = line.split()
+            pixels = size * size
+            print(f"{size:>5}x{size:<6} {pixels:>14,} {float(scene_s):>10.2f} "
+                  f"{pixels / float(scene_s) / 1e6:>8.1f} {float(extract_s):>12.3f} {float(rss):>8.1f}MB")
+            shutil.rmtree(Path(work_dir) / f"tile_{size}", ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        _benchmark_worker(int(sys.argv[2]), sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+    else:
+        sizes = tuple(int(s) for s in sys.argv[1:]) or (2048, 5490, 10980)
+        run_benchmark(sizes)
@@ -0,0 +1,523 @@
+"""
+Station Event Stream - Phase 6
+Server-Sent Events (SSE) of live station updates and alerts
+
+Features:
+- StationEventBroker follows EnhancedLiveStationService ticks (the change
+  log deltas of user-facing fields) and AlertEngine events, and keeps the
+  latest events in a bounded replay buffer with increasing ids
+- aiohttp SSE endpoint (/api/stream): one coroutine per connection instead
+  of a thread per client; every connection waits on one shared wake-up
+  event, so idle connections cost a socket and a small task
+- Filters: district, type, bbox and event kinds; an event is encoded once
+  per distinct filter and the bytes are shared by all matching clients
+- Resume with Last-Event-ID (header, or last_event_id query parameter);
+  a 'resync' event tells a client whose id has left the buffer to reload
+  over REST
+- Heartbeat comments keep idle connections open through proxies
+- Negotiated gzip/zstd: each frame is compressed once per filter as a
+  self-contained segment and the segments are shared by all connections
+- Runs as a sidecar in its own thread/loop and port next to the Flask API
+  (start_in_thread; Flask's /api/stream redirects to it, see SSE_PUBLIC_URL
+  in app.py), or on an existing aiohttp application and loop (setup_routes)
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from aiohttp import web
+
+from response_compression import SEGMENT_ENCODINGS, compress_segment, negotiate, segment_preamble
+
+
+REPLAY_BUFFER_EVENTS = 256
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+EVENT_KINDS = ('tick', 'alert')
+
+
+# ==================== FILTERS ====================
+
+@dataclass(frozen=True)
+class StreamFilter:
+    """What a connection wants to receive"""
+    districts: Optional[frozenset] = None
+    types: Optional[frozenset] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None  # min_lon, min_lat, max_lon, max_lat
+    kinds: frozenset = frozenset(EVENT_KINDS)
+
+    @classmethod
+    def from_query(cls, query: Mapping[str, str]) -> 'StreamFilter':
+        """
+        Build a filter from query parameters
+
+        Args:
+            query: district and type (comma-separated, case-insensitive),
+                bbox (min_lon,min_lat,max_lon,max_lat) and events (tick,alert)
+
+        Raises:
+            ValueError: For a malformed bbox or unknown event kind
+        """
+        def names(key):
+            value = query.get(key)
+            return frozenset(v.strip().lower() for v in value.split(',') if v.strip()) if value else None
+
+        bbox = None
+        if query.get('bbox'):
+            try:
+                bbox = tuple(float(v) for v in query['bbox'].split(','))
+            except ValueError:
+                bbox = ()
+            if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+                raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+
+        kinds = names('events') or frozenset(EVENT_KINDS)
+        unknown = kinds - set(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kind(s) {', '.join(sorted(unknown))}. Use: {', '.join(EVENT_KINDS)}")
+        return cls(names('district'), names('type'), bbox, kinds)
+
+    @property
+    def unfiltered(self) -> bool:
+        return self.districts is None and self.types is None and self.bbox is None
+
+
+class StreamEvent:
+    """One published event: items pre-encoded once, frames cached per filter"""
+
+    __slots__ = ('id', 'kind', 'header', 'list_key', 'items', 'districts', 'types', 'lats', 'lons',
+                 'created', 'last_write', '_frames')
+
+    def __init__(self, event_id: int, kind: str, header: Dict[str, Any], list_key: str,
+                 items: List[Dict[str, Any]], meta: List[Optional[Dict[str, Any]]]):
+        self.id = event_id
+        self.kind = kind
+        self.header = header
+        self.list_key = list_key
+        self.items = [json.dumps(item, separators=(',', ':'), default=str) for item in items]
+        self.districts = np.array([(m or {}).get('district') for m in meta], dtype=object)
+        self.types = np.array([(m or {}).get('type') for m in meta], dtype=object)
+        self.lats = np.array([(m or {}).get('latitude', np.nan) for m in meta], dtype=float)
+        self.lons = np.array([(m or {}).get('longitude', np.nan) for m in meta], dtype=float)
+        self.created = time.time()
+        self.last_write = None
+        self._frames: Dict[Tuple[StreamFilter, Optional[str]], Optional[bytes]] = {}
+
+    def frame(self, stream_filter: StreamFilter, encoding: Optional[str] = None) -> Optional[bytes]:
+        """SSE frame of the items matching the filter (None when nothing matches)"""
+        if self.kind not in stream_filter.kinds:
+            return None
+        frame = self._frames.get((stream_filter, encoding), False)
+        if frame is not False:
+            return frame
+        if encoding is not None:
+            frame = self.frame(stream_filter)
+            if frame is not None:
+                frame = compress_segment(frame, encoding)
+            self._frames[(stream_filter, encoding)] = frame
+            return frame
+
+        if stream_filter.unfiltered:
+            selected = self.items
+        else:
+            mask = np.ones(len(self.items), dtype=bool)
+            if stream_filter.districts is not None:
+                mask &= np.isin(np.char.lower(self.districts.astype(str)), list(stream_filter.districts))
+            if stream_filter.types is not None:
+                mask &= np.isin(np.char.lower(self.types.astype(str)), list(stream_filter.types))
+            if stream_filter.bbox is not None:
+                min_lon, min_lat, max_lon, max_lat = stream_filter.bbox
+                mask &= ((self.lons >= min_lon) & (self.lons <= max_lon) &
+                         (self.lats >= min_lat) & (self.lats <= max_lat))
+            selected = [self.items[i] for i in np.flatnonzero(mask)]
+
+        frame = None
+        # Tick headers go to every tick subscriber when they carry news of
+        # their own (a resync), and to unfiltered clients as a heartbeat of seq
+        if selected or self.kind == 'tick' and (stream_filter.unfiltered or self.header.get('resync')):
+            data = (json.dumps(self.header, separators=(',', ':'))[:-1] +
+                    f',"count":{len(selected)},"{self.list_key}":[' + ','.join(selected) + ']}')
+            frame = f"id: {self.id}\nevent: {self.kind}\ndata: {data}\n\n".encode('utf-8')
+        self._frames[(stream_filter, None)] = frame
+        return frame
+
+
+# ==================== BROKER ====================
+
+class StationEventBroker:
+    """Bounded, replayable event log fed by the station service and the alert engine"""
+
+    def __init__(self, buffer_size: int = REPLAY_BUFFER_EVENTS):
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.last_id = 0
+        self.station_meta: Dict[Any, Dict[str, Any]] = {}
+        self.station_service = None
+        self._last_seq = None  # change feed cursor of the last published tick
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._new_event: Optional[asyncio.Event] = None
+        self.connections = 0
+        self.peak_connections = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    # ==================== SOURCES ====================
+
+    def attach(self, station_service, alert_engine=None) -> 'StationEventBroker':
+        """
+        Follow a station service's ticks and its alert engine's events
+
+        Args:
+            station_service: EnhancedLiveStationService instance
+            alert_engine: Defaults to the service's alert engine
+        """
+        self.station_service = station_service
+        self.station_meta = {
+            station_id: {
+                'district': station.get('district'),
+                'type': station.get('stationType', station.get('type')),
+                'latitude': station.get('latitude'),
+                'longitude': station.get('longitude'),
+            }
+            for station_id, station in station_service.station_index.items()
+        }
+        self._last_seq = station_service.change_cursor()
+        station_service.add_tick_listener(self.on_tick)
+        (alert_engine or station_service.alert_engine).add_listener(self.on_alert_events)
+        print(f"📡 Event stream attached: {len(self.station_meta)} stations, replay buffer {self.buffer.maxlen} events")
+        return self
+
+    def on_tick(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """Tick listener: publish the stations that changed in the tick"""
+        delta = self.station_service.get_changes(self._last_seq)
+        self._last_seq = delta['seq']
+        if delta['resync']:
+            # Ticks were missed beyond the change log; clients reload over REST
+            self.publish('tick', {'seq': delta['seq'], 'timestamp': delta['lastUpdate'], 'resync': True},
+                         'changes', [], [])
+            return
+        changes = delta['changes']
+        self.publish('tick', {'seq': delta['seq'], 'timestamp': delta['lastUpdate']}, 'changes',
+                     changes, [c['id'] for c in changes])
+
+    def on_alert_events(self, events):
+        """AlertEngine listener: publish raised/escalated/deescalated/cleared alerts"""
+        if not events:
+            return
+        items = [dict(event.alert.to_dict(), event=event.kind, previousSeverity=event.previous_severity)
+                 for event in events]
+        self.publish('alert', {'timestamp': datetime.now().isoformat()}, 'alerts', items,
+                     [event.alert.station_id for event in events])
+
+    def publish(self, kind: str, header: Dict[str, Any], list_key: str, items: List[Dict[str, Any]],
+                station_ids: List[Any]) -> int:
+        """
+        Append an event to the replay buffer and wake the connections
+
+        Returns:
+            Event id
+        """
+        meta = [self.station_meta.get(station_id) for station_id in station_ids]
+        with self._lock:
+            self.last_id += 1
+            event = StreamEvent(self.last_id, kind, header, list_key, items, meta)
+            self.buffer.append(event)
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._notify)
+            except RuntimeError:
+                pass  # loop already stopped
+        return event.id
+
+    # ==================== CONSUMERS ====================
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Deliver wake-ups on this event loop (the one serving the SSE connections)"""
+        self._loop = loop
+        self._new_event = asyncio.Event()
+
+    def _notify(self):
+        waiter, self._new_event = self._new_event, asyncio.Event()
+        waiter.set()
+
+    def events_after(self, last_id: int) -> Tuple[List[StreamEvent], bool]:
+        """
+        Buffered events newer than last_id
+
+        Returns:
+            (events, resync): resync is True when events after last_id have
+            already left the buffer
+        """
+        with self._lock:
+            if not self.buffer or last_id >= self.last_id:
+                return [], last_id > self.last_id
+            oldest = self.buffer[0].id
+            if last_id < oldest - 1:
+                return list(self.buffer), True
+            return list(self.buffer)[last_id - oldest + 1:], False
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            delivered = [e for e in self.buffer if e.last_write is not None]
+            return {
+                'connections': self.connections,
+                'peakConnections': self.peak_connections,
+                'lastEventId': self.last_id,
+                'bufferedEvents': len(self.buffer),
+                'oldestEventId': self.buffer[0].id if self.buffer else None,
+                'framesSent': self.frames_sent,
+                'bytesSent': self.bytes_sent,
+                'lastFanoutMs': round((delivered[-1].last_write - delivered[-1].created) * 1000, 1) if delivered else None,
+            }
+
+
+# ==================== SSE SERVER ====================
+
+class SSEServer:
+    """aiohttp endpoint streaming broker events to EventSource clients"""
+
+    def __init__(self, broker: StationEventBroker, heartbeat: float = HEARTBEAT_SECONDS):
+        self.broker = broker
+        self.heartbeat = heartbeat
+        self.serving = False
+        self._thread = None
+
+    def setup_routes(self, app: web.Application, path: str = '/api/stream'):
+        """Add the stream (and its status) to an aiohttp application"""
+        app.router.add_get(path, self.stream_handler)
+        app.router.add_get(f'{path}/status', self.status_handler)
+        app.on_startup.append(self._bind_loop)
+
+    async def _bind_loop(self, app):
+        self.broker.bind_loop(asyncio.get_running_loop())
+        self.serving = True
+
+    async def status_handler(self, request):
+        return web.json_response({'success': True, 'serving': self.serving, **self.broker.status()},
+                                 headers={'Access-Control-Allow-Origin': '*'})
+
+    async def stream_handler(self, request):
+        """
+        GET /api/stream?district=Pune,Thane&type=surface_water&bbox=73.5,18.3,74.2,18.8&events=tick,alert
+        """
+        try:
+            stream_filter = StreamFilter.from_query(request.query)
+            resume = request.headers.get('Last-Event-ID') or request.query.get('last_event_id')
+            last_id = int(resume) if resume else None
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400, headers={'Access-Control-Allow-Origin': '*'})
+
+        if last_id is None:
+            last_id = self.broker.last_id
+        encoding = negotiate(request.headers.get('Accept-Encoding'), SEGMENT_ENCODINGS)
+        headers = {
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*',
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+
+        async def send(text: str):
+            data = text.encode('utf-8')
+            await response.write(compress_segment(data, encoding) if encoding else data)
+
+        broker = self.broker
+        broker.connections += 1
+        broker.peak_connections = max(broker.peak_connections, broker.connections)
+        try:
+            service = broker.station_service
+            ready = {'eventId': last_id, 'seq': service.change_cursor() if service else None}
+            if encoding:
+                await response.write(segment_preamble(encoding))
+            await send(f"retry: {RETRY_MILLISECONDS}\nevent: ready\ndata: {json.dumps(ready)}\n\n")
+
+            while True:
+                waiter = broker._new_event
+                events, resync = broker.events_after(last_id)
+                if resync:
+                    last_id = broker.last_id
+                    await send(f"id: {last_id}\nevent: resync\ndata: {json.dumps({'eventId': last_id})}\n\n")
+                    events = []
+                for event in events:
+                    frame = event.frame(stream_filter, encoding)
+                    last_id = event.id
+                    if frame is not None:
+                        await response.write(frame)
+                        event.last_write = time.time()
+                        broker.frames_sent += 1
+                        broker.bytes_sent += len(frame)
+                try:
+                    await asyncio.wait_for(waiter.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    await send(': ping\n\n')
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            broker.connections -= 1
+        return response
+
+    def start_in_thread(self, host: str = '0.0.0.0', port: int = 8001, path: str = '/api/stream'):
+        """Serve the stream from a daemon thread with its own event loop (next to the Flask API)"""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            app = web.Application()
+            self.setup_routes(app, path)
+            runner = web.AppRunner(app, handle_signals=False)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, host, port, backlog=4096).start())
+            started.set()
+            print(f"📡 Event stream serving on http://{host}:{port}{path}")
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='sse-server', daemon=True)
+        self._thread.start()
+        started.wait(10)
+        return self
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_broker_instance = None
+
+
+def get_event_broker(station_service=None) -> StationEventBroker:
+    """
+    Get the process-wide event broker
+
+    Args:
+        station_service: Attached on first call so the broker follows its ticks
+    """
+    global _broker_instance
+    if _broker_instance is None:
+        _broker_instance = StationEventBroker()
+        if station_service is not None:
+            _broker_instance.attach(station_service)
+    return _broker_instance
+
+
+if __name__ == '__main__':
+    import argparse
+    import multiprocessing
+    import resource
+
+    import aiohttp
+
+    parser = argparse.ArgumentParser(description='SSE load test: idle connections and tick delivery latency')
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--stations', type=int, default=4495)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    def rss_mb() -> float:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+    def run_clients(port, connections, ticks, queue):
+        """Client process: open the connections, report when each tick reached every client"""
+        async def main():
+            received = [dict() for _ in range(ticks + 1)]
+            ready = 0
+            all_ready = asyncio.Event()
+            districts = [None, 'district 1', 'district 2']
+
+            async def client(i, session):
+                nonlocal ready
+                district = districts[i % len(districts)]
+                url = f'http://127.0.0.1:{port}/api/stream' + (f'?district={district}' if district else '')
+                async with session.get(url) as response:
+                    event = None
+                    async for line in response.content:
+                        if line.startswith(b'event: '):
+                            event = line[7:].strip()
+                            if event == b'ready':
+                                ready += 1
+                                if ready == connections:
+                                    all_ready.set()
+                        elif line.startswith(b'data: {"seq":') and event == b'tick':
+                            seq = int(line[13:line.index(b',')])
+                            received[seq][i] = time.time()
+                            if seq == ticks:
+                                return
+
+            connector = aiohttp.TCPConnector(limit=0)
+            async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None)) as session:
+                tasks = [asyncio.create_task(client(i, session)) for i in range(connections)]
+                await all_ready.wait()
+                queue.put(('ready', None))
+                await asyncio.gather(*tasks)
+            queue.put(('done', [max(r.values()) if r else None for r in received]))
+
+        asyncio.run(main())
+
+    class FakeService:
+        """Station service stand-in publishing synthetic deltas"""
+        def __init__(self, stations):
+            rng = np.random.default_rng(0)
+            self.station_index = {
+                f'ST{i:05d}': {'district': f'District {i % 36}', 'type': 'surface_water',
+                               'latitude': 16 + rng.random() * 5, 'longitude': 73 + rng.random() * 7}
+                for i in range(stations)
+            }
+            self.tick_seq = 0
+            self.alert_engine = None
+
+        def change_cursor(self):
+            return f'0:{self.tick_seq}'
+
+    service = FakeService(args.stations)
+    broker = StationEventBroker()
+    broker.station_service = service
+    broker.station_meta = service.station_index
+    server = SSEServer(broker).start_in_thread('127.0.0.1', args.port)
+
+    print(f"=== Station Event Stream - Phase 6: {args.connections:,} connections ===\n")
+    base_rss = rss_mb()
+    queue = multiprocessing.Queue()
+    clients = multiprocessing.Process(target=run_clients, args=(args.port, args.connections, args.ticks, queue))
+    clients.start()
+    queue.get()
+    time.sleep(1)
+    idle_rss = rss_mb()
+    print(f"Server RSS: {base_rss:.1f} MB idle server, {idle_rss:.1f} MB with {broker.connections:,} "
+          f"connections ({(idle_rss - base_rss) * 1e3 / max(broker.connections, 1):.1f} KB per connection)")
+
+    ids = list(service.station_index)
+    rng = np.random.default_rng(1)
+    published, fanout = [None], []
+    for tick in range(1, args.ticks + 1):
+        changed = sorted(rng.choice(len(ids), len(ids) // 4, replace=False))
+        changes = [{'id': ids[i], 'wqi': round(float(rng.uniform(30, 95)), 2), 'status': 'Good',
+                    'changed': ['wqiBucket']} for i in changed]
+        service.tick_seq = tick
+        published.append(time.time())
+        broker.publish('tick', {'seq': tick, 'timestamp': datetime.now().isoformat()}, 'changes',
+                       changes, [c['id'] for c in changes])
+        time.sleep(3)
+        fanout.append(broker.status()['lastFanoutMs'])
+
+    _, last_received = queue.get()
+    clients.join()
+    latencies = [(last_received[t] - published[t]) * 1000 for t in range(1, args.ticks + 1) if last_received[t]]
+    print(f"Tick written to all {args.connections:,} sockets (server side): median {np.median(fanout):.0f} ms, "
+          f"max {max(fanout):.0f} ms")
+    print(f"Tick received by all {args.connections:,} subscribers ({len(ids) // 4:,} changed stations, "
+          f"3 filters): median {np.median(latencies):.0f} ms, max {max(latencies):.0f} ms")
+    status = broker.status()
+    print(f"Frames sent: {status['framesSent']:,}, {status['bytesSent'] / 1e6:.1f} MB")
@@ -0,0 +1,393 @@
+"""
+Station Query Engine - Phase 5
+Composable filters and keyset pagination over the station catalog
+
+Features:
+- One engine behind every station listing route (stations, district, type,
+  region, status, water-class, alerts, map-data, data/all)
+- Filters compose with AND (district, type, region, status, water class,
+  has-alerts, search); comma-separated values within a filter are ORed
+- Static fields (district, type, region) are precomputed bitsets; status,
+  water class and alert bitsets are rebuilt once per tick
+- The matching rows of a filter are computed once per tick (vectorized AND
+  of bitsets) and cached in sort order; every page after that is a binary
+  search plus a slice, so page cost is O(log N + page size)
+- Keyset cursors: opaque tokens carrying the tick seq, the sort order, a
+  filter fingerprint and the last sort key; pages never repeat or skip a
+  station while the order is stable, and a cursor from an older tick keeps
+  working (the response says the tick changed)
+- Offset pages (page=N) are still served from the same cached rows
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+ORDERS = ('catalog', 'alerts')
+MAX_CACHED_QUERIES = 256
+
+
+def _norm(value: Optional[str]) -> str:
+    """Case/separator-insensitive form of a filter value ('Very_Poor' == 'very poor')"""
+    return ' '.join(str(value or '').lower().replace('_', ' ').replace('-', ' ').split())
+
+
+def class_key(water_class: Optional[str]) -> str:
+    """
+    Short key of a CPCB water class
+
+    'Class B - Outdoor bathing (organized)', 'class b' and 'B' all map to
+    'b'; 'Unfit for any use' and 'unfit' map to 'unfit'.
+    """
+    value = _norm(water_class)
+    if value.startswith('class '):
+        value = value[6:]
+    if value.startswith('unfit'):
+        return 'unfit'
+    return value[:1] if len(value) == 1 or value[1:2] in (' ', '') else value
+
+
+# ==================== FILTERS ====================
+
+@dataclass(frozen=True)
+class StationFilter:
+    """Conjunction of station filters; each field is a set of ORed values (None = any)"""
+    district: Optional[frozenset] = None
+    type: Optional[frozenset] = None
+    region: Optional[frozenset] = None
+    status: Optional[frozenset] = None
+    water_class: Optional[frozenset] = None
+    has_alerts: Optional[bool] = None
+    search: Optional[str] = None
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], **fixed) -> 'StationFilter':
+        """
+        Build a filter from query parameters
+
+        Args:
+            args: district, type, region, status, water_class, has_alerts, search
+            **fixed: Values from the route path (e.g. district='Pune'),
+                which take precedence over the query parameters
+
+        Raises:
+            ValueError: For a has_alerts value that is not true/false
+        """
+        def values(name, normalize=_norm):
+            value = fixed.get(name, args.get(name))
+            if value is None or value == '':
+                return None
+            return frozenset(normalize(v) for v in str(value).split(',') if v.strip())
+
+        has_alerts = fixed.get('has_alerts', args.get('has_alerts'))
+        if isinstance(has_alerts, str):
+            if has_alerts.lower() not in ('true', 'false', '1', '0', ''):
+                raise ValueError("has_alerts must be true or false")
+            has_alerts = has_alerts.lower() in ('true', '1') if has_alerts else None
+
+        search = fixed.get('search', args.get('search'))
+        return cls(
+            district=values('district'),
+            type=values('type'),
+            region=values('region'),
+            status=values('status'),
+            water_class=values('water_class', class_key),
+            has_alerts=has_alerts,
+            search=search.lower() if search else None,
+        )
+
+    def fingerprint(self) -> str:
+        """Stable short hash (the same in every process) used to bind cursors to filters"""
+        parts = []
+        for f in fields(self):
+            value = getattr(self, f.name)
+            parts.append(sorted(value) if isinstance(value, frozenset) else value)
+        return hashlib.md5(json.dumps(parts).encode()).hexdigest()[:12]
+
+
+# ==================== CURSORS ====================
+
+def encode_cursor(seq: int, order: str, fingerprint: str, last_key: int) -> str:
+    payload = json.dumps({'s': seq, 'o': order, 'f': fingerprint, 'k': int(last_key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Raises:
+        ValueError: For a token that was not issued by encode_cursor
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return {'seq': int(payload['s']), 'order': payload['o'], 'fingerprint': payload['f'], 'key': int(payload['k'])}
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+# ==================== ENGINE ====================
+
+class StationQueryEngine:
+    """Bitset indexes over the station catalog with per-tick match caching"""
+
+    def __init__(self, station_service):
+        self.station_service = station_service
+        stations = station_service.stations
+        get_id = station_service._get_station_id
+        self.ids: List[str] = [get_id(s) for s in stations]
+        self.row_of: Dict[str, int] = {station_id: row for row, station_id in enumerate(self.ids)}
+        self.stations: List[dict] = stations
+        self.n = len(stations)
+
+        # Listing shape of /api/stations, built once
+        self.metadata: List[dict] = station_service.get_all_stations()
+
+        self._static = {
+            'district': self._bitsets(_norm(m['district']) for m in self.metadata),
+            'type': self._bitsets(_norm(m['type']) for m in self.metadata),
+            'region': self._bitsets(_norm(m['region']) for m in self.metadata),
+        }
+        self._search_text = [f"{(m.get('name') or '').lower()}\x00{str(m['id']).lower()}" for m in self.metadata]
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._dynamic: Dict[str, Dict[str, np.ndarray]] = {}
+        self._alert_counts = np.zeros(self.n, dtype=np.int64)
+        self._matches: OrderedDict = OrderedDict()
+
+    def _bitsets(self, values: Iterable[str]) -> Dict[str, np.ndarray]:
+        """value -> boolean row mask"""
+        codes: Dict[str, int] = {}
+        column = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=self.n)
+        return {value: column == code for value, code in codes.items()}
+
+    # ==================== PER-TICK STATE ====================
+
+    def _refresh(self, version):
+        """Rebuild status / class / alert bitsets for a new tick (caller holds the lock)"""
+        readings = self.station_service.current_readings
+        rows = [readings.get(station_id) or {} for station_id in self.ids]
+        # Few distinct raw values: normalize each once
+        status_keys = {value: _norm(value) for value in {r.get('status') for r in rows}}
+        class_keys = {value: class_key(value) for value in {r.get('waterQualityClass') for r in rows}}
+        statuses = [status_keys[r.get('status')] for r in rows]
+        classes = [class_keys[r.get('waterQualityClass')] for r in rows]
+        counts = np.fromiter((len(r.get('alerts') or ()) for r in rows), dtype=np.int64, count=self.n)
+        self._dynamic = {
+            'status': self._bitsets(statuses),
+            'water_class': self._bitsets(classes),
+            'has_alerts': {True: counts > 0, False: counts == 0},
+        }
+        self._alert_counts = counts
+        self._matches.clear()
+        self._version = version
+
+    def _mask(self, stations: StationFilter, restrict_rows: Optional[np.ndarray]) -> np.ndarray:
+        mask = np.ones(self.n, dtype=bool)
+        for name in ('district', 'region', 'status', 'water_class'):
+            wanted = getattr(stations, name)
+            if wanted is not None:
+                index = self._static.get(name) or self._dynamic[name]
+                mask &= np.logical_or.reduce([index[v] for v in wanted if v in index] or [np.zeros(self.n, bool)])
+        if stations.type is not None:
+            # Types match by substring ('water' = surface_water and groundwater), like the service
+            index = self._static['type']
+            matched = [index[t] for t in index if any(w in t for w in stations.type)]
+            mask &= np.logical_or.reduce(matched or [np.zeros(self.n, bool)])
+        if stations.has_alerts is not None:
+            mask &= self._dynamic['has_alerts'][stations.has_alerts]
+        if stations.search:
+            mask &= np.fromiter((stations.search in text for text in self._search_text), dtype=bool, count=self.n)
+        if restrict_rows is not None:
+            restricted = np.zeros(self.n, dtype=bool)
+            restricted[restrict_rows] = True
+            mask &= restricted
+        return mask
+
+    def _sort_keys(self, rows: np.ndarray, order: str) -> np.ndarray:
+        if order == 'alerts':
+            # Most alerts first, then catalog order
+            return -self._alert_counts[rows] * self.n + rows
+        return rows.astype(np.int64)
+
+    # ==================== QUERIES ====================
+
+    def query(self, stations: StationFilter, limit: int = 50, cursor: Optional[str] = None,
+              page: Optional[int] = None, order: str = 'catalog',
+              restrict: Optional[Tuple[Hashable, Callable[[], Iterable[str]]]] = None) -> Dict[str, Any]:
+        """
+        One page of matching station ids
+
+        Args:
+            stations: Filter
+            limit: Page size
+            cursor: nextCursor of the previous page (keyset pagination)
+            page: 1-based page number (offset pagination) when no cursor is given
+            order: 'catalog' (station list order) or 'alerts' (most alerts first)
+            restrict: Optional (cache key, ids function) limiting the result
+                to ids computed elsewhere, e.g. the alert engine's severity index
+
+        Returns:
+            Dict with stationIds, total, nextCursor, seq and seqChanged
+
+        Raises:
+            ValueError: For an unknown order or an invalid / mismatched cursor
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order: {order}. Use: {', '.join(ORDERS)}")
+        limit = max(int(limit), 1)
+        version = self.station_service.tick_seq
+        cache_key = (stations, order, restrict[0] if restrict else None)
+
+        with self._lock:
+            if version != self._version:
+                self._refresh(version)
+            cached = self._matches.get(cache_key)
+            if cached is None:
+                restrict_rows = None
+                if restrict is not None:
+                    restrict_rows = np.fromiter((self.row_of[i] for i in restrict[1]() if i in self.row_of),
+                                                dtype=np.int64)
+                rows = np.flatnonzero(self._mask(stations, restrict_rows))
+                keys = self._sort_keys(rows, order)
+                if order != 'catalog':
+                    sort = np.argsort(keys, kind='stable')
+                    rows, keys = rows[sort], keys[sort]
+                cached = self._matches[cache_key] = (rows, keys)
+                if len(self._matches) > MAX_CACHED_QUERIES:
+                    self._matches.popitem(last=False)
+            else:
+                self._matches.move_to_end(cache_key)
+        rows, keys = cached
+
+        fingerprint = stations.fingerprint()
+        seq_changed = False
+        if cursor:
+            token = decode_cursor(cursor)
+            if token['order'] != order or token['fingerprint'] != fingerprint:
+                raise ValueError('Cursor was issued for a different listing or filters')
+            start = int(np.searchsorted(keys, token['key'], side='right'))
+            seq_changed = token['seq'] != version
+        else:
+            start = (max(page or 1, 1) - 1) * limit
+
+        end = min(start + limit, len(rows))
+        page_rows = rows[start:end]
+        next_cursor = encode_cursor(version, order, fingerprint, keys[end - 1]) if end < len(rows) and end > start else None
+        return {
+            'stationIds': [self.ids[r] for r in page_rows],
+            'total': int(len(rows)),
+            'offset': start,
+            'nextCursor': next_cursor,
+            'seq': version,
+            'seqChanged': seq_changed,
+        }
+
+    def station_metadata(self, station_id: str) -> Optional[dict]:
+        """Listing metadata of one station (the /api/stations item shape)"""
+        row = self.row_of.get(station_id)
+        return self.metadata[row] if row is not None else None
+
+    def station_record(self, station_id: str) -> Optional[dict]:
+        """Raw catalog record of one station"""
+        row = self.row_of.get(station_id)
+        return self.stations[row] if row is not None else None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'stations': self.n,
+                'version': self._version,
+                'cachedQueries': len(self._matches),
+                'districts': len(self._static['district']),
+                'types': len(self._static['type']),
+                'regions': len(self._static['region']),
+            }
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_engine_instance = None
+
+
+def get_query_engine(station_service=None) -> StationQueryEngine:
+    """
+    Get the process-wide station query engine
+
+    Args:
+        station_service: Catalog source, required on the first call
+    """
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = StationQueryEngine(station_service)
+        print(f"🔎 Station query engine ready: {_engine_instance.n} stations, "
+              f"{len(_engine_instance._static['district'])} districts")
+    return _engine_instance
+
+
+if __name__ == '__main__':
+    import time
+
+    class FakeService:
+        """Station service stand-in with a synthetic catalog"""
+        def __init__(self, n):
+            rng = np.random.default_rng(0)
+            statuses = ['Excellent', 'Good', 'Moderate', 'Poor', 'Very Poor']
+            classes = ['Class A - x', 'Class B - x', 'Class C - x', 'Class D - x', 'Class E - x', 'Unfit for any use']
+            self.stations = [{
+                'station_id': f'MH-{i:06d}', 'name': f'Station {i}', 'type': 'groundwater' if i % 30 else 'surface_water',
+                'district': f'District {i % 36}', 'region': f'Region {i % 6}', 'latitude': 18.0, 'longitude': 73.0,
+                'laboratory': f'Lab {i % 40}',
+            } for i in range(n)]
+            self.current_readings = {s['station_id']: {
+                'status': statuses[rng.integers(5)], 'waterQualityClass': classes[rng.integers(6)],
+                'alerts': ['x'] * int(rng.integers(0, 3)),
+            } for s in self.stations}
+            self.tick_seq = 1
+
+        def _get_station_id(self, s):
+            return s['station_id']
+
+        def get_all_stations(self):
+            return [{'id': s['station_id'], 'name': s['name'], 'type': s['type'], 'district': s['district'],
+                     'region': s['region']} for s in self.stations]
+
+    print("=== Station Query Engine - Phase 5 ===\n")
+    for n in (4495, 100_000):
+        service = FakeService(n)
+        engine = StationQueryEngine(service)
+        listing = StationFilter.from_args({'district': 'District 7', 'type': 'groundwater', 'status': 'good,moderate'})
+
+        def naive_page(page, per_page=50):
+            items = [m for m in service.get_all_stations()
+                     if m['district'].lower() == 'district 7' and 'groundwater' in m['type']
+                     and service.current_readings[m['id']]['status'].lower() in ('good', 'moderate')]
+            return items[(page - 1) * per_page:page * per_page]
+
+        started = time.perf_counter()
+        naive_page(5)
+        naive = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine.query(StationFilter(), limit=1)
+        refresh = time.perf_counter() - started
+
+        started = time.perf_counter()
+        first = engine.query(listing, limit=50)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cursor, pages, seen = first['nextCursor'], 1, len(first['stationIds'])
+        while cursor:
+            result = engine.query(listing, limit=50, cursor=cursor)
+            cursor, pages, seen = result['nextCursor'], pages + 1, seen + len(result['stationIds'])
+        warm = (time.perf_counter() - started) / max(pages - 1, 1)
+
+        print(f"{n:>7,} stations, {first['total']:,} matches: naive filter+slice {naive * 1000:.1f} ms/page | "
+              f"tick refresh {refresh * 1000:.1f} ms | first page {cold * 1000:.2f} ms | next pages {warm * 1000:.3f} ms ({pages} pages, {seen} ids)")
@@ -0,0 +1,488 @@
+"""
+Streaming Trend Engine - Phase 5
+Incremental trend analysis for every station of the live network
+
+Instead of re-fitting whole posted histories per request, the engine keeps
+running sufficient statistics per station and parameter and folds in each
+tick of EnhancedLiveStationService as it happens:
+- Welford mean / variance over all readings ever seen
+- Regression sums (n, Σx, Σx², Σy, Σy², Σxy) over a sliding window, so
+  slope, R² and p-value come out in O(1)
+- Z-score of every new reading against the window, with a bounded log of
+  anomalies per station
+- Per-season Welford means for a seasonal decomposition
+  (seasonal component = season mean - overall mean)
+
+All updates are array operations over the stations of a tick, O(1) per
+reading and parameter. Window sums are rebuilt from the ring buffer once
+per window so rounding errors cannot accumulate.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import stats
+
+from trend_analysis_service import TrendAnalysisService
+from utils import convert_to_serializable
+
+
+# Numeric reading fields tracked per station
+TREND_PARAMETERS = [
+    'ph', 'temperature', 'turbidity', 'tds', 'conductivity', 'totalHardness',
+    'totalAlkalinity', 'calcium', 'magnesium', 'sodium', 'potassium',
+    'chlorides', 'sulfates', 'nitrates', 'phosphates', 'fluoride', 'iron',
+    'arsenic', 'lead', 'chromium', 'cadmium', 'totalColiform', 'fecalColiform',
+    'dissolvedOxygen', 'bod', 'cod', 'bicarbonates', 'ammonia', 'mercury', 'wqi'
+]
+
+SEASONS = ['Pre-Monsoon', 'Monsoon', 'Post-Monsoon', 'Winter']
+
+DEFAULT_WINDOW = 96  # 24 hours of 15-minute ticks
+MAX_ANOMALIES_PER_STATION = 50
+
+
+class StreamingTrendEngine:
+    """Running per-station, per-parameter trend statistics fed by live ticks"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, parameters: Optional[List[str]] = None,
+                 anomaly_threshold: float = 2.5):
+        self.window = window
+        self.parameters = list(parameters or TREND_PARAMETERS)
+        self.anomaly_threshold = anomaly_threshold
+        self.trend_service = TrendAnalysisService()
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, int] = {}
+        self._anomalies: List[deque] = []
+        self.ticks_processed = 0
+        self.readings_processed = 0
+        self.last_tick = None
+        self.last_tick_seconds = 0.0
+        self._allocate(0)
+
+    # ==================== STATE ====================
+
+    def _allocate(self, stations: int):
+        """Create (or grow) the state arrays for the given number of stations"""
+        S, W, P = stations, self.window, len(self.parameters)
+
+        def grow(name, shape, fill, dtype=float):
+            new = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None and len(old):
+                new[:len(old)] = old
+            setattr(self, name, new)
+
+        # Sliding window ring buffer, slot = tick % window
+        grow('_ring', (S, W, P), np.nan, np.float32)
+        grow('_ring_time', (S, W), None, object)
+        grow('_ticks', S, 0, np.int64)
+        grow('_base', S, 0, np.int64)  # x = tick - base keeps x small
+
+        # Window regression sums
+        for name in ('_n', '_sx', '_sxx', '_sy', '_syy', '_sxy'):
+            grow(name, (S, P), 0.0)
+
+        # Welford over all readings
+        grow('_count', (S, P), 0.0)
+        grow('_mean', (S, P), 0.0)
+        grow('_m2', (S, P), 0.0)
+
+        # Welford mean per season
+        grow('_season_count', (S, len(SEASONS), P), 0.0)
+        grow('_season_mean', (S, len(SEASONS), P), 0.0)
+
+        self._anomalies.extend(
+            deque(maxlen=MAX_ANOMALIES_PER_STATION) for _ in range(S - len(self._anomalies))
+        )
+
+    def _station_rows(self, station_ids: List[str]) -> np.ndarray:
+        """Row index of every station, registering new ones"""
+        new = [sid for sid in dict.fromkeys(station_ids) if sid not in self._index]
+        if new:
+            start = len(self._index)
+            for offset, sid in enumerate(new):
+                self._index[sid] = start + offset
+            self._allocate(len(self._index))
+        return np.fromiter((self._index[sid] for sid in station_ids), dtype=np.int64,
+                           count=len(station_ids))
+
+    # ==================== INGESTION ====================
+
+    def attach(self, station_service) -> 'StreamingTrendEngine':
+        """
+        Replay the service's retained history, then follow its ticks
+
+        Args:
+            station_service: EnhancedLiveStationService instance
+        """
+        history = station_service.historical_data
+        rounds = max((len(readings) for readings in history.values()), default=0)
+        for k in range(rounds):
+            tick = {sid: readings[k] for sid, readings in history.items() if k < len(readings)}
+            self.ingest(tick)
+        station_service.add_tick_listener(self.on_tick)
+        print(f"📈 Trend engine attached: {len(self._index)} stations, {rounds} ticks replayed")
+        return self
+
+    def on_tick(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """Tick listener for EnhancedLiveStationService"""
+        self.ingest(readings, timestamp)
+
+    def ingest(self, readings: Dict[str, dict], timestamp: Optional[str] = None):
+        """
+        Fold one reading per station into the running statistics
+
+        Args:
+            readings: station_id -> reading dictionary
+            timestamp: Tick time, used when a reading has no timestamp
+        """
+        if not readings:
+            return
+        start = time.perf_counter()
+
+        station_ids = list(readings)
+        records = list(readings.values())
+        rows = [[r.get(p) for p in self.parameters] for r in records]
+        try:
+            Y = np.array(rows, dtype=float)  # None becomes NaN
+        except (TypeError, ValueError):
+            Y = np.array([[self._to_float(v) for v in row] for row in rows], dtype=float)
+        times = [r.get('timestamp', timestamp) for r in records]
+        season = np.array([SEASONS.index(r['season']) if r.get('season') in SEASONS else -1
+                           for r in records])
+
+        with self._lock:
+            rows = self._station_rows(station_ids)
+            self._update(rows, Y, times, season)
+            self.ticks_processed += 1
+            self.readings_processed += len(rows)
+            self.last_tick = timestamp or datetime.now().isoformat()
+            self.last_tick_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    def _update(self, rows: np.ndarray, Y: np.ndarray, times: List[str], season: np.ndarray):
+        """Vectorized O(1)-per-reading update of the stations in rows"""
+        W = self.window
+        # Sums see exactly the values the ring buffer stores
+        Y = Y.astype(np.float32).astype(float)
+        t = self._ticks[rows]
+        slot = t % W
+        x = (t - self._base[rows]).astype(float)[:, None]
+        x_old = x - W
+
+        # Slide the window: drop the value leaving it, add the new one
+        old = self._ring[rows, slot].astype(float)
+        valid_old = ~np.isnan(old)
+        valid = ~np.isnan(Y)
+        y_old = np.where(valid_old, old, 0.0)
+        y = np.where(valid, Y, 0.0)
+        x_in = np.where(valid, x, 0.0)
+        x_out = np.where(valid_old, x_old, 0.0)
+
+        self._n[rows] += valid.astype(float) - valid_old
+        self._sx[rows] += x_in - x_out
+        self._sxx[rows] += x_in * x_in - x_out * x_out
+        self._sy[rows] += y - y_old
+        self._syy[rows] += y * y - y_old * y_old
+        self._sxy[rows] += x_in * y - x_out * y_old
+
+        self._ring[rows, slot] = Y
+        self._ring_time[rows, slot] = times
+        self._ticks[rows] = t + 1
+
+        # Welford over all readings
+        count = self._count[rows] + valid
+        delta = y - self._mean[rows]
+        mean = self._mean[rows] + np.where(valid, delta / np.maximum(count, 1), 0.0)
+        self._m2[rows] += np.where(valid, delta * (y - mean), 0.0)
+        self._count[rows] = count
+        self._mean[rows] = mean
+
+        # Per-season running means
+        seasonal = season >= 0
+        if seasonal.any():
+            s_rows, s_idx = rows[seasonal], season[seasonal]
+            s_valid = valid[seasonal]
+            s_count = self._season_count[s_rows, s_idx] + s_valid
+            s_mean = self._season_mean[s_rows, s_idx]
+            s_mean = s_mean + np.where(s_valid, (y[seasonal] - s_mean) / np.maximum(s_count, 1), 0.0)
+            self._season_count[s_rows, s_idx] = s_count
+            self._season_mean[s_rows, s_idx] = s_mean
+
+        self._flag_anomalies(rows, Y, valid, times)
+
+        # Rebuild the sums of stations that completed a window
+        full = (t + 1) % W == 0
+        if full.any():
+            self._resync(rows[full])
+
+    def _window_moments(self, rows: np.ndarray):
+        """Window mean and population standard deviation"""
+        n = self._n[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = self._sy[rows] / n
+            var = np.maximum(self._syy[rows] / n - mean * mean, 0.0)
+        return n, mean, np.sqrt(var)
+
+    def _flag_anomalies(self, rows: np.ndarray, Y: np.ndarray, valid: np.ndarray, times: List[str]):
+        """Z-score of every new reading against its window"""
+        n, mean, std = self._window_moments(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (Y - mean) / std
+        flagged = valid & (n >= 5) & (std > 0) & (np.abs(z) > self.anomaly_threshold)
+        for i, j in zip(*np.nonzero(flagged)):
+            record = self.trend_service.anomaly_record(
+                times[i], float(Y[i, j]), float(z[i, j]), float(mean[i, j])
+            )
+            self._anomalies[rows[i]].append({'parameter': self.parameters[j], **record})
+
+    def _resync(self, rows: np.ndarray):
+        """Recompute window sums from the ring buffer and rebase x to 0..window-1"""
+        # A full window ends at slot window-1, so slot j holds x = j
+        self._base[rows] = self._ticks[rows] - self.window
+        values = self._ring[rows].astype(float)
+        valid = ~np.isnan(values)
+        y = np.where(valid, values, 0.0)
+        x = np.where(valid, np.arange(self.window, dtype=float)[None, :, None], 0.0)
+        self._n[rows] = valid.sum(axis=1)
+        self._sx[rows] = x.sum(axis=1)
+        self._sxx[rows] = (x * x).sum(axis=1)
+        self._sy[rows] = y.sum(axis=1)
+        self._syy[rows] = (y * y).sum(axis=1)
+        self._sxy[rows] = (x * y).sum(axis=1)
+
+    # ==================== QUERIES ====================
+
+    def has_station(self, station_id: str) -> bool:
+        return station_id in self._index
+
+    def _window_values(self, row: int):
+        """Chronological window of one station: (values, timestamps)"""
+        t = int(self._ticks[row])
+        filled = min(t, self.window)
+        order = (np.arange(t - filled, t)) % self.window
+        return self._ring[row, order].astype(float), self._ring_time[row, order].tolist()
+
+    def _regression(self, row: int):
+        """Slope, R² and p-value of every parameter from the window sums"""
+        n = self._n[row]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self._sxy[row] - self._sx[row] * self._sy[row] / n
+            var_x = self._sxx[row] - self._sx[row] ** 2 / n
+            var_y = np.maximum(self._syy[row] - self._sy[row] ** 2 / n, 0.0)
+            slope = cov / var_x
+            r_squared = np.clip(cov * cov / (var_x * var_y), 0.0, 1.0)
+            r_squared = np.where(var_y > 0, r_squared, 0.0)
+            dof = n - 2
+            t_stat = np.sqrt(r_squared * dof / np.maximum(1 - r_squared, 1e-300))
+            p_value = np.where(dof > 0, 2 * stats.t.sf(t_stat, np.maximum(dof, 1)), 1.0)
+        return n, slope, r_squared, p_value
+
+    def analyze_station(self, station_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Trend analysis of a station from its running statistics
+
+        Returns:
+            Same structure as TrendAnalysisService.analyze_trends(), or None
+            for an unknown station
+        """
+        with self._lock:
+            row = self._index.get(station_id)
+            if row is None:
+                return None
+            values, timestamps = self._window_values(row)
+            n, slope, r_squared, p_value = self._regression(row)
+            mean = self._mean[row].copy()
+            std = np.sqrt(self._m2[row] / np.maximum(self._count[row], 1))
+            seasonal = self._seasonal_components(row)
+            anomalies = list(self._anomalies[row])
+
+        parameter_trends = {}
+        counts = {'improving': 0, 'declining': 0, 'stable': 0}
+        for j, parameter in enumerate(self.parameters):
+            if n[j] < 3:  # Need at least 3 points for trend
+                continue
+            valid = ~np.isnan(values[:, j])
+            series = values[valid, j]
+            half = len(series) // 2
+            first_mean = series[:half].mean() if half else series.mean()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change_pct = (series[half:].mean() - first_mean) / first_mean * 100
+            change_pct = float(np.nan_to_num(change_pct, nan=0.0, posinf=0.0, neginf=0.0))
+
+            direction, status = self.trend_service.classify_trend(
+                parameter, float(slope[j]), float(mean[j]), change_pct
+            )
+            counts[status] += 1
+            parameter_trends[parameter] = {
+                'direction': direction,
+                'status': status,
+                'changePercentage': round(change_pct, 2),
+                'slope': round(float(slope[j]), 4),
+                'rSquared': round(float(r_squared[j]), 3),
+                'pValue': round(float(p_value[j]), 4),
+                'significantTrend': bool(p_value[j] < 0.05),
+                'mean': round(float(mean[j]), 2),
+                'stdDev': round(float(std[j]), 2),
+                'min': round(float(series.min()), 2),
+                'max': round(float(series.max()), 2),
+                'range': round(float(series.max() - series.min()), 2),
+                'historicalValues': np.round(series, 2).tolist(),
+                'timestamps': [ts for ts, ok in zip(timestamps, valid) if ok],
+                'anomalies': [a for a in anomalies if a['parameter'] == parameter],
+                'seasonalComponent': seasonal.get(parameter, {}),
+                'observations': int(self._count[row, j])
+            }
+
+        # Determine overall trend
+        improving, declining, stable = counts['improving'], counts['declining'], counts['stable']
+        if improving > declining + stable:
+            overall_trend = 'improving'
+        elif declining > improving + stable:
+            overall_trend = 'declining'
+        else:
+            overall_trend = 'stable'
+
+        result = {
+            'parameterTrends': parameter_trends,
+            'overallTrend': overall_trend,
+            'summary': self.trend_service.generate_trend_summary(
+                overall_trend, improving, declining, stable, anomalies
+            ),
+            'statistics': {
+                'improving': improving,
+                'declining': declining,
+                'stable': stable,
+                'totalParameters': improving + declining + stable
+            },
+            'anomalies': sorted(anomalies, key=lambda a: a['severity_score'], reverse=True)[:10],
+            'seasonalPatterns': self._seasonal_summary(seasonal),
+            'window': self.window,
+            'timestamp': datetime.now().isoformat()
+        }
+        return convert_to_serializable(result)
+
+    def _seasonal_components(self, row: int) -> Dict[str, Dict[str, float]]:
+        """Season mean minus overall mean for every parameter with seasonal data"""
+        components = {}
+        observed = self._season_count[row] > 0
+        for j, parameter in enumerate(self.parameters):
+            if not observed[:, j].any():
+                continue
+            components[parameter] = {
+                season: round(float(self._season_mean[row, s, j] - self._mean[row, j]), 4)
+                for s, season in enumerate(SEASONS) if observed[s, j]
+            }
+        return components
+
+    def _seasonal_summary(self, components: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """Seasonal pattern block in the TrendAnalysisService format"""
+        seasons_seen = {season for parts in components.values() for season in parts}
+        if len(seasons_seen) < 2:
+            return {
+                'detected': False,
+                'description': 'Readings cover a single season so far; seasonal components '
+                               'will appear once a second season is observed',
+                'components': components,
+                'recommendations': []
+            }
+        return {
+            'detected': True,
+            'description': f'Seasonal components estimated from {len(seasons_seen)} observed seasons',
+            'components': components,
+            'recommendations': [
+                "Increase monitoring frequency during monsoon season",
+                "Implement seasonal treatment adjustments",
+                "Prepare for temperature-related changes in summer"
+            ]
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Engine counters for the API"""
+        with self._lock:
+            return {
+                'stations': len(self._index),
+                'parameters': len(self.parameters),
+                'window': self.window,
+                'ticksProcessed': self.ticks_processed,
+                'readingsProcessed': self.readings_processed,
+                'lastTick': self.last_tick,
+                'lastTickSeconds': round(self.last_tick_seconds, 4),
+                'stateMB': round(self._state_bytes() / 1e6, 1)
+            }
+
+    def _state_bytes(self) -> int:
+        """Bytes held by every per-station array, including the timestamp strings of _ring_time"""
+        arrays = [a for a in vars(self).values() if isinstance(a, np.ndarray)]
+        # Object arrays hold pointers; one timestamp string is shared by all stations of a tick
+        timestamps = {id(t): t for t in self._ring_time.ravel() if t is not None}
+        return sum(a.nbytes for a in arrays) + sum(sys.getsizeof(t) for t in timestamps.values())
+
+
+# ==================== SINGLETON INSTANCE ====================
+
+_engine_instance = None
+
+
+def get_trend_engine(station_service=None) -> StreamingTrendEngine:
+    """
+    Get the process-wide trend engine
+
+    Args:
+        station_service: Attached on first call so the engine follows its ticks
+    """
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = StreamingTrendEngine()
+        if station_service is not None:
+            _engine_instance.attach(station_service)
+    return _engine_instance
+
+
+if __name__ == '__main__':
+    print("=== Streaming Trend Engine - Phase 5 ===\n")
+
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    stations, ticks = 4495, 200
+    engine = StreamingTrendEngine()
+    start = time.perf_counter()
+    for k in range(ticks):
+        engine.ingest({
+            f'ST{i:04d}': {'ph': 7 + 0.002 * k + rng.normal(0, 0.1), 'turbidity': 10 + rng.normal(0, 2),
+                           'dissolvedOxygen': 6 - 0.01 * k + rng.normal(0, 0.2),
+                           'season': SEASONS[k * 4 // ticks], 'timestamp': str(k)}
+            for i in range(stations)
+        })
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks x {stations} stations: {elapsed:.2f}s "
+          f"({elapsed / ticks * 1000:.1f} ms per tick, last {engine.last_tick_seconds * 1000:.1f} ms)")
+
+    start = time.perf_counter()
+    analysis = engine.analyze_station('ST0001')
+    print(f"Station query: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    values, _ = engine._window_values(engine._index['ST0001'])
+    df = pd.DataFrame(values, columns=engine.parameters)[['ph', 'turbidity', 'dissolvedOxygen']]
+    start = time.perf_counter()
+    batch = TrendAnalysisService().analyze_trends(df)
+    print(f"Batch re-fit of the same window: {(time.perf_counter() - start) * 1000:.2f} ms")
+    for parameter in df.columns:
+        print(f"  {parameter:<16} slope {analysis['parameterTrends'][parameter]['slope']:>8} "
+              f"(batch {batch['parameterTrends'][parameter]['slope']:>8}) "
+              f"-> {analysis['parameterTrends'][parameter]['status']}")
+    print(f"\n{engine.status()}")
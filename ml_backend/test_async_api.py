@@ -0,0 +1,60 @@
+"""
+WSGI bridge tests for async_api
+
+A small Flask app is served through AsyncStationAPI on an aiohttp test
+server, so request bodies and responses cross the same bridge as the real
+routes.
+
+Run with: python -m pytest test_async_api.py
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from flask import Flask, jsonify, request
+
+from async_api import create_async_app
+
+
+def make_flask_app(max_content_length=None):
+    app = Flask(__name__)
+    if max_content_length:
+        app.config['MAX_CONTENT_LENGTH'] = max_content_length
+
+    @app.route('/api/ai/upload', methods=['POST'])
+    def ai_upload():
+        file = request.files.get('file')
+        data = file.read() if file else b''
+        return jsonify({'hasFile': file is not None, 'length': len(data), 'tail': data[-8:].decode()})
+
+    return app
+
+
+def post_file(flask_app, size):
+    async def run():
+        app, api = create_async_app(flask_app, station_workers=1, ai_workers=1)
+        async with TestClient(TestServer(app)) as client:
+            form = aiohttp.FormData()
+            payload = b'x' * (size - 8) + b'END-MARK'
+            form.add_field('file', payload, filename='samples.csv', content_type='text/csv')
+            response = await client.post('/api/ai/upload', data=form)
+            return response.status, await response.json()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('size', [1024, 60 * 1024, 3 * 1024 * 1024])
+def test_multipart_body_reaches_flask_whole(size):
+    status, body = post_file(make_flask_app(), size)
+
+    assert status == 200
+    assert body == {'hasFile': True, 'length': size, 'tail': 'END-MARK'}
+
+
+def test_body_over_limit_is_rejected():
+    status, body = post_file(make_flask_app(max_content_length=256 * 1024), 512 * 1024)
+
+    assert status == 413
+    assert 'too large' in body['error']
@@ -0,0 +1,71 @@
+"""
+Type inference tests for upload_store
+
+Each case stores a small upload and checks the column types and values that
+come back, so a parameter never silently turns into dates (or dates into
+parameters) on the way through the store.
+
+Run with: python -m pytest test_upload_store.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from upload_store import UploadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'datasets'), chunk_rows=2)
+
+
+def ingest_frame(store, tmp_path, df, name='samples.csv'):
+    path = tmp_path / name
+    if name.endswith('.xlsx'):
+        pytest.importorskip('openpyxl')
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    meta = store.ingest(str(path))
+    return {c['name']: c['type'] for c in meta['schema']}, store.load(meta['uploadId'])
+
+
+def test_excel_date_column_stays_datetime(store, tmp_path):
+    df = pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=5, freq='D'),
+        'pH': [7.1, 7.2, 7.0, 6.9, 7.3],
+    })
+    types, loaded = ingest_frame(store, tmp_path, df, 'samples.xlsx')
+
+    assert types == {'Date': 'datetime', 'pH': 'float'}
+    assert pd.api.types.is_datetime64_any_dtype(loaded['Date'].dtype)
+    assert loaded['Date'].iloc[0] == pd.Timestamp('2024-01-01')
+
+
+def test_month_names_stay_text(store, tmp_path):
+    df = pd.DataFrame({'Month': ['Jan', 'Feb', 'Mar', 'Apr'], 'BOD': [2.1, 2.4, 1.9, 2.0]})
+    types, loaded = ingest_frame(store, tmp_path, df)
+
+    assert types['Month'] == 'string'
+    assert loaded['Month'].tolist() == ['Jan', 'Feb', 'Mar', 'Apr']
+
+
+def test_text_dates_parse_and_out_of_range_becomes_text(store, tmp_path):
+    df = pd.DataFrame({
+        'Sampled': ['2024-01-01 06:00', '2024-01-02 06:00', '2024-01-03 06:00', '2024-01-04 06:00'],
+        'Legacy': ['0001-01-01', '0001-02-01', '0001-03-01', '0001-04-01'],
+    })
+    types, loaded = ingest_frame(store, tmp_path, df)
+
+    assert types == {'Sampled': 'datetime', 'Legacy': 'string'}
+    assert loaded['Sampled'].iloc[3] == pd.Timestamp('2024-01-04 06:00')
+    assert loaded['Legacy'].tolist() == df['Legacy'].tolist()
+
+
+def test_bool_with_missing_values_is_not_numeric(store, tmp_path):
+    df = pd.DataFrame({'Flagged': [True, np.nan, False, True], 'DO': [6.1, 5.8, 6.4, 6.0]})
+    types, loaded = ingest_frame(store, tmp_path, df)
+
+    assert types['Flagged'] == 'string'
+    assert loaded['Flagged'].tolist() == ['True', None, 'False', 'True']
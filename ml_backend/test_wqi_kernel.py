@@ -0,0 +1,273 @@
+"""
+Golden tests for wqi_kernel
+
+The reference functions below are the scalar implementations the services
+used before they moved to wqi_kernel, kept verbatim (as functions) so every
+kernel can be checked sample by sample against them.
+
+Run with: python -m pytest test_wqi_kernel.py
+"""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+import wqi_kernel
+
+
+# ==================== REFERENCE IMPLEMENTATIONS ====================
+
+def ref_cpcb_wqi(ph, bod, dissolved_oxygen, fecal_coliform, temperature=None):
+    """AuthenticWaterQualityGenerator.calculate_wqi"""
+    saturation_constant = 6.5
+    if temperature is not None:
+        saturation_constant = 6.5 * (1 - ((temperature - 20) * 0.015))
+        saturation_constant = max(4.0, min(9.0, saturation_constant))
+    pct = (dissolved_oxygen / saturation_constant) * 100
+    if 0 <= pct <= 40:
+        do_sub = 0.18 + (0.66 * pct)
+    elif 40 < pct <= 100:
+        do_sub = -13.55 + (1.17 * pct)
+    elif 100 < pct <= 140:
+        do_sub = 163.34 - (0.62 * pct)
+    else:
+        do_sub = 50.0 if pct > 140 else 2.0
+    do_sub = max(0, min(100, do_sub))
+
+    if fecal_coliform < 1:
+        fc_sub = 97.0
+    elif fecal_coliform <= 1000:
+        fc_sub = 97.2 - (26.6 * math.log10(fecal_coliform))
+    elif fecal_coliform <= 100000:
+        fc_sub = 42.33 - (7.75 * math.log10(fecal_coliform))
+    else:
+        fc_sub = 2.0
+    fc_sub = max(0, min(100, fc_sub))
+
+    if 2 <= ph < 5:
+        ph_sub = 16.1 + (7.35 * ph)
+    elif 5 <= ph < 7.3:
+        ph_sub = -142.67 + (33.5 * ph)
+    elif 7.3 <= ph <= 10:
+        ph_sub = 316.96 - (29.85 * ph)
+    elif 10 < ph <= 12:
+        ph_sub = 96.17 - (8.0 * ph)
+    else:
+        ph_sub = 0.0
+    ph_sub = max(0, min(100, ph_sub))
+
+    if 0 <= bod <= 10:
+        bod_sub = 96.67 - (7.0 * bod)
+    elif 10 < bod <= 30:
+        bod_sub = 38.9 - (1.23 * bod)
+    else:
+        bod_sub = 2.0
+    bod_sub = max(0, min(100, bod_sub))
+
+    wqi = (do_sub * 0.31) + (fc_sub * 0.28) + (ph_sub * 0.22) + (bod_sub * 0.19)
+    return max(0, min(100, wqi))
+
+
+def ref_banded_wqi(r):
+    """EnhancedLiveStationService._calculate_comprehensive_wqi"""
+    weights = {'ph': 0.10, 'dissolvedOxygen': 0.15, 'bod': 0.12, 'turbidity': 0.10, 'tds': 0.10,
+               'nitrates': 0.08, 'fecalColiform': 0.15, 'totalColiform': 0.10, 'fluoride': 0.05, 'iron': 0.05}
+    s = {}
+    s['ph'] = 100 if 6.5 <= r['ph'] <= 8.5 else 80 if 6.0 <= r['ph'] <= 9.0 else 50
+    if r['dissolvedOxygen']:
+        s['dissolvedOxygen'] = 100 if r['dissolvedOxygen'] >= 6.0 else 70 if r['dissolvedOxygen'] >= 4.0 else 40
+    else:
+        s['dissolvedOxygen'] = 80
+    if r['bod']:
+        s['bod'] = 100 if r['bod'] <= 3.0 else 70 if r['bod'] <= 6.0 else 40
+    else:
+        s['bod'] = 80
+    s['turbidity'] = 100 if r['turbidity'] <= 5 else 80 if r['turbidity'] <= 10 else 50
+    s['tds'] = 100 if r['tds'] <= 500 else 75 if r['tds'] <= 1000 else 50
+    s['nitrates'] = 100 if r['nitrates'] <= 10 else 70 if r['nitrates'] <= 45 else 40
+    s['fecalColiform'] = 100 if r['fecalColiform'] <= 10 else 70 if r['fecalColiform'] <= 100 else 30
+    s['totalColiform'] = 100 if r['totalColiform'] <= 50 else 70 if r['totalColiform'] <= 500 else 40
+    s['fluoride'] = 100 if 0.6 <= r['fluoride'] <= 1.5 else 70 if r['fluoride'] <= 2.0 else 40
+    s['iron'] = 100 if r['iron'] <= 0.3 else 75 if r['iron'] <= 1.0 else 50
+    return round(sum(s[p] * weights[p] for p in weights.keys()), 2)
+
+
+def ref_screening_wqi(data):
+    """RealtimeDataOrchestrator.calculate_wqi_quick"""
+    ph = data.get('ph', 7.0)
+    bod = data.get('bod', 2.0)
+    do_val = data.get('dissolved_oxygen', 6.0)
+    fc = data.get('fecal_coliform', 500)
+    ph_sub = 90 if 7.0 <= ph <= 8.5 else 70
+    bod_sub = 90 if bod <= 3 else 70
+    do_sub = 90 if do_val >= 6 else 70
+    fc_sub = 90 if fc <= 500 else 70
+    wqi = (0.22 * ph_sub + 0.19 * bod_sub + 0.31 * do_sub + 0.28 * fc_sub)
+    return max(0, min(100, wqi))
+
+
+def ref_ratio_wqi(r):
+    """HistoricalDataGenerator._calculate_wqi"""
+    do_score = min(r['dissolvedOxygen'] / 8.0, 1.0) * 100
+    ph_score = (1 - abs(r['ph'] - 7.0) / 7.0) * 100
+    turb_score = max(0, (1 - r['turbidity'] / 50.0)) * 100
+    coliform_score = max(0, (1 - r['fecalColiform'] / 1000.0)) * 100
+    return round((do_score + ph_score + turb_score + coliform_score) / 4, 1)
+
+
+def ref_linear_wqi(p):
+    """LiveStationService._calculate_wqi"""
+    ph_index = max(0, min(100, 100 - (abs(p['pH'] - 7.0) / 1.5 * 100)))
+    turbidity_index = max(0, 100 - (p['turbidity'] / 50.0 * 100))
+    do_index = min(100, (p['dissolvedOxygen'] / 12.0) * 100)
+    tds_index = max(0, 100 - (p['tds'] / 1500.0 * 100))
+    bod_index = max(0, 100 - (p['bod'] / 20.0 * 100))
+    chlorides_index = max(0, 100 - (p['chlorides'] / 600.0 * 100))
+    nitrates_index = max(0, 100 - (p['nitrates'] / 50.0 * 100))
+    wqi = (ph_index * 0.20 + turbidity_index * 0.15 + do_index * 0.20 + tds_index * 0.15 +
+           bod_index * 0.10 + chlorides_index * 0.10 + nitrates_index * 0.10)
+    return max(0, min(100, wqi))
+
+
+def ref_band(wqi, bounds, labels):
+    for bound, label in zip(bounds, labels):
+        if wqi >= bound:
+            return label
+    return labels[-1]
+
+
+# ==================== FIXTURES ====================
+
+@pytest.fixture(scope='module')
+def rng():
+    return np.random.default_rng(2024)
+
+
+def _rounded(values, decimals):
+    """Values rounded like the simulators do, plus exact band edges"""
+    return [round(float(v), decimals) for v in values]
+
+
+# ==================== CPCB ====================
+
+def test_cpcb_matches_reference(rng):
+    n = 5000
+    ph = np.concatenate([rng.uniform(0, 14, n), [2, 5, 7.3, 10, 12, 1.9, 12.1]])
+    m = len(ph)
+    bod = np.concatenate([rng.uniform(-1, 40, n), [0, 10, 30, 10.01, 0, 5, 31]])
+    do = np.concatenate([rng.uniform(0, 15, n), [0, 2.6, 6.5, 9.1, 10, 0.5, 12]])
+    fc = np.concatenate([rng.lognormal(4, 3, n), [0, 0.5, 1, 1000, 100000, 100001, 1001]])
+    temp = rng.uniform(5, 45, m)
+
+    for with_temp in (False, True):
+        got = wqi_kernel.cpcb_wqi(ph, bod, do, fc, temp if with_temp else None)
+        for i in range(m):
+            expected = ref_cpcb_wqi(ph[i], bod[i], do[i], fc[i], temp[i] if with_temp else None)
+            assert got[i] == pytest.approx(expected, abs=1e-9)
+
+
+def test_cpcb_report_example():
+    """Krishna River at Rajapur Weir, Kolhapur (April): 83.16 in the report"""
+    assert float(wqi_kernel.cpcb_wqi(ph=7.6, bod=2.2, dissolved_oxygen=5.5, fecal_coliform=6)) == \
+        pytest.approx(83.16, abs=1.0)
+
+
+def test_cpcb_classification_matches_reference():
+    wqi = np.array([100, 63, 62.99, 50, 49.99, 38, 37.99, 25, 24.99, 0])
+    got = wqi_kernel.cpcb_classification(wqi)
+    for i, value in enumerate(wqi):
+        if value >= 63:
+            expected = ('Good to Excellent', 'A', 'A-I', 'Non Polluted')
+        elif value >= 50:
+            expected = ('Medium to Good', 'B', 'Not Prescribed', 'Non Polluted')
+        elif value >= 38:
+            expected = ('Bad', 'C', 'A-II', 'Polluted')
+        else:
+            expected = ('Bad to Very Bad', 'D' if value >= 25 else 'E', 'A-III' if value >= 25 else 'A-IV',
+                        'Heavily Polluted')
+        assert (got['classification'][i], got['cpcb_class'][i], got['mpcb_class'][i], got['status'][i]) == expected
+
+
+# ==================== SIMPLIFIED INDICES ====================
+
+def test_banded_matches_reference_on_every_band_combination():
+    # One value inside every band of every parameter, including band edges
+    # and the missing DO/BOD of groundwater stations
+    choices = {
+        'ph': [6.5, 8.5, 6.0, 9.0, 5.9, 9.1],
+        'dissolvedOxygen': [None, 0, 6.0, 4.0, 3.9],
+        'bod': [None, 0, 3.0, 6.0, 6.1],
+        'turbidity': [5, 10, 10.1],
+        'tds': [500, 1000, 1000.5],
+        'nitrates': [10, 45, 45.01],
+        'fecalColiform': [10, 100, 101],
+        'totalColiform': [50, 500, 501],
+        'fluoride': [0.6, 1.5, 0.59, 2.0, 2.01],
+        'iron': [0.3, 1.0, 1.01],
+    }
+    records = [dict(zip(choices, values)) for values in itertools.product(*choices.values())]
+    got = wqi_kernel.score_records(records, 'banded')
+    expected = np.array([ref_banded_wqi(r) for r in records])
+    assert np.array_equal(got, expected)
+
+
+def test_screening_matches_reference(rng):
+    records = [{'ph': float(rng.uniform(6, 9.5)), 'bod': float(rng.uniform(0, 6)),
+                'dissolved_oxygen': float(rng.uniform(3, 9)), 'fecal_coliform': float(rng.uniform(0, 1000))}
+               for _ in range(2000)]
+    records += [{'ph': 7.0, 'bod': 3, 'dissolved_oxygen': 6, 'fecal_coliform': 500}, {}]
+    for record in records[:-1:3]:
+        del record['bod']
+    got = wqi_kernel.score_records(records, 'screening')
+    expected = np.array([ref_screening_wqi(r) for r in records])
+    assert np.array_equal(got, expected)
+
+
+def test_ratio_matches_reference(rng):
+    records = [{'dissolvedOxygen': v[0], 'ph': v[1], 'turbidity': v[2], 'fecalColiform': int(v[3])}
+               for v in zip(_rounded(rng.uniform(1, 12, 5000), 2), _rounded(rng.uniform(5, 9.5, 5000), 2),
+                            _rounded(rng.uniform(0, 80, 5000), 2), rng.lognormal(4, 2, 5000))]
+    got = wqi_kernel.score_records(records, 'ratio')
+    expected = np.array([ref_ratio_wqi(r) for r in records])
+    assert np.array_equal(got, expected)
+
+
+def test_linear_matches_reference(rng):
+    n = 5000
+    records = [dict(zip(['pH', 'turbidity', 'dissolvedOxygen', 'tds', 'bod', 'chlorides', 'nitrates'], v))
+               for v in zip(_rounded(rng.uniform(6, 9, n), 2), _rounded(rng.uniform(0.1, 50, n), 2),
+                            _rounded(rng.uniform(2, 12, n), 2), _rounded(rng.uniform(50, 1500, n), 1),
+                            _rounded(rng.uniform(0.5, 20, n), 2), _rounded(rng.uniform(10, 600, n), 1),
+                            _rounded(rng.uniform(0.1, 50, n), 2))]
+    got = wqi_kernel.score_records(records, 'linear')
+    expected = np.array([ref_linear_wqi(r) for r in records])
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+
+
+def test_score_reading_is_scalar():
+    reading = {'ph': 7.6, 'bod': 2.2, 'dissolved_oxygen': 5.5, 'fecal_coliform': 6}
+    value = wqi_kernel.score_reading(reading)
+    assert isinstance(value, float)
+    assert value == pytest.approx(ref_cpcb_wqi(7.6, 2.2, 5.5, 6), abs=1e-9)
+
+
+def test_unknown_scheme_raises():
+    with pytest.raises(ValueError):
+        wqi_kernel.score_records([{}], 'nsf')
+
+
+# ==================== BANDS ====================
+
+@pytest.mark.parametrize('bands', [
+    wqi_kernel.USE_CLASS_BANDS,
+    wqi_kernel.BANDED_STATUS_BANDS,
+    wqi_kernel.RATIO_STATUS_BANDS,
+    wqi_kernel.LINEAR_STATUS_BANDS,
+])
+def test_classify_matches_reference(bands):
+    bounds, labels = bands
+    wqi = sorted({b + d for b in bounds for d in (-0.01, 0, 0.01)} | {0.0, 100.0})
+    got = wqi_kernel.classify(wqi, bands)
+    assert list(got) == [ref_band(w, bounds, labels) for w in wqi]
@@ -0,0 +1,482 @@
+"""
+Training Pipeline - Phase 5
+Parallel, incremental training for WaterQualityMLModels
+
+- Feature cache: the base features (day_of_year, month, season_encoded) and
+  every model input column are prepared once per dataset and stored as
+  .npy files keyed by the data hash; workers memory-map them instead of
+  receiving a pickled DataFrame
+- Each parameter model (MODEL_SPECS) is fitted in its own worker process
+- A manifest next to the models records the input hash of every model,
+  so a rerun refits only the models whose inputs actually changed
+- Large datasets are fitted on a fixed-size random sample of the training
+  split (max_train_rows), so fit time stops growing with the data; the
+  test R² is still measured on the full held-out split
+- Random forests build their trees on the CPUs not used by other workers
+- Wall time and peak RSS (orchestrator and workers) are reported
+"""
+
+import hashlib
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import dump
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from ml_models import WaterQualityMLModels
+
+BASE_FEATURES = ['day_of_year', 'month', 'season_encoded']
+MANIFEST_FILE = 'training_manifest.json'
+DEFAULT_CACHE_DIR = os.path.join('data', 'feature_cache')
+# Rows a model is fitted on at most (None = the whole training split)
+DEFAULT_MAX_TRAIN_ROWS = 200_000
+
+ESTIMATORS = {
+    'gradient_boosting': GradientBoostingRegressor,
+    'random_forest': RandomForestRegressor,
+}
+
+
+def _peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _array_hash(values: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(values).view(np.uint8)).hexdigest()
+
+
+def dataset_hash(df: pd.DataFrame) -> str:
+    """Content hash of a training DataFrame (values and column names)"""
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _write_atomic(obj, path: str):
+    """Dump then rename, so a hot-reloading registry never sees half a file"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# FEATURE CACHE
+# ============================================================================
+
+class FeatureCache:
+    """Prepared training columns stored as .npy files, one directory per dataset"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 3):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def prepare(self, df: pd.DataFrame) -> Dict:
+        """
+        Build (or reuse) the cached columns for a dataset
+
+        Returns:
+            Cache metadata: path, data hash, rows, hash of every column
+        """
+        key = dataset_hash(df)
+        path = os.path.join(self.cache_dir, key[:16])
+        meta_path = os.path.join(path, 'meta.json')
+
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(path)  # Most recently used
+            meta['cache_hit'] = True
+            return meta
+
+        columns = self._prepare_columns(df)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+
+        meta = {
+            'path': path,
+            'data_hash': key,
+            'rows': len(df),
+            'base_features': [f for f in BASE_FEATURES if f in columns],
+            'columns': {name: _array_hash(values) for name, values in columns.items()},
+            'created_at': datetime.now().isoformat(),
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self._evict()
+        meta['cache_hit'] = False
+        return meta
+
+    @staticmethod
+    def _prepare_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Base features plus every numeric column a model reads"""
+        columns = {}
+        if 'timestamp' in df.columns:
+            timestamps = pd.to_datetime(df['timestamp'])
+            columns['day_of_year'] = timestamps.dt.dayofyear.to_numpy(dtype=np.float64)
+            columns['month'] = timestamps.dt.month.to_numpy(dtype=np.float64)
+        if 'season' in df.columns:
+            columns['season_encoded'] = (df['season'].map(WaterQualityMLModels.SEASON_MAP)
+                                         .fillna(0).to_numpy(dtype=np.float64))
+
+        needed = set()
+        for param, spec in WaterQualityMLModels.MODEL_SPECS.items():
+            needed.update(spec['features'])
+            needed.add(param)
+        for name in sorted(needed):
+            if name in df.columns:
+                columns[name] = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+        return columns
+
+    def _evict(self):
+        """Keep only the most recently used datasets"""
+        entries = [os.path.join(self.cache_dir, d) for d in os.listdir(self.cache_dir)
+                   if os.path.exists(os.path.join(self.cache_dir, d, 'meta.json'))]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def fit_parameter_model(param: str, spec: Dict, cache_path: str, features: List[str],
+                        model_dir: str, max_train_rows: Optional[int] = None,
+                        n_jobs: int = 1) -> Dict:
+    """
+    Fit one parameter model from the memory-mapped feature cache
+
+    Runs in a worker process. The model and its scaler are written to
+    model_dir directly so only the metrics travel back to the orchestrator.
+
+    Args:
+        max_train_rows: Fit on a random sample of at most this many rows
+        n_jobs: Threads for estimators that build trees in parallel
+    """
+    start = time.perf_counter()
+
+    def column(name):
+        return np.load(os.path.join(cache_path, f'{name}.npy'), mmap_mode='r')
+
+    X = np.column_stack([column(name) for name in features])
+    # Missing inputs take the column mean, as in the original training code
+    missing = np.isnan(X)
+    if missing.any():
+        X[missing] = np.take(np.nanmean(X, axis=0), np.nonzero(missing)[1])
+
+    y = np.array(column(param))
+    if spec.get('log_target'):
+        y = np.log1p(y)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if max_train_rows and len(X_train) > max_train_rows:
+        sample = np.sort(np.random.default_rng(42).choice(len(X_train), max_train_rows, replace=False))
+        X_train, y_train = X_train[sample], y_train[sample]
+
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    params = dict(spec['params'])
+    if spec['estimator'] == 'random_forest':
+        params.setdefault('n_jobs', n_jobs)
+    model = ESTIMATORS[spec['estimator']](**params)
+    model.fit(X_train_scaled, y_train)
+
+    train_r2 = model.score(X_train_scaled, y_train)
+    test_r2 = model.score(X_test_scaled, y_test)
+
+    model_file = spec['model_attr'] + '.pkl'
+    scaler_file = spec['scaler_attr'] + '.pkl'
+    _write_atomic(model, os.path.join(model_dir, model_file))
+    _write_atomic(scaler, os.path.join(model_dir, scaler_file))
+
+    return {
+        'param': param,
+        'label': spec['label'],
+        'features': features,
+        'train_r2': round(float(train_r2), 4),
+        'test_r2': round(float(test_r2), 4),
+        'train_rows': len(X_train),
+        'seconds': round(time.perf_counter() - start, 2),
+        'worker_pid': os.getpid(),
+        'worker_peak_rss_mb': round(_peak_rss_mb(), 1),
+        'files': [model_file, scaler_file],
+    }
+
+
+# ============================================================================
+# ORCHESTRATOR
+# ============================================================================
+
+class TrainingPipeline:
+    """
+    Fits the Phase 5 parameter models in parallel, retraining only what changed
+
+    Usage:
+        pipeline = TrainingPipeline('models')
+        report = pipeline.run(df)
+    """
+
+    def __init__(self, model_dir: str = 'models', cache_dir: str = DEFAULT_CACHE_DIR,
+                 n_workers: Optional[int] = None, specs: Optional[Dict] = None,
+                 max_train_rows: Optional[int] = DEFAULT_MAX_TRAIN_ROWS):
+        self.model_dir = model_dir
+        self.cache = FeatureCache(cache_dir)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_train_rows = max_train_rows
+        self.specs = specs or WaterQualityMLModels.MODEL_SPECS
+        self.manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+        os.makedirs(model_dir, exist_ok=True)
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _model_inputs(self, param: str, spec: Dict, meta: Dict) -> Optional[List[str]]:
+        """Input columns of a model, or None if the data cannot support it"""
+        features = [f for f in meta['base_features'] + spec['features'] if f in meta['columns']]
+        if len(features) < spec.get('min_features', 1) or param not in meta['columns']:
+            return None
+        return features
+
+    def input_hash(self, param: str, spec: Dict, features: List[str], meta: Dict) -> str:
+        """Hash of everything a model depends on: recipe, inputs and target"""
+        recipe = {k: v for k, v in spec.items() if k != 'label'}
+        # The sample size only matters once the training split exceeds it
+        train_rows = meta['rows'] - int(np.ceil(meta['rows'] * 0.2))  # train_test_split(test_size=0.2)
+        if self.max_train_rows and train_rows > self.max_train_rows:
+            recipe['max_train_rows'] = self.max_train_rows
+        payload = {
+            'recipe': recipe,
+            'features': features,
+            'columns': [meta['columns'][name] for name in features + [param]],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def plan(self, meta: Dict, incremental: bool = True) -> Dict:
+        """Split the models into train / unchanged / insufficient data"""
+        manifest = self._load_manifest()
+        plan = {'train': {}, 'skipped': [], 'insufficient': []}
+
+        for param, spec in self.specs.items():
+            features = self._model_inputs(param, spec, meta)
+            if features is None:
+                plan['insufficient'].append(param)
+                continue
+
+            input_hash = self.input_hash(param, spec, features, meta)
+            files_present = all(
+                os.path.exists(os.path.join(self.model_dir, spec[attr] + '.pkl'))
+                for attr in ('model_attr', 'scaler_attr')
+            )
+            previous = manifest.get(param, {})
+            if incremental and files_present and previous.get('input_hash') == input_hash:
+                plan['skipped'].append(param)
+            else:
+                plan['train'][param] = {'features': features, 'input_hash': input_hash}
+        return plan
+
+    def run(self, df: pd.DataFrame, incremental: bool = True) -> Dict:
+        """
+        Prepare features, fit changed models in parallel and update the manifest
+
+        Returns:
+            Report with per-model metrics, timings and peak memory
+        """
+        run_start = time.perf_counter()
+
+        meta = self.cache.prepare(df)
+        prepare_seconds = time.perf_counter() - run_start
+        print(f"   Feature cache: {'hit' if meta['cache_hit'] else 'built'} "
+              f"({meta['data_hash'][:12]}, {prepare_seconds:.2f}s)")
+
+        plan = self.plan(meta, incremental)
+        for param in plan['insufficient']:
+            print(f"     ⚠️ Insufficient data for {self.specs[param]['label']} model")
+        for param in plan['skipped']:
+            print(f"     ⏭️ {self.specs[param]['label']} model unchanged, skipping")
+
+        results = self._fit_all(plan['train'], meta['path'])
+
+        manifest = self._load_manifest()
+        for param, result in results.items():
+            manifest[param] = {
+                'input_hash': plan['train'][param]['input_hash'],
+                'data_hash': meta['data_hash'],
+                'rows': meta['rows'],
+                'train_r2': result['train_r2'],
+                'test_r2': result['test_r2'],
+                'trained_at': datetime.now().isoformat(),
+            }
+        self._save_manifest(manifest)
+
+        if results:
+            self._compile(results)
+
+        report = {
+            'data_hash': meta['data_hash'],
+            'rows': meta['rows'],
+            'feature_cache_hit': meta['cache_hit'],
+            'prepare_seconds': round(prepare_seconds, 2),
+            'trained': results,
+            'skipped': plan['skipped'],
+            'insufficient': plan['insufficient'],
+            'workers': min(self.n_workers, max(len(plan['train']), 1)),
+            'wall_seconds': round(time.perf_counter() - run_start, 2),
+            'peak_rss_mb': {
+                'orchestrator': round(_peak_rss_mb(), 1),
+                'workers': round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+            },
+        }
+        return report
+
+    def _fit_all(self, jobs: Dict, cache_path: str) -> Dict:
+        """Fit every planned model, in worker processes when more than one is allowed"""
+        results = {}
+        if not jobs:
+            return results
+
+        def report(result):
+            results[result['param']] = result
+            print(f"  📊 {result['label']} Model: Train R²: {result['train_r2']:.4f}, "
+                  f"Test R²: {result['test_r2']:.4f} ({result['seconds']:.1f}s)")
+
+        cpus = os.cpu_count() or 1
+        if self.n_workers == 1 or len(jobs) == 1:
+            for param, job in jobs.items():
+                report(fit_parameter_model(param, self.specs[param], cache_path, job['features'],
+                                           self.model_dir, self.max_train_rows, cpus))
+            return results
+
+        # Slowest models first so the pool drains evenly
+        order = sorted(jobs, key=lambda p: -self.specs[p]['params'].get('n_estimators', 0)
+                       * self.specs[p]['params'].get('max_depth', 1))
+        workers = min(self.n_workers, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(fit_parameter_model, param, self.specs[param], cache_path,
+                            jobs[param]['features'], self.model_dir, self.max_train_rows,
+                            max(1, cpus // workers))
+                for param in order
+            ]
+            for future in as_completed(futures):
+                report(future.result())
+        return results
+
+    def _compile(self, results: Dict):
+        """Refresh the compiled tree ensembles of the retrained models"""
+        try:
+            from tree_compiler import compile_model_file
+            for result in results.values():
+                compile_model_file(os.path.join(self.model_dir, result['files'][0]))
+            print(f"⚡ Compiled {len(results)} tree ensembles for fast inference")
+        except Exception as e:
+            print(f"⚠️ Tree ensemble compilation skipped: {e}")
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def synthetic_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Per-minute synthetic readings with the columns the models train on"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2020-01-01', periods=rows, freq='min'),
+        'season': rng.choice(list(WaterQualityMLModels.SEASON_MAP), rows),
+        'ph': rng.normal(7.5, 0.5, rows),
+        'bod': rng.gamma(2.0, 1.5, rows),
+        'dissolved_oxygen': rng.normal(6.0, 1.5, rows),
+        'fecal_coliform': rng.lognormal(6.0, 1.0, rows),
+        'temperature': rng.normal(26.0, 3.0, rows),
+        'turbidity': rng.gamma(2.0, 3.0, rows),
+        'tds': rng.normal(350.0, 80.0, rows),
+    })
+    df['wqi'] = np.clip(100 - df['bod'] * 5 - np.abs(df['ph'] - 7) * 10
+                        + df['dissolved_oxygen'] * 2 - np.log1p(df['fecal_coliform']), 0, 100)
+    return df
+
+
+def run_benchmark(rows: int = 1_000_000, model_dir: Optional[str] = None,
+                  n_workers: Optional[int] = None,
+                  max_train_rows: Optional[int] = DEFAULT_MAX_TRAIN_ROWS):
+    """Cold run, no-op rerun and a single-column change on a synthetic dataset"""
+    import tempfile
+
+    work_dir = model_dir or tempfile.mkdtemp(prefix='training_benchmark_')
+    pipeline = TrainingPipeline(os.path.join(work_dir, 'models'),
+                                cache_dir=os.path.join(work_dir, 'feature_cache'),
+                                n_workers=n_workers, max_train_rows=max_train_rows)
+
+    print(f"Generating {rows:,} synthetic rows...")
+    df = synthetic_dataset(rows)
+
+    runs = [('cold', df)]
+    runs.append(('unchanged', df))
+    changed = df.copy()
+    changed['tds'] = changed['tds'] * 1.01
+    runs.append(('tds changed', changed))
+
+    print(f"Workers: {pipeline.n_workers} | CPUs: {os.cpu_count()} | "
+          f"Max train rows: {pipeline.max_train_rows or 'all'}\n")
+    for label, data in runs:
+        print(f"--- {label} ---")
+        report = pipeline.run(data)
+        print(f"   Trained: {sorted(report['trained']) or '-'} | Skipped: {len(report['skipped'])}")
+        print(f"   Wall: {report['wall_seconds']:.1f}s (features {report['prepare_seconds']:.1f}s) | "
+              f"Peak RSS: orchestrator {report['peak_rss_mb']['orchestrator']:.0f} MB, "
+              f"largest worker {report['peak_rss_mb']['workers']:.0f} MB\n")
+
+    if model_dir is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Phase 5 training pipeline')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Train on a synthetic dataset (cold, unchanged, one column changed)')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-train-rows', type=int, default=DEFAULT_MAX_TRAIN_ROWS,
+                        help='Fit each model on at most this many rows (0 = all)')
+    parser.add_argument('--csv', default='water_quality_all_seasons.csv')
+    args = parser.parse_args()
+
+    print("=== Training Pipeline - Phase 5 ===\n")
+    if args.benchmark:
+        run_benchmark(args.rows, n_workers=args.workers, max_train_rows=args.max_train_rows or None)
+    else:
+        data = pd.read_csv(args.csv)
+        result = TrainingPipeline('models', n_workers=args.workers,
+                                  max_train_rows=args.max_train_rows or None).run(data)
+        print(json.dumps({k: v for k, v in result.items() if k != 'trained'}, indent=2))
@@ -0,0 +1,540 @@
+"""
+Tree Ensemble Compiler - Phase 5
+Flattens trained GradientBoostingRegressor / RandomForestRegressor models
+into compact NumPy node arrays for fast, low-memory inference
+
+- All trees of an ensemble live in one set of node arrays; evaluation walks
+  every (row, tree) pair one level per step with vectorized gathers
+- Child links carry the child's split feature in their low bits, so each
+  level costs three gathers (input, threshold, child) into reused buffers
+- Threshold modes:
+    float64    - sklearn's thresholds as stored
+    float32    - each threshold rounded down to the nearest float32; exact
+                 because sklearn compares float32 inputs
+    quantized  - uint16 threshold ranks per feature; inputs are bucketed
+                 once with searchsorted, nodes compare small integers
+- Predictions match sklearn bit for bit (same float32 input cast, same
+  sequential accumulation order)
+- Compiled models are saved as plain .npy files so they can be
+  memory-mapped and shared between worker processes
+- RoutedEnsemble serves small batches from the compiled arrays and large
+  batches from sklearn, whose Cython traversal has the higher throughput
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+THRESHOLD_MODES = ('float64', 'float32', 'quantized')
+COMPILED_SUFFIX = '.compiled'
+COMPILED_FORMAT_VERSION = 1
+
+# Rows evaluated per block: keeps the (rows x trees) index arrays in cache
+DEFAULT_BLOCK_ROWS = 1024
+
+# Largest batch RoutedEnsemble evaluates with the compiled arrays. Above it
+# sklearn is faster (crossover measured with run_benchmark, single core)
+COMPILED_MAX_BATCH_ROWS = {'gradient_boosting': 128, 'random_forest': 1024}
+
+
+def _feature_bits(n_features: int) -> int:
+    """Low bits of a child code that hold the child's split feature"""
+    return max(1, int(np.ceil(np.log2(max(n_features, 2)))))
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each float64 value"""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledEnsemble:
+    """
+    Flattened tree ensemble with a sklearn-compatible predict()
+
+    Node arrays (one entry per node across all trees):
+        feature       split feature (leaves: 0)
+        threshold     split threshold (leaves: +inf / max rank)
+        child_codes   (n_nodes, 2) left/right child encoded as
+                      (child << feature_bits) | feature[child];
+                      leaves point to themselves
+        value         node output (only leaf values are ever read)
+        missing_left  NaN inputs go left at this node
+    """
+
+    ARRAY_NAMES = ('feature', 'threshold', 'child_codes', 'value', 'missing_left', 'roots')
+    QUANTIZED_ARRAY_NAMES = ('cut_points', 'cut_offsets')
+
+    def __init__(self, kind: str, n_features: int, arrays: Dict[str, np.ndarray],
+                 max_depth: int, threshold_mode: str = 'float64',
+                 learning_rate: float = 1.0, init_value: float = 0.0,
+                 source_hash: Optional[str] = None):
+        self.kind = kind
+        self.n_features = n_features
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+        self.threshold_mode = threshold_mode
+        self.learning_rate = learning_rate
+        self.init_value = init_value
+        self.source_hash = source_hash
+
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.child_codes = arrays['child_codes']
+        self.value = arrays['value']
+        self.missing_left = arrays['missing_left']
+        self.roots = arrays['roots']
+        self.cut_points = arrays.get('cut_points')
+        self.cut_offsets = arrays.get('cut_offsets')
+
+        self.feature_bits = _feature_bits(n_features)
+        self._feature_mask = (1 << self.feature_bits) - 1
+        self._child_codes_flat = self.child_codes.reshape(-1)
+        self._root_codes = ((self.roots.astype(np.int64) << self.feature_bits)
+                            | self.feature[self.roots])
+        self._has_missing_left = bool(np.any(self.missing_left))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays().values())
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        if self.threshold_mode == 'quantized':
+            arrays.update({name: getattr(self, name) for name in self.QUANTIZED_ARRAY_NAMES})
+        return arrays
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    def _encode(self, X32: np.ndarray) -> np.ndarray:
+        """Convert float32 inputs to the dtype the thresholds are stored in"""
+        if self.threshold_mode == 'float64':
+            return X32.astype(np.float64)
+        if self.threshold_mode == 'float32':
+            return X32
+
+        # Rank of x among the feature's cut points: x <= cut[k] <=> rank <= k
+        ranks = np.empty(X32.shape, dtype=self.threshold.dtype)
+        for f in range(self.n_features):
+            cuts = self.cut_points[self.cut_offsets[f]:self.cut_offsets[f + 1]]
+            ranks[:, f] = np.searchsorted(cuts, X32[:, f], side='left')
+        return ranks
+
+    def _leaf_values(self, X32: np.ndarray) -> np.ndarray:
+        """Leaf value of every tree for every row: (rows, trees)"""
+        n_rows = X32.shape[0]
+        x_flat = self._encode(X32).reshape(-1)
+        row_base = (np.arange(n_rows, dtype=np.int64) * self.n_features)[:, None]
+
+        nan_flat = None
+        if self._has_missing_left:
+            nan_mask = np.isnan(X32)
+            if nan_mask.any():
+                nan_flat = nan_mask.reshape(-1)
+
+        shape = (n_rows, self.n_trees)
+        code = np.broadcast_to(self._root_codes.astype(self.child_codes.dtype), shape).copy()
+        node = np.empty(shape, dtype=np.int64)
+        position = np.empty(shape, dtype=np.int64)
+        x = np.empty(shape, dtype=x_flat.dtype)
+        threshold = np.empty(shape, dtype=self.threshold.dtype)
+        go_right = np.empty(shape, dtype=bool)
+
+        for _ in range(self.max_depth):
+            np.right_shift(code, self.feature_bits, out=node)
+            np.bitwise_and(code, self._feature_mask, out=position)
+            position += row_base
+            np.take(x_flat, position, out=x, mode='clip')
+            np.take(self.threshold, node, out=threshold, mode='clip')
+            # sklearn goes left on x <= t; NaN fails that test and goes right
+            # unless the split learned to send missing values left
+            np.greater(x, threshold, out=go_right)
+            if nan_flat is not None:
+                go_right |= np.take(nan_flat, position)
+                go_right &= ~(np.take(nan_flat, position) & np.take(self.missing_left, node))
+            # Child slot: 2 * node + (0 left / 1 right)
+            node <<= 1
+            node += go_right
+            np.take(self._child_codes_flat, node, out=code, mode='clip')
+
+        np.right_shift(code, self.feature_bits, out=node)
+        return np.take(self.value, node)
+
+    def predict(self, X, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """
+        Predict like the source sklearn model
+
+        Args:
+            X: array-like (rows x n_features)
+            block_rows: rows evaluated per block
+
+        Returns:
+            float64 predictions, identical to sklearn's
+        """
+        X32 = np.ascontiguousarray(np.asarray(X), dtype=np.float32)
+        if X32.ndim != 2 or X32.shape[1] != self.n_features:
+            raise ValueError(f"X has shape {X32.shape}, expected (n, {self.n_features})")
+
+        out = np.empty(X32.shape[0], dtype=np.float64)
+        for start in range(0, X32.shape[0], block_rows):
+            stop = min(start + block_rows, X32.shape[0])
+            leaves = self._leaf_values(X32[start:stop])
+
+            if self.kind == 'gradient_boosting':
+                # Same order as sklearn: init, then += lr * value tree by tree
+                terms = np.empty((stop - start, self.n_trees + 1))
+                terms[:, 0] = self.init_value
+                np.multiply(self.learning_rate, leaves, out=terms[:, 1:])
+                out[start:stop] = np.cumsum(terms, axis=1)[:, -1]
+            else:
+                # RandomForest: trees summed in order, then averaged
+                out[start:stop] = np.cumsum(leaves, axis=1)[:, -1] / self.n_trees
+        return out
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """Write the node arrays and metadata to a directory"""
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays().items():
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+        meta = {
+            'format_version': COMPILED_FORMAT_VERSION,
+            'kind': self.kind,
+            'n_features': self.n_features,
+            'max_depth': self.max_depth,
+            'feature_bits': self.feature_bits,
+            'threshold_mode': self.threshold_mode,
+            'learning_rate': self.learning_rate,
+            'init_value': self.init_value,
+            'source_hash': self.source_hash,
+            'n_trees': self.n_trees,
+            'n_nodes': self.n_nodes,
+        }
+        # Metadata last: a directory with meta.json is complete
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'CompiledEnsemble':
+        """Load a compiled ensemble; arrays are memory-mapped by default"""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format in {path}")
+
+        names = list(cls.ARRAY_NAMES)
+        if meta['threshold_mode'] == 'quantized':
+            names += cls.QUANTIZED_ARRAY_NAMES
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+                  for name in names}
+        return cls(meta['kind'], meta['n_features'], arrays, meta['max_depth'],
+                   threshold_mode=meta['threshold_mode'],
+                   learning_rate=meta['learning_rate'],
+                   init_value=meta['init_value'],
+                   source_hash=meta.get('source_hash'))
+
+    @staticmethod
+    def read_meta(path: str) -> Optional[Dict]:
+        """Metadata of a compiled directory, or None if it is missing"""
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+class RoutedEnsemble:
+    """
+    Compiled ensemble for small batches, the source sklearn model for large ones
+
+    The compiled arrays have almost no per-call overhead (single-station
+    forecasts); sklearn walks large batches faster (network forecasts). The
+    sklearn model is only loaded when the first large batch arrives.
+    """
+
+    def __init__(self, compiled: CompiledEnsemble, load_source: Callable[[], object],
+                 max_batch_rows: Optional[int] = None):
+        """
+        Args:
+            compiled: Compiled ensemble
+            load_source: Returns the sklearn model the ensemble was compiled from
+            max_batch_rows: Largest batch for the compiled path
+                (default: COMPILED_MAX_BATCH_ROWS for the ensemble kind)
+        """
+        self.compiled = compiled
+        self.max_batch_rows = (COMPILED_MAX_BATCH_ROWS.get(compiled.kind, 0)
+                               if max_batch_rows is None else max_batch_rows)
+        self.n_features_in_ = compiled.n_features_in_
+        self._load_source = load_source
+        self._source = None
+        self._lock = threading.Lock()
+
+    @property
+    def source(self):
+        if self._source is None:
+            with self._lock:
+                if self._source is None:
+                    self._source = self._load_source()
+        return self._source
+
+    def predict(self, X) -> np.ndarray:
+        """Predict like the source sklearn model (identical results on both paths)"""
+        X = np.asarray(X)
+        if X.ndim == 2 and X.shape[0] > self.max_batch_rows:
+            return self.source.predict(X)
+        return self.compiled.predict(X)
+
+
+# ============================================================================
+# COMPILATION
+# ============================================================================
+
+def compile_ensemble(model, threshold_mode: str = 'float32',
+                     source_hash: Optional[str] = None) -> CompiledEnsemble:
+    """
+    Flatten a fitted GradientBoostingRegressor or RandomForestRegressor
+
+    Args:
+        model: Fitted single-output regressor ensemble
+        threshold_mode: 'float64', 'float32' or 'quantized'
+        source_hash: Content hash of the pickle this was compiled from
+
+    Returns:
+        CompiledEnsemble with identical predictions
+    """
+    if threshold_mode not in THRESHOLD_MODES:
+        raise ValueError(f"threshold_mode must be one of {THRESHOLD_MODES}")
+
+    if isinstance(model, GradientBoostingRegressor):
+        kind = 'gradient_boosting'
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        learning_rate = float(model.learning_rate)
+        if model.init_ == 'zero':
+            init_value = 0.0
+        elif isinstance(model.init_, DummyRegressor):
+            init_value = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError("Only the default (mean) or 'zero' init estimator is supported")
+    elif isinstance(model, RandomForestRegressor):
+        kind = 'random_forest'
+        trees = [est.tree_ for est in model.estimators_]
+        learning_rate = 1.0
+        init_value = 0.0
+    else:
+        raise TypeError(f"Cannot compile {type(model).__name__}")
+
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output ensembles are supported")
+
+    n_features = int(model.n_features_in_)
+    sizes = [tree.node_count for tree in trees]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    n_nodes = int(offsets[-1])
+
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    threshold64 = np.full(n_nodes, np.inf)
+    children = np.empty((n_nodes, 2), dtype=np.int32)
+    value = np.empty(n_nodes, dtype=np.float64)
+    missing_left = np.zeros(n_nodes, dtype=bool)
+
+    for tree, start in zip(trees, offsets[:-1]):
+        stop = start + tree.node_count
+        nodes = np.arange(start, stop, dtype=np.int32)
+        is_split = tree.children_left != -1
+
+        feature[start:stop] = np.where(is_split, tree.feature, 0)
+        threshold64[start:stop] = np.where(is_split, tree.threshold, np.inf)
+        children[start:stop, 0] = np.where(is_split, tree.children_left + start, nodes)
+        children[start:stop, 1] = np.where(is_split, tree.children_right + start, nodes)
+        value[start:stop] = tree.value[:, 0, 0]
+        if hasattr(tree, 'missing_go_to_left'):
+            missing_left[start:stop] = is_split & (tree.missing_go_to_left != 0)
+
+    feature = feature.astype(np.uint8 if n_features <= 256 else np.int32)
+    child_codes = (children.astype(np.int64) << _feature_bits(n_features)) | feature[children]
+    if child_codes.max() <= np.iinfo(np.int32).max:
+        child_codes = child_codes.astype(np.int32)  # halves the hottest gather table
+
+    arrays = {
+        'feature': feature,
+        'child_codes': child_codes,
+        'value': value,
+        'missing_left': missing_left,
+        'roots': offsets[:-1].astype(np.int32),
+    }
+
+    if threshold_mode == 'float64':
+        arrays['threshold'] = threshold64
+    else:
+        threshold32 = _floor_float32(threshold64)
+        if threshold_mode == 'float32':
+            arrays['threshold'] = threshold32
+        else:
+            cut_points, cut_offsets, ranks = _quantize_thresholds(feature, threshold32, n_features)
+            arrays['threshold'] = ranks
+            arrays['cut_points'] = cut_points
+            arrays['cut_offsets'] = cut_offsets
+
+    max_depth = max(int(tree.max_depth) for tree in trees)
+    return CompiledEnsemble(kind, n_features, arrays, max_depth,
+                            threshold_mode=threshold_mode,
+                            learning_rate=learning_rate,
+                            init_value=init_value,
+                            source_hash=source_hash)
+
+
+def _quantize_thresholds(feature: np.ndarray, threshold32: np.ndarray, n_features: int):
+    """Per-feature sorted cut points and each node's rank among them"""
+    split = np.isfinite(threshold32)
+    cuts_per_feature = [np.unique(threshold32[split & (feature == f)]) for f in range(n_features)]
+    max_cuts = max((len(c) for c in cuts_per_feature), default=0)
+    rank_dtype = np.uint16 if max_cuts < np.iinfo(np.uint16).max else np.uint32
+
+    # Leaves get the largest rank so every encoded input compares <= (self loop)
+    ranks = np.full(len(threshold32), np.iinfo(rank_dtype).max, dtype=rank_dtype)
+    for f, cuts in enumerate(cuts_per_feature):
+        nodes = split & (feature == f)
+        ranks[nodes] = np.searchsorted(cuts, threshold32[nodes])
+
+    cut_offsets = np.concatenate([[0], np.cumsum([len(c) for c in cuts_per_feature])]).astype(np.int64)
+    cut_points = (np.concatenate(cuts_per_feature) if max_cuts else np.empty(0)).astype(np.float32)
+    return cut_points, cut_offsets, ranks
+
+
+def compiled_path_for(pickle_path: str) -> str:
+    """models/bod_model.pkl -> models/bod_model.compiled"""
+    return os.path.splitext(pickle_path)[0] + COMPILED_SUFFIX
+
+
+def compile_model_file(pickle_path: str, threshold_mode: str = 'float32') -> Optional[str]:
+    """
+    Compile one pickled ensemble next to its .pkl file
+
+    Returns the compiled directory, or None if the pickle is not a tree ensemble.
+    """
+    from joblib import load
+    from model_registry import file_content_hash
+
+    model = load(pickle_path)
+    if not isinstance(model, (GradientBoostingRegressor, RandomForestRegressor)):
+        return None
+
+    compiled = compile_ensemble(model, threshold_mode, source_hash=file_content_hash(pickle_path))
+    path = compiled_path_for(pickle_path)
+    compiled.save(path)
+    return path
+
+
+def compile_models(model_dir: str = 'models', threshold_mode: str = 'float32') -> Dict[str, str]:
+    """Compile every Phase 5 ensemble in model_dir; returns name -> compiled dir"""
+    from model_registry import MODEL_ARTIFACTS
+
+    compiled = {}
+    for name, (filename, _) in MODEL_ARTIFACTS.items():
+        pickle_path = os.path.join(model_dir, filename)
+        if not os.path.exists(pickle_path):
+            continue
+        path = compile_model_file(pickle_path, threshold_mode)
+        if path:
+            compiled[name] = path
+    return compiled
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(model_dir: str = 'models', batch_rows: int = 10_000):
+    """Single-row and batch latency plus on-disk size, sklearn vs compiled"""
+    import tempfile
+    from joblib import load
+    from model_registry import MODEL_ARTIFACTS
+
+    rng = np.random.default_rng(42)
+    print(f"{'Model':<10} {'Mode':<10} {'Disk':>10} {'1 row':>10} {f'{batch_rows:,} rows':>11} {'Exact':>6}")
+
+    for name, (filename, _) in MODEL_ARTIFACTS.items():
+        pickle_path = os.path.join(model_dir, filename)
+        if not os.path.exists(pickle_path):
+            continue
+        model = load(pickle_path)
+        if not isinstance(model, (GradientBoostingRegressor, RandomForestRegressor)):
+            continue
+
+        # Standardized inputs, as the models see them after the scaler
+        X = rng.normal(size=(batch_rows, model.n_features_in_))
+        expected = model.predict(X)
+
+        single = _best_of(lambda: model.predict(X[:1]), 50)
+        batch = _best_of(lambda: model.predict(X), 3)
+        print(f"{name:<10} {'sklearn':<10} {os.path.getsize(pickle_path):>10,} "
+              f"{single * 1e3:>8.3f}ms {batch * 1e3:>9.1f}ms {'-':>6}")
+
+        for mode in THRESHOLD_MODES:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, name + COMPILED_SUFFIX)
+                compile_ensemble(model, mode).save(path)
+                compiled = CompiledEnsemble.load(path)
+                exact = np.array_equal(compiled.predict(X), expected)
+                single = _best_of(lambda: compiled.predict(X[:1]), 50)
+                batch = _best_of(lambda: compiled.predict(X), 3)
+                print(f"{'':<10} {mode:<10} {_dir_bytes(path):>10,} "
+                      f"{single * 1e3:>8.3f}ms {batch * 1e3:>9.1f}ms {'yes' if exact else 'NO':>6}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile Phase 5 tree ensembles')
+    parser.add_argument('model_dir', nargs='?', default='models')
+    parser.add_argument('--threshold-mode', choices=THRESHOLD_MODES, default='float32')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare latency and size against the .pkl files')
+    args = parser.parse_args()
+
+    print("=== Tree Ensemble Compiler - Phase 5 ===\n")
+    if args.benchmark:
+        run_benchmark(args.model_dir)
+        sys.exit(0)
+
+    compiled = compile_models(args.model_dir, args.threshold_mode)
+    if not compiled:
+        print(f"⚠️ No models found in {args.model_dir}. Please train models first.")
+        sys.exit(1)
+    for name, path in compiled.items():
+        print(f"✅ {name}: {path} ({_dir_bytes(path):,} bytes)")
@@ -5,7 +5,7 @@ Analyzes historical patterns, detects anomalies, and identifies trends
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 from scipy import stats
 from utils import convert_to_serializable
@@ -38,6 +38,8 @@ class TrendAnalysisService:
             # Skip non-numeric columns
             if column.lower() in ['date', 'timestamp', 'location', 'station', 'id']:
                 continue
+            if pd.api.types.is_datetime64_any_dtype(df[column].dtype):
+                continue
             
             try:
                 values = pd.to_numeric(df[column], errors='coerce').dropna()
@@ -79,7 +81,7 @@ class TrendAnalysisService:
             overall_trend = 'stable'
         
         # Generate summary
-        summary = self._generate_trend_summary(
+        summary = self.generate_trend_summary(
             overall_trend,
             improving_count,
             declining_count,
@@ -140,26 +142,7 @@ class TrendAnalysisService:
             change_pct = 0
         
         # Determine trend direction and status
-        # For some parameters, increasing is bad, for others it's good
-        if abs(change_pct) < 5 and abs(slope) < 0.01 * mean_val:
-            direction = 'stable'
-            status = 'stable'
-        elif slope > 0:
-            direction = 'increasing'
-            # For DO (Dissolved Oxygen), increasing is good
-            if 'do' in parameter.lower() or 'oxygen' in parameter.lower():
-                status = 'improving'
-            else:
-                # For most parameters (pH, turbidity, BOD, etc.), increasing is bad
-                status = 'declining'
-        else:
-            direction = 'decreasing'
-            # For DO, decreasing is bad
-            if 'do' in parameter.lower() or 'oxygen' in parameter.lower():
-                status = 'declining'
-            else:
-                # For BOD, turbidity, etc., decreasing is good
-                status = 'improving'
+        direction, status = self.classify_trend(parameter, slope, mean_val, change_pct)
         
         # Detect anomalies using Z-score
         anomalies = self._detect_anomalies(values, parameter)
@@ -188,46 +171,69 @@ class TrendAnalysisService:
             'anomalies': anomalies
         }
     
+    def classify_trend(
+        self,
+        parameter: str,
+        slope: float,
+        mean_val: float,
+        change_pct: float
+    ) -> Tuple[str, str]:
+        """Trend direction and whether it is improving or declining for a parameter"""
+        # For some parameters, increasing is bad, for others it's good
+        if abs(change_pct) < 5 and abs(slope) < 0.01 * mean_val:
+            return 'stable', 'stable'
+        
+        # For DO (Dissolved Oxygen), increasing is good
+        higher_is_better = 'do' in parameter.lower() or 'oxygen' in parameter.lower()
+        if slope > 0:
+            # For most parameters (pH, turbidity, BOD, etc.), increasing is bad
+            return 'increasing', 'improving' if higher_is_better else 'declining'
+        # For BOD, turbidity, etc., decreasing is good
+        return 'decreasing', 'declining' if higher_is_better else 'improving'
+    
+    def anomaly_record(self, index: Any, value: float, z_score: float, mean: float) -> Dict[str, Any]:
+        """Anomaly dictionary for a value beyond the Z-score threshold"""
+        # Determine severity
+        if abs(z_score) > 4:
+            severity = 'critical'
+            severity_score = 100
+        elif abs(z_score) > 3:
+            severity = 'high'
+            severity_score = 75
+        else:
+            severity = 'medium'
+            severity_score = 50
+        
+        return {
+            'index': index,
+            'value': round(value, 2),
+            'zScore': round(z_score, 2),
+            'severity': severity,
+            'severity_score': severity_score,
+            'deviation': round(abs(value - mean), 2),
+            'description': f'Value {value:.2f} is {abs(z_score):.1f} standard deviations from mean'
+        }
+    
     def _detect_anomalies(self, values: List[float], parameter: str) -> List[Dict[str, Any]]:
         """Detect anomalous values using statistical methods"""
-        anomalies = []
-        
         if len(values) < 5:
-            return anomalies
+            return []
         
-        mean = np.mean(values)
-        std = np.std(values)
+        values = np.asarray(values, dtype=float)
+        mean = values.mean()
+        std = values.std()
         
         if std == 0:
-            return anomalies
-        
-        # Calculate Z-scores
-        z_scores = [(v - mean) / std for v in values]
-        
-        for i, (value, z_score) in enumerate(zip(values, z_scores)):
-            if abs(z_score) > self.anomaly_threshold:
-                # Determine severity
-                if abs(z_score) > 4:
-                    severity = 'critical'
-                    severity_score = 100
-                elif abs(z_score) > 3:
-                    severity = 'high'
-                    severity_score = 75
-                else:
-                    severity = 'medium'
-                    severity_score = 50
-                
-                anomalies.append({
-                    'index': i,
-                    'value': round(value, 2),
-                    'zScore': round(z_score, 2),
-                    'severity': severity,
-                    'severity_score': severity_score,
-                    'deviation': round(abs(value - mean), 2),
-                    'description': f'Value {value:.2f} is {abs(z_score):.1f} standard deviations from mean'
-                })
-        
-        return anomalies
+            return []
+        
+        # Calculate Z-scores for all values at once
+        z_scores = (values - mean) / std
+        flagged = np.flatnonzero(np.abs(z_scores) > self.anomaly_threshold)
+        
+        return [
+            self.anomaly_record(int(i), float(values[i]), float(z_scores[i]), float(mean))
+            for i in flagged
+        ]
     
     def _detect_seasonal_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Detect seasonal patterns in water quality"""
@@ -259,7 +265,7 @@ class TrendAnalysisService:
         
         return patterns
     
-    def _generate_trend_summary(
+    def generate_trend_summary(
         self,
         overall_trend: str,
         improving: int,
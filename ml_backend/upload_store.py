@@ -0,0 +1,431 @@
+"""
+Upload Store - Phase 5
+Streaming parser and server-side typed storage for uploaded datasets
+
+Features:
+- CSV files are read in chunks (pandas C parser), so memory holds typed
+  column arrays, never Python row dicts
+- Column type inference across chunks: int -> float -> string widening,
+  bool, and datetime columns (typed or parsed from text, bounds-checked)
+- Excel files go through FileParser.parse_excel
+- Parsed uploads are stored as a compact typed dataset: Parquet when
+  pyarrow is installed, otherwise an uncompressed .npz with dictionary
+  encoded string columns (no pickles)
+- Uploads are content-addressed: re-uploading the same file returns the
+  existing upload id without parsing again
+- Schema and per-column summary are returned instead of the data itself
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from file_parser import FileParser
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+DEFAULT_CHUNK_ROWS = 50_000
+CSV_EXTENSIONS = ('.csv', '.txt')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'datasets')
+
+# Widening order when chunks of one column disagree
+TYPE_RANK = {'bool': 0, 'int': 1, 'float': 2, 'datetime': 3, 'string': 4}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, streamed in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_datetime64(values) -> pd.Series:
+    """
+    Parse values as datetime64[ns]
+
+    Unparseable values and dates outside the nanosecond range become NaT
+    instead of overflowing; time zones are converted to naive UTC.
+    """
+    dates = pd.to_datetime(pd.Series(values), errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+    dates = dates.where((dates >= pd.Timestamp.min) & (dates <= pd.Timestamp.max))
+    return dates.astype('datetime64[ns]')
+
+
+def _infer_chunk(series: pd.Series) -> Tuple[str, np.ndarray]:
+    """
+    Type of one chunk of a column and its values in that type
+
+    Typed chunks (bool, datetime, numeric dtypes, e.g. from Excel) keep their
+    dtype. Text that fully parses as numbers counts as numeric; text with
+    digits that fully parses as in-range dates counts as datetime. Anything
+    else, including booleans with missing values, stays a string column (raw
+    values kept, so a later widening loses nothing).
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return 'bool', series.to_numpy(dtype=bool)
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return 'datetime', _to_datetime64(series).to_numpy()
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return 'int', series.to_numpy(dtype=np.int64)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 'float', series.to_numpy(dtype=float, na_value=np.nan)
+
+    n_present = int(series.notna().sum())
+    raw = series.to_numpy(dtype=object, na_value=None)
+    if not n_present:
+        return 'string', raw
+
+    # A leading sample rejects plain text without converting the whole chunk
+    sample = series.dropna().head(64)
+    inferred = pd.api.types.infer_dtype(sample, skipna=True)
+    if inferred == 'boolean':
+        # True/False with gaps: not a 1.0/0.0 parameter
+        return 'string', np.array([None if v is None else str(v) for v in raw], dtype=object)
+    if inferred in ('datetime64', 'datetime', 'date'):
+        dates = _to_datetime64(series)
+        if int(dates.notna().sum()) == n_present:
+            return 'datetime', dates.to_numpy()
+    elif pd.to_numeric(sample, errors='coerce').notna().all():
+        numeric = pd.to_numeric(series, errors='coerce')
+        if int(numeric.notna().sum()) == n_present:
+            return 'float', numeric.to_numpy(dtype=float, na_value=np.nan)
+    elif sample.astype(str).str.contains(r'\d').all() and _to_datetime64(sample).notna().all():
+        # Bare words ('Jan', 'Mar') parse as year-1 dates, so digits are required
+        if int(_to_datetime64(series).notna().sum()) == n_present:
+            return 'datetime', raw
+    return 'string', raw
+
+
+def _widen(kind: str, values: np.ndarray, target: str) -> np.ndarray:
+    """Convert a chunk's values to the column's final type"""
+    if kind == target:
+        if target == 'datetime' and values.dtype.kind != 'M':
+            return _to_datetime64(values).to_numpy()
+        return values
+    if target == 'float':
+        return values.astype(float)
+    # Mixed columns become text; numeric and date chunks are formatted back
+    if kind in ('int', 'float', 'bool'):
+        return np.array([None if isinstance(v, float) and np.isnan(v) else str(v) for v in values.tolist()],
+                        dtype=object)
+    if values.dtype.kind == 'M':
+        return np.array([None if pd.isna(v) else v.isoformat() for v in pd.Series(values)], dtype=object)
+    return values
+
+
+def _column_summary(name: str, kind: str, values: np.ndarray) -> Dict[str, Any]:
+    """Schema entry and statistics of one stored column"""
+    summary: Dict[str, Any] = {'name': name, 'type': kind, 'count': int(len(values))}
+    if kind in ('int', 'float', 'bool'):
+        numeric = values.astype(float)
+        valid = ~np.isnan(numeric)
+        summary['nulls'] = int((~valid).sum())
+        if valid.any():
+            numeric = numeric[valid]
+            summary.update({
+                'min': float(numeric.min()),
+                'max': float(numeric.max()),
+                'mean': round(float(numeric.mean()), 4),
+                'std': round(float(numeric.std(ddof=1)), 4) if len(numeric) > 1 else 0.0,
+            })
+    elif kind == 'datetime':
+        valid = ~np.isnat(values)
+        summary['nulls'] = int((~valid).sum())
+        if valid.any():
+            summary['min'] = pd.Timestamp(values[valid].min()).isoformat()
+            summary['max'] = pd.Timestamp(values[valid].max()).isoformat()
+    else:
+        counts = pd.Series(values, dtype=object).value_counts(dropna=True)
+        summary['nulls'] = int(len(values) - counts.sum())
+        summary['distinct'] = int(len(counts))
+        summary['top'] = [{'value': str(v), 'count': int(c)} for v, c in counts.head(3).items()]
+    return summary
+
+
+class UploadStore:
+    """Parses uploads once and keeps them as typed datasets under an id"""
+
+    def __init__(self, root: str = DEFAULT_ROOT, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Args:
+            root: Directory for stored datasets and their metadata (created on the first ingest)
+            chunk_rows: Rows per CSV chunk
+        """
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+
+    # ==================== PATHS ====================
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.json")
+
+    def _data_path(self, upload_id: str, fmt: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.{fmt}")
+
+    @staticmethod
+    def _valid_id(upload_id: str) -> bool:
+        return isinstance(upload_id, str) and len(upload_id) == 32 and all(c in '0123456789abcdef' for c in upload_id)
+
+    # ==================== PARSING ====================
+
+    def _read_chunks(self, file_path: str):
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in CSV_EXTENSIONS:
+            return pd.read_csv(file_path, chunksize=self.chunk_rows, skipinitialspace=True)
+        if ext in EXCEL_EXTENSIONS:
+            with open(file_path, 'rb') as f:
+                return iter([FileParser.parse_excel(f.read())])
+        raise ValueError(f"Unsupported file type '{ext}' (supported: {', '.join(SUPPORTED_EXTENSIONS)})")
+
+    def parse(self, file_path: str) -> Tuple[List[str], Dict[str, str], Dict[str, np.ndarray]]:
+        """
+        Stream a file into typed column arrays
+
+        Returns:
+            (column names, column types, column arrays)
+        """
+        columns: List[str] = []
+        chunks: Dict[str, List[Tuple[str, np.ndarray]]] = {}
+
+        for chunk in self._read_chunks(file_path):
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            if not columns:
+                columns = list(chunk.columns)
+                chunks = {c: [] for c in columns}
+            for column in columns:
+                chunks[column].append(_infer_chunk(chunk[column]))
+
+        types: Dict[str, str] = {}
+        arrays: Dict[str, np.ndarray] = {}
+        for column in columns:
+            parts = chunks.pop(column)
+            kinds = {kind for kind, _ in parts}
+            target = max(kinds, key=TYPE_RANK.get)
+            if target == 'datetime' and kinds != {'datetime'}:
+                target = 'string'
+            elif target == 'int' and 'bool' in kinds:
+                target = 'string'
+            types[column] = target
+            arrays[column] = np.concatenate([_widen(kind, values, target) for kind, values in parts])
+        return columns, types, arrays
+
+    # ==================== STORAGE ====================
+
+    def _write(self, upload_id: str, columns: List[str], types: Dict[str, str],
+               arrays: Dict[str, np.ndarray]) -> str:
+        if PYARROW_AVAILABLE:
+            path = self._data_path(upload_id, 'parquet')
+            self._to_frame(columns, types, arrays).to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+            return 'parquet'
+
+        # Column i is stored as "c{i}"; string columns as dictionary codes
+        payload = {}
+        for i, column in enumerate(columns):
+            values = arrays[column]
+            if types[column] == 'string':
+                codes, categories = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+                payload[f"c{i}.codes"] = codes.astype(np.int32)
+                payload[f"c{i}.categories"] = np.asarray([str(c) for c in categories], dtype=str)
+            else:
+                payload[f"c{i}"] = values
+        path = self._data_path(upload_id, 'npz')
+        with open(f"{path}.tmp", 'wb') as f:
+            np.savez(f, **payload)
+        os.replace(f"{path}.tmp", path)
+        return 'npz'
+
+    @staticmethod
+    def _to_frame(columns: List[str], types: Dict[str, str], arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+        data = {}
+        for column in columns:
+            values = arrays[column]
+            data[column] = pd.Series(values, dtype=object) if types[column] == 'string' else values
+        return pd.DataFrame(data, columns=columns)
+
+    def ingest(self, file_path: str, file_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse and store an uploaded file
+
+        Args:
+            file_path: Saved upload on disk
+            file_name: Original file name for the metadata
+
+        Returns:
+            Metadata: uploadId, schema, summary, rowCount, format, ...
+        """
+        from analysis_cache import dataset_key
+
+        upload_id = file_sha256(file_path)[:32]
+        existing = self.metadata(upload_id)
+        if existing is not None:
+            return {**existing, 'deduplicated': True}
+
+        start = time.perf_counter()
+        columns, types, arrays = self.parse(file_path)
+        if not columns:
+            raise ValueError('File contains no columns')
+        parse_seconds = time.perf_counter() - start
+
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            fmt = self._write(upload_id, columns, types, arrays)
+            df = self._to_frame(columns, types, arrays)
+            meta = {
+                'uploadId': upload_id,
+                'fileName': file_name or os.path.basename(file_path),
+                'format': fmt,
+                'rowCount': int(len(df)),
+                'columnCount': len(columns),
+                'schema': [{'name': c, 'type': types[c]} for c in columns],
+                'summary': [_column_summary(c, types[c], arrays[c]) for c in columns],
+                'datasetKey': dataset_key(df),
+                'sourceBytes': os.path.getsize(file_path),
+                'storedBytes': os.path.getsize(self._data_path(upload_id, fmt)),
+                'parseSeconds': round(parse_seconds, 4),
+                'createdAt': datetime.now().isoformat(),
+            }
+            with open(f"{self._meta_path(upload_id)}.tmp", 'w') as f:
+                json.dump(meta, f)
+            os.replace(f"{self._meta_path(upload_id)}.tmp", self._meta_path(upload_id))
+
+        return {**meta, 'deduplicated': False}
+
+    # ==================== ACCESS ====================
+
+    def metadata(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Stored metadata of an upload, or None if unknown"""
+        if not self._valid_id(upload_id):
+            return None
+        try:
+            with open(self._meta_path(upload_id), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, upload_id: str) -> pd.DataFrame:
+        """
+        Load a stored upload as a DataFrame
+
+        Raises:
+            LookupError: If the upload id is unknown
+        """
+        meta = self.metadata(upload_id)
+        if meta is None:
+            raise LookupError(f"Unknown upload id: {upload_id}")
+
+        path = self._data_path(upload_id, meta['format'])
+        if meta['format'] == 'parquet':
+            return pd.read_parquet(path)
+
+        columns = [c['name'] for c in meta['schema']]
+        types = {c['name']: c['type'] for c in meta['schema']}
+        arrays = {}
+        with np.load(path, allow_pickle=False) as npz:
+            for i, column in enumerate(columns):
+                if types[column] == 'string':
+                    codes = npz[f"c{i}.codes"]
+                    categories = npz[f"c{i}.categories"].astype(object)
+                    values = np.empty(len(codes), dtype=object)
+                    valid = codes >= 0
+                    values[valid] = categories[codes[valid]]
+                    arrays[column] = values
+                else:
+                    arrays[column] = npz[f"c{i}"]
+        return self._to_frame(columns, types, arrays)
+
+    def delete(self, upload_id: str) -> bool:
+        """Remove a stored upload"""
+        meta = self.metadata(upload_id)
+        if meta is None:
+            return False
+        for path in (self._data_path(upload_id, meta['format']), self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+
+_store_instance = None
+
+
+def get_upload_store(root: Optional[str] = None) -> UploadStore:
+    """Get or create the process-wide upload store"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = UploadStore(root or os.environ.get('UPLOAD_STORE_DIR', DEFAULT_ROOT))
+    return _store_instance
+
+
+if __name__ == '__main__':
+    import argparse
+    import csv
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Benchmark the upload parser against the row-dict CSV parser')
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'samples.csv')
+    pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=args.rows, freq='h').strftime('%Y-%m-%d %H:%M'),
+        'station': rng.choice(['Pune-01', 'Nashik-04', 'Nagpur-11'], args.rows),
+        'pH': rng.normal(7.2, 0.4, args.rows).round(2),
+        'DO': rng.normal(6.5, 1.0, args.rows).round(2),
+        'BOD': rng.gamma(2.0, 1.2, args.rows).round(2),
+        'TDS': rng.integers(80, 900, args.rows),
+        'Temperature': rng.normal(26, 3, args.rows).round(1),
+    }).to_csv(path, index=False)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"📄 {args.rows:,} rows, {size_mb:.1f} MB CSV")
+
+    start = time.perf_counter()
+    data: Dict[str, list] = {}
+    with open(path, 'r') as f:
+        rows = list(csv.DictReader(f))
+        for key in rows[0].keys():
+            data[key] = []
+        for row in rows:
+            for key, value in row.items():
+                try:
+                    data[key].append(float(value))
+                except ValueError:
+                    data[key].append(value)
+    legacy_seconds = time.perf_counter() - start
+    legacy_json_mb = len(json.dumps({'data': data})) / 1e6
+    del rows, data
+
+    store = UploadStore(os.path.join(tmp, 'datasets'))
+    start = time.perf_counter()
+    meta = store.ingest(path)
+    ingest_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    df = store.load(meta['uploadId'])
+    load_seconds = time.perf_counter() - start
+
+    print(f"Row-dict parser:  {legacy_seconds:.2f}s, response body {legacy_json_mb:.1f} MB")
+    print(f"Chunked parser:   {ingest_seconds:.2f}s (parse {meta['parseSeconds']:.2f}s), "
+          f"stored {meta['storedBytes'] / 1e6:.1f} MB as {meta['format']}, "
+          f"response body {len(json.dumps(meta)) / 1e3:.1f} KB")
+    print(f"Reload by id:     {load_seconds * 1000:.0f} ms -> {df.shape}")
+    print(f"Schema: {[(c['name'], c['type']) for c in meta['schema']]}")
@@ -18,6 +18,17 @@ def convert_to_serializable(obj: Any) -> Any:
     Returns:
         JSON-serializable version of the object
     """
+    # Native values are by far the most common; skip the numpy/pandas checks
+    obj_type = type(obj)
+    if obj_type is str or obj_type is int or obj_type is bool or obj is None:
+        return obj
+    if obj_type is float:
+        return None if obj != obj else obj
+    if obj_type is dict:
+        return {key: convert_to_serializable(value) for key, value in obj.items()}
+    if obj_type is list:
+        return [convert_to_serializable(item) for item in obj]
+    
     if isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
         return int(obj)
     elif isinstance(obj, (np.floating, np.float64, np.float32, np.float16)):
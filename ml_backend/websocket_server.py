@@ -1,6 +1,14 @@
 """
 Real-time WebSocket Server - Phase 6
 Provides live water quality updates to Flutter dashboard
+
+Also pushes progress and completion of background jobs (job_queue.py):
+clients send {"type": "subscribe_job", "job_id": ...} and receive
+'job_update' messages, read from the shared SQLite job table.
+
+Alerts come from an AlertEngine (alert_engine.py): watch_alerts()
+forwards its raised/escalated/deescalated/cleared events to the clients
+subscribed to the station.
 """
 
 import asyncio
@@ -10,8 +18,11 @@ from datetime import datetime
 from typing import Dict, Set, Optional
 from aiohttp import web
 import aiohttp
+import os
 from collections import defaultdict
 
+from job_queue import JobStore, DEFAULT_DB_PATH as DEFAULT_JOB_DB_PATH, FINAL_STATUSES
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -22,11 +33,22 @@ class RealtimeWebSocketServer:
     Supports multiple clients and station subscriptions
     """
     
-    def __init__(self):
+    def __init__(self, job_db_path: Optional[str] = os.environ.get('JOB_DB_PATH', DEFAULT_JOB_DB_PATH),
+                 job_poll_interval: float = 0.5):
         self.clients: Dict[str, web.WebSocketResponse] = {}
         self.station_subscriptions: Dict[int, Set[str]] = defaultdict(set)
+        self.job_subscriptions: Dict[str, Set[str]] = defaultdict(set)
+        self.job_store = JobStore(job_db_path) if job_db_path else None
+        self.job_poll_interval = job_poll_interval
+        self._job_cursor = datetime.now().timestamp()
+        self.alert_engine = None
+        self._loop = None
         self.app = web.Application()
         self.setup_routes()
+        self.app.on_startup.append(self._capture_loop)
+        if self.job_store:
+            self.app.on_startup.append(self._start_job_watcher)
+            self.app.on_cleanup.append(self._stop_job_watcher)
         
     def setup_routes(self):
         """Configure WebSocket routes"""
@@ -160,6 +182,26 @@ class RealtimeWebSocketServer:
                     })
                     logger.info(f"Client {client_id} unsubscribed from station {station_id}")
                     
+            elif msg_type == 'subscribe_job':
+                # Subscribe to progress/completion of a background job
+                job_id = message.get('job_id')
+                if job_id:
+                    self.job_subscriptions[job_id].add(client_id)
+                    job = self.job_store.get(job_id, include_result=False) if self.job_store else None
+                    await ws.send_json({
+                        'type': 'job_subscribed',
+                        'job_id': job_id,
+                        'job': job,
+                        'timestamp': datetime.now().isoformat()
+                    })
+                    
+            elif msg_type == 'unsubscribe_job':
+                job_id = message.get('job_id')
+                if job_id in self.job_subscriptions:
+                    self.job_subscriptions[job_id].discard(client_id)
+                    if not self.job_subscriptions[job_id]:
+                        del self.job_subscriptions[job_id]
+                    
             elif msg_type == 'ping':
                 # Respond to ping
                 await ws.send_json({
@@ -196,6 +238,11 @@ class RealtimeWebSocketServer:
                 if not self.station_subscriptions[station_id]:
                     del self.station_subscriptions[station_id]
         
+        for job_id in list(self.job_subscriptions.keys()):
+            self.job_subscriptions[job_id].discard(client_id)
+            if not self.job_subscriptions[job_id]:
+                del self.job_subscriptions[job_id]
+        
         # Remove client connection
         if client_id in self.clients:
             del self.clients[client_id]
@@ -235,22 +282,27 @@ class RealtimeWebSocketServer:
         for client_id in disconnected_clients:
             await self.cleanup_client(client_id)
     
-    async def broadcast_alert(self, station_id: int, alert_data: dict):
+    async def broadcast_alert(self, station_id: int, alert_data, event: Optional[str] = None):
         """
         Broadcast critical alert to subscribed clients
         
         Args:
             station_id: Station ID
-            alert_data: Alert information
+            alert_data: Alert information (dict or alert_engine.Alert)
+            event: Alert engine event kind (raised, escalated, deescalated, cleared)
         """
         if station_id not in self.station_subscriptions:
             return
         
+        if hasattr(alert_data, 'to_dict'):
+            alert_data = alert_data.to_dict()
+        
         message = {
             'type': 'alert',
             'station_id': station_id,
             'timestamp': datetime.now().isoformat(),
             'alert': alert_data,
+            'event': event,
             'priority': alert_data.get('severity', 'medium')
         }
         
@@ -264,6 +316,40 @@ class RealtimeWebSocketServer:
                 except Exception as e:
                     logger.error(f"Error sending alert to {client_id}: {e}")
     
+    def watch_alerts(self, alert_engine):
+        """
+        Forward the alert engine's events to subscribed clients
+        
+        Events may be produced on any thread (e.g. the live station
+        service's update thread); they are scheduled on the server loop.
+        """
+        if self.alert_engine is not None:
+            self.alert_engine.remove_listener(self._on_alert_events)
+        self.alert_engine = alert_engine
+        alert_engine.add_listener(self._on_alert_events)
+    
+    async def _capture_loop(self, app):
+        self._loop = asyncio.get_running_loop()
+    
+    def _on_alert_events(self, events):
+        """Alert engine listener"""
+        events = [e for e in events if e.alert.station_id in self.station_subscriptions]
+        if not events:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop or running
+        if loop is None:
+            return
+        for event in events:
+            coro = self.broadcast_alert(event.alert.station_id, event.alert, event.kind)
+            if loop is running:
+                loop.create_task(coro)
+            else:
+                asyncio.run_coroutine_threadsafe(coro, loop)
+    
     async def broadcast_prediction(self, station_id: int, prediction_data: dict):
         """
         Broadcast ML prediction update
@@ -290,6 +376,54 @@ class RealtimeWebSocketServer:
                 except Exception as e:
                     logger.error(f"Error sending prediction to {client_id}: {e}")
     
+    async def broadcast_job_update(self, job: dict):
+        """
+        Push a job's progress or outcome to the clients subscribed to it
+        
+        Args:
+            job: Job dictionary from the job table (without result)
+        """
+        job_id = job['id']
+        if job_id not in self.job_subscriptions:
+            return
+        
+        message = {
+            'type': 'job_update',
+            'job_id': job_id,
+            'timestamp': datetime.now().isoformat(),
+            'job': job,
+            'result_url': f"/api/jobs/{job_id}" if job['status'] == 'completed' else None
+        }
+        
+        for client_id in list(self.job_subscriptions[job_id]):
+            await self.send_to_client(client_id, message)
+        
+        # Nothing more will happen to a finished job
+        if job['status'] in FINAL_STATUSES:
+            self.job_subscriptions.pop(job_id, None)
+    
+    async def _start_job_watcher(self, app):
+        self._job_watcher = asyncio.create_task(self.watch_jobs())
+    
+    async def _stop_job_watcher(self, app):
+        self._job_watcher.cancel()
+    
+    async def watch_jobs(self):
+        """Poll the job table for changes and push them to subscribers"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if self.job_subscriptions:
+                    updates = await loop.run_in_executor(None, self.job_store.updates_since, self._job_cursor)
+                    for job in updates:
+                        self._job_cursor = max(self._job_cursor, job['updated_at'])
+                        await self.broadcast_job_update(job)
+                else:
+                    self._job_cursor = datetime.now().timestamp()
+            except Exception as e:
+                logger.error(f"Error watching jobs: {e}")
+            await asyncio.sleep(self.job_poll_interval)
+    
     async def send_to_client(self, client_id: str, message: dict):
         """Send message to specific client"""
         if client_id in self.clients:
@@ -314,6 +448,7 @@ if __name__ == '__main__':
     print("  - ws://localhost:8080/ws (general connection)")
     print("  - ws://localhost:8080/ws/station/{id} (station-specific)")
     print("  - http://localhost:8080/health (health check)")
+    print("  - subscribe_job / unsubscribe_job messages (background job updates)")
     print("  - http://localhost:8080/stats (statistics)")
     print("\nPress Ctrl+C to stop\n")
     
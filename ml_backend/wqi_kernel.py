@@ -0,0 +1,448 @@
+"""
+WQI Kernel - Phase 5
+Shared, vectorized Water Quality Index and classification
+
+Features:
+- CPCB WQI (NSF-based sub-index curves for DO % saturation, fecal coliform,
+  pH and BOD with the CPCB modified weights), as published in the
+  Maharashtra Water Quality Status Report 2023-24
+- The simplified indices used by the station simulators and the real-time
+  orchestrator, in one place instead of one copy per service:
+  banded (10-parameter step scores), screening (4-parameter quick check),
+  ratio (daily historical records) and linear (legacy station service)
+- Array in / array out: every kernel takes scalars, lists or NumPy arrays
+  and scores all samples at once; missing values are NaN
+- Band tables for CPCB/MPCB classification, designated-use class and the
+  status labels of each service, looked up with one searchsorted
+- Scalar convenience wrappers (score_reading) and a record-list path
+  (score_records) for dictionaries with the services' own field names
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# ==================== CPCB WQI ====================
+
+# CPCB modified weights
+CPCB_WEIGHTS = {
+    'dissolved_oxygen': 0.31,
+    'fecal_coliform': 0.28,
+    'ph': 0.22,
+    'bod': 0.19,
+}
+
+# DO saturation constant (mg/l at 20 °C)
+DO_SATURATION_CONSTANT = 6.5
+
+
+def _array(value) -> np.ndarray:
+    return np.asarray(value, dtype=float)
+
+
+def _round(values: np.ndarray, decimals: int) -> np.ndarray:
+    """np.round, with Python's round() for the values near a .5 tie where the two can differ"""
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded = np.array(rounded, dtype=float)
+        flat = rounded.reshape(-1)
+        for i in np.flatnonzero(near_tie):
+            flat[i] = round(float(values.reshape(-1)[i]), decimals)
+    return rounded
+
+
+def do_sub_index(dissolved_oxygen, temperature=None) -> np.ndarray:
+    """DO sub-index from % saturation; temperature adjusts the saturation constant"""
+    do_value = _array(dissolved_oxygen)
+    saturation_constant = DO_SATURATION_CONSTANT
+    if temperature is not None:
+        saturation_constant = np.clip(
+            DO_SATURATION_CONSTANT * (1 - ((_array(temperature) - 20) * 0.015)), 4.0, 9.0
+        )
+
+    pct = (do_value / saturation_constant) * 100
+    sub_index = np.select(
+        [(pct >= 0) & (pct <= 40), (pct > 40) & (pct <= 100), (pct > 100) & (pct <= 140), pct > 140],
+        [0.18 + 0.66 * pct, -13.55 + 1.17 * pct, 163.34 - 0.62 * pct, 50.0],
+        default=2.0
+    )
+    return np.clip(sub_index, 0, 100)
+
+
+def fc_sub_index(fecal_coliform) -> np.ndarray:
+    """Fecal coliform sub-index (log-linear in MPN/100ml)"""
+    fc_value = _array(fecal_coliform)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_fc = np.log10(fc_value)
+    sub_index = np.select(
+        [fc_value < 1, fc_value <= 1000, fc_value <= 100000],
+        [97.0, 97.2 - 26.6 * log_fc, 42.33 - 7.75 * log_fc],
+        default=2.0
+    )
+    return np.clip(sub_index, 0, 100)
+
+
+def ph_sub_index(ph) -> np.ndarray:
+    """pH sub-index"""
+    ph_value = _array(ph)
+    sub_index = np.select(
+        [(ph_value >= 2) & (ph_value < 5), (ph_value >= 5) & (ph_value < 7.3),
+         (ph_value >= 7.3) & (ph_value <= 10), (ph_value > 10) & (ph_value <= 12)],
+        [16.1 + 7.35 * ph_value, -142.67 + 33.5 * ph_value,
+         316.96 - 29.85 * ph_value, 96.17 - 8.0 * ph_value],
+        default=0.0
+    )
+    return np.clip(sub_index, 0, 100)
+
+
+def bod_sub_index(bod) -> np.ndarray:
+    """BOD sub-index"""
+    bod_value = _array(bod)
+    sub_index = np.select(
+        [(bod_value >= 0) & (bod_value <= 10), (bod_value > 10) & (bod_value <= 30)],
+        [96.67 - 7.0 * bod_value, 38.9 - 1.23 * bod_value],
+        default=2.0
+    )
+    return np.clip(sub_index, 0, 100)
+
+
+def cpcb_wqi(ph, bod, dissolved_oxygen, fecal_coliform, temperature=None) -> np.ndarray:
+    """
+    CPCB WQI (0-100)
+
+    Args:
+        ph: pH
+        bod: Biochemical Oxygen Demand (mg/l)
+        dissolved_oxygen: Dissolved Oxygen (mg/l)
+        fecal_coliform: Fecal Coliform (MPN/100ml)
+        temperature: Optional temperature (°C) for the DO saturation adjustment
+
+    Returns:
+        WQI per sample
+    """
+    wqi = (
+        do_sub_index(dissolved_oxygen, temperature) * CPCB_WEIGHTS['dissolved_oxygen'] +
+        fc_sub_index(fecal_coliform) * CPCB_WEIGHTS['fecal_coliform'] +
+        ph_sub_index(ph) * CPCB_WEIGHTS['ph'] +
+        bod_sub_index(bod) * CPCB_WEIGHTS['bod']
+    )
+    return np.clip(wqi, 0, 100)
+
+
+# ==================== SIMPLIFIED INDICES ====================
+
+def step_score(values, bounds: Sequence[float], scores: Sequence[float], missing: Optional[float] = None) -> np.ndarray:
+    """
+    Score values against ascending upper bounds
+
+    A value scores scores[i] for the first bound with value <= bounds[i],
+    and scores[-1] above the last bound.
+
+    Args:
+        values: Samples
+        bounds: Ascending upper bounds (inclusive)
+        scores: len(bounds) + 1 scores
+        missing: Score of NaN samples (defaults to the score above the last bound)
+    """
+    values = _array(values)
+    score = np.asarray(scores, dtype=float)[np.searchsorted(np.asarray(bounds, dtype=float), values, side='left')]
+    if missing is not None:
+        score = np.where(np.isnan(values), missing, score)
+    return score
+
+
+# 10-parameter step-scored index of the live station network
+BANDED_WEIGHTS = {
+    'ph': 0.10,
+    'dissolved_oxygen': 0.15,
+    'bod': 0.12,
+    'turbidity': 0.10,
+    'tds': 0.10,
+    'nitrates': 0.08,
+    'fecal_coliform': 0.15,
+    'total_coliform': 0.10,
+    'fluoride': 0.05,
+    'iron': 0.05,
+}
+
+
+def banded_wqi(ph, dissolved_oxygen, bod, turbidity, tds, nitrates, fecal_coliform, total_coliform,
+               fluoride, iron) -> np.ndarray:
+    """
+    Step-scored weighted index of the live station network (rounded to 2 decimals)
+
+    DO and BOD are not measured at groundwater stations; missing (NaN) or
+    zero values score 80.
+    """
+    ph = _array(ph)
+    dissolved_oxygen = _array(dissolved_oxygen)
+    bod = _array(bod)
+    fluoride = _array(fluoride)
+
+    sub_indices = {
+        'ph': np.where((ph >= 6.5) & (ph <= 8.5), 100.0, np.where((ph >= 6.0) & (ph <= 9.0), 80.0, 50.0)),
+        'dissolved_oxygen': np.where(
+            np.isnan(dissolved_oxygen) | (dissolved_oxygen == 0), 80.0,
+            np.where(dissolved_oxygen >= 6.0, 100.0, np.where(dissolved_oxygen >= 4.0, 70.0, 40.0))),
+        'bod': np.where(bod == 0, 80.0, step_score(bod, (3.0, 6.0), (100, 70, 40), missing=80)),
+        'turbidity': step_score(turbidity, (5, 10), (100, 80, 50)),
+        'tds': step_score(tds, (500, 1000), (100, 75, 50)),
+        'nitrates': step_score(nitrates, (10, 45), (100, 70, 40)),
+        'fecal_coliform': step_score(fecal_coliform, (10, 100), (100, 70, 30)),
+        'total_coliform': step_score(total_coliform, (50, 500), (100, 70, 40)),
+        'fluoride': np.where((fluoride >= 0.6) & (fluoride <= 1.5), 100.0, step_score(fluoride, (2.0,), (70, 40))),
+        'iron': step_score(iron, (0.3, 1.0), (100, 75, 50)),
+    }
+
+    # Accumulated in weight order so results match the scalar sum exactly
+    wqi = 0
+    for parameter, weight in BANDED_WEIGHTS.items():
+        wqi = wqi + sub_indices[parameter] * weight
+    return _round(wqi, 2)
+
+
+# Defaults of the screening index for parameters a feed does not report
+SCREENING_DEFAULTS = {'ph': 7.0, 'bod': 2.0, 'dissolved_oxygen': 6.0, 'fecal_coliform': 500}
+
+
+def screening_wqi(ph, bod, dissolved_oxygen, fecal_coliform) -> np.ndarray:
+    """
+    Two-level quick check with the CPCB weights (70-90); missing values
+    take SCREENING_DEFAULTS
+    """
+    def filled(value, parameter):
+        value = _array(value)
+        return np.where(np.isnan(value), SCREENING_DEFAULTS[parameter], value)
+
+    ph, bod = filled(ph, 'ph'), filled(bod, 'bod')
+    do_val, fc = filled(dissolved_oxygen, 'dissolved_oxygen'), filled(fecal_coliform, 'fecal_coliform')
+
+    ph_sub = np.where((ph >= 7.0) & (ph <= 8.5), 90.0, 70.0)
+    bod_sub = np.where(bod <= 3, 90.0, 70.0)
+    do_sub = np.where(do_val >= 6, 90.0, 70.0)
+    fc_sub = np.where(fc <= 500, 90.0, 70.0)
+
+    wqi = (CPCB_WEIGHTS['ph'] * ph_sub + CPCB_WEIGHTS['bod'] * bod_sub +
+           CPCB_WEIGHTS['dissolved_oxygen'] * do_sub + CPCB_WEIGHTS['fecal_coliform'] * fc_sub)
+    return np.clip(wqi, 0, 100)
+
+
+def ratio_wqi(dissolved_oxygen, ph, turbidity, fecal_coliform) -> np.ndarray:
+    """Mean of four 0-100 ratio scores, used for daily historical records (rounded to 1 decimal)"""
+    do_score = np.minimum(_array(dissolved_oxygen) / 8.0, 1.0) * 100
+    ph_score = (1 - np.abs(_array(ph) - 7.0) / 7.0) * 100
+    turb_score = np.maximum(0, (1 - _array(turbidity) / 50.0)) * 100
+    coliform_score = np.maximum(0, (1 - _array(fecal_coliform) / 1000.0)) * 100
+
+    wqi = (do_score + ph_score + turb_score + coliform_score) / 4
+    return _round(wqi, 1)
+
+
+LINEAR_WEIGHTS = {
+    'ph': 0.20,
+    'turbidity': 0.15,
+    'dissolved_oxygen': 0.20,
+    'tds': 0.15,
+    'bod': 0.10,
+    'chlorides': 0.10,
+    'nitrates': 0.10,
+}
+
+
+def linear_wqi(ph, turbidity, dissolved_oxygen, tds, bod, chlorides, nitrates) -> np.ndarray:
+    """7-parameter index of linear sub-indices (ideal pH 7.0, limits per parameter)"""
+    sub_indices = {
+        'ph': np.clip(100 - (np.abs(_array(ph) - 7.0) / 1.5 * 100), 0, 100),
+        'turbidity': np.maximum(0, 100 - (_array(turbidity) / 50.0 * 100)),
+        'dissolved_oxygen': np.minimum(100, (_array(dissolved_oxygen) / 12.0) * 100),
+        'tds': np.maximum(0, 100 - (_array(tds) / 1500.0 * 100)),
+        'bod': np.maximum(0, 100 - (_array(bod) / 20.0 * 100)),
+        'chlorides': np.maximum(0, 100 - (_array(chlorides) / 600.0 * 100)),
+        'nitrates': np.maximum(0, 100 - (_array(nitrates) / 50.0 * 100)),
+    }
+
+    wqi = 0
+    for parameter, weight in LINEAR_WEIGHTS.items():
+        wqi = wqi + sub_indices[parameter] * weight
+    return np.clip(wqi, 0, 100)
+
+
+# ==================== CLASSIFICATION ====================
+
+# Bands are (descending lower WQI bounds, labels); labels has one more
+# entry than bounds, for WQI below the last bound (and NaN)
+
+# CPCB/MPCB classification: (classification, CPCB class, MPCB class, status)
+CPCB_BANDS = (
+    (63, 50, 38, 25),
+    (
+        ('Good to Excellent', 'A', 'A-I', 'Non Polluted'),
+        ('Medium to Good', 'B', 'Not Prescribed', 'Non Polluted'),
+        ('Bad', 'C', 'A-II', 'Polluted'),
+        ('Bad to Very Bad', 'D', 'A-III', 'Heavily Polluted'),
+        ('Bad to Very Bad', 'E', 'A-IV', 'Heavily Polluted'),
+    ),
+)
+
+# CPCB designated-best-use class of the simplified indices
+USE_CLASS_BANDS = ((90, 75, 60, 45, 30), ('A', 'B', 'C', 'D', 'E', 'Unfit'))
+
+# Status labels of each service
+BANDED_STATUS_BANDS = ((80, 65, 50, 35), ('Excellent', 'Good', 'Moderate', 'Poor', 'Very Poor'))
+RATIO_STATUS_BANDS = ((80, 60, 40, 20), ('good', 'moderate', 'poor', 'very_poor', 'critical'))
+LINEAR_STATUS_BANDS = ((90, 70, 50, 25), ('Excellent', 'Good', 'Fair', 'Poor', 'Very Poor'))
+
+
+def band_index(wqi, bounds: Sequence[float]) -> np.ndarray:
+    """Index of the first band whose lower bound wqi reaches (len(bounds) below all)"""
+    return np.searchsorted(-np.asarray(bounds, dtype=float), -_array(wqi), side='left')
+
+
+def classify(wqi, bands) -> np.ndarray:
+    """
+    Label of every WQI value
+
+    Args:
+        wqi: WQI values
+        bands: (bounds, labels) table, e.g. USE_CLASS_BANDS
+
+    Returns:
+        Object array of labels
+    """
+    bounds, labels = bands
+    table = np.empty(len(labels), dtype=object)
+    table[:] = list(labels)
+    return table[band_index(wqi, bounds)]
+
+
+def cpcb_classification(wqi) -> Dict[str, np.ndarray]:
+    """
+    CPCB/MPCB classification of every WQI value
+
+    Returns:
+        Dict of arrays: classification, cpcb_class, mpcb_class, status
+    """
+    bounds, labels = CPCB_BANDS
+    index = band_index(wqi, bounds)
+    return {
+        name: np.array(column, dtype=object)[index]
+        for name, column in zip(['classification', 'cpcb_class', 'mpcb_class', 'status'], zip(*labels))
+    }
+
+
+# ==================== RECORDS ====================
+
+# Scheme -> (kernel, kernel argument -> record field)
+SCHEMES = {
+    'cpcb': (cpcb_wqi, {
+        'ph': 'ph', 'bod': 'bod', 'dissolved_oxygen': 'dissolved_oxygen',
+        'fecal_coliform': 'fecal_coliform', 'temperature': 'temperature',
+    }),
+    'banded': (banded_wqi, {
+        'ph': 'ph', 'dissolved_oxygen': 'dissolvedOxygen', 'bod': 'bod', 'turbidity': 'turbidity',
+        'tds': 'tds', 'nitrates': 'nitrates', 'fecal_coliform': 'fecalColiform',
+        'total_coliform': 'totalColiform', 'fluoride': 'fluoride', 'iron': 'iron',
+    }),
+    'screening': (screening_wqi, {
+        'ph': 'ph', 'bod': 'bod', 'dissolved_oxygen': 'dissolved_oxygen', 'fecal_coliform': 'fecal_coliform',
+    }),
+    'ratio': (ratio_wqi, {
+        'dissolved_oxygen': 'dissolvedOxygen', 'ph': 'ph', 'turbidity': 'turbidity',
+        'fecal_coliform': 'fecalColiform',
+    }),
+    'linear': (linear_wqi, {
+        'ph': 'pH', 'turbidity': 'turbidity', 'dissolved_oxygen': 'dissolvedOxygen', 'tds': 'tds',
+        'bod': 'bod', 'chlorides': 'chlorides', 'nitrates': 'nitrates',
+    }),
+}
+
+
+def _column(records: List[Dict[str, Any]], field: str) -> np.ndarray:
+    """One field of every record as floats (None or missing -> NaN)"""
+    try:
+        return np.array([record.get(field) for record in records], dtype=float)
+    except (TypeError, ValueError):
+        return np.array([_to_float(record.get(field)) for record in records], dtype=float)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def score_records(records: List[Dict[str, Any]], scheme: str = 'cpcb') -> np.ndarray:
+    """
+    WQI of a list of records in one vectorized call
+
+    Args:
+        records: Dictionaries with the scheme's field names (see SCHEMES)
+        scheme: 'cpcb', 'banded', 'screening', 'ratio' or 'linear'
+
+    Returns:
+        WQI per record
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown WQI scheme '{scheme}'. Use one of: {', '.join(SCHEMES)}")
+    kernel, fields = SCHEMES[scheme]
+    columns = {argument: _column(records, field) for argument, field in fields.items()}
+    if scheme == 'cpcb' and np.isnan(columns['temperature']).all():
+        columns['temperature'] = None
+    return kernel(**columns)
+
+
+def score_reading(reading: Dict[str, Any], scheme: str = 'cpcb') -> float:
+    """WQI of a single reading (scalar convenience wrapper of score_records)"""
+    return float(score_records([reading], scheme)[0])
+
+
+if __name__ == '__main__':
+    import time
+
+    print("=== WQI Kernel - Phase 5 ===\n")
+
+    # Krishna River at Rajapur Weir, Kolhapur (April), Maharashtra report example
+    example = float(cpcb_wqi(ph=7.6, bod=2.2, dissolved_oxygen=5.5, fecal_coliform=6))
+    print(f"🧪 CPCB example: {example:.2f} (report: 83.16)\n")
+
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    samples = {
+        'ph': rng.uniform(5.5, 9.5, n), 'bod': rng.uniform(0.5, 20, n), 'dissolved_oxygen': rng.uniform(1, 10, n),
+        'fecal_coliform': rng.lognormal(5, 2, n), 'temperature': rng.uniform(15, 35, n),
+        'turbidity': rng.uniform(0.5, 60, n), 'tds': rng.uniform(50, 1500, n), 'nitrates': rng.uniform(0, 60, n),
+        'total_coliform': rng.lognormal(6, 2, n), 'fluoride': rng.uniform(0, 3, n), 'iron': rng.uniform(0, 2, n),
+        'chlorides': rng.uniform(10, 600, n),
+    }
+
+    def timed(label, kernel, **kwargs):
+        start = time.perf_counter()
+        wqi = kernel(**kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34} {n / elapsed / 1e6:6.1f} M rows/s")
+        return wqi
+
+    wqi = timed('cpcb_wqi', cpcb_wqi, **{k: samples[k] for k in SCHEMES['cpcb'][1]})
+    timed('banded_wqi', banded_wqi, **{k: samples[k] for k in SCHEMES['banded'][1]})
+    timed('screening_wqi', screening_wqi, **{k: samples[k] for k in SCHEMES['screening'][1]})
+    timed('ratio_wqi', ratio_wqi, **{k: samples[k] for k in SCHEMES['ratio'][1]})
+    timed('linear_wqi', linear_wqi, **{k: samples[k] for k in SCHEMES['linear'][1]})
+    timed('cpcb_classification', cpcb_classification, wqi=wqi)
+    timed('classify (use class)', classify, wqi=wqi, bands=USE_CLASS_BANDS)
+
+    # Scalar path, as the services used to score one reading at a time
+    records = [{'ph': 7.2, 'bod': 2.5, 'dissolved_oxygen': 6.1, 'fecal_coliform': 120.0}] * 10_000
+    start = time.perf_counter()
+    for record in records:
+        score_reading(record)
+    scalar = len(records) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    score_records(records)
+    batch = len(records) / (time.perf_counter() - start)
+    print(f"\nscore_reading (one at a time)      {scalar / 1e3:8.1f} k rows/s")
+    print(f"score_records (10,000 dicts)       {batch / 1e3:8.1f} k rows/s")